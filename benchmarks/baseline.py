@@ -0,0 +1,70 @@
+"""
+Benchmark Baselines - Agent Makalah Backend
+Shared command line for the pytest-benchmark suites: record a baseline or
+compare against it
+
+Results are stored under benchmarks/.baselines/<machine>/ (not committed:
+baselines are machine-specific, so record one on the machine that runs the
+comparison, e.g. the deploy runner). Comparing fails when a benchmark's median
+is more than --threshold percent slower than the latest saved run, and exits
+with NO_BASELINE when this machine has no saved run, so a missing baseline
+never passes as "no regression".
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".baselines")
+
+# Exit status of a comparison without a saved baseline
+NO_BASELINE = 3
+
+
+def has_baseline() -> bool:
+    """True if a run is saved for this machine"""
+    return bool(glob.glob(os.path.join(BASELINE_DIR, get_machine_id(), "*.json")))
+
+
+def run_benchmarks(path: str, description: str) -> int:
+    """
+    Run a benchmark module from the command line
+
+    Args:
+        path: Benchmark module file
+        description: Argument parser description
+
+    Returns:
+        int: pytest exit status, or NO_BASELINE
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--save-baseline", action="store_true", help="Save results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed median regression in percent")
+    args, pytest_args = parser.parse_known_args()
+
+    options = [
+        os.path.abspath(path),
+        "-q",
+        "-p", "no:cacheprovider",
+        "--benchmark-only",
+        f"--benchmark-storage=file://{BASELINE_DIR}",
+        "--benchmark-columns=min,median,mean,stddev,ops,rounds",
+        "--benchmark-sort=name"
+    ]
+    if args.save_baseline:
+        options.append("--benchmark-save=baseline")
+    else:
+        if not has_baseline():
+            print(
+                f"No baseline for {get_machine_id()} in {BASELINE_DIR}; "
+                f"record one with: python {os.path.relpath(path)} --save-baseline",
+                file=sys.stderr
+            )
+            return NO_BASELINE
+        options += ["--benchmark-compare", f"--benchmark-compare-fail=median:{args.threshold:g}%"]
+
+    return pytest.main(options + pytest_args)
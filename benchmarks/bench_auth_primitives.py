@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Auth Primitives Benchmark - Agent Makalah Backend
+pytest-benchmark suite for the per-request auth cost: token creation and
+validation (HS256 and keyring ES256), JTI extraction, bcrypt, rate limit
+accounting, password strength checks and the session hash round trip
+
+Usage:
+    python benchmarks/bench_auth_primitives.py --save-baseline   # record a baseline
+    python benchmarks/bench_auth_primitives.py [--threshold 20]  # compare, fail on regression
+
+    # or directly with pytest-benchmark options
+    pytest benchmarks/bench_auth_primitives.py --benchmark-only
+
+Baselines are machine-specific and not committed (see benchmarks/baseline.py):
+comparing without one for this machine exits non-zero.
+
+No Redis or Supabase is needed: the blacklist lookup is disabled, so token
+validation measures signature checking and decoding only.
+"""
+
+import os
+import sys
+import uuid
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from benchmarks.baseline import run_benchmarks
+from src.auth import jwt_utils
+from src.auth.jwt_utils import create_token_pair, validate_and_decode_token
+from src.auth.keyring import KeyRing, parse_key, generate_private_key
+from src.auth.password_utils import hash_password, verify_password, is_password_strong
+from src.auth.session_codec import epoch_now, session_from_hash, session_hash_fields, token_ref
+from src.auth.token_blacklist import TokenBlacklist
+from src.middleware.rate_limit_store import MemoryRateLimitStore
+
+USER_DATA = {"sub": str(uuid.uuid4()), "email": "bench@agent-makalah.com", "is_superuser": False}
+PASSWORD = "Bench#Password2025"
+
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended")
+
+
+@pytest.fixture(scope="module")
+def token_pair():
+    return create_token_pair(USER_DATA)
+
+
+@pytest.fixture(scope="module")
+def offline_blacklist():
+    blacklist = TokenBlacklist()
+    blacklist.redis = None
+    return blacklist
+
+
+@pytest.fixture(scope="module")
+def password_hash():
+    return hash_password(PASSWORD)
+
+
+def test_create_token_pair(benchmark):
+    access_token, refresh_token = benchmark(create_token_pair, USER_DATA)
+    assert access_token and refresh_token
+
+
+def test_validate_and_decode_token(benchmark, token_pair):
+    payload = benchmark(validate_and_decode_token, token_pair[0], False)
+    assert payload["sub"] == USER_DATA["sub"]
+
+
+def test_validate_and_decode_token_es256(benchmark, monkeypatch):
+    # Same path with the keyring active: kid lookup + ES256 signature check
+    ring = KeyRing(keyring_file="")
+    ring.active = parse_key({"kid": "bench", "alg": "ES256", "private_key": generate_private_key("ES256").decode()})
+    ring.keys = {"bench": ring.active}
+    monkeypatch.setattr(jwt_utils, "keyring", ring)
+
+    token = jwt_utils.create_access_token(USER_DATA)
+    payload = benchmark(validate_and_decode_token, token, False)
+    assert payload["sub"] == USER_DATA["sub"]
+
+
+def test_extract_jti(benchmark, token_pair, offline_blacklist):
+    assert benchmark(offline_blacklist._extract_jti, token_pair[0])
+
+
+def test_hash_password(benchmark):
+    # bcrypt is slow by design: a few single-call rounds are enough
+    hashed = benchmark.pedantic(hash_password, args=(PASSWORD,), rounds=5, iterations=1, warmup_rounds=1)
+    assert hashed.startswith("$2")
+
+
+def test_verify_password(benchmark, password_hash):
+    assert benchmark.pedantic(verify_password, args=(PASSWORD, password_hash), rounds=5, iterations=1, warmup_rounds=1)
+
+
+def test_rate_limit_hit(benchmark):
+    store = MemoryRateLimitStore()
+    for _ in range(50):
+        run_sync(store.hit("ip:203.0.113.7", "api_general", 100, 60))
+    history = store.request_history["ip:203.0.113.7"]["api_general"]
+
+    def hit():
+        # Steady state: half-used window; drop the new entry so the size stays fixed
+        result = run_sync(store.hit("ip:203.0.113.7", "api_general", 100, 60))
+        history.pop()
+        return result
+
+    allowed, current = benchmark(hit)
+    assert allowed and current == 51
+
+
+def test_is_password_strong(benchmark):
+    is_valid, _ = benchmark(is_password_strong, PASSWORD)
+    assert is_valid
+
+
+def test_session_hash_round_trip(benchmark, token_pair):
+    # Same shape as EnhancedSessionManager.create_authenticated_session, through the Redis hash codec
+    now = epoch_now()
+    access_jti, access_exp = token_ref(token_pair[0])
+    refresh_jti, refresh_exp = token_ref(token_pair[1])
+    session_id = str(uuid.uuid4())
+    session_data = {
+        "session_id": session_id,
+        "user_id": USER_DATA["sub"],
+        "created_at": now,
+        "last_accessed": now,
+        "access_jti": access_jti,
+        "access_exp": access_exp,
+        "refresh_jti": refresh_jti,
+        "refresh_exp": refresh_exp,
+        "user_data": {"email": USER_DATA["email"], "is_superuser": False},
+        "device_info": {"login_time": now, "user_agent": "Agent-Makalah-Client", "ip_address": "unknown"},
+        "is_active": True
+    }
+
+    def round_trip():
+        return session_from_hash(session_hash_fields(session_data, versioned=True), session_id)
+
+    assert benchmark(round_trip) == session_data
+
+
+def main():
+    sys.exit(run_benchmarks(__file__, "Auth primitives benchmark with baseline comparison"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark - Agent Makalah Backend
+Measures cold import time of src.main with `python -X importtime` and fails when
+it exceeds a budget or when heavy clients are imported eagerly again
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5] [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that must only be imported on first use, never by `import src.main`
+DEFERRED_MODULES = ("supabase", "upstash_redis", "passlib.context", "jose.jwt", "httpx")
+
+TARGET = "src.main"
+
+
+def run_importtime(module: str = TARGET) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Tuple of {module: (self_us, cumulative_us)} and the deferred modules that were loaded
+    """
+    check = f"import sys; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; {check}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark for src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Median cumulative import budget")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    args = parser.parse_args()
+
+    totals = []
+    timings: Dict[str, Tuple[int, int]] = {}
+    loaded: List[str] = []
+    for _ in range(args.runs):
+        timings, loaded = run_importtime()
+        totals.append(timings[TARGET][1] / 1000)
+
+    median_ms = statistics.median(totals)
+
+    print(f"📦 Import time of {TARGET} ({args.runs} runs)")
+    print(f"   median {median_ms:.1f} ms, min {min(totals):.1f} ms, budget {args.budget_ms:.0f} ms\n")
+    print(f"   {'cumulative ms':>13} {'self ms':>9}  module (last run)")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"   {cumulative_us / 1000:>13.1f} {self_us / 1000:>9.1f}  {name}")
+
+    failed = False
+    if loaded:
+        print(f"\n❌ Deferred modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\n❌ Import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Within budget, heavy clients deferred")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Session Store Benchmark - Agent Makalah Backend
+pytest-benchmark suite for the session store backends (memory, Redis,
+Postgres): create, get, touch (last access update), user_data update and
+the per-user session listing
+
+Usage:
+    python benchmarks/bench_session_stores.py --save-baseline   # record a baseline
+    python benchmarks/bench_session_stores.py [--threshold 20]  # compare, fail on regression
+
+    # or directly with pytest-benchmark options
+    pytest benchmarks/bench_session_stores.py --benchmark-only -k redis
+
+Baselines are machine-specific and not committed (see benchmarks/baseline.py):
+comparing without one for this machine exits non-zero.
+
+The Redis and Postgres backends talk HTTP to the in-memory fakes of the
+load test (benchmarks/loadtest/fakes.py) on loopback, so their numbers are
+the client and round trip cost per operation, without network latency or
+server work. Each session's stored size is reported in extra_info.
+"""
+
+import os
+import sys
+import uuid
+
+import orjson
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from benchmarks.baseline import run_benchmarks
+from benchmarks.loadtest.fakes import BackgroundServer, FakePostgREST, FakeUpstash
+from benchmarks.loadtest.harness import FAKE_SUPABASE_KEY, FAKE_UPSTASH_TOKEN
+from src.auth.session_codec import epoch_now
+from src.auth.session_store import MemorySessionStore, PostgresSessionStore, RedisSessionStore
+
+TTL = 3600
+BACKENDS = ("memory", "redis", "postgres")
+
+
+def make_session(user_id=None):
+    now = epoch_now()
+    return {
+        "session_id": str(uuid.uuid4()),
+        "user_id": user_id or str(uuid.uuid4()),
+        "created_at": now,
+        "last_accessed": now,
+        "access_jti": uuid.uuid4().hex,
+        "access_exp": now + 900,
+        "refresh_jti": uuid.uuid4().hex,
+        "refresh_exp": now + 604800,
+        "user_data": {"email": "bench@agent-makalah.com", "is_superuser": False},
+        "device_info": {"user_agent": "Mozilla/5.0", "ip": "203.0.113.7"},
+        "is_active": True
+    }
+
+
+@pytest.fixture(scope="module")
+def upstash():
+    fake = FakeUpstash(token=FAKE_UPSTASH_TOKEN)
+    server = BackgroundServer(fake.app).start()
+    yield fake, server
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def postgrest():
+    fake = FakePostgREST({"sessions": []})
+    server = BackgroundServer(fake.app).start()
+    yield fake, server
+    server.stop()
+
+
+def stored_size(backend, fake, session_id):
+    """Bytes one session occupies in the backend's payload"""
+    if backend == "memory":
+        return len(orjson.dumps(fake.sessions.get(session_id)))
+    if backend == "redis":
+        fields = fake.data[f"bench_session:{session_id}"]
+        return sum(len(field) + len(value) for field, value in fields.items())
+    row = next(row for row in fake.tables["sessions"] if row["session_id"] == session_id)
+    return len(orjson.dumps(row))
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request):
+    """(backend, store, fake holding its data)"""
+    if request.param == "memory":
+        memory = MemorySessionStore()
+        return request.param, memory, memory
+
+    if request.param == "redis":
+        from upstash_redis import Redis
+        fake, server = request.getfixturevalue("upstash")
+        redis = RedisSessionStore("bench_session", "bench_user_sessions")
+        redis.redis = Redis(url=server.url, token=FAKE_UPSTASH_TOKEN)
+        return request.param, redis, fake
+
+    from supabase import create_client
+    fake, server = request.getfixturevalue("postgrest")
+    return request.param, PostgresSessionStore(client=create_client(server.url, FAKE_SUPABASE_KEY)), fake
+
+
+def test_create(benchmark, store):
+    backend, session_store, fake = store
+    sessions = iter(make_session() for _ in range(100000))
+
+    benchmark(lambda: session_store.create(next(sessions), TTL))
+
+    session = make_session()
+    assert session_store.create(session, TTL)
+    benchmark.extra_info["stored_bytes"] = stored_size(backend, fake, session["session_id"])
+
+
+def test_get(benchmark, store):
+    _, session_store, _ = store
+    session = make_session()
+    session_store.create(session, TTL)
+
+    result = benchmark(session_store.get, session["session_id"])
+    assert result["user_id"] == session["user_id"]
+
+
+def test_touch(benchmark, store):
+    _, session_store, _ = store
+    session = make_session()
+    session_store.create(session, TTL)
+
+    assert benchmark(session_store.update, session["session_id"], {"last_accessed": epoch_now()}, TTL)
+
+
+def test_update_user_data(benchmark, store):
+    _, session_store, _ = store
+    session = make_session()
+    session_store.create(session, TTL)
+
+    assert benchmark(session_store.update, session["session_id"], {"user_data": {"theme": "dark"}}, TTL)
+    assert session_store.get(session["session_id"])["user_data"]["theme"] == "dark"
+
+
+def test_user_sessions(benchmark, store):
+    _, session_store, _ = store
+    user_id = str(uuid.uuid4())
+    for _ in range(5):
+        session_store.create(make_session(user_id), TTL)
+
+    assert len(benchmark(session_store.user_sessions, user_id)) == 5
+
+
+def main():
+    sys.exit(run_benchmarks(__file__, "Session store benchmark with baseline comparison"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Load Test - Agent Makalah Backend
+Runs scripted auth scenarios against the service wired to local fakes of
+Supabase (PostgREST) and Upstash, so no accounts or network are needed
+
+Usage:
+    python -m benchmarks.loadtest [--scenario mixed] [--concurrency 20] [--duration 20]
+                                  [--workers 1] [--hash-rounds 12] [--json results.json]
+    python -m benchmarks.loadtest --list
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from benchmarks.loadtest.harness import Stack, run_load, seed_users, summarize
+from benchmarks.loadtest.scenarios import SCENARIOS
+
+
+def print_summary(name: str, summary: dict) -> None:
+    print(f"\n📊 {name}")
+    print(f"   {'step':<12} {'requests':>9} {'errors':>7} {'rps':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for step, stats in sorted(summary.items(), key=lambda item: item[0] == "total"):
+        print(
+            f"   {step:<12} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}"
+        )
+    print("   (latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the auth API")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS) + ["all"],
+                        help="Scenario to run (repeatable, default: mixed)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--workers", type=int, default=1, help="Service worker processes")
+    parser.add_argument("--hash-rounds", type=int, default=12, help="bcrypt rounds for the service and seeded users")
+    parser.add_argument("--rate-limit-backend", default="redis", choices=["memory", "redis"])
+    parser.add_argument("--auth-mode", default="stateful", choices=["stateful", "stateless"])
+    parser.add_argument("--session-store", default="redis", choices=["memory", "redis", "postgres"])
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--list", action="store_true", help="List scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for scenario in SCENARIOS.values():
+            print(f"   {scenario.name:<12} {scenario.description}")
+        return
+
+    names = args.scenario or ["mixed"]
+    if "all" in names:
+        names = list(SCENARIOS)
+
+    print(f"🚀 Starting service ({args.workers} worker(s)) with fake Supabase and Upstash...")
+    stack = Stack(
+        workers=args.workers,
+        hash_rounds=args.hash_rounds,
+        rate_limit_backend=args.rate_limit_backend,
+        auth_mode=args.auth_mode,
+        session_store_backend=args.session_store
+    )
+    emails = seed_users(stack.database, args.concurrency, args.hash_rounds)
+    stack.start()
+    print(f"   service {stack.url}, log {stack.log_file.name}")
+
+    results = {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+            "hash_rounds": args.hash_rounds,
+            "rate_limit_backend": args.rate_limit_backend,
+            "auth_mode": args.auth_mode,
+            "session_store_backend": args.session_store
+        },
+        "scenarios": {}
+    }
+    try:
+        for name in names:
+            samples, measured = asyncio.run(run_load(stack.url, SCENARIOS[name], emails, args.duration, args.warmup))
+            summary = summarize(samples, measured)
+            results["scenarios"][name] = summary
+            print_summary(f"{name} ({args.concurrency} users, {measured:.1f}s)", summary)
+    finally:
+        stack.stop()
+
+    print(f"\n   fake PostgREST requests: {stack.database.request_count}, fake Upstash commands: {stack.redis.command_count}")
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
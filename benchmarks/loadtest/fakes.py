@@ -0,0 +1,466 @@
+"""
+Local stand-ins for Supabase (PostgREST) and Upstash (Redis REST API)
+
+Both are small Starlette apps kept entirely in memory and served by uvicorn on
+loopback ports from background threads. They implement the subset of each
+protocol the backend uses, so the real supabase-py and upstash-redis clients
+talk to them unchanged:
+
+- FakePostgREST: /rest/v1/<table> with select, eq/neq/in/is filters, order,
+  limit/offset, insert (return=representation), update and delete.
+- FakeUpstash: POST / (single command), POST /pipeline and /multi-exec, with
+  strings, TTLs, counters, sets, hashes, sorted sets and SCAN. Responses honour
+  the Upstash-Encoding: base64 header sent by upstash-redis.
+"""
+
+import asyncio
+import base64
+import fnmatch
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+
+def _json(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(orjson.dumps(payload), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# === PostgREST ===
+
+def _parse_value(raw: str) -> Any:
+    if raw == "null":
+        return None
+    if raw == "true":
+        return True
+    if raw == "false":
+        return False
+    return raw
+
+
+def _matches(row: Dict[str, Any], filters: List[Tuple[str, str, str]]) -> bool:
+    for column, operator, raw in filters:
+        value = row.get(column)
+        text = None if value is None else str(value).lower() if isinstance(value, bool) else str(value)
+        if operator == "eq" and text != raw:
+            return False
+        if operator == "neq" and text == raw:
+            return False
+        if operator == "is" and _parse_value(raw) is not value:
+            return False
+        if operator == "in" and text not in [item.strip('"') for item in raw.strip("()").split(",")]:
+            return False
+        if operator in ("gt", "gte", "lt", "lte"):
+            if value is None:
+                return False
+            compare = {"gt": text > raw, "gte": text >= raw, "lt": text < raw, "lte": text <= raw}
+            if not compare[operator]:
+                return False
+    return True
+
+
+class FakePostgREST:
+    """
+    In-memory PostgREST speaking enough of the protocol for supabase-py
+
+    Rows are stored per table as dicts; values arrive and leave as JSON, so the
+    types are whatever the client sent (ISO strings for timestamps).
+    """
+
+    # Filters PostgREST accepts as "<column>=<operator>.<value>"
+    OPERATORS = ("eq", "neq", "in", "is", "gt", "gte", "lt", "lte")
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {"users": [], "agents": []}
+        self.tables.update(tables or {})
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self.app = Starlette(routes=[
+            Route("/rest/v1/{table}", self.handle, methods=["GET", "HEAD", "POST", "PATCH", "DELETE"])
+        ])
+
+    def _parse_query(self, request: Request):
+        filters, order, limit, offset, columns = [], None, None, 0, None
+        for key, value in request.query_params.multi_items():
+            if key == "select":
+                columns = None if value.strip() == "*" else [column.strip() for column in value.split(",")]
+            elif key == "order":
+                column, _, direction = value.partition(".")
+                order = (column, direction.startswith("desc"))
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key in ("on_conflict", "columns"):
+                continue
+            else:
+                operator, _, raw = value.partition(".")
+                if operator in self.OPERATORS:
+                    filters.append((key, operator, raw))
+        return filters, order, limit, offset, columns
+
+    async def handle(self, request: Request) -> Response:
+        self.request_count += 1
+        table = request.path_params["table"]
+        filters, order, limit, offset, columns = self._parse_query(request)
+        # Read the body before locking: awaiting under the lock would block the loop
+        body = await request.body()
+
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+
+            if request.method in ("GET", "HEAD"):
+                selected = [row for row in rows if _matches(row, filters)]
+                if order:
+                    selected.sort(key=lambda row: (row.get(order[0]) is None, row.get(order[0])), reverse=order[1])
+                selected = selected[offset:None if limit is None else offset + limit]
+                if columns:
+                    selected = [{column: row.get(column) for column in columns} for row in selected]
+                headers = {"Content-Range": f"0-{max(len(selected) - 1, 0)}/{len(selected)}"}
+                return _json(selected, headers=headers)
+
+            if request.method == "POST":
+                payload = orjson.loads(body)
+                inserted = []
+                for row in payload if isinstance(payload, list) else [payload]:
+                    row = dict(row)
+                    row.setdefault("id", str(uuid.uuid4()))
+                    rows.append(row)
+                    inserted.append(row)
+                return _json(inserted, status_code=201)
+
+            matched = [row for row in rows if _matches(row, filters)]
+            if request.method == "PATCH":
+                changes = orjson.loads(body)
+                for row in matched:
+                    row.update(changes)
+                return _json(matched)
+
+            # DELETE
+            self.tables[table] = [row for row in rows if not _matches(row, filters)]
+            return _json(matched)
+
+
+# === Upstash ===
+
+class FakeUpstash:
+    """
+    In-memory Redis behind the Upstash REST protocol
+
+    Keys expire lazily on access. Commands run under one lock, so pipelines
+    and multi-exec blocks are atomic, as they are on Upstash.
+    """
+
+    def __init__(self, token: str = "fake-upstash-token"):
+        self.token = token
+        self.data: Dict[str, Any] = {}
+        self.expires: Dict[str, float] = {}
+        self.command_count = 0
+        self._lock = threading.Lock()
+        self.app = Starlette(routes=[
+            Route("/", self.handle_command, methods=["POST"]),
+            Route("/pipeline", self.handle_pipeline, methods=["POST"]),
+            Route("/multi-exec", self.handle_pipeline, methods=["POST"])
+        ])
+
+    # --- protocol ---
+
+    def _authorized(self, request: Request) -> bool:
+        return request.headers.get("authorization") == f"Bearer {self.token}"
+
+    def _encode(self, value: Any, encoding: Optional[str]) -> Any:
+        if encoding != "base64":
+            return value
+        if isinstance(value, str):
+            return value if value == "OK" else base64.b64encode(value.encode()).decode()
+        if isinstance(value, list):
+            return [self._encode(item, encoding) for item in value]
+        return value
+
+    def _run(self, command: List[Any], encoding: Optional[str]) -> Dict[str, Any]:
+        self.command_count += 1
+        name = str(command[0]).upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return {"error": f"ERR unknown command '{name}'"}
+        try:
+            return {"result": self._encode(handler(*[str(arg) for arg in command[1:]]), encoding)}
+        except (ValueError, TypeError, IndexError) as e:
+            return {"error": f"ERR {e}"}
+
+    async def handle_command(self, request: Request) -> Response:
+        if not self._authorized(request):
+            return _json({"error": "Unauthorized"}, status_code=401)
+        command = orjson.loads(await request.body())
+        with self._lock:
+            return _json(self._run(command, request.headers.get("upstash-encoding")))
+
+    async def handle_pipeline(self, request: Request) -> Response:
+        if not self._authorized(request):
+            return _json({"error": "Unauthorized"}, status_code=401)
+        commands = orjson.loads(await request.body())
+        encoding = request.headers.get("upstash-encoding")
+        with self._lock:
+            return _json([self._run(command, encoding) for command in commands])
+
+    # --- keyspace ---
+
+    def _alive(self, key: str) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _get(self, key: str, kind: type, create: bool = False):
+        if not self._alive(key):
+            if not create:
+                return None
+            self.data[key] = kind()
+        value = self.data[key]
+        if not isinstance(value, kind):
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _set_string(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self.data[key] = value
+        if ttl is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = time.time() + ttl
+
+    # --- commands ---
+
+    def cmd_ping(self, *args):
+        return "PONG"
+
+    def cmd_get(self, key):
+        return self._get(key, str)
+
+    def cmd_mget(self, *keys):
+        return [self.data[key] if self._alive(key) and isinstance(self.data[key], str) else None for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        ttl = None
+        if "EX" in options:
+            ttl = float(options[options.index("EX") + 1])
+        if "PX" in options:
+            ttl = float(options[options.index("PX") + 1]) / 1000
+        exists = self._alive(key)
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return None
+        self._set_string(key, value, ttl)
+        return "OK"
+
+    def cmd_setex(self, key, seconds, value):
+        self._set_string(key, value, float(seconds))
+        return "OK"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_unlink(self, *keys):
+        return self.cmd_del(*keys)
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + float(seconds)
+        return 1
+
+    def cmd_ttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else max(0, int(round(deadline - time.time())))
+
+    def cmd_incrby(self, key, amount):
+        current = int(self._get(key, str) or 0) + int(amount)
+        self.data[key] = str(current)
+        return current
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_decr(self, key):
+        return self.cmd_incrby(key, -1)
+
+    def cmd_sadd(self, key, *members):
+        members_set = self._get(key, set, create=True)
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def cmd_srem(self, key, *members):
+        members_set = self._get(key, set)
+        if members_set is None:
+            return 0
+        removed = len(members_set & set(members))
+        members_set.difference_update(members)
+        return removed
+
+    def cmd_smembers(self, key):
+        return sorted(self._get(key, set) or ())
+
+    def cmd_scard(self, key):
+        return len(self._get(key, set) or ())
+
+    def cmd_sismember(self, key, member):
+        return int(member in (self._get(key, set) or ()))
+
+    def cmd_hset(self, key, *pairs):
+        hash_value = self._get(key, dict, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in hash_value
+            hash_value[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        return (self._get(key, dict) or {}).get(field)
+
+    def cmd_hmget(self, key, *fields):
+        hash_value = self._get(key, dict) or {}
+        return [hash_value.get(field) for field in fields]
+
+    def cmd_hgetall(self, key):
+        return [item for pair in (self._get(key, dict) or {}).items() for item in pair]
+
+    def cmd_hdel(self, key, *fields):
+        hash_value = self._get(key, dict) or {}
+        return sum(1 for field in fields if hash_value.pop(field, None) is not None)
+
+    def cmd_hincrby(self, key, field, amount):
+        hash_value = self._get(key, dict, create=True)
+        hash_value[field] = str(int(hash_value.get(field, 0)) + int(amount))
+        return int(hash_value[field])
+
+    def cmd_zadd(self, key, *args):
+        zset = self._get(key, dict, create=True)
+        added = 0
+        for score, member in zip(args[::2], args[1::2]):
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+
+    def cmd_zrem(self, key, *members):
+        zset = self._get(key, dict) or {}
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    def cmd_zcard(self, key):
+        return len(self._get(key, dict) or {})
+
+    def cmd_zscore(self, key, member):
+        score = (self._get(key, dict) or {}).get(member)
+        return None if score is None else repr(score)
+
+    def _zsorted(self, key, reverse=False):
+        zset = self._get(key, dict) or {}
+        return sorted(zset.items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+
+    def cmd_zrange(self, key, start, stop, *options):
+        items = self._zsorted(key, reverse="REV" in [option.upper() for option in options])
+        start, stop = int(start), int(stop)
+        stop = len(items) + stop if stop < 0 else stop
+        selected = items[start:stop + 1]
+        if "WITHSCORES" in [option.upper() for option in options]:
+            return [value for member, score in selected for value in (member, repr(score))]
+        return [member for member, _ in selected]
+
+    def cmd_zrevrange(self, key, start, stop, *options):
+        return self.cmd_zrange(key, start, stop, "REV", *options)
+
+    def cmd_zremrangebyrank(self, key, start, stop):
+        zset = self._get(key, dict) or {}
+        members = self.cmd_zrange(key, start, stop)
+        for member in members:
+            zset.pop(member, None)
+        return len(members)
+
+    def cmd_zrangebyscore(self, key, minimum, maximum, *options):
+        low = float("-inf") if minimum == "-inf" else float(minimum)
+        high = float("inf") if maximum in ("+inf", "inf") else float(maximum)
+        selected = [(member, score) for member, score in self._zsorted(key) if low <= score <= high]
+        if "WITHSCORES" in [option.upper() for option in options]:
+            return [value for member, score in selected for value in (member, repr(score))]
+        return [member for member, _ in selected]
+
+    def cmd_zremrangebyscore(self, key, minimum, maximum):
+        zset = self._get(key, dict) or {}
+        low = float("-inf") if minimum == "-inf" else float(minimum)
+        high = float("inf") if maximum in ("+inf", "inf") else float(maximum)
+        members = [member for member, score in zset.items() if low <= score <= high]
+        for member in members:
+            del zset[member]
+        return len(members)
+
+    def cmd_scan(self, cursor, *options):
+        options_upper = [option.upper() for option in options]
+        pattern = options[options_upper.index("MATCH") + 1] if "MATCH" in options_upper else "*"
+        count = int(options[options_upper.index("COUNT") + 1]) if "COUNT" in options_upper else 10
+        keys = sorted(key for key in list(self.data) if self._alive(key))
+        start = int(cursor)
+        page = keys[start:start + count]
+        next_cursor = start + count if start + count < len(keys) else 0
+        return [str(next_cursor), [key for key in page if fnmatch.fnmatchcase(key, pattern)]]
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+
+# === Serving ===
+
+class BackgroundServer:
+    """
+    Serve an ASGI app with uvicorn on a loopback port from a daemon thread
+    """
+
+    def __init__(self, app, port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off"
+        ))
+        self._thread = threading.Thread(target=self._serve, name=f"fake-server-{self.port}", daemon=True)
+
+    def _serve(self) -> None:
+        asyncio.run(self.server.serve())
+
+    def start(self, timeout: float = 10.0) -> "BackgroundServer":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Fake server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=5.0)
@@ -0,0 +1,246 @@
+"""
+Load-test harness: starts the fakes and the service, drives virtual users and
+summarizes latencies
+"""
+
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from benchmarks.loadtest.fakes import BackgroundServer, FakePostgREST, FakeUpstash, _free_port
+from benchmarks.loadtest.scenarios import SEED_PASSWORD, Scenario, VirtualUser
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# The fakes accept any JWT-shaped key (supabase-py validates the shape)
+FAKE_SUPABASE_KEY = "fake.supabase.key"
+FAKE_UPSTASH_TOKEN = "fake-upstash-token"
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction (0.99 for p99)
+
+    Returns:
+        float: Percentile value (0.0 for no values)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: List[Tuple[str, int, float]], duration: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-step throughput and latency percentiles
+
+    Args:
+        samples: (step, status, seconds) tuples
+        duration: Measured wall-clock seconds
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Statistics per step plus a "total" entry
+    """
+    steps: Dict[str, List[Tuple[int, float]]] = {}
+    for step, status, seconds in samples:
+        steps.setdefault(step, []).append((status, seconds))
+    steps["total"] = [(status, seconds) for _, status, seconds in samples]
+
+    summary = {}
+    for step, results in steps.items():
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        errors = sum(1 for status, _ in results if status == 0 or status >= 400)
+        summary[step] = {
+            "requests": len(results),
+            "errors": errors,
+            "rps": round(len(results) / duration, 1) if duration else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p90_ms": round(percentile(latencies, 0.90), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0
+        }
+    return summary
+
+
+def seed_users(database: FakePostgREST, count: int, hash_rounds: int) -> List[str]:
+    """
+    Insert active users sharing SEED_PASSWORD (hashed once)
+
+    Args:
+        database: Fake PostgREST
+        count: Number of users
+        hash_rounds: bcrypt rounds, matching the service
+
+    Returns:
+        List[str]: Seeded emails
+    """
+    from passlib.context import CryptContext
+
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=hash_rounds).hash(SEED_PASSWORD)
+    now = datetime.utcnow().isoformat()
+    emails = []
+    for index in range(count):
+        email = f"user{index}@loadtest.local"
+        database.tables["users"].append({
+            "id": str(uuid.uuid4()),
+            "email": email,
+            "hashed_password": hashed,
+            "is_active": True,
+            "is_superuser": False,
+            "created_at": now,
+            "updated_at": now
+        })
+        emails.append(email)
+    return emails
+
+
+class Stack:
+    """
+    The service under test (subprocess) wired to in-process fakes
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        hash_rounds: int = 12,
+        rate_limit_backend: str = "redis",
+        auth_mode: str = "stateful",
+        session_store_backend: str = "redis"
+    ):
+        self.workers = workers
+        self.hash_rounds = hash_rounds
+        self.rate_limit_backend = rate_limit_backend
+        self.auth_mode = auth_mode
+        self.session_store_backend = session_store_backend
+        self.database = FakePostgREST()
+        self.redis = FakeUpstash(token=FAKE_UPSTASH_TOKEN)
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_file = tempfile.NamedTemporaryFile(prefix="agent-makalah-loadtest-", suffix=".log", delete=False)
+        self._servers: List[BackgroundServer] = []
+        self._process: Optional[subprocess.Popen] = None
+
+    def environment(self, database_url: str, redis_url: str) -> Dict[str, str]:
+        from src.middleware.rate_limit_policy import DEFAULT_RATE_LIMITS
+
+        # Rate limits would cap a load test at a few requests per client
+        unlimited = {name: {"requests": 10_000_000, "window": 60} for name in DEFAULT_RATE_LIMITS}
+        env = dict(os.environ)
+        env.update({
+            "API_HOST": "127.0.0.1",
+            "API_PORT": str(self.port),
+            "SERVER_WORKERS": str(self.workers),
+            "SUPABASE_URL": database_url,
+            "SUPABASE_ANON_KEY": FAKE_SUPABASE_KEY,
+            "SUPABASE_SERVICE_ROLE_KEY": FAKE_SUPABASE_KEY,
+            "UPSTASH_REDIS_URL": redis_url,
+            "UPSTASH_REDIS_TOKEN": FAKE_UPSTASH_TOKEN,
+            # No outbound LLM probes
+            "OPENAI_API_KEY": "",
+            "ANTHROPIC_API_KEY": "",
+            "GOOGLE_GEMINI_API_KEY": "",
+            "PASSWORD_HASH_ROUNDS": str(self.hash_rounds),
+            "RATE_LIMIT_POLICIES": json.dumps(unlimited),
+            "RATE_LIMIT_BACKEND": self.rate_limit_backend,
+            "AUTH_MODE": self.auth_mode,
+            "SESSION_STORE_BACKEND": self.session_store_backend,
+            "LOG_LEVEL": "warning",
+            "PYTHONUNBUFFERED": "1"
+        })
+        return env
+
+    def start(self, timeout: float = 60.0) -> "Stack":
+        database = BackgroundServer(self.database.app).start()
+        redis = BackgroundServer(self.redis.app).start()
+        self._servers = [database, redis]
+
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "src.server"],
+            cwd=PROJECT_ROOT,
+            env=self.environment(database.url, redis.url),
+            stdout=self.log_file,
+            stderr=subprocess.STDOUT
+        )
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Service exited during startup, see {self.log_file.name}")
+            try:
+                if httpx.get(f"{self.url}/ready", timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Service not ready after {timeout}s, see {self.log_file.name}")
+
+    def stop(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        for server in self._servers:
+            server.stop()
+        self.log_file.close()
+
+
+async def run_load(
+    url: str,
+    scenario: Scenario,
+    emails: Sequence[str],
+    duration: float,
+    warmup: float = 0.0
+) -> Tuple[List[Tuple[str, int, float]], float]:
+    """
+    Run one virtual user per email for the given duration
+
+    Args:
+        url: Service base URL
+        scenario: Scenario to run
+        emails: Seeded user emails (one virtual user each)
+        duration: Measured seconds
+        warmup: Seconds run before measuring (samples discarded)
+
+    Returns:
+        Tuple of the measured samples and the measured duration
+    """
+    limits = httpx.Limits(max_connections=len(emails), max_keepalive_connections=len(emails))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        users = [VirtualUser(client=client, email=email) for email in emails]
+        await asyncio.gather(*(scenario.setup(user) for user in users))
+
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+
+        async def drive(user: VirtualUser) -> None:
+            user.samples.clear()
+            while time.perf_counter() < stop_at:
+                if time.perf_counter() < measure_from:
+                    await scenario.iteration(user)
+                    user.samples.clear()
+                    continue
+                await scenario.iteration(user)
+
+        await asyncio.gather(*(drive(user) for user in users))
+        measured = time.perf_counter() - max(measure_from, start)
+
+    samples = [sample for user in users for sample in user.samples]
+    return samples, measured
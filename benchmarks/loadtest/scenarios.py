@@ -0,0 +1,138 @@
+"""
+Load-test scenarios
+
+A scenario is a setup step run once per virtual user and an iteration run in a
+loop until the test ends. Every HTTP call goes through VirtualUser.call, which
+records its latency under a step name.
+"""
+
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# Password shared by all seeded users (meets is_password_strong)
+SEED_PASSWORD = "LoadTest#2025"
+
+
+@dataclass
+class VirtualUser:
+    """
+    One simulated client with its own tokens
+    """
+
+    client: httpx.AsyncClient
+    email: str
+    samples: List[Tuple[str, int, float]] = field(default_factory=list)
+    access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
+
+    async def call(self, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request and record (step, status, seconds)
+
+        Transport errors are recorded with status 0 and re-raised as a 599 response
+        so scenarios keep running.
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.samples.append((step, 0, time.perf_counter() - start))
+            return httpx.Response(599)
+        self.samples.append((step, response.status_code, time.perf_counter() - start))
+        return response
+
+    @property
+    def auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    async def login(self) -> bool:
+        response = await self.call(
+            "login", "POST", "/api/v1/auth/login",
+            data={"username": self.email, "password": SEED_PASSWORD}
+        )
+        if response.status_code != 200:
+            return False
+        body = response.json()
+        self.access_token = body["access_token"]
+        self.refresh_token = body["refresh_token"]
+        return True
+
+
+async def _noop(user: VirtualUser) -> None:
+    return None
+
+
+async def _register(user: VirtualUser) -> None:
+    await user.call(
+        "register", "POST", "/api/v1/auth/register",
+        json={"email": f"new-{uuid.uuid4().hex}@loadtest.local", "password": SEED_PASSWORD}
+    )
+
+
+async def _login(user: VirtualUser) -> None:
+    await user.login()
+
+
+async def _refresh(user: VirtualUser) -> None:
+    # AuthenticationMiddleware requires the bearer token on /auth/refresh as well
+    response = await user.call(
+        "refresh", "POST", "/api/v1/auth/refresh",
+        json={"refresh_token": user.refresh_token}, headers=user.auth_headers
+    )
+    # Refreshing revokes the previous access token and consumes the refresh token
+    if response.status_code == 200:
+        body = response.json()
+        user.access_token = body["access_token"]
+        user.refresh_token = body["refresh_token"]
+
+
+async def _profile(user: VirtualUser) -> None:
+    await user.call("profile", "GET", "/api/v1/auth/profile", headers=user.auth_headers)
+
+
+async def _logout_all(user: VirtualUser) -> None:
+    if await user.login():
+        await user.call("logout_all", "POST", "/api/v1/auth/logout-all", headers=user.auth_headers)
+
+
+async def _health(user: VirtualUser) -> None:
+    await user.call("health", "GET", "/health")
+
+
+async def _setup_login(user: VirtualUser) -> None:
+    await user.login()
+
+
+# Mixed traffic: mostly authenticated reads
+MIXED_WEIGHTS = ((_profile, 50), (_refresh, 20), (_health, 20), (_login, 10))
+
+
+async def _mixed(user: VirtualUser) -> None:
+    iteration = random.choices([step for step, _ in MIXED_WEIGHTS], weights=[w for _, w in MIXED_WEIGHTS])[0]
+    await iteration(user)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    setup: Callable[[VirtualUser], Awaitable[Any]]
+    iteration: Callable[[VirtualUser], Awaitable[Any]]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in (
+        Scenario("register", "POST /auth/register with a new email each time", _noop, _register),
+        Scenario("login", "POST /auth/login (bcrypt verify + session creation)", _noop, _login),
+        Scenario("refresh", "POST /auth/refresh with the user's refresh token", _setup_login, _refresh),
+        Scenario("profile", "GET /auth/profile with a bearer token", _setup_login, _profile),
+        Scenario("logout-all", "login followed by POST /auth/logout-all", _noop, _logout_all),
+        Scenario("health", "GET /health", _noop, _health),
+        Scenario("mixed", "50% profile, 20% refresh, 20% health, 10% login", _setup_login, _mixed),
+    )
+}
@@ -3,9 +3,9 @@ Authentication API Routes for Agent-Makalah Backend
 Implements OAuth2 password flow with JWT tokens and session management
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
@@ -13,15 +13,19 @@ from ..models.user import (
     UserCreate, UserPublic, LoginRequest, Token, 
     UserResponse, UserUpdate
 )
-from ..crud.crud_user import UserCRUD
+from ..crud.crud_user import user_crud
 from ..auth.jwt_utils import (
     create_access_token, create_refresh_token, 
     verify_token, decode_token, get_user_id_from_token,
     get_token_remaining_time, is_token_expired
 )
-from ..auth.enhanced_session_manager import EnhancedSessionManager
-from ..auth.token_blacklist import TokenBlacklist
+from ..auth.enhanced_session_manager import enhanced_session_manager as session_manager
+from ..auth.token_blacklist import token_blacklist
+from ..auth.stateless import revocation_set, stateless_user_claims, user_from_claims
+from ..auth.introspection import introspect_tokens
+from ..auth.refresh_rotation import RefreshTokenError, refresh_rotator
 from ..core.config import settings
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,10 +33,9 @@ logger = logging.getLogger(__name__)
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-# Initialize dependencies
-user_crud = UserCRUD()
-session_manager = EnhancedSessionManager()
-token_blacklist = TokenBlacklist()
+# Dependencies are the shared module-level singletons (user_crud,
+# enhanced_session_manager, token_blacklist); their Redis and Supabase
+# clients are created lazily on first use
 
 # Create auth router
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -49,6 +52,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
     )
     
     try:
+        # Stateless mode: the token claims stand in for the blacklist and user lookups
+        if revocation_set.enabled:
+            payload = decode_token(token)
+            if payload and revocation_set.can_verify(payload):
+                user_data = user_from_claims(payload)
+                if not user_data:
+                    logger.warning("Revoked or inactive stateless token provided")
+                    raise credentials_exception
+                return UserPublic(
+                    id=user_data["user_id"],
+                    email=user_data["email"],
+                    is_active=True,
+                    created_at=user_data["created_at"]
+                )
+        
         # Check if token is blacklisted
         if token_blacklist.is_token_blacklisted(token):
             logger.warning("Attempt to use blacklisted token")
@@ -183,7 +201,8 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()) -> Dict[s
             user_id=str(user.id),
             user_data={
                 "email": user.email,
-                "is_superuser": user.is_superuser
+                "is_superuser": user.is_superuser,
+                **stateless_user_claims(user)
             },
             device_info={
                 "login_time": str(datetime.utcnow()),
@@ -229,72 +248,38 @@ class RefreshTokenRequest(BaseModel):
 @auth_router.post("/refresh", response_model=Dict[str, Any])
 async def refresh_access_token(request: RefreshTokenRequest) -> Dict[str, Any]:
     """
-    Refresh access token using valid refresh token
+    Exchange a refresh token for a new access and refresh token pair
+    
+    The presented refresh token is consumed (see src.auth.refresh_rotation):
+    clients must store the returned refresh_token for the next refresh.
     
     Args:
         refresh_token: Valid refresh token
     
     Returns:
-        Dict containing new access_token and updated session info
+        Dict containing new access_token, refresh_token and updated session info
     
     Raises:
-        HTTPException: If refresh token is invalid or expired
+        HTTPException: If refresh token is invalid, expired, revoked or reused
     """
     try:
-        # Check if refresh token is blacklisted
-        if token_blacklist.is_token_blacklisted(request.refresh_token):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Refresh token has been revoked"
-            )
-        
-        # Verify refresh token
-        if not verify_token(request.refresh_token):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
-        
-        # Check if refresh token is expired
-        if is_token_expired(request.refresh_token):
+        try:
+            result = await refresh_rotator.refresh(request.refresh_token, user_crud)
+        except RefreshTokenError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Refresh token has expired"
+                detail=str(e)
             )
         
-        # Get user from refresh token
-        user_id = get_user_id_from_token(request.refresh_token)
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token format"
-            )
-        
-        user = await user_crud.get_user_by_id(user_id)
-        if not user or not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive"
-            )
-        
-        # Create new access token
-        new_access_token = create_access_token(
-            data={"sub": str(user.id), "email": user.email, "is_superuser": user.is_superuser}
-        )
-        
-        # Update session with new access token
-        session_updated = session_manager.refresh_session_token(request.refresh_token)
-        
         # Get token expiry information
-        token_remaining = get_token_remaining_time(new_access_token)
-        
-        logger.info(f"Token refreshed successfully for user: {user.email}")
+        token_remaining = get_token_remaining_time(result["access_token"])
         
         return {
-            "access_token": new_access_token,
+            "access_token": result["access_token"],
+            "refresh_token": result["refresh_token"],
             "token_type": "bearer",
             "expires_in": token_remaining,
-            "session_updated": session_updated is not None,
+            "session_updated": result["session_updated"],
             "message": "Token refreshed successfully"
         }
         
@@ -358,8 +343,10 @@ async def get_user_profile(current_user: UserPublic = Depends(get_current_user))
         Dict containing user profile and session information
     """
     try:
-        # Get session information
-        session_info = session_manager.get_user_active_sessions(str(current_user.id))
+        # Get session information (at most max_sessions_per_user sessions, most recently active first)
+        session_info = session_manager.get_user_active_sessions(
+            str(current_user.id), limit=settings.max_sessions_per_user or None
+        )
         
         return {
             "user": {
@@ -459,6 +446,41 @@ async def verify_token_endpoint(current_user: UserPublic = Depends(get_current_u
     }
 
 
+@auth_router.get("/sessions", response_model=Dict[str, Any])
+async def list_user_sessions(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserPublic = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    List the current user's active sessions, most recently active first
+    
+    Args:
+        offset: Number of sessions to skip
+        limit: Maximum number of sessions to return
+        current_user: Current authenticated user
+    
+    Returns:
+        Dict with one page of sessions and the offset of the next page (None on the last page)
+    """
+    try:
+        sessions = session_manager.get_user_active_sessions(str(current_user.id), offset, limit)
+        
+        return {
+            "sessions": sessions,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if len(sessions) == limit else None
+        }
+        
+    except Exception as e:
+        logger.error(f"Error listing user sessions: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error listing sessions"
+        )
+
+
 @auth_router.post("/logout-all")
 async def logout_all_sessions(current_user: UserPublic = Depends(get_current_user)) -> Dict[str, str]:
     """
@@ -490,6 +512,9 @@ async def logout_all_sessions(current_user: UserPublic = Depends(get_current_use
         # Clean up all user sessions
         sessions_logged_out = session_manager.logout_all_user_sessions(str(current_user.id))
         
+        # Stateless nodes: revoke tokens that are not tracked in any session
+        revocation_set.revoke_user(str(current_user.id), "logout_all_sessions")
+        
         logger.info(f"All sessions logged out for user: {current_user.email} ({sessions_logged_out} sessions)")
         
         return {
@@ -502,4 +527,51 @@ async def logout_all_sessions(current_user: UserPublic = Depends(get_current_use
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout all sessions"
-        ) 
\ No newline at end of file
+        ) 
+
+
+class IntrospectionRequest(BaseModel):
+    tokens: List[str]
+
+@auth_router.post("/introspect", response_model=Dict[str, Any])
+async def introspect_tokens_endpoint(request: Request, body: IntrospectionRequest) -> Dict[str, Any]:
+    """
+    Check many tokens at once (internal services, gateways)
+    
+    Signatures are verified in memory, revocation is checked with one Redis
+    call and users are resolved with one database query.
+    
+    Args:
+        body: Tokens to introspect (at most introspection_max_tokens)
+    
+    Returns:
+        Dict with one result per token, in request order
+    
+    Raises:
+        HTTPException: If the caller is neither a service nor a superuser,
+            or the batch is empty or too large
+    """
+    service_token = request.headers.get("X-Introspection-Token", "")
+    is_service = bool(settings.introspection_auth_token) and hmac.compare_digest(
+        service_token, settings.introspection_auth_token
+    )
+    current_user = getattr(request.state, "current_user", None)
+    if not is_service and not (current_user and current_user.get("is_superuser")):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Introspection requires a service token or superuser access"
+        )
+    
+    if not body.tokens or len(body.tokens) > settings.introspection_max_tokens:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {settings.introspection_max_tokens} tokens"
+        )
+    
+    results = await introspect_tokens(body.tokens, user_crud)
+    
+    return {
+        "results": results,
+        "active": sum(1 for result in results if result["active"]),
+        "total": len(results)
+    }
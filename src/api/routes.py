@@ -7,6 +7,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List
 from pydantic import BaseModel
 from src.database.supabase_client import supabase_client
+from src.core.health import health_prober, STATUS_HEALTHY
+from src.utils.responses import PrecomputedJSON
+from src.core.config import settings
 
 # Create main API router
 api_router = APIRouter(prefix="/api/v1")
@@ -24,14 +27,11 @@ class SystemInfo(BaseModel):
     system_load: str
     uptime: str
 
-# === API Endpoints ===
+# === Precomputed Responses ===
 
-@api_router.get("/agents", response_model=List[AgentStatus])
-async def get_agents_status():
-    """
-    Get status of all Agent-Makalah multi-agent system components
-    """
-    return [
+# Agent status list is constant: validate once and serialize once
+AGENTS_STATUS_RESPONSE = PrecomputedJSON([
+    agent.model_dump() for agent in [
         AgentStatus(name="Orchestrator_Agent", status="ready", last_activity="active"),
         AgentStatus(name="Brainstorming_Agent", status="ready", last_activity="idle"),
         AgentStatus(name="Literature_Search_Agent", status="ready", last_activity="idle"),
@@ -39,6 +39,16 @@ async def get_agents_status():
         AgentStatus(name="Writer_Agent", status="ready", last_activity="idle"),
         AgentStatus(name="Analysis_Editor_Agent", status="ready", last_activity="idle"),
     ]
+])
+
+# === API Endpoints ===
+
+@api_router.get("/agents", response_model=List[AgentStatus])
+async def get_agents_status():
+    """
+    Get status of all Agent-Makalah multi-agent system components
+    """
+    return AGENTS_STATUS_RESPONSE.response()
 
 @api_router.get("/system", response_model=SystemInfo)
 async def get_system_info():
@@ -46,14 +56,14 @@ async def get_system_info():
     Get detailed system information for Agent-Makalah backend with Supabase health
     """
     try:
-        # Check Supabase health
-        supabase_health = await supabase_client.health_check()
+        # Latest background probe result (no live query per request)
+        supabase_health = health_prober.get_status("supabase")
         
         return SystemInfo(
             total_agents=6,
             active_sessions=0,
-            system_load="low" if supabase_health["status"] == "healthy" else "high",
-            uptime="operational" if supabase_health["status"] == "healthy" else "degraded"
+            system_load="low" if supabase_health["status"] == STATUS_HEALTHY else "high",
+            uptime="operational" if supabase_health["status"] == STATUS_HEALTHY else "degraded"
         )
     except Exception as e:
         return SystemInfo(
@@ -90,14 +100,18 @@ async def analyze_existing_paper():
 @api_router.get("/database/health")
 async def get_database_health():
     """
-    Get Supabase database health status
+    Get Supabase database health status (from the background health prober)
     """
     try:
-        health_status = await supabase_client.health_check()
+        health_status = health_prober.get_status("supabase")
         return {
             "database": "supabase",
-            "health": health_status,
-            "timestamp": "2025-01-31T00:00:00Z"
+            "health": {
+                **health_status,
+                "supabase_url": settings.supabase_url,
+                "project_ref": settings.supabase_project_ref
+            },
+            "timestamp": health_status["checked_at"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database health check failed: {str(e)}")
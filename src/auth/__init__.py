@@ -21,9 +21,22 @@ from .jwt_utils import (
     is_token_near_expiry
 )
 
+# Signing Keys
+from .keyring import KeyRing, keyring
+
 # Password Management
 from .password_utils import hash_password, verify_password
 
+# Session Storage
+from .session_store import (
+    SessionStore,
+    MemorySessionStore,
+    RedisSessionStore,
+    PostgresSessionStore,
+    create_session_store,
+    resolve_session_store_backend
+)
+
 # Session Management  
 from .session_manager import SessionManager, session_manager
 
@@ -33,6 +46,12 @@ from .enhanced_session_manager import EnhancedSessionManager, enhanced_session_m
 # Token Blacklisting
 from .token_blacklist import TokenBlacklist, token_blacklist
 
+# Stateless Authentication
+from .stateless import RevocationSet, revocation_set
+
+# Refresh Token Rotation
+from .refresh_rotation import RefreshTokenError, RefreshTokenRotator, refresh_rotator
+
 __all__ = [
     # JWT Token Management
     "create_access_token",
@@ -50,10 +69,22 @@ __all__ = [
     "get_token_remaining_time",
     "is_token_near_expiry",
     
+    # Signing Keys
+    "KeyRing",
+    "keyring",
+    
     # Password Management
     "hash_password",
     "verify_password",
     
+    # Session Storage
+    "SessionStore",
+    "MemorySessionStore",
+    "RedisSessionStore",
+    "PostgresSessionStore",
+    "create_session_store",
+    "resolve_session_store_backend",
+    
     # Session Management
     "SessionManager", 
     "session_manager",
@@ -64,5 +95,14 @@ __all__ = [
     
     # Token Blacklisting
     "TokenBlacklist",
-    "token_blacklist"
+    "token_blacklist",
+    
+    # Stateless Authentication
+    "RevocationSet",
+    "revocation_set",
+    
+    # Refresh Token Rotation
+    "RefreshTokenError",
+    "RefreshTokenRotator",
+    "refresh_rotator"
 ] 
\ No newline at end of file
@@ -1,43 +1,75 @@
 """
 Enhanced Session Management for Agent-Makalah
-Comprehensive session management integrating JWT tokens, Redis storage, and token blacklisting
+Comprehensive session management integrating JWT tokens, session storage, and token blacklisting
 """
 
-import json
+import logging
 import uuid
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple, List
-from upstash_redis import Redis
 from src.core.config import settings
+from src.core.timing import timed
 from src.auth.jwt_utils import create_token_pair, validate_and_decode_token, get_user_id_from_token
 from src.auth.token_blacklist import token_blacklist
+from src.auth.stateless import STATELESS_CLAIMS, revocation_set
+from src.auth.session_activity import session_activity
+from src.auth.session_codec import epoch_now, epoch_to_iso, token_ref
+from src.auth.session_store import SessionStore, create_session_store
+
+
+logger = logging.getLogger(__name__)
+security_logger = logging.getLogger("agent_makalah.security")
 
 
 class EnhancedSessionManager:
     """
     Enhanced session manager with JWT token integration and blacklisting
+    
+    Sessions are kept in a SessionStore (see src.auth.session_store); the
+    backend is chosen by settings.session_store_backend.
     """
     
-    def __init__(self):
-        """Initialize enhanced session manager with Upstash Redis connection"""
-        self.redis = None
-        if settings.upstash_redis_url and settings.upstash_redis_token:
-            try:
-                self.redis = Redis(
-                    url=settings.upstash_redis_url,
-                    token=settings.upstash_redis_token
-                )
-            except Exception as e:
-                print(f"Failed to connect to Upstash Redis for session: {e}")
-                self.redis = None
+    # Redis key prefixes of the sessions and the per-user session index
+    SESSION_KEY_PREFIX = "enhanced_session:agent_makalah"
+    USER_SESSIONS_KEY_PREFIX = "user_sessions:agent_makalah"
     
-    def _get_session_key(self, session_id: str) -> str:
-        """Generate Redis key for session"""
-        return f"enhanced_session:agent_makalah:{session_id}"
+    def __init__(self, store: Optional[SessionStore] = None):
+        self._store = store
     
-    def _get_user_sessions_key(self, user_id: str) -> str:
-        """Generate Redis key for user's active sessions"""
-        return f"user_sessions:agent_makalah:{user_id}"
+    @property
+    def store(self) -> SessionStore:
+        """Session store selected by settings.session_store_backend, created on first use"""
+        if self._store is None:
+            self._store = create_session_store(self.SESSION_KEY_PREFIX, self.USER_SESSIONS_KEY_PREFIX)
+        return self._store
+    
+    @store.setter
+    def store(self, store: SessionStore) -> None:
+        self._store = store
+    
+    def _update_session(self, session_id: str, user_id: Optional[str] = None, **fields: Any) -> bool:
+        """
+        Set session fields in place and renew the session TTL
+        
+        Args:
+            session_id: Session identifier
+            user_id: Owner of the session, to reorder the user's session index
+            **fields: Session fields to set
+            
+        Returns:
+            bool: True if the session exists and was updated
+        """
+        return self.store.update(session_id, fields, settings.session_max_age, user_id)
+    
+    def record_activity(self, session_id: str, user_id: Optional[str] = None) -> None:
+        """
+        Note activity on a session; the last access time is written behind
+        (see src.auth.session_activity)
+        
+        Args:
+            session_id: Session identifier (the "sid" token claim)
+            user_id: Owner of the session (the "sub" token claim)
+        """
+        session_activity.touch(self.store, session_id, user_id=user_id)
     
     def create_authenticated_session(
         self, 
@@ -62,48 +94,74 @@ class EnhancedSessionManager:
         jwt_user_data = {
             "sub": user_id,
             "email": user_data.get("email"),
-            "is_superuser": user_data.get("is_superuser", False)
+            "is_superuser": user_data.get("is_superuser", False),
+            # Session id doubles as the refresh token family (see src.auth.refresh_rotation)
+            "sid": session_id
         }
         
+        # Stateless mode claims (see src.auth.stateless.stateless_user_claims)
+        for claim in STATELESS_CLAIMS:
+            if claim in user_data:
+                jwt_user_data[claim] = user_data[claim]
+        
         access_token, refresh_token = create_token_pair(jwt_user_data)
         
-        # Create session data
+        # Create session data (tokens are stored by reference, see src.auth.session_codec)
+        now = epoch_now()
+        access_jti, access_exp = token_ref(access_token)
+        refresh_jti, refresh_exp = token_ref(refresh_token)
         session_data = {
             "session_id": session_id,
             "user_id": user_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "last_accessed": datetime.utcnow().isoformat(),
-            "access_token": access_token,
-            "refresh_token": refresh_token,
+            "created_at": now,
+            "last_accessed": now,
+            "access_jti": access_jti,
+            "access_exp": access_exp,
+            "refresh_jti": refresh_jti,
+            "refresh_exp": refresh_exp,
             "user_data": user_data,
             "device_info": device_info or {},
             "is_active": True
         }
         
-        if self.redis:
-            try:
-                # Store session
-                session_key = self._get_session_key(session_id)
-                self.redis.setex(
-                    session_key,
-                    settings.session_max_age,
-                    json.dumps(session_data)
-                )
-                
-                # Track session for user
-                user_sessions_key = self._get_user_sessions_key(user_id)
-                self.redis.sadd(user_sessions_key, session_id)
-                self.redis.expire(user_sessions_key, settings.session_max_age)
-                
-                # Track tokens in blacklist manager
-                token_blacklist.track_user_token(user_id, access_token)
-                token_blacklist.track_user_token(user_id, refresh_token)
-                
-            except Exception as e:
-                print(f"Failed to create enhanced session in Redis: {e}")
+        try:
+            # Make room under the per-user cap, then store the session (indexed per user by the store)
+            self._enforce_session_cap(user_id)
+            self.store.create(session_data, settings.session_max_age)
+            
+            # Track tokens in blacklist manager
+            token_blacklist.track_user_token(user_id, access_token)
+            token_blacklist.track_user_token(user_id, refresh_token)
+            
+        except Exception as e:
+            logger.error(f"Failed to create enhanced session: {e}")
         
         return session_id, access_token, refresh_token
     
+    def _enforce_session_cap(self, user_id: str) -> int:
+        """
+        End the least recently active sessions of a user so that one more
+        fits under settings.max_sessions_per_user, and revoke their tokens
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            int: Number of sessions ended
+        """
+        if settings.max_sessions_per_user <= 0:
+            return 0
+        
+        evicted = self.store.trim_user_sessions(user_id, settings.max_sessions_per_user - 1)
+        for data in evicted:
+            self._revoke_session_tokens(data, "session_limit")
+        if evicted:
+            security_logger.info(
+                f"Ended {len(evicted)} least recently active sessions of user {user_id} "
+                f"(limit {settings.max_sessions_per_user})"
+            )
+        return len(evicted)
+    
     def get_session_from_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
         Get session data from JWT token
@@ -120,34 +178,28 @@ class EnhancedSessionManager:
             return None
         
         user_id = payload.get("sub")
-        if not user_id:
+        jti = payload.get("jti")
+        if not user_id or not jti:
             return None
         
-        # Find session containing this token
-        if self.redis:
-            try:
-                user_sessions_key = self._get_user_sessions_key(user_id)
-                session_ids = self.redis.smembers(user_sessions_key)
-                
-                for session_id in session_ids:
-                    session_key = self._get_session_key(session_id)
-                    session_data = self.redis.get(session_key)
+        # Find session containing this token: tokens carry their session id,
+        # older ones are matched against all of the user's sessions
+        try:
+            if payload.get("sid"):
+                session = self.store.get(payload["sid"])
+                candidates = [session] if session else []
+            else:
+                candidates = self.store.user_sessions(user_id)
+            
+            for data in candidates:
+                if data["user_id"] == user_id and jti in (data.get("access_jti"), data.get("refresh_jti")):
+                    # Update last accessed (buffered, written in the next activity flush)
+                    data["last_accessed"] = epoch_now()
+                    session_activity.touch(self.store, data["session_id"], data["last_accessed"], user_id)
+                    return data
                     
-                    if session_data:
-                        data = json.loads(session_data)
-                        if (data.get("access_token") == token or 
-                            data.get("refresh_token") == token):
-                            # Update last accessed
-                            data["last_accessed"] = datetime.utcnow().isoformat()
-                            self.redis.setex(
-                                session_key,
-                                settings.session_max_age,
-                                json.dumps(data)
-                            )
-                            return data
-                            
-            except Exception as e:
-                print(f"Failed to get session from token: {e}")
+        except Exception as e:
+            logger.error(f"Failed to get session from token: {e}")
         
         return None
     
@@ -181,34 +233,98 @@ class EnhancedSessionManager:
             return None
         
         # Update session with new access token
-        if self.redis:
-            try:
-                # Blacklist old access token
-                old_access_token = session_data.get("access_token")
-                if old_access_token:
-                    token_blacklist.blacklist_token(old_access_token, "token_refresh")
-                
-                # Update session
-                session_data["access_token"] = new_access_token
-                session_data["last_accessed"] = datetime.utcnow().isoformat()
-                
-                session_key = self._get_session_key(session_id)
-                self.redis.setex(
-                    session_key,
-                    settings.session_max_age,
-                    json.dumps(session_data)
-                )
-                
-                # Track new token
-                token_blacklist.track_user_token(user_id, new_access_token)
-                
-                return new_access_token, session_id
-                
-            except Exception as e:
-                print(f"Failed to refresh session token: {e}")
+        try:
+            # Blacklist old access token
+            self._revoke_session_tokens(session_data, "token_refresh", refresh=False)
+            
+            # Update session
+            access_jti, access_exp = token_ref(new_access_token)
+            self._update_session(
+                session_id, user_id, access_jti=access_jti, access_exp=access_exp, last_accessed=epoch_now()
+            )
+            
+            # Track new token
+            token_blacklist.track_user_token(user_id, new_access_token)
+            
+            return new_access_token, session_id
+            
+        except Exception as e:
+            logger.error(f"Failed to refresh session token: {e}")
         
         return None
     
+    def rotate_session_tokens(self, session_id: str, access_token: str, refresh_token: str) -> bool:
+        """
+        Store a rotated token pair in its session, looked up by session id,
+        and revoke the session's previous access token
+        
+        Args:
+            session_id: Session identifier (the tokens' "sid" claim)
+            access_token: New access token
+            refresh_token: New refresh token
+            
+        Returns:
+            bool: True if the session exists and was updated
+        """
+        try:
+            data = self.store.get(session_id)
+            if not data:
+                return False
+            
+            # Blacklist the access token issued with the consumed refresh token
+            self._revoke_session_tokens(data, "token_refresh", refresh=False)
+            
+            access_jti, access_exp = token_ref(access_token)
+            refresh_jti, refresh_exp = token_ref(refresh_token)
+            if not self._update_session(
+                session_id, data["user_id"], access_jti=access_jti, access_exp=access_exp,
+                refresh_jti=refresh_jti, refresh_exp=refresh_exp, last_accessed=epoch_now()
+            ):
+                return False
+            
+            token_blacklist.track_user_token(data["user_id"], access_token)
+            token_blacklist.track_user_token(data["user_id"], refresh_token)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to rotate session tokens: {e}")
+            return False
+    
+    def end_session(self, session_id: str, user_id: str) -> bool:
+        """
+        Remove a session without touching its tokens
+        
+        Args:
+            session_id: Session identifier
+            user_id: Session owner
+            
+        Returns:
+            bool: True if the session was removed
+        """
+        try:
+            return self.store.delete(session_id, user_id)
+            
+        except Exception as e:
+            logger.error(f"Failed to end session {session_id}: {e}")
+            return False
+    
+    def _revoke_session_tokens(self, data: Dict[str, Any], reason: str, refresh: bool = True) -> None:
+        """
+        Blacklist the tokens a session references
+        
+        Args:
+            data: Decoded session data
+            reason: Reason for blacklisting
+            refresh: Also blacklist the refresh token
+        """
+        now = epoch_now()
+        if data.get("access_jti"):
+            token_blacklist.blacklist_jti(data["access_jti"], data["access_exp"] - now, reason)
+            # Stateless nodes check access tokens against their local revocation set
+            revocation_set.revoke_token(data["access_jti"], data["access_exp"])
+        if refresh and data.get("refresh_jti"):
+            token_blacklist.blacklist_jti(data["refresh_jti"], data["refresh_exp"] - now, reason)
+    
     def logout_session(self, token: str) -> bool:
         """
         Logout a specific session using any valid token
@@ -226,29 +342,17 @@ class EnhancedSessionManager:
         session_id = session_data["session_id"]
         user_id = session_data["user_id"]
         
-        if self.redis:
-            try:
-                # Blacklist both tokens
-                access_token = session_data.get("access_token")
-                refresh_token = session_data.get("refresh_token")
-                
-                if access_token:
-                    token_blacklist.blacklist_token(access_token, "user_logout")
-                if refresh_token:
-                    token_blacklist.blacklist_token(refresh_token, "user_logout")
-                
-                # Remove session
-                session_key = self._get_session_key(session_id)
-                self.redis.delete(session_key)
-                
-                # Remove from user sessions
-                user_sessions_key = self._get_user_sessions_key(user_id)
-                self.redis.srem(user_sessions_key, session_id)
-                
-                return True
-                
-            except Exception as e:
-                print(f"Failed to logout session: {e}")
+        try:
+            # Blacklist both tokens
+            self._revoke_session_tokens(session_data, "user_logout")
+            
+            # Remove session (and its entry in the user's sessions)
+            self.store.delete(session_id, user_id)
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to logout session: {e}")
         
         return False
     
@@ -262,89 +366,67 @@ class EnhancedSessionManager:
         Returns:
             int: Number of sessions logged out
         """
-        if not self.redis:
-            return 0
-        
         try:
-            # Get all user sessions
-            user_sessions_key = self._get_user_sessions_key(user_id)
-            session_ids = self.redis.smembers(user_sessions_key)
+            # Remove all user sessions
+            sessions = self.store.delete_user_sessions(user_id)
             
             logged_out_count = 0
             
-            for session_id in session_ids:
+            for data in sessions:
                 try:
-                    session_key = self._get_session_key(session_id)
-                    session_data = self.redis.get(session_key)
+                    # Blacklist tokens
+                    self._revoke_session_tokens(data, "mass_logout")
+                    logged_out_count += 1
                     
-                    if session_data:
-                        data = json.loads(session_data)
-                        
-                        # Blacklist tokens
-                        access_token = data.get("access_token")
-                        refresh_token = data.get("refresh_token")
-                        
-                        if access_token:
-                            token_blacklist.blacklist_token(access_token, "mass_logout")
-                        if refresh_token:
-                            token_blacklist.blacklist_token(refresh_token, "mass_logout")
-                        
-                        # Delete session
-                        self.redis.delete(session_key)
-                        logged_out_count += 1
-                        
                 except Exception as e:
-                    print(f"Failed to logout session {session_id}: {e}")
-            
-            # Clear user sessions set
-            self.redis.delete(user_sessions_key)
+                    logger.error(f"Failed to logout session {data.get('session_id')}: {e}")
             
-            print(f"Logged out {logged_out_count} sessions for user {user_id}")
+            security_logger.info(f"Logged out {logged_out_count} sessions for user {user_id}")
             return logged_out_count
             
         except Exception as e:
-            print(f"Failed to logout all user sessions: {e}")
+            logger.error(f"Failed to logout all user sessions: {e}")
             return 0
     
-    def get_user_active_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+    @timed("sessions")
+    def get_user_active_sessions(
+        self, user_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Get all active sessions for a user
+        Get active sessions for a user, most recently active first
         
         Args:
             user_id: User identifier
+            offset: Number of sessions to skip
+            limit: Maximum number of sessions to return (None: all)
             
         Returns:
             List[Dict[str, Any]]: List of active session data
         """
-        if not self.redis:
-            return []
-        
         try:
-            user_sessions_key = self._get_user_sessions_key(user_id)
-            session_ids = self.redis.smembers(user_sessions_key)
-            
             active_sessions = []
             
-            for session_id in session_ids:
-                session_key = self._get_session_key(session_id)
-                session_data = self.redis.get(session_key)
+            for data in self.store.user_sessions(user_id, offset, limit):
+                # Activity this worker has not flushed yet
+                last_accessed = max(
+                    data.get("last_accessed") or 0,
+                    session_activity.pending(self.store, data["session_id"]) or 0
+                )
                 
-                if session_data:
-                    data = json.loads(session_data)
-                    # Remove sensitive tokens from response
-                    safe_data = {
-                        "session_id": data.get("session_id"),
-                        "created_at": data.get("created_at"),
-                        "last_accessed": data.get("last_accessed"),
-                        "device_info": data.get("device_info", {}),
-                        "is_active": data.get("is_active", True)
-                    }
-                    active_sessions.append(safe_data)
+                # Remove sensitive tokens from response
+                safe_data = {
+                    "session_id": data.get("session_id"),
+                    "created_at": epoch_to_iso(data.get("created_at")),
+                    "last_accessed": epoch_to_iso(last_accessed or None),
+                    "device_info": data.get("device_info", {}),
+                    "is_active": data.get("is_active", True)
+                }
+                active_sessions.append(safe_data)
             
             return active_sessions
             
         except Exception as e:
-            print(f"Failed to get user active sessions: {e}")
+            logger.error(f"Failed to get user active sessions: {e}")
             return []
     
     def validate_session_token(self, token: str) -> Optional[Dict[str, Any]]:
@@ -366,7 +448,7 @@ class EnhancedSessionManager:
             "user_id": session_data["user_id"],
             "session_id": session_data["session_id"],
             "user_data": session_data["user_data"],
-            "last_accessed": session_data["last_accessed"]
+            "last_accessed": epoch_to_iso(session_data["last_accessed"])
         }
     
     def cleanup_expired_sessions(self) -> int:
@@ -0,0 +1,144 @@
+"""
+Batch Token Introspection for Agent-Makalah Backend
+Checks many tokens at once: signatures in memory, revocation in one Redis MGET,
+users in one database query
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from jose import ExpiredSignatureError, JWTError
+from src.auth.jwt_utils import _decode
+from src.auth.token_blacklist import token_blacklist
+from src.auth.stateless import revocation_set
+from src.core.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Reasons reported for inactive tokens
+REASON_INVALID = "invalid"
+REASON_EXPIRED = "expired"
+REASON_REVOKED = "revoked"
+REASON_USER_NOT_FOUND = "user_not_found"
+REASON_USER_INACTIVE = "user_inactive"
+
+
+def _inactive(reason: str) -> Dict[str, Any]:
+    return {"active": False, "reason": reason}
+
+
+def decode_many(tokens: List[str]) -> List[Any]:
+    """
+    Verify and decode tokens in one pass
+
+    Args:
+        tokens: Encoded JWTs
+
+    Returns:
+        List[Any]: Payload dict per token, or the inactive reason string
+    """
+    decoded = []
+    for token in tokens:
+        try:
+            decoded.append(_decode(token))
+        except ExpiredSignatureError:
+            decoded.append(REASON_EXPIRED)
+        except (JWTError, AttributeError, ValueError):
+            decoded.append(REASON_INVALID)
+    return decoded
+
+
+def revoked_flags(payloads: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Check blacklist entries (and revocation epochs in stateless mode) with one MGET
+
+    Args:
+        payloads: Decoded token payloads
+
+    Returns:
+        List[bool]: True for each revoked token; nothing is revoked if Redis is unavailable
+    """
+    if not payloads or not token_blacklist.redis:
+        return [False] * len(payloads)
+
+    keys = [token_blacklist._get_blacklist_key(token_blacklist._jti_from_payload(p) or "") for p in payloads]
+    user_ids: List[str] = []
+    if revocation_set.enabled:
+        user_ids = list(dict.fromkeys(str(p.get("sub")) for p in payloads))
+        keys += [revocation_set._get_epoch_key(user_id) for user_id in user_ids]
+
+    try:
+        values = token_blacklist.redis.mget(*keys)
+    except Exception as e:
+        logger.error(f"Failed to check revocation for {len(payloads)} tokens: {e}")
+        return [False] * len(payloads)
+
+    blacklisted = [value is not None for value in values[:len(payloads)]]
+    epochs = {user_id: int(value or 0) for user_id, value in zip(user_ids, values[len(payloads):])}
+    return [
+        is_blacklisted or int(payload.get("rev", 0)) < epochs.get(str(payload.get("sub")), 0)
+        for is_blacklisted, payload in zip(blacklisted, payloads)
+    ]
+
+
+async def introspect_tokens(tokens: List[str], user_crud: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    Introspect a batch of tokens
+
+    Args:
+        tokens: Encoded JWTs
+        user_crud: User CRUD used for the batched user query (defaults to the shared one)
+
+    Returns:
+        List[Dict[str, Any]]: One result per token, in request order. Active
+            tokens report sub, email, is_superuser, token_type, exp, iat and
+            jti; inactive ones report a reason.
+    """
+    if user_crud is None:
+        from src.crud.crud_user import user_crud
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(tokens)
+
+    with span("jwt"):
+        decoded = decode_many(tokens)
+
+    valid = []
+    for index, payload in enumerate(decoded):
+        if isinstance(payload, str):
+            results[index] = _inactive(payload)
+        elif not payload.get("sub"):
+            results[index] = _inactive(REASON_INVALID)
+        else:
+            valid.append((index, payload))
+
+    with span("blacklist"):
+        revoked = revoked_flags([payload for _, payload in valid])
+
+    remaining = []
+    for (index, payload), is_revoked in zip(valid, revoked):
+        if is_revoked:
+            results[index] = _inactive(REASON_REVOKED)
+        else:
+            remaining.append((index, payload))
+
+    users = await user_crud.get_users_by_ids([payload["sub"] for _, payload in remaining]) if remaining else {}
+
+    for index, payload in remaining:
+        user = users.get(str(payload["sub"]))
+        if user is None:
+            results[index] = _inactive(REASON_USER_NOT_FOUND)
+        elif not user.is_active:
+            results[index] = _inactive(REASON_USER_INACTIVE)
+        else:
+            results[index] = {
+                "active": True,
+                "sub": str(user.id),
+                "email": user.email,
+                "is_superuser": user.is_superuser,
+                "token_type": payload.get("type"),
+                "exp": payload.get("exp"),
+                "iat": payload.get("iat"),
+                "jti": payload.get("jti")
+            }
+
+    return results
@@ -7,8 +7,39 @@ import uuid
 import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
-from jose import JWTError, jwt
+from jose import JWTError  # jose.exceptions only; jose.jwt is imported on first use
 from src.core.config import settings
+from src.core.timing import span
+from src.auth.keyring import keyring
+
+_jose_jwt = None
+
+
+def _jwt():
+    """Get the jose.jwt module, importing it on first use"""
+    global _jose_jwt
+    if _jose_jwt is None:
+        from jose import jwt
+        _jose_jwt = jwt
+    return _jose_jwt
+
+
+def _encode(claims: Dict[str, Any]) -> str:
+    """Sign claims with the keyring's active key (HS256 secret if none)"""
+    key, algorithm, headers = keyring.signing_key()
+    return _jwt().encode(claims, key, algorithm=algorithm, headers=headers)
+
+
+def _decode(token: str) -> Dict[str, Any]:
+    """
+    Verify and decode a token with the key selected by its kid header
+
+    Raises:
+        JWTError: If the token is malformed, unsigned by a known key or expired
+    """
+    jwt = _jwt()
+    key, algorithms = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+    return jwt.decode(token, key, algorithms=algorithms)
 
 
 def create_access_token(
@@ -32,6 +63,9 @@ def create_access_token(
     
     if expires_delta:
         expire_seconds = int(expires_delta.total_seconds())
+    elif settings.auth_mode == "stateless":
+        # Claims are trusted until expiry: keep the window short
+        expire_seconds = settings.stateless_access_token_expire_minutes * 60
     else:
         expire_seconds = settings.jwt_access_token_expire_minutes * 60
     
@@ -44,11 +78,7 @@ def create_access_token(
         "type": "access"
     })
     
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.jwt_secret_key, 
-        algorithm=settings.jwt_algorithm
-    )
+    encoded_jwt = _encode(to_encode)
     
     return encoded_jwt
 
@@ -78,11 +108,7 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
         "type": "refresh"
     })
     
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.jwt_secret_key, 
-        algorithm=settings.jwt_algorithm
-    )
+    encoded_jwt = _encode(to_encode)
     
     return encoded_jwt
 
@@ -119,11 +145,7 @@ def verify_token(token: str, token_type: Optional[str] = None) -> bool:
         return False
         
     try:
-        payload = jwt.decode(
-            token, 
-            settings.jwt_secret_key, 
-            algorithms=[settings.jwt_algorithm]
-        )
+        payload = _decode(token)
         
         # Check token type if specified
         if token_type and payload.get("type") != token_type:
@@ -158,11 +180,7 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         Optional[Dict[str, Any]]: Token payload if valid, None otherwise
     """
     try:
-        payload = jwt.decode(
-            token, 
-            settings.jwt_secret_key, 
-            algorithms=[settings.jwt_algorithm]
-        )
+        payload = _decode(token)
         return payload
     except JWTError:
         return None
@@ -283,20 +301,23 @@ def validate_and_decode_token(token: str, check_blacklist: bool = True) -> Optio
         Optional[Dict[str, Any]]: Token payload if valid, None otherwise
     """
     # First verify token structure and signature
-    if not verify_token(token):
-        return None
+    with span("jwt"):
+        if not verify_token(token):
+            return None
     
     # Check if token is blacklisted
     if check_blacklist:
         try:
             from src.auth.token_blacklist import token_blacklist
-            if token_blacklist.is_token_blacklisted(token):
-                return None
+            with span("blacklist"):
+                if token_blacklist.is_token_blacklisted(token):
+                    return None
         except ImportError:
             pass  # Blacklist not available
     
     # Decode and return payload
-    return decode_token(token)
+    with span("jwt"):
+        return decode_token(token)
 
 
 def get_token_remaining_time(token: str) -> Optional[timedelta]:
@@ -0,0 +1,417 @@
+"""
+JWT Signing Keyring for Agent-Makalah Backend
+kid-indexed asymmetric signing keys with zero-downtime rotation and a JWKS document
+
+Keys come from Settings (JWT_KEYRING) or a JSON keyring file with hot reload:
+
+    {
+        "active": "2026-10-a",
+        "keys": [
+            {"kid": "2026-10-a", "alg": "ES256", "private_key_file": "keys/2026-10-a.pem"},
+            {"kid": "2026-07-a", "alg": "ES256", "public_key": "-----BEGIN PUBLIC KEY-----..."}
+        ]
+    }
+
+Tokens are signed with the active key and carry its kid in the header; any key
+in the ring verifies tokens carrying its kid. Relative key file paths are
+resolved against the keyring file's directory. Every key is parsed once per
+load into a ready-to-use key object, so verification is a dict lookup plus the
+signature check.
+
+Without an active key the ring falls back to HS256 with jwt_secret_key. Once a
+key is active, tokens without a kid (issued before the ring was configured) are
+rejected: anyone holding jwt_secret_key could keep minting them. To log nobody
+out, set jwt_legacy_tokens_until to the activation time plus one refresh token
+lifetime; kid-less tokens are verified with jwt_secret_key until then.
+
+Rotation without logging anyone out:
+    1. python -m src.auth.keyring generate --kid <new>    (published, verify-only)
+    2. wait for every instance to reload and JWKS caches to expire
+    3. python -m src.auth.keyring activate <new>          (new tokens use it)
+    4. drop the old key once its last refresh token has expired
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from jose import JWTError
+from jose.exceptions import JOSEError
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Asymmetric algorithms accepted in the keyring
+SUPPORTED_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """
+    One parsed keyring entry
+
+    key is the private key object for signing keys and the public key object
+    for verify-only keys; verifier is always the public key object.
+    """
+
+    kid: str
+    algorithm: str
+    key: Any
+    verifier: Any
+    can_sign: bool
+    public_jwk: Dict[str, Any]
+
+
+def _construct(key_data: Any, algorithm: str) -> Any:
+    from jose import jwk
+    return jwk.construct(key_data, algorithm)
+
+
+def _read_key(entry: Dict[str, Any], field: str, base_dir: Optional[str]) -> Optional[str]:
+    """Inline PEM from entry[field] or the contents of entry[field + '_file']"""
+    if entry.get(field):
+        return entry[field]
+
+    path = entry.get(f"{field}_file")
+    if not path:
+        return None
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    with open(path, "r", encoding="utf-8") as key_file:
+        return key_file.read()
+
+
+def parse_key(entry: Dict[str, Any], base_dir: Optional[str] = None) -> SigningKey:
+    """
+    Parse a keyring entry into key objects
+
+    Args:
+        entry: {"kid", "alg", and private_key[_file] or public_key[_file]}
+        base_dir: Directory for relative key file paths
+
+    Returns:
+        SigningKey: Parsed key
+
+    Raises:
+        ValueError: If the entry is incomplete or the algorithm is unsupported
+    """
+    kid = entry.get("kid")
+    algorithm = entry.get("alg", "ES256")
+    if not kid:
+        raise ValueError("Keyring entry without kid")
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise ValueError(f"Unsupported algorithm for key {kid}: {algorithm}")
+
+    private_pem = _read_key(entry, "private_key", base_dir)
+    if private_pem:
+        key = _construct(private_pem, algorithm)
+        verifier = key.public_key()
+    else:
+        public_pem = _read_key(entry, "public_key", base_dir)
+        if not public_pem:
+            raise ValueError(f"Keyring entry {kid} has no private_key or public_key")
+        key = verifier = _construct(public_pem, algorithm)
+
+    public_jwk = verifier.to_dict()
+    public_jwk.update({"kid": kid, "use": "sig", "alg": algorithm})
+
+    return SigningKey(
+        kid=kid,
+        algorithm=algorithm,
+        key=key,
+        verifier=verifier,
+        can_sign=bool(private_pem),
+        public_jwk=public_jwk
+    )
+
+
+class KeyRing:
+    """
+    Active signing key plus kid-indexed verification keys
+
+    The keyring file is re-read when its modification time changes (checked at
+    most once per reload interval). A broken file keeps the previous keys.
+    """
+
+    def __init__(
+        self,
+        keyring_file: Optional[str] = None,
+        reload_interval: Optional[int] = None
+    ):
+        self.keyring_file = keyring_file if keyring_file is not None else settings.jwt_keyring_file
+        self.reload_interval = (
+            reload_interval if reload_interval is not None else settings.jwt_keyring_reload_interval
+        )
+
+        self.keys: Dict[str, SigningKey] = {}
+        self.active: Optional[SigningKey] = None
+        self._jwks_body: Optional[bytes] = None
+
+        self._file_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reload_count = 0
+
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Rebuild the ring from Settings and the keyring file
+
+        Returns:
+            bool: True if keys were loaded successfully
+        """
+        data: Dict[str, Any] = {
+            "active": settings.jwt_keyring.get("active"),
+            "keys": list(settings.jwt_keyring.get("keys", []))
+        }
+        base_dir = None
+
+        try:
+            if self.keyring_file:
+                self._file_mtime = os.path.getmtime(self.keyring_file)
+                with open(self.keyring_file, "r", encoding="utf-8") as keyring_file:
+                    file_data = json.load(keyring_file)
+                base_dir = os.path.dirname(os.path.abspath(self.keyring_file))
+                data["keys"] += file_data.get("keys", [])
+                data["active"] = file_data.get("active") or data["active"]
+
+            keys = {}
+            for entry in data["keys"]:
+                key = parse_key(entry, base_dir)
+                keys[key.kid] = key
+
+            active = None
+            if data["active"]:
+                active = keys.get(data["active"])
+                if active is None or not active.can_sign:
+                    raise ValueError(f"Active key {data['active']} is missing or has no private key")
+        except (OSError, ValueError, TypeError, KeyError, AttributeError, JOSEError) as e:
+            # Keep signing and verifying with the previous keys if the file is broken
+            logger.error(f"Failed to load JWT keyring {self.keyring_file or '(settings)'}: {e}")
+            if self.reload_count:
+                return False
+            keys, active = {}, None
+
+        self.keys = keys
+        self.active = active
+        self._jwks_body = None
+        self.reload_count += 1
+        return True
+
+    def maybe_reload(self) -> bool:
+        """
+        Reload keys if the keyring file changed since the last load
+
+        Returns:
+            bool: True if keys were reloaded
+        """
+        if not self.keyring_file:
+            return False
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+
+        try:
+            mtime = os.path.getmtime(self.keyring_file)
+        except OSError:
+            return False
+
+        if mtime == self._file_mtime:
+            return False
+
+        logger.info(f"JWT keyring file changed, reloading: {self.keyring_file}")
+        return self.reload()
+
+    def signing_key(self) -> Tuple[Any, str, Optional[Dict[str, str]]]:
+        """
+        Key, algorithm and headers for signing a new token
+
+        Returns:
+            Tuple of the key (object or HS256 secret), algorithm and JWT headers
+        """
+        self.maybe_reload()
+        active = self.active
+        if active is None:
+            return settings.jwt_secret_key, settings.jwt_algorithm, None
+        return active.key, active.algorithm, {"kid": active.kid}
+
+    def verification_key(self, kid: Optional[str]) -> Tuple[Any, List[str]]:
+        """
+        Key and allowed algorithms for verifying a token
+
+        Args:
+            kid: Key id from the token header (None for legacy tokens)
+
+        Returns:
+            Tuple of the key (object or HS256 secret) and allowed algorithms
+
+        Raises:
+            JWTError: If the kid is unknown or kid-less tokens are not accepted
+        """
+        self.maybe_reload()
+
+        if kid is None:
+            if self.active is None or _legacy_tokens_accepted():
+                return settings.jwt_secret_key, [settings.jwt_algorithm]
+            raise JWTError("Token has no key id")
+
+        key = self.keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        # Pinning the algorithm to the key rules out algorithm confusion
+        return key.verifier, [key.algorithm]
+
+    def jwks(self) -> Dict[str, Any]:
+        """
+        Public JWK Set of every key in the ring (never includes HS256 secrets)
+
+        Returns:
+            Dict[str, Any]: {"keys": [...]}, active key first
+        """
+        keys = sorted(self.keys.values(), key=lambda key: key is not self.active)
+        return {"keys": [key.public_jwk for key in keys]}
+
+    def jwks_body(self) -> bytes:
+        """
+        Serialized JWK Set, rebuilt only after a reload
+
+        Returns:
+            bytes: JSON body
+        """
+        import orjson
+
+        self.maybe_reload()
+        body = self._jwks_body
+        if body is None:
+            body = self._jwks_body = orjson.dumps(self.jwks())
+        return body
+
+
+# Global keyring instance
+keyring = KeyRing()
+
+
+# === KEY MANAGEMENT CLI ===
+
+def _legacy_tokens_accepted() -> bool:
+    """True while kid-less tokens are still accepted next to an active key"""
+    until = settings.jwt_legacy_tokens_until
+    if until is None:
+        return False
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) < until
+
+
+def _load_file(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"active": None, "keys": []}
+    with open(path, "r", encoding="utf-8") as keyring_file:
+        return json.load(keyring_file)
+
+
+def _write_file(path: str, data: Dict[str, Any]) -> None:
+    # Replace atomically so a reloading worker never reads a half-written file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as keyring_file:
+        json.dump(data, keyring_file, indent=2)
+    os.replace(temp_path, path)
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    """
+    Generate a PEM (PKCS#8) private key for an algorithm
+
+    Args:
+        algorithm: One of SUPPORTED_ALGORITHMS
+
+    Returns:
+        bytes: Unencrypted PEM private key
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm.startswith("RS"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=3072)
+    else:
+        curve = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}[algorithm]
+        private_key = ec.generate_private_key(curve())
+
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the JWT signing keyring")
+    parser.add_argument("--keyring", default=settings.jwt_keyring_file, help="Keyring JSON file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Add a new signing key (verify-only until activated)")
+    generate.add_argument("--kid", required=True)
+    generate.add_argument("--alg", default="ES256", choices=SUPPORTED_ALGORITHMS)
+    generate.add_argument("--activate", action="store_true", help="Sign new tokens with it right away")
+
+    activate = commands.add_parser("activate", help="Sign new tokens with an existing key")
+    activate.add_argument("kid")
+
+    retire = commands.add_parser("retire", help="Remove a key that is no longer active")
+    retire.add_argument("kid")
+
+    commands.add_parser("jwks", help="Print the public JWK Set")
+
+    args = parser.parse_args(argv)
+    if not args.keyring:
+        parser.error("--keyring or JWT_KEYRING_FILE is required")
+
+    data = _load_file(args.keyring)
+    kids = [entry.get("kid") for entry in data.get("keys", [])]
+
+    if args.command == "generate":
+        if args.kid in kids:
+            parser.error(f"Key {args.kid} already exists")
+        key_dir = os.path.dirname(os.path.abspath(args.keyring))
+        key_path = os.path.join(key_dir, f"{args.kid}.pem")
+        descriptor = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "wb") as key_file:
+            key_file.write(generate_private_key(args.alg))
+        data.setdefault("keys", []).append(
+            {"kid": args.kid, "alg": args.alg, "private_key_file": os.path.basename(key_path)}
+        )
+        if args.activate:
+            data["active"] = args.kid
+        _write_file(args.keyring, data)
+        print(f"Added key {args.kid} ({args.alg}) -> {key_path}; active: {data.get('active')}")
+
+    elif args.command == "activate":
+        if args.kid not in kids:
+            parser.error(f"Unknown key {args.kid}")
+        data["active"] = args.kid
+        _write_file(args.keyring, data)
+        print(f"Active key: {args.kid}")
+
+    elif args.command == "retire":
+        if args.kid == data.get("active"):
+            parser.error("Activate another key before retiring the active one")
+        data["keys"] = [entry for entry in data.get("keys", []) if entry.get("kid") != args.kid]
+        _write_file(args.keyring, data)
+        print(f"Retired key {args.kid}; tokens signed with it no longer verify")
+
+    else:
+        print(json.dumps(KeyRing(keyring_file=args.keyring, reload_interval=0).jwks(), indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
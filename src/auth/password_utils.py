@@ -3,15 +3,91 @@ Password Hashing Utilities
 Secure password hashing and verification using bcrypt for Agent-Makalah authentication
 """
 
-from passlib.context import CryptContext
+import math
+import time
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from src.core.config import settings
+from src.core.metrics import password_hash_duration, password_hash_in_flight
+from src.core.timing import record_span
 
-# Create password context for bcrypt hashing
-pwd_context = CryptContext(
-    schemes=["bcrypt"], 
-    deprecated="auto",
-    bcrypt__rounds=settings.password_hash_rounds
-)
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# Password context for bcrypt hashing, built on first use (passlib/bcrypt import is slow)
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+_pwd_rounds = settings.password_hash_rounds
+
+# bcrypt's cost factor is exponential; passlib's bcrypt accepts 4..31 rounds
+MAX_HASH_ROUNDS = 16
+
+
+def get_pwd_context() -> "CryptContext":
+    """
+    Get the bcrypt password context, creating it on first use
+    
+    Returns:
+        CryptContext: Shared password context
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+                _pwd_context = CryptContext(
+                    schemes=["bcrypt"], 
+                    deprecated="auto",
+                    bcrypt__rounds=_pwd_rounds
+                )
+    return _pwd_context
+
+
+def calibrate_hash_cost(target_ms: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Warm up the bcrypt backend and optionally raise the cost factor to a time budget
+    
+    One hash is timed at the configured rounds. Each extra round doubles the
+    cost, so with a target the rounds are raised to the highest value whose
+    extrapolated time stays within it. The configured rounds are a floor:
+    calibration never weakens hashing. Existing hashes keep verifying with the
+    rounds stored in them.
+    
+    Args:
+        target_ms: Desired hash time in milliseconds (None only warms up)
+        
+    Returns:
+        Dict[str, Any]: Rounds in use and measured hash time at the configured rounds
+    """
+    global _pwd_context, _pwd_rounds
+    
+    baseline = get_pwd_context().handler().using(rounds=settings.password_hash_rounds)
+    start = time.perf_counter()
+    baseline.hash("calibration-password")
+    measured_ms = (time.perf_counter() - start) * 1000
+    
+    rounds = settings.password_hash_rounds
+    if target_ms and measured_ms > 0:
+        extra = int(math.floor(math.log2(target_ms / measured_ms)))
+        rounds = min(MAX_HASH_ROUNDS, rounds + max(0, extra))
+    
+    if rounds != _pwd_rounds:
+        with _pwd_context_lock:
+            _pwd_rounds = rounds
+            _pwd_context = None
+    
+    return {
+        "rounds": rounds,
+        "measured_ms": round(measured_ms, 1),
+        "estimated_ms": round(measured_ms * 2 ** (rounds - settings.password_hash_rounds), 1)
+    }
+
+
+def __getattr__(name: str):
+    # Backwards compatible module attribute: password_utils.pwd_context
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def hash_password(password: str) -> str:
@@ -24,7 +100,15 @@ def hash_password(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    return pwd_context.hash(password)
+    password_hash_in_flight.inc("hash")
+    start = time.perf_counter()
+    try:
+        return get_pwd_context().hash(password)
+    finally:
+        duration = time.perf_counter() - start
+        password_hash_duration.observe(duration, "hash")
+        record_span("bcrypt", duration)
+        password_hash_in_flight.dec("hash")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -38,7 +122,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    password_hash_in_flight.inc("verify")
+    start = time.perf_counter()
+    try:
+        return get_pwd_context().verify(plain_password, hashed_password)
+    finally:
+        duration = time.perf_counter() - start
+        password_hash_duration.observe(duration, "verify")
+        record_span("bcrypt", duration)
+        password_hash_in_flight.dec("verify")
 
 
 def is_password_strong(password: str) -> tuple[bool, list[str]]:
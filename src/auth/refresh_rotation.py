@@ -0,0 +1,263 @@
+"""
+Refresh Token Rotation for Agent-Makalah Backend
+One-time-use refresh tokens with family tracking, reuse detection and single-flight refresh
+
+Every refresh consumes the presented refresh token and returns a new access
+and refresh token pair in the same family (the login session id, "sid"
+claim). Consuming is an atomic SET NX on a per-token marker, so exactly one
+request rotates a given token across all workers:
+
+- requests for the same token in the same worker share the in-flight
+  rotation (single-flight)
+- requests in other workers within refresh_reuse_grace_seconds get the
+  stored result of the rotation (several tabs refreshing at once)
+- a consumed token presented after the grace period means it was copied:
+  the whole family is revoked (latest access and refresh tokens blacklisted,
+  session ended) and the user has to log in again
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from src.auth.enhanced_session_manager import enhanced_session_manager
+from src.auth.jwt_utils import create_token_pair, decode_token
+from src.auth.stateless import revocation_set, stateless_user_claims
+from src.auth.token_blacklist import token_blacklist
+from src.core.config import settings
+from src.core.metrics import auth_refresh_outcomes
+from src.database.redis_client import SharedRedis
+from src.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+security_logger = logging.getLogger("agent_makalah.security")
+
+# Longest a request waits for a rotation running in another worker
+ROTATION_WAIT_SECONDS = 2.0
+ROTATION_POLL_SECONDS = 0.05
+
+
+class RefreshTokenError(Exception):
+    """Refresh rejected; the message is safe to return to the client"""
+
+
+class RefreshTokenRotator:
+    """
+    Rotates refresh tokens and detects reuse of consumed ones
+    """
+
+    # Shared Upstash Redis client, created on first use (see src.database.redis_client)
+    redis = SharedRedis()
+
+    def __init__(self, grace_seconds: Optional[int] = None):
+        self.grace_seconds = grace_seconds if grace_seconds is not None else settings.refresh_reuse_grace_seconds
+        self.flights = SingleFlight()
+
+    def _get_used_key(self, jti: str) -> str:
+        """Generate Redis key marking a consumed refresh token"""
+        return f"refresh_used:agent_makalah:{jti}"
+
+    def _get_result_key(self, jti: str) -> str:
+        """Generate Redis key holding the rotation result during the grace period"""
+        return f"refresh_result:agent_makalah:{jti}"
+
+    def _get_family_key(self, family: str) -> str:
+        """Generate Redis key for a refresh token family's latest tokens"""
+        return f"refresh_family:agent_makalah:{family}"
+
+    async def refresh(self, refresh_token: str, user_crud: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Exchange a refresh token for a new token pair
+
+        Args:
+            refresh_token: Refresh token presented by the client
+            user_crud: User CRUD for the user lookup (defaults to the shared one)
+
+        Returns:
+            Dict[str, Any]: access_token, refresh_token, session_id and session_updated
+
+        Raises:
+            RefreshTokenError: If the token is invalid, revoked, reused or the user is inactive
+        """
+        if user_crud is None:
+            from src.crud.crud_user import user_crud
+
+        payload = decode_token(refresh_token)
+        if not payload or payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+            auth_refresh_outcomes.inc("rejected")
+            raise RefreshTokenError("Invalid refresh token")
+
+        jti = payload["jti"]
+        if jti in self.flights:
+            auth_refresh_outcomes.inc("coalesced")
+        return await self.flights.do(jti, lambda: self._refresh(payload, user_crud))
+
+    async def _refresh(self, payload: Dict[str, Any], user_crud: Any) -> Dict[str, Any]:
+        jti = payload["jti"]
+
+        if not self.redis:
+            # No shared state: rotate without reuse detection
+            return await self._rotate(payload, user_crud)
+
+        deadline = time.monotonic() + ROTATION_WAIT_SECONDS
+        while True:
+            if await asyncio.to_thread(self._claim, jti, payload["exp"]):
+                try:
+                    return await self._rotate(payload, user_crud)
+                except Exception:
+                    # Nothing was issued: let the client retry with the same token
+                    await asyncio.to_thread(self.redis.delete, self._get_used_key(jti))
+                    raise
+
+            result, consumed_at = await asyncio.to_thread(self._read_rotation, jti)
+            if result is not None:
+                auth_refresh_outcomes.inc("shared")
+                return result
+
+            if consumed_at is not None and time.time() - consumed_at > self.grace_seconds:
+                auth_refresh_outcomes.inc("reuse_detected")
+                await asyncio.to_thread(self._revoke_family, payload)
+                raise RefreshTokenError("Refresh token reuse detected, please log in again")
+
+            # Another worker is rotating this token (or just gave up): wait for it
+            if time.monotonic() >= deadline:
+                auth_refresh_outcomes.inc("rejected")
+                raise RefreshTokenError("Refresh in progress, retry")
+            await asyncio.sleep(ROTATION_POLL_SECONDS)
+
+    def _claim(self, jti: str, expires_at: int) -> bool:
+        """Mark the token consumed; True for the one caller that gets to rotate it"""
+        ttl = max(1, int(expires_at - time.time()))
+        return bool(self.redis.set(self._get_used_key(jti), str(time.time()), nx=True, ex=ttl))
+
+    def _read_rotation(self, jti: str):
+        result, consumed_at = self.redis.mget(self._get_result_key(jti), self._get_used_key(jti))
+        return (
+            json.loads(result) if result else None,
+            float(consumed_at) if consumed_at else None
+        )
+
+    async def _rotate(self, payload: Dict[str, Any], user_crud: Any) -> Dict[str, Any]:
+        jti = payload["jti"]
+        family = payload.get("sid")
+
+        # Logout blacklists refresh tokens; reuse detection revokes whole families
+        if self.redis:
+            keys = [token_blacklist._get_blacklist_key(jti)]
+            if family:
+                keys.append(self._get_family_key(family))
+            values = await asyncio.to_thread(self.redis.mget, *keys)
+            family_state = json.loads(values[1]) if family and values[1] else {}
+            if values[0] is not None or family_state.get("revoked"):
+                auth_refresh_outcomes.inc("rejected")
+                raise RefreshTokenError("Refresh token has been revoked")
+        elif token_blacklist.redis and token_blacklist.redis.get(token_blacklist._get_blacklist_key(jti)) is not None:
+            # Single node: the blacklist is kept in process
+            auth_refresh_outcomes.inc("rejected")
+            raise RefreshTokenError("Refresh token has been revoked")
+
+        user = await user_crud.get_user_by_id(payload["sub"])
+        if not user or not user.is_active:
+            auth_refresh_outcomes.inc("rejected")
+            raise RefreshTokenError("User not found or inactive")
+
+        # Refresh tokens issued before a logout-all or account change carry an older epoch
+        claims = await asyncio.to_thread(stateless_user_claims, user)
+        if claims and payload.get("rev", 0) < claims["rev"]:
+            auth_refresh_outcomes.inc("rejected")
+            raise RefreshTokenError("Refresh token has been revoked")
+
+        family = family or str(uuid.uuid4())
+        access_token, refresh_token = create_token_pair({
+            "sub": str(user.id),
+            "email": user.email,
+            "is_superuser": user.is_superuser,
+            "sid": family,
+            **claims
+        })
+        result = {"access_token": access_token, "refresh_token": refresh_token, "session_id": family}
+
+        if self.redis:
+            await asyncio.to_thread(self._store_rotation, jti, family, str(user.id), access_token, refresh_token, result)
+
+        result["session_updated"] = await asyncio.to_thread(
+            enhanced_session_manager.rotate_session_tokens, family, access_token, refresh_token
+        )
+
+        auth_refresh_outcomes.inc("rotated")
+        return result
+
+    def _store_rotation(
+        self,
+        jti: str,
+        family: str,
+        user_id: str,
+        access_token: str,
+        refresh_token: str,
+        result: Dict[str, Any]
+    ) -> None:
+        access_payload = decode_token(access_token)
+        refresh_payload = decode_token(refresh_token)
+        family_state = {
+            "user_id": user_id,
+            "refresh_jti": refresh_payload["jti"],
+            "refresh_exp": refresh_payload["exp"],
+            "access_jti": access_payload["jti"],
+            "access_exp": access_payload["exp"],
+            "revoked": False
+        }
+
+        pipeline = self.redis.pipeline()
+        pipeline.setex(self._get_family_key(family), max(1, refresh_payload["exp"] - int(time.time())), json.dumps(family_state))
+        pipeline.setex(self._get_result_key(jti), self.grace_seconds, json.dumps({**result, "session_updated": True}))
+        pipeline.exec()
+
+    def _revoke_family(self, payload: Dict[str, Any]) -> None:
+        """Revoke the latest tokens of a family whose consumed token was replayed"""
+        family = payload.get("sid")
+        security_logger.warning(
+            f"Refresh token reuse detected for user {payload.get('sub')} (family {family}, jti {payload.get('jti')})"
+        )
+        if not family:
+            return
+
+        try:
+            family_key = self._get_family_key(family)
+            state_data = self.redis.get(family_key)
+            state = json.loads(state_data) if state_data else {"user_id": payload.get("sub")}
+
+            now = int(time.time())
+            if state.get("refresh_jti"):
+                token_blacklist.blacklist_jti(state["refresh_jti"], state["refresh_exp"] - now, "refresh_reuse")
+            if state.get("access_jti"):
+                token_blacklist.blacklist_jti(state["access_jti"], state["access_exp"] - now, "refresh_reuse")
+                revocation_set.revoke_token(state["access_jti"], state["access_exp"])
+
+            state["revoked"] = True
+            ttl = max(1, int(payload["exp"]) - now, int(state.get("refresh_exp", 0)) - now)
+            self.redis.setex(family_key, ttl, json.dumps(state))
+
+            enhanced_session_manager.end_session(family, state["user_id"])
+
+        except Exception as e:
+            logger.error(f"Failed to revoke refresh token family {family}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Rotation statistics for this worker
+
+        Returns:
+            Dict[str, Any]: In-flight, executed and coalesced refresh counts
+        """
+        return {
+            "in_flight": self.flights.in_flight,
+            "executed": self.flights.executed,
+            "coalesced": self.flights.shared
+        }
+
+
+# Global refresh token rotator instance
+refresh_rotator = RefreshTokenRotator()
@@ -0,0 +1,211 @@
+"""
+Session Activity Write-Behind Buffer for Agent-Makalah
+Collects session last-access times per worker and writes them in batches
+
+Touching a session (an authenticated request, a session lookup) only
+records the latest timestamp in memory. Every session_activity_flush_interval_ms
+the buffered timestamps are written with one SessionStore.touch_many call
+per store (one Redis pipeline, or one Postgres UPDATE per distinct second),
+which also renews the session TTLs and reorders the per-user session
+indexes by last access. Repeated touches of a session within
+an interval coalesce into one write. The buffer is flushed on shutdown;
+a failed batch is queued again. With an interval of 0 nothing is buffered
+and every touch is written at once (the auth middleware does so in a
+worker thread, not on the event loop).
+
+Session reads overlay the buffered timestamp (pending()), so this worker
+reports the latest activity before it is flushed; other workers see it
+after at most one interval.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from src.auth.session_codec import epoch_now
+from src.core.config import settings
+from src.core.metrics import (
+    session_activity_dropped,
+    session_activity_flush_lag,
+    session_activity_flushed,
+    session_activity_pending,
+    session_activity_touches
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityBuffer:
+    """
+    Per-worker write-behind buffer of session last-access times
+    """
+
+    def __init__(self, flush_interval_ms: Optional[int] = None, max_pending: Optional[int] = None):
+        self.flush_interval_ms = (
+            flush_interval_ms if flush_interval_ms is not None else settings.session_activity_flush_interval_ms
+        )
+        self.max_pending = max_pending if max_pending is not None else settings.session_activity_max_pending
+        # Structure: {id(store): (store, {session_id: last_accessed}, {session_id: user_id})}
+        self._pending: Dict[int, Tuple[Any, Dict[str, int], Dict[str, str]]] = {}
+        self._size = 0
+        # Monotonic time of the oldest buffered touch
+        self._oldest: Optional[float] = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flush_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """False when every touch is written at once"""
+        return self.flush_interval_ms > 0
+
+    def _add(self, store: Any, session_id: str, last_accessed: int, user_id: Optional[str] = None) -> bool:
+        """Buffer a timestamp (caller holds the lock); False if the buffer is full"""
+        entry = self._pending.get(id(store))
+        previous = entry[1].get(session_id) if entry else None
+        if previous is None:
+            if self._size >= self.max_pending:
+                return False
+            self._size += 1
+        if entry is None:
+            entry = self._pending[id(store)] = (store, {}, {})
+        batch = entry[1]
+        if previous is None or last_accessed > previous:
+            batch[session_id] = last_accessed
+        if user_id:
+            entry[2][session_id] = user_id
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        return True
+
+    def touch(
+        self, store: Any, session_id: str, last_accessed: Optional[int] = None, user_id: Optional[str] = None
+    ) -> None:
+        """
+        Record activity on a session
+
+        Args:
+            store: SessionStore holding the session
+            session_id: Session identifier
+            last_accessed: Epoch seconds (defaults to now)
+            user_id: Owner of the session, to reorder the user's session index
+        """
+        last_accessed = last_accessed or epoch_now()
+        session_activity_touches.inc()
+
+        if not self.enabled:
+            store.update(session_id, {"last_accessed": last_accessed}, settings.session_max_age, user_id)
+            return
+
+        with self._lock:
+            added = self._add(store, session_id, last_accessed, user_id)
+            size = self._size
+        if not added:
+            session_activity_dropped.inc("buffer_full")
+        session_activity_pending.set(size)
+
+        # Without the background task (scripts, tests without lifespan) flush inline once per interval
+        if not self.is_running and time.monotonic() - self._last_flush >= self.flush_interval_ms / 1000:
+            self.flush()
+
+    def pending(self, store: Any, session_id: str) -> Optional[int]:
+        """Buffered last-access time of a session, None if nothing is buffered"""
+        entry = self._pending.get(id(store))
+        return entry[1].get(session_id) if entry else None
+
+    def flush(self) -> int:
+        """
+        Write all buffered timestamps
+
+        Returns:
+            int: Number of sessions updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            oldest, self._oldest = self._oldest, None
+            self._size = 0
+            self._last_flush = time.monotonic()
+        session_activity_pending.set(0)
+        if not pending:
+            return 0
+
+        written = 0
+        for store, batch, user_ids in pending.values():
+            try:
+                written += store.touch_many(batch, settings.session_max_age, user_ids)
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Failed to flush {len(batch)} session activity updates: {e}")
+                self._requeue(store, batch, user_ids)
+
+        self.flushes += 1
+        session_activity_flushed.inc(amount=written)
+        if oldest is not None:
+            session_activity_flush_lag.observe(time.monotonic() - oldest)
+        return written
+
+    def _requeue(self, store: Any, batch: Dict[str, int], user_ids: Dict[str, str]) -> None:
+        with self._lock:
+            dropped = sum(
+                1 for session_id, last_accessed in batch.items()
+                if not self._add(store, session_id, last_accessed, user_ids.get(session_id))
+            )
+            size = self._size
+        if dropped:
+            session_activity_dropped.inc("flush_failed", amount=dropped)
+        session_activity_pending.set(size)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Session activity flush failed: {e}")
+
+    # === Lifecycle ===
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start flushing in the background on the running event loop"""
+        if self.enabled and not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background flushing and write what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Buffer statistics
+
+        Returns:
+            Dict[str, Any]: Pending sessions, flush counters and settings
+        """
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running,
+            "pending": self._size,
+            "max_pending": self.max_pending,
+            "flush_interval_ms": self.flush_interval_ms,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors
+        }
+
+
+# Global session activity buffer instance
+session_activity = SessionActivityBuffer()
@@ -0,0 +1,222 @@
+"""
+Compact Session Encoding for Agent-Makalah
+Versioned encodings of enhanced sessions stored in Redis
+
+Sessions live in Redis hashes (schema version 2): one short-named hash
+field per session field and one "ud:<key>" field per user_data key, each
+holding an orjson value. Single fields can then be updated in place with
+HSET instead of rewriting the whole session.
+
+Timestamps are stored as epoch seconds and tokens as their JTI and expiry
+instead of the full JWT strings. Values stay text because the Upstash REST
+API transports strings.
+
+Sessions stored as strings are only read, to migrate them: blob sessions
+(schema version 1: one version character followed by an orjson array whose
+positions are fixed by the field dictionary below) and sessions written
+before versioning (plain JSON objects) decode with decode_session and are
+rewritten as hashes on their next read.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+import orjson
+
+from src.auth.jwt_utils import _jwt
+
+# Field dictionary of blob sessions (schema version 1): array position -> session field
+SESSION_FIELDS_V1 = (
+    "user_id",
+    "created_at",
+    "last_accessed",
+    "access_jti",
+    "access_exp",
+    "refresh_jti",
+    "refresh_exp",
+    "user_data",
+    "device_info",
+    "is_active"
+)
+
+# user_data fields every session has; anything else is kept in a trailing dict
+USER_DATA_FIELDS_V1 = ("email", "is_superuser")
+
+# Schema version of the hash layout, stored in its "v" field
+SESSION_HASH_VERSION = 2
+VERSION_FIELD = "v"
+
+# Field dictionary of the hash layout: session field -> hash field
+SESSION_HASH_FIELDS = {
+    "user_id": "u",
+    "created_at": "c",
+    "last_accessed": "a",
+    "access_jti": "aj",
+    "access_exp": "ae",
+    "refresh_jti": "rj",
+    "refresh_exp": "re",
+    "device_info": "d",
+    "is_active": "x"
+}
+SESSION_FIELDS_BY_HASH_FIELD = {field: name for name, field in SESSION_HASH_FIELDS.items()}
+
+# Hash field prefix of user_data keys
+USER_DATA_PREFIX = "ud:"
+
+
+def epoch_now() -> int:
+    """Current time in epoch seconds, the session timestamp unit"""
+    return int(datetime.now(timezone.utc).timestamp())
+
+
+def epoch_to_iso(value: Optional[int]) -> Optional[str]:
+    """
+    Format a session timestamp for API responses
+
+    Args:
+        value: Epoch seconds
+
+    Returns:
+        Optional[str]: Naive UTC ISO timestamp, the format sessions used to store
+    """
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def token_ref(token: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    JTI and expiry of a token issued by this service
+
+    Args:
+        token: Encoded JWT (the signature is not verified)
+
+    Returns:
+        Tuple[Optional[str], Optional[int]]: (jti, exp), (None, None) if unreadable
+    """
+    if not token:
+        return None, None
+    try:
+        claims = _jwt().get_unverified_claims(token)
+    except Exception:
+        return None, None
+    return claims.get("jti"), claims.get("exp")
+
+
+def decode_session(raw: Union[str, bytes], session_id: str) -> Dict[str, Any]:
+    """
+    Decode a session stored as a string (blob or pre-versioning JSON)
+
+    Args:
+        raw: Stored session value
+        session_id: Session identifier (taken from the key, not stored)
+
+    Returns:
+        Dict[str, Any]: session_id, user_id, created_at and last_accessed
+            (epoch seconds), access_jti/access_exp, refresh_jti/refresh_exp,
+            user_data, device_info and is_active
+
+    Raises:
+        ValueError: If the value has an unknown schema version
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+
+    if raw.startswith("{"):
+        return _decode_legacy(orjson.loads(raw), session_id)
+    if raw[:1] == "1":
+        return _decode_v1(orjson.loads(raw[1:]), session_id)
+    raise ValueError(f"Unknown session schema version {raw[:1]!r}")
+
+
+def _decode_v1(packed: list, session_id: str) -> Dict[str, Any]:
+    data = dict(zip(SESSION_FIELDS_V1, packed))
+
+    packed_user = data["user_data"]
+    user_data = dict(zip(USER_DATA_FIELDS_V1, packed_user))
+    if len(packed_user) > len(USER_DATA_FIELDS_V1):
+        user_data.update(packed_user[len(USER_DATA_FIELDS_V1)])
+
+    data.update(
+        session_id=session_id,
+        user_data=user_data,
+        device_info=data["device_info"] or {},
+        is_active=bool(data["is_active"])
+    )
+    return data
+
+
+def _iso_to_epoch(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _decode_legacy(data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    """Unversioned JSON session holding full tokens and ISO timestamps"""
+    access_jti, access_exp = token_ref(data.get("access_token"))
+    refresh_jti, refresh_exp = token_ref(data.get("refresh_token"))
+    return {
+        "session_id": data.get("session_id", session_id),
+        "user_id": data["user_id"],
+        "created_at": _iso_to_epoch(data.get("created_at")),
+        "last_accessed": _iso_to_epoch(data.get("last_accessed")),
+        "access_jti": access_jti,
+        "access_exp": access_exp,
+        "refresh_jti": refresh_jti,
+        "refresh_exp": refresh_exp,
+        "user_data": data.get("user_data") or {},
+        "device_info": data.get("device_info") or {},
+        "is_active": data.get("is_active", True)
+    }
+
+
+def session_hash_fields(data: Dict[str, Any], versioned: bool = False) -> Dict[str, str]:
+    """
+    Hash fields for some or all fields of a session
+
+    Args:
+        data: Session fields to encode (user_data is split into one field per key)
+        versioned: Include the schema version field (for a complete session)
+
+    Returns:
+        Dict[str, str]: Hash field -> encoded value
+    """
+    fields = {VERSION_FIELD: str(SESSION_HASH_VERSION)} if versioned else {}
+    for name, value in data.items():
+        if name == "user_data":
+            for key, item in value.items():
+                fields[USER_DATA_PREFIX + key] = orjson.dumps(item).decode()
+        elif name in SESSION_HASH_FIELDS:
+            fields[SESSION_HASH_FIELDS[name]] = orjson.dumps(value).decode()
+    return fields
+
+
+def session_from_hash(fields: Dict[str, Any], session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a session stored as a hash
+
+    Args:
+        fields: HGETALL result
+        session_id: Session identifier (taken from the key, not stored)
+
+    Returns:
+        Optional[Dict[str, Any]]: Session dict as returned by decode_session,
+            None if the hash is missing or incomplete
+
+    Raises:
+        ValueError: If the hash has an unknown schema version
+    """
+    # A field update racing a delete can leave a hash without the core fields
+    if not fields or SESSION_HASH_FIELDS["user_id"] not in fields:
+        return None
+    if fields.get(VERSION_FIELD) != str(SESSION_HASH_VERSION):
+        raise ValueError(f"Unknown session hash schema version {fields.get(VERSION_FIELD)!r}")
+
+    data: Dict[str, Any] = {"session_id": session_id, "user_data": {}, "device_info": {}, "is_active": True}
+    for field, value in fields.items():
+        if field.startswith(USER_DATA_PREFIX):
+            data["user_data"][field[len(USER_DATA_PREFIX):]] = orjson.loads(value)
+        elif field in SESSION_FIELDS_BY_HASH_FIELD:
+            data[SESSION_FIELDS_BY_HASH_FIELD[field]] = orjson.loads(value)
+    return data
@@ -0,0 +1,73 @@
+"""
+Redis Hash Session Storage for Agent-Makalah
+Reads and field-level writes of sessions stored as Redis hashes
+
+Field updates are HSET + EXPIRE in one MULTI/EXEC round trip, so concurrent
+requests touching different fields (last access, access token, user data
+keys) no longer overwrite each other's read-modify-write cycles.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+
+def read_session_hash(redis: Any, key: str) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Read a session hash, falling back to sessions stored as strings
+
+    Args:
+        redis: Upstash Redis client
+        key: Session key
+
+    Returns:
+        Tuple[Optional[Dict[str, str]], Optional[str]]: (hash fields, None),
+            or (None, string value) for a session written before the hash layout
+    """
+    try:
+        return redis.hgetall(key) or None, None
+    except Exception as e:
+        if "WRONGTYPE" not in str(e):
+            raise
+    return None, redis.get(key)
+
+
+def write_session_hash(redis: Any, key: str, fields: Dict[str, str], ttl: int, replace: bool = False) -> None:
+    """
+    Store a complete session hash
+
+    Args:
+        redis: Upstash Redis client
+        key: Session key
+        fields: All session hash fields
+        ttl: Session lifetime in seconds
+        replace: Delete the existing value first (migrating a string session)
+    """
+    transaction = redis.multi()
+    if replace:
+        transaction.delete(key)
+    transaction.hset(key, values=fields)
+    transaction.expire(key, ttl)
+    transaction.exec()
+
+
+def update_session_hash(redis: Any, key: str, fields: Dict[str, str], ttl: int) -> bool:
+    """
+    Set some fields of an existing session and renew its TTL atomically
+
+    Args:
+        redis: Upstash Redis client
+        key: Session key
+        fields: Hash fields to set
+        ttl: Session lifetime in seconds
+
+    Returns:
+        bool: True if the session existed
+    """
+    transaction = redis.multi()
+    transaction.expire(key, ttl)
+    transaction.hset(key, values=fields)
+    existed = transaction.exec()[0]
+
+    if not existed:
+        # The session expired or was deleted: drop the partial hash HSET created
+        redis.delete(key)
+    return bool(existed)
@@ -1,37 +1,41 @@
 """
 Session Management for Agent-Makalah
-Handles user sessions using Upstash Redis for distributed session storage
+Handles user sessions in the configured session store (see src.auth.session_store)
 """
 
-import json
+import logging
 import uuid
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from upstash_redis import Redis
 from src.core.config import settings
+from src.auth.session_activity import session_activity
+from src.auth.session_codec import epoch_now, epoch_to_iso
+from src.auth.session_store import SessionStore, create_session_store
+
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
     """
-    Manages user sessions with Redis storage
+    Manages user sessions in a SessionStore
     """
     
-    def __init__(self):
-        """Initialize session manager with Upstash Redis connection"""
-        self.redis = None
-        if settings.upstash_redis_url and settings.upstash_redis_token:
-            try:
-                self.redis = Redis(
-                    url=settings.upstash_redis_url,
-                    token=settings.upstash_redis_token
-                )
-            except Exception as e:
-                print(f"Failed to connect to Upstash Redis: {e}")
-                self.redis = None
+    # Redis key prefix of the sessions (no per-user index)
+    SESSION_KEY_PREFIX = "session:agent_makalah"
+    
+    def __init__(self, store: Optional[SessionStore] = None):
+        self._store = store
     
-    def _get_session_key(self, session_id: str) -> str:
-        """Generate Redis key for session"""
-        return f"session:agent_makalah:{session_id}"
+    @property
+    def store(self) -> SessionStore:
+        """Session store selected by settings.session_store_backend, created on first use"""
+        if self._store is None:
+            self._store = create_session_store(self.SESSION_KEY_PREFIX)
+        return self._store
+    
+    @store.setter
+    def store(self, store: SessionStore) -> None:
+        self._store = store
     
     def create_session(self, user_id: str, user_data: Dict[str, Any]) -> str:
         """
@@ -46,23 +50,19 @@ class SessionManager:
         """
         session_id = str(uuid.uuid4())
         
+        now = epoch_now()
         session_data = {
+            "session_id": session_id,
             "user_id": user_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "last_accessed": datetime.utcnow().isoformat(),
+            "created_at": now,
+            "last_accessed": now,
             "user_data": user_data
         }
         
-        if self.redis:
-            try:
-                key = self._get_session_key(session_id)
-                self.redis.setex(
-                    key,
-                    settings.session_max_age,
-                    json.dumps(session_data)
-                )
-            except Exception as e:
-                print(f"Failed to create session in Redis: {e}")
+        try:
+            self.store.create(session_data, settings.session_max_age)
+        except Exception as e:
+            logger.error(f"Failed to create session: {e}")
         
         return session_id
     
@@ -76,25 +76,21 @@ class SessionManager:
         Returns:
             Optional[Dict[str, Any]]: Session data if found, None otherwise
         """
-        if not self.redis:
-            return None
-        
         try:
-            key = self._get_session_key(session_id)
-            session_data = self.redis.get(key)
+            data = self.store.get(session_id)
             
-            if session_data:
-                data = json.loads(session_data)
-                # Update last accessed time
-                data["last_accessed"] = datetime.utcnow().isoformat()
-                self.redis.setex(
-                    key,
-                    settings.session_max_age,
-                    json.dumps(data)
-                )
-                return data
+            if data:
+                # Update last accessed time (buffered, written in the next activity flush)
+                data["last_accessed"] = epoch_now()
+                session_activity.touch(self.store, session_id, data["last_accessed"])
+                return {
+                    "user_id": data["user_id"],
+                    "created_at": epoch_to_iso(data["created_at"]),
+                    "last_accessed": epoch_to_iso(data["last_accessed"]),
+                    "user_data": data["user_data"]
+                }
         except Exception as e:
-            print(f"Failed to get session from Redis: {e}")
+            logger.error(f"Failed to get session: {e}")
         
         return None
     
@@ -109,26 +105,13 @@ class SessionManager:
         Returns:
             bool: True if session updated successfully, False otherwise
         """
-        if not self.redis:
-            return False
-        
         try:
-            key = self._get_session_key(session_id)
-            session_data = self.redis.get(key)
-            
-            if session_data:
-                data = json.loads(session_data)
-                data["user_data"].update(user_data)
-                data["last_accessed"] = datetime.utcnow().isoformat()
-                
-                self.redis.setex(
-                    key,
-                    settings.session_max_age,
-                    json.dumps(data)
-                )
-                return True
+            # Only the given user_data keys and last access are written
+            return self.store.update(
+                session_id, {"user_data": user_data, "last_accessed": epoch_now()}, settings.session_max_age
+            )
         except Exception as e:
-            print(f"Failed to update session in Redis: {e}")
+            logger.error(f"Failed to update session: {e}")
         
         return False
     
@@ -142,15 +125,10 @@ class SessionManager:
         Returns:
             bool: True if session deleted successfully, False otherwise
         """
-        if not self.redis:
-            return False
-        
         try:
-            key = self._get_session_key(session_id)
-            result = self.redis.delete(key)
-            return result == 1
+            return self.store.delete(session_id)
         except Exception as e:
-            print(f"Failed to delete session from Redis: {e}")
+            logger.error(f"Failed to delete session: {e}")
             return False
     
     def is_session_valid(self, session_id: str) -> bool:
@@ -183,14 +161,13 @@ class SessionManager:
     
     def cleanup_expired_sessions(self) -> int:
         """
-        Clean up expired sessions (Redis handles this automatically with TTL)
+        Clean up expired sessions (every session store expires sessions itself)
         This method is for compatibility and monitoring
         
         Returns:
-            int: Number of sessions cleaned up (always 0 as Redis handles TTL)
+            int: Number of sessions cleaned up (always 0 as the stores handle TTL)
         """
-        # Redis automatically handles TTL expiration
-        # This method exists for compatibility with other session stores
+        # Stores expire sessions on their own (Redis TTL, memory heap, Postgres expires_at)
         return 0
 
 
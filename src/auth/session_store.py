@@ -0,0 +1,679 @@
+"""
+Session Stores for Agent-Makalah Backend
+Storage behind the session managers: in-process, Redis or Postgres
+
+Every store keeps the same session dict (see src.auth.session_codec):
+session_id, user_id, created_at and last_accessed (epoch seconds),
+access_jti/access_exp, refresh_jti/refresh_exp, user_data, device_info and
+is_active. Updates are partial: only the given fields change, user_data keys
+are merged, and the session TTL is renewed. A user's sessions are listed most
+recently active first, in pages; trim_user_sessions enforces the per-user
+session cap (settings.max_sessions_per_user) by removing the least recently
+active ones.
+
+The backend is chosen by settings.session_store_backend; see
+benchmarks/bench_session_stores.py for the per-operation latency of each.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
+
+from src.auth.session_codec import decode_session, session_from_hash, session_hash_fields
+from src.auth.session_hash import read_session_hash, update_session_hash, write_session_hash
+from src.core.config import settings
+from src.database.redis_client import SharedRedis
+from src.utils.ttl_store import TTLStore
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_REDIS = "redis"
+BACKEND_POSTGRES = "postgres"
+BACKEND_AUTO = "auto"
+
+
+class SessionStore(Protocol):
+    """Storage interface of the session managers"""
+
+    def create(self, session: Dict[str, Any], ttl: int) -> bool:
+        """Store a new session for ttl seconds"""
+        ...
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read a live session"""
+        ...
+
+    def update(self, session_id: str, fields: Dict[str, Any], ttl: int, user_id: Optional[str] = None) -> bool:
+        """Set some fields of a live session and renew its TTL; False if it is gone"""
+        ...
+
+    def touch_many(
+        self, last_accessed: Dict[str, int], ttl: int, user_ids: Optional[Dict[str, str]] = None
+    ) -> int:
+        """Set the last access time of live sessions and renew their TTL; returns how many were live"""
+        ...
+
+    def delete(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        """Remove a session"""
+        ...
+
+    def user_sessions(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Live sessions of a user, most recently active first"""
+        ...
+
+    def trim_user_sessions(self, user_id: str, keep: int) -> List[Dict[str, Any]]:
+        """Remove all but the keep most recently active sessions of a user and return them"""
+        ...
+
+    def delete_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Remove all sessions of a user and return them"""
+        ...
+
+
+def _copy_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a session so callers cannot mutate stored state"""
+    return {
+        **session,
+        "user_data": dict(session.get("user_data") or {}),
+        "device_info": dict(session.get("device_info") or {})
+    }
+
+
+def _merge_fields(session: Dict[str, Any], fields: Dict[str, Any]) -> None:
+    for name, value in fields.items():
+        if name == "user_data":
+            session.setdefault("user_data", {}).update(value)
+        else:
+            session[name] = value
+
+
+def _page(items: List[Any], offset: int, limit: Optional[int]) -> List[Any]:
+    return items[offset:None if limit is None else offset + limit]
+
+
+class MemorySessionStore:
+    """
+    Sessions kept in this process (single node, development and tests)
+
+    Sessions live in a TTLStore (see src.utils.ttl_store): reads, writes and
+    TTL renewals are O(1) and expiry is driven by its timing wheel, with a
+    per-user index kept in step as sessions leave it. A user's sessions are
+    ordered by last access when listed (the per-user cap keeps that short).
+    At max_entries the session closest to expiry is evicted. Sessions are not
+    shared between workers.
+    """
+
+    def __init__(self, name: str = "sessions", max_entries: Optional[int] = None):
+        self.sessions = TTLStore(
+            name,
+            max_entries=max_entries if max_entries is not None else settings.local_store_max_entries,
+            on_remove=self._unindex
+        )
+        self.user_index: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _unindex(self, session_id: str, session: Dict[str, Any]) -> None:
+        sessions = self.user_index.get(session.get("user_id"))
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self.user_index[session["user_id"]]
+
+    def create(self, session: Dict[str, Any], ttl: int) -> bool:
+        with self._lock:
+            session_id = session["session_id"]
+            self.sessions.set(session_id, _copy_session(session), ttl)
+            self.user_index[session["user_id"]].add(session_id)
+        return True
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            return _copy_session(session) if session else None
+
+    def update(self, session_id: str, fields: Dict[str, Any], ttl: int, user_id: Optional[str] = None) -> bool:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return False
+            _merge_fields(session, fields)
+            return self.sessions.expire(session_id, ttl)
+
+    def touch_many(
+        self, last_accessed: Dict[str, int], ttl: int, user_ids: Optional[Dict[str, str]] = None
+    ) -> int:
+        return sum(
+            1 for session_id, accessed_at in last_accessed.items()
+            if self.update(session_id, {"last_accessed": accessed_at}, ttl)
+        )
+
+    def delete(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        with self._lock:
+            return self.sessions.delete(session_id)
+
+    def _by_activity(self, user_id: str) -> List[Dict[str, Any]]:
+        """Live sessions of a user, most recently active first (caller holds the lock)"""
+        sessions = (self.sessions.get(session_id) for session_id in list(self.user_index.get(user_id, ())))
+        return sorted(
+            (session for session in sessions if session),
+            key=lambda session: session.get("last_accessed") or 0,
+            reverse=True
+        )
+
+    def user_sessions(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [_copy_session(session) for session in _page(self._by_activity(user_id), offset, limit)]
+
+    def trim_user_sessions(self, user_id: str, keep: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            evicted = self._by_activity(user_id)[keep:]
+            for session in evicted:
+                self.sessions.pop(session["session_id"])
+            return evicted
+
+    def delete_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            sessions = (self.sessions.pop(session_id) for session_id in list(self.user_index.get(user_id, ())))
+            return [session for session in sessions if session]
+
+
+class RedisSessionStore:
+    """
+    Sessions in Redis hashes (see src.auth.session_hash), shared by all workers
+
+    Keys expire with the session TTL. When index_prefix is given, a per-user
+    sorted set indexes the session IDs scored by last access, so listings
+    are paged with ZRANGE and the least recently active sessions are found
+    without reading the others; the sessions of a page are read in one
+    pipeline. Index entries of expired sessions are dropped when a listing
+    finds them gone, and the listing reads on until its page is full. Sessions stored as strings and per-user sets written by
+    earlier versions are rewritten on their first use. Without a Redis client
+    every operation is a no-op.
+    """
+
+    # Shared Upstash Redis client, created on first use (see src.database.redis_client)
+    redis = SharedRedis()
+
+    def __init__(self, key_prefix: str, index_prefix: Optional[str] = None):
+        self.key_prefix = key_prefix
+        self.index_prefix = index_prefix
+
+    def _get_session_key(self, session_id: str) -> str:
+        """Generate Redis key for session"""
+        return f"{self.key_prefix}:{session_id}"
+
+    def _get_user_sessions_key(self, user_id: str) -> str:
+        """Generate Redis key for user's active sessions"""
+        return f"{self.index_prefix}:{user_id}"
+
+    def _with_index(self, user_id: str, operation: Callable[[], Any]) -> Any:
+        """Run a command on a user's index, migrating a set index written by an earlier version first"""
+        try:
+            return operation()
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+        self._migrate_index(user_id)
+        return operation()
+
+    def _migrate_index(self, user_id: str) -> None:
+        """Rewrite a per-user set of session IDs as a sorted set scored by last access"""
+        user_sessions_key = self._get_user_sessions_key(user_id)
+        try:
+            session_ids = self.redis.smembers(user_sessions_key)
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            # Another worker migrated it already
+            return
+
+        scores = {
+            session["session_id"]: session.get("last_accessed") or 0
+            for session in self._read_sessions(list(session_ids)) if session
+        }
+        transaction = self.redis.multi()
+        transaction.delete(user_sessions_key)
+        if scores:
+            transaction.zadd(user_sessions_key, scores)
+            transaction.expire(user_sessions_key, settings.session_max_age)
+        transaction.exec()
+
+    def _index(self, user_id: str, scores: Dict[str, int], ttl: int) -> None:
+        """Add or reorder sessions in a user's index and renew its TTL"""
+        user_sessions_key = self._get_user_sessions_key(user_id)
+
+        def add():
+            pipeline = self.redis.pipeline()
+            pipeline.zadd(user_sessions_key, scores)
+            pipeline.expire(user_sessions_key, ttl)
+            pipeline.exec()
+
+        self._with_index(user_id, add)
+
+    def _read_sessions(self, session_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Read sessions in one pipeline; None for the ones that are gone"""
+        if not session_ids:
+            return []
+
+        pipeline = self.redis.pipeline()
+        for session_id in session_ids:
+            pipeline.hgetall(self._get_session_key(session_id))
+        try:
+            results = pipeline.exec()
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            # Some session is stored as a string by an earlier version: read one by one
+            return [self.get(session_id) for session_id in session_ids]
+        return [session_from_hash(fields, session_id) for session_id, fields in zip(session_ids, results)]
+
+    def create(self, session: Dict[str, Any], ttl: int) -> bool:
+        if not self.redis:
+            return False
+
+        write_session_hash(
+            self.redis, self._get_session_key(session["session_id"]),
+            session_hash_fields(session, versioned=True), ttl
+        )
+        if self.index_prefix:
+            self._index(session["user_id"], {session["session_id"]: session.get("last_accessed") or 0}, ttl)
+        return True
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self.redis:
+            return None
+
+        session_key = self._get_session_key(session_id)
+        fields, legacy_value = read_session_hash(self.redis, session_key)
+        if not legacy_value:
+            return session_from_hash(fields, session_id)
+
+        session = decode_session(legacy_value, session_id)
+        write_session_hash(
+            self.redis, session_key, session_hash_fields(session, versioned=True),
+            settings.session_max_age, replace=True
+        )
+        return session
+
+    def update(self, session_id: str, fields: Dict[str, Any], ttl: int, user_id: Optional[str] = None) -> bool:
+        if not self.redis:
+            return False
+
+        session_key = self._get_session_key(session_id)
+        hash_fields = session_hash_fields(fields)
+        try:
+            updated = update_session_hash(self.redis, session_key, hash_fields, ttl)
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            # Session stored as a string by an earlier version: migrate it, then update
+            updated = bool(self.get(session_id)) and update_session_hash(self.redis, session_key, hash_fields, ttl)
+
+        if updated and self.index_prefix and user_id and fields.get("last_accessed"):
+            self._index(user_id, {session_id: fields["last_accessed"]}, ttl)
+        return updated
+
+    def touch_many(
+        self, last_accessed: Dict[str, int], ttl: int, user_ids: Optional[Dict[str, str]] = None
+    ) -> int:
+        if not self.redis or not last_accessed:
+            return 0
+
+        # Sessions of a user share one ZADD to the user's index
+        scores_by_user: Dict[str, Dict[str, int]] = defaultdict(dict)
+        if self.index_prefix and user_ids:
+            for session_id, accessed_at in last_accessed.items():
+                if user_ids.get(session_id):
+                    scores_by_user[user_ids[session_id]][session_id] = accessed_at
+
+        # One pipeline: EXPIRE (does the session exist?) + HSET of the last access field per session,
+        # then ZADD + EXPIRE per user index
+        session_ids = list(last_accessed)
+        pipeline = self.redis.pipeline()
+        for session_id in session_ids:
+            session_key = self._get_session_key(session_id)
+            pipeline.expire(session_key, ttl)
+            pipeline.hset(session_key, values=session_hash_fields({"last_accessed": last_accessed[session_id]}))
+        for user_id, scores in scores_by_user.items():
+            user_sessions_key = self._get_user_sessions_key(user_id)
+            pipeline.zadd(user_sessions_key, scores)
+            pipeline.expire(user_sessions_key, ttl)
+        try:
+            results = pipeline.exec()
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            # Some session or index is stored by an earlier version: update one by one
+            user_ids = user_ids or {}
+            return sum(
+                1 for session_id in session_ids
+                if self.update(session_id, {"last_accessed": last_accessed[session_id]}, ttl, user_ids.get(session_id))
+            )
+
+        existed = results[:2 * len(session_ids):2]
+        gone = [session_id for session_id, live in zip(session_ids, existed) if not live]
+        if not gone:
+            return len(session_ids)
+
+        # Sessions that ended before the flush: drop the partial hashes HSET created
+        gone_keys = [self._get_session_key(session_id) for session_id in gone]
+        gone_by_user: Dict[str, List[str]] = defaultdict(list)
+        for session_id in gone:
+            if user_ids and user_ids.get(session_id) in scores_by_user:
+                gone_by_user[user_ids[session_id]].append(session_id)
+        if not gone_by_user:
+            self.redis.delete(*gone_keys)
+        else:
+            # ... and the index entries ZADD put back
+            pipeline = self.redis.pipeline()
+            pipeline.delete(*gone_keys)
+            for user_id, user_gone in gone_by_user.items():
+                pipeline.zrem(self._get_user_sessions_key(user_id), *user_gone)
+            pipeline.exec()
+        return len(session_ids) - len(gone)
+
+    def delete(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        if not self.redis:
+            return False
+
+        removed = self.redis.delete(self._get_session_key(session_id))
+        if self.index_prefix and user_id:
+            user_sessions_key = self._get_user_sessions_key(user_id)
+            self._with_index(user_id, lambda: self.redis.zrem(user_sessions_key, session_id))
+        return bool(removed)
+
+    def user_sessions(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not self.redis or not self.index_prefix or limit == 0:
+            return []
+
+        user_sessions_key = self._get_user_sessions_key(user_id)
+        sessions: List[Dict[str, Any]] = []
+        start = offset
+        while True:
+            # Read until the page is full: expired entries do not count towards it
+            wanted = None if limit is None else limit - len(sessions)
+            stop = -1 if wanted is None else start + wanted - 1
+            session_ids = self._with_index(
+                user_id, lambda: self.redis.zrange(user_sessions_key, start, stop, rev=True)
+            )
+            batch = self._read_sessions(session_ids)
+            live = [session for session in batch if session]
+            sessions.extend(live)
+
+            expired = [session_id for session_id, session in zip(session_ids, batch) if session is None]
+            if expired:
+                # Only entries at or after the offset are removed, so earlier pages keep their ranks
+                self.redis.zrem(user_sessions_key, *expired)
+            if wanted is None or len(session_ids) < wanted or len(sessions) == limit:
+                return sessions
+            start += len(live)
+
+    def trim_user_sessions(self, user_id: str, keep: int) -> List[Dict[str, Any]]:
+        if not self.redis or not self.index_prefix:
+            return []
+
+        # Everything after the keep most recently active sessions
+        user_sessions_key = self._get_user_sessions_key(user_id)
+        session_ids = self._with_index(
+            user_id, lambda: self.redis.zrange(user_sessions_key, keep, -1, rev=True)
+        )
+        if not session_ids:
+            return []
+
+        sessions = self._read_sessions(session_ids)
+        pipeline = self.redis.pipeline()
+        pipeline.delete(*[self._get_session_key(session_id) for session_id in session_ids])
+        pipeline.zrem(user_sessions_key, *session_ids)
+        pipeline.exec()
+        return [session for session in sessions if session]
+
+    def delete_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        sessions = self.user_sessions(user_id)
+        if not self.redis or not self.index_prefix:
+            return sessions
+
+        keys = [self._get_session_key(session["session_id"]) for session in sessions]
+        self.redis.delete(self._get_user_sessions_key(user_id), *keys)
+        return sessions
+
+
+def _to_timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def _from_timestamp(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class PostgresSessionStore:
+    """
+    Sessions in the Postgres `sessions` table, through Supabase
+
+    Uses the table from the database design (session_id, user_id,
+    start_time, last_active_time, end_time, status) plus two columns for
+    authentication sessions:
+
+        ALTER TABLE sessions
+            ADD COLUMN expires_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            ADD COLUMN auth_data JSONB NOT NULL DEFAULT '{}'::jsonb;
+        CREATE INDEX sessions_user_active ON sessions (user_id, status, expires_at);
+
+    Token references, user_data and device_info live in auth_data. Ending a
+    session marks the row COMPLETED instead of deleting it, because
+    conversation turns and artifacts reference it. Expiry is a filter on
+    expires_at. Listings are ordered by last_active_time and paged with
+    LIMIT/OFFSET. Touching a session is one UPDATE; updates of auth_data
+    fields read the row first to merge them.
+    """
+
+    ACTIVE = "ACTIVE"
+    COMPLETED = "COMPLETED"
+
+    # Session fields stored in their own columns
+    COLUMNS = {"last_accessed": "last_active_time"}
+
+    def __init__(self, table_name: str = "sessions", client: Any = None):
+        self.table_name = table_name
+        # Supabase client; defaults to the shared admin client
+        self.client = client
+
+    @property
+    def table(self):
+        if self.client is None:
+            from src.database.supabase_client import supabase_client
+            self.client = supabase_client.admin_client
+        return self.client.table(self.table_name)
+
+    def _live(self, query):
+        return query.eq("status", self.ACTIVE).gt("expires_at", _to_timestamp(time.time()))
+
+    def _to_row(self, session: Dict[str, Any], ttl: int) -> Dict[str, Any]:
+        return {
+            "session_id": session["session_id"],
+            "user_id": session["user_id"],
+            "start_time": _to_timestamp(session.get("created_at")),
+            "last_active_time": _to_timestamp(session.get("last_accessed")),
+            "status": self.ACTIVE,
+            "expires_at": _to_timestamp(time.time() + ttl),
+            "auth_data": {
+                name: session[name] for name in (
+                    "access_jti", "access_exp", "refresh_jti", "refresh_exp", "user_data", "device_info"
+                ) if name in session
+            }
+        }
+
+    def _from_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        auth_data = row.get("auth_data") or {}
+        return {
+            "session_id": str(row["session_id"]),
+            "user_id": str(row["user_id"]),
+            "created_at": _from_timestamp(row.get("start_time")),
+            "last_accessed": _from_timestamp(row.get("last_active_time")),
+            "access_jti": auth_data.get("access_jti"),
+            "access_exp": auth_data.get("access_exp"),
+            "refresh_jti": auth_data.get("refresh_jti"),
+            "refresh_exp": auth_data.get("refresh_exp"),
+            "user_data": auth_data.get("user_data") or {},
+            "device_info": auth_data.get("device_info") or {},
+            "is_active": row.get("status") == self.ACTIVE
+        }
+
+    def create(self, session: Dict[str, Any], ttl: int) -> bool:
+        from src.database.supabase_client import track_query
+        with track_query(self.table_name, "insert"):
+            response = self.table.insert(self._to_row(session, ttl)).execute()
+        return bool(response.data)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        from src.database.supabase_client import track_query
+        with track_query(self.table_name, "select"):
+            response = self._live(self.table.select("*").eq("session_id", session_id)).execute()
+        return self._from_row(response.data[0]) if response.data else None
+
+    def update(self, session_id: str, fields: Dict[str, Any], ttl: int, user_id: Optional[str] = None) -> bool:
+        from src.database.supabase_client import track_query
+
+        changes: Dict[str, Any] = {"expires_at": _to_timestamp(time.time() + ttl)}
+        auth_fields = {}
+        for name, value in fields.items():
+            if name in self.COLUMNS:
+                changes[self.COLUMNS[name]] = _to_timestamp(value)
+            else:
+                auth_fields[name] = value
+
+        if auth_fields:
+            session = self.get(session_id)
+            if session is None:
+                return False
+            _merge_fields(session, auth_fields)
+            changes["auth_data"] = self._to_row(session, ttl)["auth_data"]
+
+        with track_query(self.table_name, "update"):
+            response = self._live(self.table.update(changes).eq("session_id", session_id)).execute()
+        return bool(response.data)
+
+    def touch_many(
+        self, last_accessed: Dict[str, int], ttl: int, user_ids: Optional[Dict[str, str]] = None
+    ) -> int:
+        from src.database.supabase_client import track_query
+
+        # One UPDATE per distinct timestamp: a flush interval spans few seconds
+        sessions_by_time: Dict[int, List[str]] = defaultdict(list)
+        for session_id, accessed_at in last_accessed.items():
+            sessions_by_time[accessed_at].append(session_id)
+
+        expires_at = _to_timestamp(time.time() + ttl)
+        touched = 0
+        for accessed_at, session_ids in sessions_by_time.items():
+            changes = {"last_active_time": _to_timestamp(accessed_at), "expires_at": expires_at}
+            with track_query(self.table_name, "update"):
+                response = self._live(self.table.update(changes).in_("session_id", session_ids)).execute()
+            touched += len(response.data or [])
+        return touched
+
+    def delete(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        from src.database.supabase_client import track_query
+        ended = {"status": self.COMPLETED, "end_time": _to_timestamp(time.time())}
+        with track_query(self.table_name, "update"):
+            response = self.table.update(ended).eq("session_id", session_id).eq("status", self.ACTIVE).execute()
+        return bool(response.data)
+
+    def _by_activity(self, user_id: str):
+        """Query of a user's live sessions, most recently active first"""
+        return self._live(self.table.select("*").eq("user_id", user_id)).order("last_active_time", desc=True)
+
+    def user_sessions(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        from src.database.supabase_client import track_query
+        if limit == 0:
+            return []
+
+        query = self._by_activity(user_id)
+        if limit is not None:
+            query = query.range(offset, offset + limit - 1)
+        elif offset:
+            query = query.offset(offset)
+        with track_query(self.table_name, "select"):
+            response = query.execute()
+        return [self._from_row(row) for row in response.data or []]
+
+    def trim_user_sessions(self, user_id: str, keep: int) -> List[Dict[str, Any]]:
+        from src.database.supabase_client import track_query
+        with track_query(self.table_name, "select"):
+            response = self._by_activity(user_id).offset(keep).execute()
+        if not response.data:
+            return []
+
+        ended = {"status": self.COMPLETED, "end_time": _to_timestamp(time.time())}
+        session_ids = [row["session_id"] for row in response.data]
+        with track_query(self.table_name, "update"):
+            self.table.update(ended).in_("session_id", session_ids).eq("status", self.ACTIVE).execute()
+        return [self._from_row(row) for row in response.data]
+
+    def delete_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        from src.database.supabase_client import track_query
+        ended = {"status": self.COMPLETED, "end_time": _to_timestamp(time.time())}
+        with track_query(self.table_name, "update"):
+            response = self._live(self.table.update(ended).eq("user_id", user_id)).execute()
+        return [self._from_row(row) for row in response.data or []]
+
+
+def resolve_session_store_backend(backend: Optional[str] = None) -> str:
+    """
+    Backend that create_session_store will use
+
+    "auto" and "redis" resolve to memory when Upstash is not configured.
+
+    Args:
+        backend: "memory", "redis", "postgres" or "auto" (defaults to the setting)
+
+    Returns:
+        str: BACKEND_MEMORY, BACKEND_REDIS or BACKEND_POSTGRES
+    """
+    backend = backend or settings.session_store_backend
+    if backend in (BACKEND_MEMORY, BACKEND_POSTGRES):
+        return backend
+    if not (settings.upstash_redis_url and settings.upstash_redis_token):
+        return BACKEND_MEMORY
+    return BACKEND_REDIS
+
+
+def create_session_store(
+    key_prefix: str,
+    index_prefix: Optional[str] = None,
+    backend: Optional[str] = None
+) -> SessionStore:
+    """
+    Create the session store selected by settings.session_store_backend
+
+    "auto" keeps sessions in Redis when Upstash is configured and in memory
+    otherwise.
+
+    Args:
+        key_prefix: Redis key prefix of the sessions
+        index_prefix: Redis key prefix of the per-user session index (None: no index)
+        backend: "memory", "redis", "postgres" or "auto" (defaults to the setting)
+
+    Returns:
+        SessionStore: MemorySessionStore, RedisSessionStore or PostgresSessionStore
+    """
+    backend = backend or settings.session_store_backend
+    resolved = resolve_session_store_backend(backend)
+    if resolved == BACKEND_POSTGRES:
+        return PostgresSessionStore()
+    if resolved == BACKEND_REDIS:
+        return RedisSessionStore(key_prefix, index_prefix)
+
+    if backend == BACKEND_REDIS:
+        logger.warning("session_store_backend is 'redis' but Redis is not configured; using in-memory sessions")
+    return MemorySessionStore(key_prefix)
@@ -0,0 +1,363 @@
+"""
+Stateless Authentication for Agent-Makalah Backend
+Claims-based access token verification backed by a locally synced revocation set
+
+With auth_mode = "stateless", access tokens are short-lived and carry the
+claims routes need (is_active, is_superuser, created_at) plus the user's
+revocation epoch ("rev"). Requests are then authenticated from the token
+alone: no blacklist lookup in Redis and no user row from the database. The
+database is only read on login and refresh.
+
+Revocations are appended to a Redis sorted set (scored by publish time) that
+every node reads incrementally in the background:
+
+    t:<jti>:<exp>         one token (logout, token refresh)
+    u:<user_id>:<epoch>   every token of a user with rev < epoch
+                          (logout-all, deactivation, password or role change)
+
+Entries older than the longest access token lifetime are trimmed, since every
+token they could revoke has expired. If the local set has not synced within
+revocation_max_staleness, requests fall back to the stateful path.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from src.database.redis_client import SharedRedis
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+security_logger = logging.getLogger("agent_makalah.security")
+
+REVOCATION_LOG_KEY = "revocations:agent_makalah"
+
+# Seconds re-read before the newest synced entry, covering clock skew between publishers
+SYNC_OVERLAP_SECONDS = 5.0
+
+# Extra retention for token expiry checks on nodes with skewed clocks
+RETENTION_MARGIN_SECONDS = 60
+
+# Claims added to tokens in stateless mode
+STATELESS_CLAIMS = ("is_active", "created_at", "rev")
+
+
+class RevocationSet:
+    """
+    Local copy of recent revocations, synced from Redis
+    """
+
+    # Shared Upstash Redis client, created on first use (see src.database.redis_client)
+    redis = SharedRedis()
+
+    def __init__(
+        self,
+        sync_interval: Optional[float] = None,
+        max_staleness: Optional[float] = None
+    ):
+        self.sync_interval = sync_interval if sync_interval is not None else settings.revocation_sync_interval
+        self.max_staleness = max_staleness if max_staleness is not None else settings.revocation_max_staleness
+
+        # jti -> token expiry (unix time)
+        self.tokens: Dict[str, float] = {}
+        # user_id -> (epoch, unix time after which the entry is no longer needed)
+        self.user_epochs: Dict[str, Tuple[int, float]] = {}
+
+        self.last_sync: Optional[float] = None
+        self.sync_count = 0
+        self.sync_errors = 0
+        self._cursor: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.auth_mode == "stateless"
+
+    @property
+    def retention(self) -> int:
+        """Seconds a revocation stays relevant (longest access token lifetime)"""
+        return settings.stateless_access_token_expire_minutes * 60 + RETENTION_MARGIN_SECONDS
+
+    def _get_epoch_key(self, user_id: str) -> str:
+        """Generate Redis key for a user's revocation epoch"""
+        return f"revocation_epoch:agent_makalah:{user_id}"
+
+    # === Read side (per request, in memory) ===
+
+    def is_fresh(self) -> bool:
+        """
+        Check that the local set synced recently enough to be trusted
+
+        Returns:
+            bool: True if the last successful sync is within max_staleness
+        """
+        return self.last_sync is not None and time.monotonic() - self.last_sync <= self.max_staleness
+
+    def can_verify(self, payload: Dict[str, Any]) -> bool:
+        """
+        Check whether a decoded token can be authenticated from its claims
+
+        Args:
+            payload: Decoded token payload
+
+        Returns:
+            bool: True for stateless access tokens while the local set is fresh
+        """
+        return (
+            self.enabled
+            and payload.get("type") == "access"
+            and "rev" in payload
+            and self.is_fresh()
+        )
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """
+        Check a decoded token against the local revocation set
+
+        Args:
+            payload: Decoded token payload
+
+        Returns:
+            bool: True if the token or all of its user's older tokens are revoked
+        """
+        if payload.get("jti") in self.tokens:
+            return True
+
+        user_epoch = self.user_epochs.get(payload.get("sub"))
+        return user_epoch is not None and int(payload.get("rev", 0)) < user_epoch[0]
+
+    # === Write side (logout, refresh, account changes) ===
+
+    def _publish(self, member: str, now: float) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.zadd(REVOCATION_LOG_KEY, {member: now})
+        pipeline.zremrangebyscore(REVOCATION_LOG_KEY, "-inf", now - self.retention)
+        pipeline.exec()
+
+    def revoke_token(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke one access token on every node
+
+        Args:
+            jti: Token JTI
+            expires_at: Token expiry (unix time)
+
+        Returns:
+            bool: True if the revocation was published
+        """
+        now = time.time()
+        if not self.enabled or expires_at <= now:
+            return False
+
+        self.tokens[jti] = expires_at
+        if not self.redis:
+            return False
+
+        try:
+            self._publish(f"t:{jti}:{int(expires_at)}", now)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish token revocation: {e}")
+            return False
+
+    def revoke_user(self, user_id: str, reason: str = "security_revocation") -> Optional[int]:
+        """
+        Revoke every token issued to a user so far by bumping their epoch
+
+        Args:
+            user_id: User identifier
+            reason: Reason for the revocation (logged)
+
+        Returns:
+            Optional[int]: New epoch, None if it could not be published
+        """
+        if not self.enabled or not self.redis:
+            return None
+
+        try:
+            epoch_key = self._get_epoch_key(user_id)
+            pipeline = self.redis.pipeline()
+            pipeline.incr(epoch_key)
+            # Refresh tokens carrying an older epoch expire with the key
+            pipeline.expire(epoch_key, settings.jwt_refresh_token_expire_days * 86400)
+            epoch = int(pipeline.exec()[0])
+
+            now = time.time()
+            self.user_epochs[user_id] = (epoch, now + self.retention)
+            self._publish(f"u:{user_id}:{epoch}", now)
+
+            security_logger.info(f"Revoked tokens of user {user_id} (epoch {epoch}), reason: {reason}")
+            return epoch
+        except Exception as e:
+            logger.error(f"Failed to publish user revocation: {e}")
+            return None
+
+    def current_epoch(self, user_id: str) -> int:
+        """
+        Authoritative revocation epoch of a user (read on token issuance)
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            int: Current epoch (the locally known one if Redis is unavailable)
+        """
+        local_epoch = self.user_epochs.get(user_id, (0, 0.0))[0]
+        if not self.redis:
+            return local_epoch
+
+        try:
+            epoch = self.redis.get(self._get_epoch_key(user_id))
+            return max(int(epoch), local_epoch) if epoch is not None else local_epoch
+        except Exception as e:
+            logger.error(f"Failed to read revocation epoch for user {user_id}: {e}")
+            return local_epoch
+
+    # === Sync ===
+
+    def _apply(self, member: str, score: float) -> None:
+        kind, _, value = member.partition(":")
+        subject, _, number = value.rpartition(":")
+        if not subject or not number:
+            return
+
+        if kind == "t":
+            self.tokens[subject] = float(number)
+        elif kind == "u":
+            epoch = int(number)
+            known = self.user_epochs.get(subject)
+            if known is None or epoch > known[0]:
+                self.user_epochs[subject] = (epoch, score + self.retention)
+
+    def _prune(self, now: float) -> None:
+        self.tokens = {jti: expires_at for jti, expires_at in self.tokens.items() if expires_at > now}
+        self.user_epochs = {
+            user_id: entry for user_id, entry in self.user_epochs.items() if entry[1] > now
+        }
+
+    def sync(self) -> int:
+        """
+        Pull revocations published since the last sync (synchronous)
+
+        Returns:
+            int: Number of log entries read
+
+        Raises:
+            Exception: If Redis is unavailable
+        """
+        if not self.redis:
+            raise ConnectionError("Redis not available for revocation sync")
+
+        now = time.time()
+        since = self._cursor - SYNC_OVERLAP_SECONDS if self._cursor is not None else now - self.retention
+        entries = self.redis.zrangebyscore(REVOCATION_LOG_KEY, since, "+inf", withscores=True)
+
+        for member, score in entries:
+            self._apply(member, score)
+            if self._cursor is None or score > self._cursor:
+                self._cursor = score
+        if self._cursor is None:
+            self._cursor = now
+
+        self._prune(now)
+        self.last_sync = time.monotonic()
+        self.sync_count += 1
+        return len(entries)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                self.sync_errors += 1
+                logger.error(f"Revocation sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    # === Lifecycle ===
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start syncing in the background on the running event loop"""
+        if not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background syncing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Revocation set statistics
+
+        Returns:
+            Dict[str, Any]: Sizes, sync counters and freshness
+        """
+        return {
+            "enabled": self.enabled,
+            "fresh": self.is_fresh(),
+            "revoked_tokens": len(self.tokens),
+            "revoked_users": len(self.user_epochs),
+            "sync_count": self.sync_count,
+            "sync_errors": self.sync_errors,
+            "last_sync_age_seconds": (
+                round(time.monotonic() - self.last_sync, 1) if self.last_sync is not None else None
+            )
+        }
+
+
+# Global revocation set instance
+revocation_set = RevocationSet()
+
+
+def stateless_user_claims(user: Any) -> Dict[str, Any]:
+    """
+    Token claims that stand in for the per-request user lookup
+
+    Args:
+        user: User row (UserInDB)
+
+    Returns:
+        Dict[str, Any]: Extra claims in stateless mode, empty otherwise
+    """
+    if not revocation_set.enabled:
+        return {}
+
+    return {
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat(),
+        "rev": revocation_set.current_epoch(str(user.id))
+    }
+
+
+def user_from_claims(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build the authenticated user from a stateless access token
+
+    Args:
+        payload: Decoded token payload (see RevocationSet.can_verify)
+
+    Returns:
+        Optional[Dict[str, Any]]: User data as set by AuthenticationMiddleware,
+            None if the user is inactive or the token is revoked
+    """
+    user_id = payload.get("sub")
+    if not user_id or not payload.get("is_active") or revocation_set.is_revoked(payload):
+        return None
+
+    return {
+        "user_id": user_id,
+        "email": payload.get("email"),
+        "is_active": True,
+        "is_superuser": payload.get("is_superuser", False),
+        "created_at": payload.get("created_at"),
+        "token_payload": payload
+    }
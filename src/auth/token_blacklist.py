@@ -1,14 +1,21 @@
 """
 JWT Token Blacklist Manager - Agent Makalah Backend
 Handles token revocation and blacklisting using Redis for distributed blacklist storage
+(in process when Redis is not configured, see src.database.local_redis)
 """
 
 import json
+import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Set
-from upstash_redis import Redis
+from src.database.redis_client import SharedRedis
 from src.core.config import settings
 from src.auth.jwt_utils import decode_token, get_token_expiry
+from src.auth.stateless import revocation_set
+
+
+logger = logging.getLogger(__name__)
+security_logger = logging.getLogger("agent_makalah.security")
 
 
 class TokenBlacklist:
@@ -16,18 +23,9 @@ class TokenBlacklist:
     Manages JWT token blacklisting and revocation using Redis
     """
     
-    def __init__(self):
-        """Initialize token blacklist with Upstash Redis connection"""
-        self.redis = None
-        if settings.upstash_redis_url and settings.upstash_redis_token:
-            try:
-                self.redis = Redis(
-                    url=settings.upstash_redis_url,
-                    token=settings.upstash_redis_token
-                )
-            except Exception as e:
-                print(f"Failed to connect to Upstash Redis for blacklist: {e}")
-                self.redis = None
+    # Shared Upstash Redis client, created on first use (see src.database.redis_client);
+    # an in-process LocalRedis when Redis is not configured
+    redis = SharedRedis(local_store="token_blacklist")
     
     def _get_blacklist_key(self, token_jti: str) -> str:
         """Generate Redis key for blacklisted token"""
@@ -49,11 +47,24 @@ class TokenBlacklist:
         """
         payload = decode_token(token)
         if payload:
-            # If JTI not present, use a combination of sub and iat as unique identifier
-            if 'jti' in payload:
-                return payload['jti']
-            elif 'sub' in payload and 'iat' in payload:
-                return f"{payload['sub']}:{payload['iat']}"
+            return self._jti_from_payload(payload)
+        return None
+    
+    def _jti_from_payload(self, payload: dict) -> Optional[str]:
+        """
+        Blacklist identifier of an already decoded token
+        
+        Args:
+            payload: Decoded token payload
+            
+        Returns:
+            Optional[str]: JTI if found, None otherwise
+        """
+        # If JTI not present, use a combination of sub and iat as unique identifier
+        if 'jti' in payload:
+            return payload['jti']
+        elif 'sub' in payload and 'iat' in payload:
+            return f"{payload['sub']}:{payload['iat']}"
         return None
     
     def blacklist_token(self, token: str, reason: str = "user_logout") -> bool:
@@ -68,19 +79,19 @@ class TokenBlacklist:
             bool: True if token blacklisted successfully, False otherwise
         """
         if not self.redis:
-            print("Redis not available for token blacklisting")
+            logger.warning("Redis not available for token blacklisting")
             return False
         
         jti = self._extract_jti(token)
         if not jti:
-            print("Could not extract JTI from token")
+            logger.warning("Could not extract JTI from token")
             return False
         
         try:
             # Get token expiry to set TTL
             expiry = get_token_expiry(token)
             if not expiry:
-                print("Could not determine token expiry")
+                logger.warning("Could not determine token expiry")
                 return False
             
             # Calculate TTL (time until token expires)
@@ -103,11 +114,43 @@ class TokenBlacklist:
                 json.dumps(blacklist_data)
             )
             
-            print(f"Token {jti} blacklisted until {expiry}, reason: {reason}")
+            # Stateless nodes check access tokens against their local revocation set
+            if revocation_set.enabled and (decode_token(token) or {}).get("type") == "access":
+                revocation_set.revoke_token(jti, expiry.timestamp())
+            
+            security_logger.info(f"Token {jti} blacklisted until {expiry}, reason: {reason}")
             return result
             
         except Exception as e:
-            print(f"Failed to blacklist token: {e}")
+            logger.error(f"Failed to blacklist token: {e}")
+            return False
+    
+    def blacklist_jti(self, jti: str, ttl_seconds: int, reason: str = "revoked") -> bool:
+        """
+        Blacklist a token by JTI when only its identifier is known
+        
+        Args:
+            jti: Token JTI
+            ttl_seconds: Seconds until the token expires
+            reason: Reason for blacklisting
+            
+        Returns:
+            bool: True if token blacklisted successfully, False otherwise
+        """
+        if not self.redis or ttl_seconds <= 0:
+            return False
+        
+        try:
+            blacklist_data = {
+                "blacklisted_at": datetime.utcnow().isoformat(),
+                "reason": reason
+            }
+            result = self.redis.setex(self._get_blacklist_key(jti), ttl_seconds, json.dumps(blacklist_data))
+            security_logger.info(f"Token {jti} blacklisted for {ttl_seconds}s, reason: {reason}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to blacklist token {jti}: {e}")
             return False
     
     def is_token_blacklisted(self, token: str) -> bool:
@@ -133,7 +176,7 @@ class TokenBlacklist:
             return result is not None
             
         except Exception as e:
-            print(f"Failed to check token blacklist status: {e}")
+            logger.error(f"Failed to check token blacklist status: {e}")
             return False
     
     def blacklist_all_user_tokens(self, user_id: str, reason: str = "security_revocation") -> int:
@@ -176,16 +219,19 @@ class TokenBlacklist:
                     blacklisted_count += 1
                     
                 except Exception as e:
-                    print(f"Failed to blacklist token {token_jti}: {e}")
+                    logger.error(f"Failed to blacklist token {token_jti}: {e}")
             
             # Clear the user's active tokens set
             self.redis.delete(user_tokens_key)
             
-            print(f"Blacklisted {blacklisted_count} tokens for user {user_id}")
+            # Untracked tokens may remain: revoke everything issued so far on stateless nodes
+            revocation_set.revoke_user(user_id, reason)
+            
+            security_logger.info(f"Blacklisted {blacklisted_count} tokens for user {user_id}")
             return blacklisted_count
             
         except Exception as e:
-            print(f"Failed to blacklist user tokens: {e}")
+            logger.error(f"Failed to blacklist user tokens: {e}")
             return 0
     
     def track_user_token(self, user_id: str, token: str) -> bool:
@@ -222,7 +268,7 @@ class TokenBlacklist:
             return True
             
         except Exception as e:
-            print(f"Failed to track user token: {e}")
+            logger.error(f"Failed to track user token: {e}")
             return False
     
     def untrack_user_token(self, user_id: str, token: str) -> bool:
@@ -249,7 +295,7 @@ class TokenBlacklist:
             return result == 1
             
         except Exception as e:
-            print(f"Failed to untrack user token: {e}")
+            logger.error(f"Failed to untrack user token: {e}")
             return False
     
     def get_blacklist_stats(self) -> dict:
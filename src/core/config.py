@@ -4,7 +4,8 @@ Environment variables and application settings management
 """
 
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -18,6 +19,15 @@ class Settings(BaseSettings):
     api_reload: bool = True
     log_level: str = "info"
     
+    # === Production Server Configuration (python -m src.server) ===
+    server_workers: int = 0  # 0 = one worker per CPU core
+    server_preload_app: bool = True  # Import the app once in the master, fork workers from it
+    server_max_requests: int = 10000  # Recycle a worker after this many requests (0 disables)
+    server_max_requests_jitter: int = 1000  # Random extra requests so workers don't recycle together
+    server_graceful_timeout: int = 30  # seconds a worker gets to finish in-flight requests
+    server_timeout: int = 60  # seconds of silence before a worker is killed and replaced
+    server_keepalive: int = 5
+    
     # === AI/LLM Provider Keys ===
     openai_api_key: Optional[str] = None
     google_gemini_api_key: Optional[str] = None
@@ -59,6 +69,20 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
     jwt_refresh_token_expire_days: int = 7
+    refresh_reuse_grace_seconds: int = 30  # A rotated refresh token replays the same result this long
+    jwt_keyring: Dict[str, Any] = {}  # {"active": kid, "keys": [...]}; see src/auth/keyring.py
+    jwt_keyring_file: Optional[str] = None  # JSON keyring, hot-reloaded when modified
+    jwt_keyring_reload_interval: int = 10  # seconds between keyring file checks
+    jwt_legacy_tokens_until: Optional[datetime] = None  # With an active key, kid-less HS256 tokens verify until then (UTC if naive)
+    jwks_cache_max_age: int = 300  # Cache-Control max-age of /.well-known/jwks.json
+    
+    # === Stateless Authentication (see src/auth/stateless.py) ===
+    auth_mode: str = "stateful"  # "stateful" (blacklist + user row per request) or "stateless" (token claims)
+    stateless_access_token_expire_minutes: int = 5  # Access token lifetime in stateless mode
+    revocation_sync_interval: float = 2.0  # seconds between revocation set syncs from Redis
+    revocation_max_staleness: float = 30.0  # Older local revocation sets fall back to stateful checks
+    introspection_auth_token: Optional[str] = None  # X-Introspection-Token for internal services
+    introspection_max_tokens: int = 100  # Tokens per /auth/introspect request
     
     # === Password Hashing Configuration ===
     password_hash_algorithm: str = "bcrypt"
@@ -68,11 +92,77 @@ class Settings(BaseSettings):
     # === Session Configuration ===
     session_secret_key: str = "default-session-secret-change-in-production"
     session_max_age: int = 3600  # 1 hour
+    session_store_backend: str = "auto"  # memory, redis, postgres, or auto (Redis when Upstash is configured)
+    session_activity_flush_interval_ms: int = 1000  # write-behind interval of session last-access times (0: write each touch)
+    session_activity_max_pending: int = 50000  # sessions buffered per worker before touches are dropped
+    max_sessions_per_user: int = 10  # concurrent sessions per user; logging in beyond it ends the least recently active (0: no cap)
+    local_store_max_entries: int = 100000  # cap of in-process session stores; the blacklist without Redis is never capped and warns past it
     session_cookie_name: str = "agent_makalah_session"
     session_cookie_secure: bool = False  # Set to True in production with HTTPS
     session_cookie_httponly: bool = True
     session_cookie_samesite: str = "lax"
     
+    # === Rate Limiting Configuration ===
+    # Per-route overrides, e.g. {"api_general": {"requests": 200, "window": 60, "key": "user"}}
+    rate_limit_policies: Dict[str, Dict[str, Any]] = {}
+    # Per-user overrides, e.g. {"<user_id>": {"api_general": {"requests": 1000, "window": 60}}}
+    rate_limit_user_policies: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    rate_limit_policy_file: Optional[str] = None  # JSON file, hot-reloaded when modified
+    rate_limit_reload_interval: int = 30  # seconds between policy file checks
+    rate_limit_backend: str = "auto"  # memory, redis, or auto (Redis when Upstash is configured)
+    
+    # === Request Logging Configuration ===
+    # Fraction of requests whose informational log records are emitted
+    log_sample_rate_security: float = 1.0
+    log_sample_rate_performance: float = 1.0
+    log_sample_rate_general: float = 1.0
+    
+    # === Logging Pipeline Configuration ===
+    log_pipeline_enabled: bool = True  # Queue log records and write JSON lines from a background thread
+    log_queue_max_size: int = 10000  # Records beyond this are dropped and counted
+    log_batch_size: int = 256
+    log_flush_interval_ms: int = 200
+    log_output_file: Optional[str] = None  # Defaults to stdout
+    
+    # === Metrics Configuration ===
+    metrics_enabled: bool = True
+    metrics_auth_token: Optional[str] = None  # /metrics requires a matching X-Metrics-Token header (outside development it is refused without one)
+    metrics_multiprocess_dir: Optional[str] = None  # Shared directory for per-worker snapshots
+    metrics_snapshot_interval: int = 5  # seconds between per-worker snapshot writes
+    
+    # === Server-Timing Configuration ===
+    server_timing_enabled: bool = False  # Emit the phase breakdown as a Server-Timing header (superusers and metrics token holders only)
+    server_timing_log: bool = True  # Include the phase breakdown in request log records
+    
+    # === Event Loop Monitor Configuration ===
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: int = 250  # Probe interval for loop lag measurement
+    loop_monitor_threshold_ms: int = 100  # Stalls longer than this capture a stack sample
+    loop_monitor_stack_depth: int = 30
+    
+    # === Request Profiler Configuration (debug mode, off by default) ===
+    profiler_enabled: bool = False
+    profiler_header: str = "X-Debug-Profile"  # "1" profiles the request (kept for superusers only)
+    profiler_sample_rate: float = 0.0  # Fraction of all requests to profile
+    profiler_threshold_ms: int = 500  # Only requests slower than this are written
+    profiler_interval_ms: int = 5  # Stack sampling interval
+    profiler_output_dir: str = "profiles"
+    profiler_max_concurrent: int = 2
+    
+    # === Dependency Health Probe Configuration ===
+    health_probe_enabled: bool = True
+    health_probe_interval: int = 15  # seconds between Supabase/Redis checks
+    health_llm_probe_interval: int = 300  # seconds between LLM provider checks
+    health_probe_timeout: float = 5.0
+    
+    # === Startup/Shutdown Configuration ===
+    startup_warmup_enabled: bool = True  # Warm pools and caches before the app reports ready
+    startup_warmup_timeout: float = 10.0  # Warmup never delays readiness longer than this
+    shutdown_drain_timeout: float = 20.0  # seconds to wait for in-flight requests on shutdown
+    password_hash_target_ms: Optional[int] = None  # Raise bcrypt rounds up to this hash time at startup
+    http_pool_max_connections: int = 100
+    http_pool_max_keepalive: int = 20
+    
     # === Google Cloud Configuration ===
     gcs_bucket_name: Optional[str] = None
     google_cloud_project: Optional[str] = None
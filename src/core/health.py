@@ -0,0 +1,278 @@
+"""
+Agent-Makalah Dependency Health Prober
+Checks Supabase, Redis and configured LLM providers in the background
+
+Health endpoints read the latest snapshot instead of querying dependencies on
+every poll, so load balancer and monitor traffic costs nothing downstream and
+never waits on a slow dependency. Synchronous client calls run in worker
+threads with a timeout, so a hanging dependency cannot block the event loop.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.core.config import settings
+from src.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Dependency states
+STATUS_HEALTHY = "healthy"
+STATUS_UNHEALTHY = "unhealthy"
+STATUS_NOT_CONFIGURED = "not_configured"
+STATUS_UNKNOWN = "unknown"
+
+dependency_up = metrics_registry.gauge(
+    "dependency_up",
+    "1 if the last health probe of a dependency succeeded",
+    ("dependency",)
+)
+dependency_check_duration = metrics_registry.histogram(
+    "dependency_check_duration_seconds",
+    "Latency of dependency health probes",
+    ("dependency",)
+)
+
+# LLM provider model-list endpoints (cheap, authenticated, no token usage)
+LLM_PROVIDERS = {
+    "openai": {
+        "key_setting": "openai_api_key",
+        "url": "https://api.openai.com/v1/models",
+        "headers": lambda key: {"Authorization": f"Bearer {key}"},
+        "params": lambda key: None
+    },
+    "anthropic": {
+        "key_setting": "anthropic_api_key",
+        "url": "https://api.anthropic.com/v1/models",
+        "headers": lambda key: {"x-api-key": key, "anthropic-version": "2023-06-01"},
+        "params": lambda key: None
+    },
+    "gemini": {
+        "key_setting": "google_gemini_api_key",
+        "url": "https://generativelanguage.googleapis.com/v1beta/models",
+        # Key in a header: httpx logs request URLs, query strings included
+        "headers": lambda key: {"x-goog-api-key": key},
+        "params": lambda key: {"pageSize": 1}
+    }
+}
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class HealthProber:
+    """
+    Background prober that keeps the latest status of every dependency
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        llm_interval: Optional[float] = None,
+        timeout: Optional[float] = None
+    ):
+        self.interval = interval if interval is not None else settings.health_probe_interval
+        self.llm_interval = llm_interval if llm_interval is not None else settings.health_llm_probe_interval
+        self.timeout = timeout if timeout is not None else settings.health_probe_timeout
+
+        # Dependency name -> (check coroutine factory, interval)
+        self.checks: Dict[str, tuple] = {}
+        self.snapshot: Dict[str, Dict[str, Any]] = {}
+
+        # Shared HTTP pool set by the resource container; checks open a client otherwise
+        self.http_client = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._next_run: Dict[str, float] = {}
+
+        self.register("supabase", self._check_supabase)
+        self.register("redis", self._check_redis)
+        for provider in LLM_PROVIDERS:
+            self.register(
+                f"llm_{provider}",
+                lambda provider=provider: self._check_llm(provider),
+                interval=self.llm_interval
+            )
+
+    def register(
+        self,
+        name: str,
+        check: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        interval: Optional[float] = None
+    ) -> None:
+        """
+        Register a dependency check
+
+        Args:
+            name: Dependency name
+            check: Coroutine function that raises on failure, returns STATUS_NOT_CONFIGURED
+                   to mark the dependency as not configured, or optional details
+            interval: Seconds between checks (defaults to the prober interval)
+        """
+        self.checks[name] = (check, interval if interval is not None else self.interval)
+        self.snapshot[name] = {"status": STATUS_UNKNOWN, "checked_at": None, "latency_ms": None}
+
+    # === Checks ===
+
+    async def _check_supabase(self):
+        if not (settings.supabase_url and settings.supabase_anon_key):
+            return STATUS_NOT_CONFIGURED
+        from src.database.supabase_client import supabase_client
+        await asyncio.to_thread(supabase_client.ping)
+        return {"project_ref": settings.supabase_project_ref}
+
+    async def _check_redis(self):
+        from src.database.redis_client import get_redis_client
+        redis = await asyncio.to_thread(get_redis_client)
+        if redis is None:
+            return STATUS_NOT_CONFIGURED
+        await asyncio.to_thread(redis.ping)
+        return None
+
+    async def _check_llm(self, provider: str):
+        config = LLM_PROVIDERS[provider]
+        api_key = getattr(settings, config["key_setting"], None)
+        if not api_key:
+            return STATUS_NOT_CONFIGURED
+
+        request = {
+            "headers": config["headers"](api_key),
+            "params": config["params"](api_key),
+            "timeout": self.timeout
+        }
+        if self.http_client is not None:
+            response = await self.http_client.get(config["url"], **request)
+        else:
+            import httpx
+
+            async with httpx.AsyncClient() as client:
+                response = await client.get(config["url"], **request)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return None
+
+    # === Probing ===
+
+    async def run_check(self, name: str) -> Dict[str, Any]:
+        """
+        Run one dependency check and store its result in the snapshot
+
+        Args:
+            name: Dependency name
+
+        Returns:
+            Dict[str, Any]: Stored result
+        """
+        check, _ = self.checks[name]
+        previous = self.snapshot.get(name, {}).get("status")
+
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check(), timeout=self.timeout)
+            if details == STATUS_NOT_CONFIGURED:
+                result = {"status": STATUS_NOT_CONFIGURED}
+            else:
+                result = {"status": STATUS_HEALTHY}
+                if details:
+                    result["details"] = details
+        except asyncio.TimeoutError:
+            result = {"status": STATUS_UNHEALTHY, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": STATUS_UNHEALTHY, "error": str(e)}
+        latency = time.perf_counter() - start
+
+        result["checked_at"] = _utc_now()
+        result["latency_ms"] = round(latency * 1000, 2)
+        self.snapshot[name] = result
+
+        if result["status"] != STATUS_NOT_CONFIGURED:
+            dependency_check_duration.observe(latency, name)
+            dependency_up.set(1 if result["status"] == STATUS_HEALTHY else 0, name)
+
+        if result["status"] == STATUS_UNHEALTHY and previous != STATUS_UNHEALTHY:
+            logger.warning(f"Dependency {name} is unhealthy: {result.get('error')}")
+        elif result["status"] == STATUS_HEALTHY and previous == STATUS_UNHEALTHY:
+            logger.info(f"Dependency {name} recovered")
+
+        return result
+
+    async def run_due_checks(self) -> None:
+        """Run every check whose interval has elapsed, concurrently"""
+        now = time.monotonic()
+        due = [name for name in self.checks if now >= self._next_run.get(name, 0.0)]
+        for name in due:
+            self._next_run[name] = now + self.checks[name][1]
+        if due:
+            await asyncio.gather(*(self.run_check(name) for name in due))
+
+    async def _run(self) -> None:
+        tick = min(interval for _, interval in self.checks.values())
+        while True:
+            try:
+                await self.run_due_checks()
+            except Exception as e:
+                logger.error(f"Health prober iteration failed: {e}")
+            await asyncio.sleep(tick)
+
+    # === Lifecycle ===
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start probing in the background on the running event loop"""
+        if not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background probing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # === Read side (health endpoints) ===
+
+    def get_status(self, name: str) -> Dict[str, Any]:
+        """
+        Latest result for one dependency
+
+        Args:
+            name: Dependency name
+
+        Returns:
+            Dict[str, Any]: Status, checked_at, latency_ms and error/details if any
+        """
+        return self.snapshot.get(name, {"status": STATUS_UNKNOWN, "checked_at": None, "latency_ms": None})
+
+    def get_overall_status(self) -> str:
+        """
+        Aggregate status: unhealthy dependencies make the service degraded
+
+        Returns:
+            str: "healthy" or "degraded"
+        """
+        if any(entry["status"] == STATUS_UNHEALTHY for entry in self.snapshot.values()):
+            return "degraded"
+        return STATUS_HEALTHY
+
+    def get_summary(self) -> Dict[str, str]:
+        """
+        Dependency name -> status
+
+        Returns:
+            Dict[str, str]: Status per dependency
+        """
+        return {name: entry["status"] for name, entry in self.snapshot.items()}
+
+
+# Global health prober instance
+health_prober = HealthProber()
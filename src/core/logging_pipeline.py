@@ -0,0 +1,375 @@
+"""
+Agent-Makalah Logging Pipeline
+Non-blocking queued log shipping with orjson structured output
+
+Log calls on the request path only enqueue the LogRecord. A background writer
+thread serializes records to JSON lines with orjson and writes them to the sink
+in batches, so request latency never depends on the speed of stdout or a file.
+"""
+
+import io
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from src.core.config import settings
+from src.core.metrics import metrics_registry, COUNTER
+
+# Event categories used for sampling and drop counters
+CATEGORY_SECURITY = "security"
+CATEGORY_PERFORMANCE = "performance"
+CATEGORY_GENERAL = "general"
+
+CATEGORIES = (CATEGORY_SECURITY, CATEGORY_PERFORMANCE, CATEGORY_GENERAL)
+
+# Category whose informational records were already sampled in for the current
+# request (set by RequestLoggingMiddleware so records are not sampled twice)
+request_sampled_category: ContextVar[Optional[str]] = ContextVar("request_sampled_category", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+_STOP = object()
+
+
+def get_record_category(record: logging.LogRecord) -> str:
+    """
+    Classify a log record into an event category
+
+    Args:
+        record: Log record
+
+    Returns:
+        str: security, performance or general
+    """
+    name = record.name
+    if name.startswith("agent_makalah.security"):
+        return CATEGORY_SECURITY
+    if name.startswith("agent_makalah.performance"):
+        return CATEGORY_PERFORMANCE
+    return CATEGORY_GENERAL
+
+
+def record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    """
+    Convert a log record into a structured dictionary
+
+    Args:
+        record: Log record
+
+    Returns:
+        Dict[str, Any]: Structured log entry
+    """
+    entry: Dict[str, Any] = {
+        "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage(),
+        "category": get_record_category(record)
+    }
+
+    for key, value in record.__dict__.items():
+        if key not in _STANDARD_RECORD_ATTRS and not key.startswith("_"):
+            entry[key] = value
+
+    if record.exc_info:
+        entry["exception"] = logging.Formatter().formatException(record.exc_info)
+
+    return entry
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    Logging handler that samples records and hands them to the pipeline queue
+    """
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.pipeline.enqueue(record)
+
+
+class LogPipeline:
+    """
+    Queue-based logging pipeline with a background writer thread
+
+    - Bounded queue: when full, records are dropped and counted per category
+    - Batching: the writer drains up to batch_size records per write
+    - Sampling: informational records (below WARNING) are sampled per category;
+      warnings and errors are always kept
+    """
+
+    def __init__(
+        self,
+        max_queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        sample_rates: Optional[Dict[str, float]] = None,
+        stream=None
+    ):
+        self.max_queue_size = max_queue_size or settings.log_queue_max_size
+        self.batch_size = batch_size or settings.log_batch_size
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.log_flush_interval_ms / 1000
+        )
+        self.sample_rates = sample_rates or {
+            CATEGORY_SECURITY: settings.log_sample_rate_security,
+            CATEGORY_PERFORMANCE: settings.log_sample_rate_performance,
+            CATEGORY_GENERAL: settings.log_sample_rate_general
+        }
+        self.stream = stream
+
+        self.queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        self.handler = QueueLogHandler(self)
+
+        self.dropped: Dict[str, int] = {category: 0 for category in CATEGORIES}
+        self.sampled_out: Dict[str, int] = {category: 0 for category in CATEGORIES}
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._owns_stream = False
+        self._installed_on: Optional[logging.Logger] = None
+        self._previous_handlers: List[logging.Handler] = []
+        self._previous_level = logging.NOTSET
+
+    # === Sampling ===
+
+    def sample(self, category: str) -> bool:
+        """
+        Decide whether an informational event of a category is sampled in
+
+        Args:
+            category: Event category
+
+        Returns:
+            bool: True if the event should be logged
+        """
+        sample_rate = self.sample_rates.get(category, 1.0)
+        if sample_rate >= 1.0:
+            return True
+        if sample_rate <= 0.0:
+            return False
+        return random.random() < sample_rate
+
+    # === Producer side (request path) ===
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Sample and enqueue a record without blocking
+
+        Args:
+            record: Log record
+        """
+        category = get_record_category(record)
+
+        if record.levelno < logging.WARNING and request_sampled_category.get() != category:
+            if not self.sample(category):
+                self.sampled_out[category] += 1
+                return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped[category] += 1
+
+    # === Consumer side (writer thread) ===
+
+    def _get_stream(self):
+        """Get the output stream, resolving stdout lazily so it can be redirected"""
+        if self.stream is not None:
+            return self.stream
+        return getattr(sys.stdout, "buffer", sys.stdout)
+
+    def _serialize(self, record: logging.LogRecord) -> bytes:
+        """
+        Serialize a record into one JSON line
+
+        Args:
+            record: Log record
+
+        Returns:
+            bytes: JSON line
+        """
+        return orjson.dumps(
+            record_to_dict(record),
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+        )
+
+    def _write_batch(self, batch: List[logging.LogRecord]) -> None:
+        """
+        Serialize and write a batch of records in one write call
+
+        Args:
+            batch: Records to write
+        """
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self._serialize(record))
+            except Exception:
+                self.write_errors += 1
+
+        if not lines:
+            return
+
+        stream = self._get_stream()
+        payload = b"".join(lines)
+        try:
+            if isinstance(stream, io.TextIOBase):
+                stream.write(payload.decode("utf-8"))
+            else:
+                stream.write(payload)
+            stream.flush()
+            self.written += len(lines)
+            self.batches += 1
+        except Exception:
+            self.write_errors += 1
+
+    def _run(self) -> None:
+        """Writer thread main loop"""
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            stop = first is _STOP
+            batch = [] if stop else [first]
+
+            # Drain what is already queued, up to one batch
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+
+            if batch:
+                self._write_batch(batch)
+
+            if stop:
+                # Flush anything enqueued after the stop marker
+                remaining = []
+                while True:
+                    try:
+                        record = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is not _STOP:
+                        remaining.append(record)
+                if remaining:
+                    self._write_batch(remaining)
+                return
+
+    # === Lifecycle ===
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, logger: Optional[logging.Logger] = None, level: Optional[str] = None) -> None:
+        """
+        Start the writer thread and route a logger's records through the queue
+
+        Args:
+            logger: Logger to install on (defaults to the root logger)
+            level: Log level name to apply (defaults to settings.log_level)
+        """
+        if self.is_running:
+            return
+
+        if self.stream is None and settings.log_output_file:
+            self.stream = open(settings.log_output_file, "ab")
+            self._owns_stream = True
+
+        target = logger or logging.getLogger()
+        self._previous_handlers = list(target.handlers)
+        self._previous_level = target.level
+        for existing in self._previous_handlers:
+            target.removeHandler(existing)
+        target.addHandler(self.handler)
+        target.setLevel((level or settings.log_level).upper())
+        self._installed_on = target
+
+        self._thread = threading.Thread(target=self._run, name="log-pipeline-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Flush queued records, stop the writer thread and restore previous handlers and level
+
+        Args:
+            timeout: Seconds to wait for the writer to drain
+        """
+        if self._installed_on is not None:
+            self._installed_on.removeHandler(self.handler)
+            for existing in self._previous_handlers:
+                self._installed_on.addHandler(existing)
+            self._installed_on.setLevel(self._previous_level)
+            self._installed_on = None
+            self._previous_handlers = []
+
+        if not self.is_running:
+            return
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self.queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+        self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._thread = None
+
+        if self._owns_stream:
+            self.stream.close()
+            self.stream = None
+            self._owns_stream = False
+
+    def get_stats(self) -> dict:
+        """
+        Get pipeline statistics for monitoring
+
+        Returns:
+            dict: Pipeline statistics
+        """
+        return {
+            "running": self.is_running,
+            "queued": self.queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": dict(self.dropped),
+            "sampled_out": dict(self.sampled_out),
+            "write_errors": self.write_errors
+        }
+
+
+# Global logging pipeline instance
+log_pipeline = LogPipeline()
+
+metrics_registry.register_callback(
+    "log_records_dropped_total",
+    "Log records dropped because the pipeline queue was full",
+    COUNTER,
+    ("category",),
+    lambda: [((category,), count) for category, count in log_pipeline.dropped.items()]
+)
@@ -0,0 +1,202 @@
+"""
+Agent-Makalah Event Loop Monitor
+Measures event-loop lag and captures stacks of calls that block the loop
+
+A probe task on the event loop sleeps for a fixed interval and records how late
+it wakes up (loop lag). It also refreshes a heartbeat. A watchdog thread checks
+the heartbeat; when the loop has not come back within the blocking threshold it
+samples the loop thread's current stack with sys._current_frames(), so the
+blocking call (bcrypt, sync Supabase/Upstash I/O, ...) is caught in the act.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from src.core.config import settings
+from src.core.metrics import metrics_registry
+
+performance_logger = logging.getLogger("agent_makalah.performance")
+
+# Project root, used to find the first application frame of a stack
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+event_loop_lag = metrics_registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between scheduled and actual wake-up of the loop probe",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+event_loop_blocked = metrics_registry.counter(
+    "event_loop_blocked_total",
+    "Event loop stalls longer than the blocking threshold, by application frame",
+    ("location",)
+)
+
+
+def find_app_location(stack: List[traceback.FrameSummary]) -> str:
+    """
+    Find the innermost application frame of a stack (skipping library code)
+
+    Args:
+        stack: Extracted stack, outermost first
+
+    Returns:
+        str: "src/module.py:function" or "<external>" if no application frame
+    """
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_PROJECT_ROOT) and "site-packages" not in filename:
+            relative = os.path.relpath(filename, _PROJECT_ROOT)
+            if relative.startswith("src" + os.sep):
+                return f"{relative}:{frame.name}"
+    return "<external>"
+
+
+class LoopMonitor:
+    """
+    Event loop lag probe with a blocking-call watchdog
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        threshold: Optional[float] = None,
+        stack_depth: Optional[int] = None,
+        max_samples: int = 20
+    ):
+        self.interval = interval if interval is not None else settings.loop_monitor_interval_ms / 1000
+        self.threshold = threshold if threshold is not None else settings.loop_monitor_threshold_ms / 1000
+        self.stack_depth = stack_depth or settings.loop_monitor_stack_depth
+
+        # Most recent blocking samples, for get_stats()
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=max_samples)
+        self.max_lag = 0.0
+        self.blocked_count = 0
+
+        self._heartbeat = time.perf_counter()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # === Probe (runs on the event loop) ===
+
+    async def _probe(self) -> None:
+        """Measure loop lag and refresh the heartbeat"""
+        while True:
+            self._heartbeat = time.perf_counter()
+            scheduled = self._heartbeat + self.interval
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, time.perf_counter() - scheduled)
+            event_loop_lag.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    # === Watchdog (runs in its own thread) ===
+
+    def _watch(self) -> None:
+        """Sample the loop thread's stack when the heartbeat is overdue"""
+        check_every = max(self.threshold / 2, 0.005)
+        captured_for = None
+
+        while not self._stop_event.wait(check_every):
+            heartbeat = self._heartbeat
+            overdue = time.perf_counter() - heartbeat - self.interval
+            if overdue < self.threshold or captured_for == heartbeat:
+                continue
+
+            # One sample per stall: the heartbeat changes once the loop recovers
+            captured_for = heartbeat
+            self._capture(overdue)
+
+    def _capture(self, overdue: float) -> None:
+        """
+        Record the stack of the blocked loop thread
+
+        Args:
+            overdue: Seconds the loop is past its expected wake-up
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+
+        stack = traceback.extract_stack(frame, limit=self.stack_depth)
+        location = find_app_location(stack)
+        formatted = "".join(traceback.format_list(stack))
+
+        self.blocked_count += 1
+        event_loop_blocked.inc(location)
+        self.samples.append({
+            "timestamp": time.time(),
+            "overdue_ms": round(overdue * 1000, 1),
+            "location": location,
+            "stack": formatted
+        })
+
+        performance_logger.warning(
+            f"Event loop blocked for more than {self.threshold * 1000:.0f}ms at {location}",
+            extra={"event_type": "event_loop_blocked", "location": location, "stack": formatted}
+        )
+
+    # === Lifecycle ===
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the probe on the running event loop and the watchdog thread"""
+        if self.is_running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+
+        self._stop_event.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the probe and the watchdog thread"""
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def get_stats(self) -> dict:
+        """
+        Get monitor statistics
+
+        Returns:
+            dict: Monitor statistics with the most recent blocking samples
+        """
+        return {
+            "running": self.is_running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocked_count": self.blocked_count,
+            "recent_blocks": [
+                {key: value for key, value in sample.items() if key != "stack"}
+                for sample in self.samples
+            ]
+        }
+
+
+# Global event loop monitor instance
+loop_monitor = LoopMonitor()
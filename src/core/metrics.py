@@ -0,0 +1,721 @@
+"""
+Agent-Makalah Metrics Registry
+In-process counters, gauges and fixed-bucket histograms with Prometheus text output
+
+Recording is lock-light: a series is created under a lock once, after that every
+update is a plain dict lookup plus an in-place add. Under the GIL concurrent
+increments from worker threads may very rarely lose an update, which is
+acceptable for monitoring data.
+
+With several worker processes each worker periodically writes a snapshot to
+settings.metrics_multiprocess_dir and /metrics merges all snapshots, so the
+exposed histograms (and p50/p99 computed from them) cover every worker.
+Counters and histograms of exited workers are folded into one archive
+snapshot (metrics-archive.json) so totals never go backwards while the
+directory stays bounded by the number of live workers.
+"""
+
+import asyncio
+import fcntl
+import glob
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds, +Inf is implicit)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# Snapshot of the counters and histograms of exited workers
+ARCHIVE_SNAPSHOT = "metrics-archive.json"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects"""
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[Any], extra: str = "") -> str:
+    """Render a label set as {a="x",b="y"}"""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """
+    Base class for labelled metrics
+    """
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def _get_series(self, labelvalues: Tuple):
+        """Get the series for a label set, creating it under the lock on first use"""
+        series = self._series.get(labelvalues)
+        if series is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+            with self._lock:
+                series = self._series.get(labelvalues)
+                if series is None:
+                    series = self._new_series()
+                    self._series[labelvalues] = series
+        return series
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of all series"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing counter
+    """
+
+    metric_type = COUNTER
+
+    def _new_series(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        self._get_series(labelvalues)[0] += amount
+
+    def get(self, *labelvalues) -> float:
+        series = self._series.get(labelvalues)
+        return series[0] if series else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.metric_type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "series": [[list(labels), series[0]] for labels, series in list(self._series.items())]
+        }
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down
+    """
+
+    metric_type = GAUGE
+
+    def dec(self, *labelvalues, amount: float = 1.0) -> None:
+        self._get_series(labelvalues)[0] -= amount
+
+    def set(self, value: float, *labelvalues) -> None:
+        self._get_series(labelvalues)[0] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram (bucket counts are stored non-cumulatively and
+    accumulated at render time)
+    """
+
+    metric_type = HISTOGRAM
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+
+    def _new_series(self) -> _HistogramSeries:
+        return _HistogramSeries(len(self.buckets) + 1)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        series = self._get_series(labelvalues)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def quantile(self, q: float, *labelvalues) -> Optional[float]:
+        """
+        Estimate a quantile for one series
+
+        Args:
+            q: Quantile between 0 and 1
+            labelvalues: Label values of the series
+
+        Returns:
+            Optional[float]: Estimated value, None if nothing was observed
+        """
+        series = self._series.get(labelvalues)
+        if series is None:
+            return None
+        return estimate_quantile(self.buckets, series.counts, q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.metric_type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "series": [
+                [list(labels), {"counts": list(series.counts), "sum": series.sum, "count": series.count}]
+                for labels, series in list(self._series.items())
+            ]
+        }
+
+
+class _CallbackMetric:
+    """
+    Metric whose samples are read from a callback at collection time
+    (used for statistics that components already keep, e.g. cache hits)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[Sequence[Any], float]]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def snapshot(self) -> Dict[str, Any]:
+        try:
+            samples = [[list(labels), float(value)] for labels, value in self.callback()]
+        except Exception as e:
+            logger.warning(f"Metrics callback {self.name} failed: {e}")
+            samples = []
+        return {
+            "type": self.metric_type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "series": samples
+        }
+
+
+def estimate_quantile(buckets: Sequence[float], counts: Sequence[int], q: float) -> Optional[float]:
+    """
+    Estimate a quantile from non-cumulative bucket counts by linear interpolation
+
+    Args:
+        buckets: Bucket upper bounds (without +Inf)
+        counts: Observation count per bucket, last entry is the +Inf bucket
+        q: Quantile between 0 and 1
+
+    Returns:
+        Optional[float]: Estimated value, None if nothing was observed
+    """
+    total = sum(counts)
+    if total == 0:
+        return None
+
+    rank = q * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if index >= len(buckets):
+                # Observation above the largest bucket: report the largest bound
+                return buckets[-1] if buckets else None
+            lower = buckets[index - 1] if index > 0 else 0.0
+            upper = buckets[index]
+            return lower + (upper - lower) * ((rank - cumulative) / count)
+        cumulative += count
+    return buckets[-1] if buckets else None
+
+
+class MetricsRegistry:
+    """
+    Registry of all metrics exposed on /metrics
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[Sequence[Any], float]]]
+    ) -> None:
+        """
+        Register a metric read from a callback at collection time
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            metric_type: COUNTER or GAUGE
+            labelnames: Label names
+            callback: Returns (labelvalues, value) pairs
+        """
+        with self._lock:
+            self._metrics[name] = _CallbackMetric(name, documentation, metric_type, labelnames, callback)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    # === Collection ===
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Serializable view of every metric in this process
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Metric name -> metric snapshot
+        """
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def write_snapshot(self, directory: str) -> str:
+        """
+        Write this process's snapshot for cross-worker aggregation
+
+        Args:
+            directory: Shared snapshot directory
+
+        Returns:
+            str: Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        _write_snapshot_file(path, {"pid": os.getpid(), "metrics": self.snapshot()})
+        return path
+
+    def retire_snapshot(self, directory: str) -> None:
+        """
+        Fold this worker's final counters into the archive snapshot and
+        remove its own snapshot file (on worker exit)
+
+        Args:
+            directory: Shared snapshot directory
+        """
+        path = self.write_snapshot(directory)
+        with _snapshot_lock(directory):
+            _archive_snapshot(directory, path)
+
+    def collect(self, directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Collect metrics, merged across worker snapshots when a directory is set
+
+        Args:
+            directory: Shared snapshot directory (defaults to settings.metrics_multiprocess_dir)
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Merged metric snapshots
+        """
+        directory = directory if directory is not None else settings.metrics_multiprocess_dir
+        if not directory:
+            return self.snapshot()
+
+        # Refresh our own file so the scraping worker is never stale
+        self.write_snapshot(directory)
+
+        # Gauges describe current state: ignore workers that stopped reporting
+        gauge_max_age = max(3 * settings.metrics_snapshot_interval, 10)
+        now = time.time()
+
+        snapshots = []
+        with _snapshot_lock(directory):
+            for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+                pid = _snapshot_pid(path)
+                if pid is not None and pid != os.getpid() and not _process_alive(pid):
+                    # Worker exited without retiring its snapshot (killed, crashed)
+                    _archive_snapshot(directory, path)
+
+            for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+                try:
+                    with open(path, "rb") as snapshot_file:
+                        data = orjson.loads(snapshot_file.read())
+                    fresh = _snapshot_pid(path) is not None and now - os.path.getmtime(path) <= gauge_max_age
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+                    continue
+                snapshots.append((data.get("metrics", {}), fresh))
+
+        return merge_snapshots(snapshots)
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Args:
+            directory: Shared snapshot directory (defaults to settings.metrics_multiprocess_dir)
+
+        Returns:
+            str: Exposition text
+        """
+        return render_snapshot(self.collect(directory))
+
+    def get_latency_summary(
+        self,
+        name: str = "http_request_duration_seconds",
+        quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+        directory: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Quantile estimates per series of a histogram (across workers)
+
+        Args:
+            name: Histogram metric name
+            quantiles: Quantiles to estimate
+            directory: Shared snapshot directory (defaults to settings.metrics_multiprocess_dir)
+
+        Returns:
+            List[Dict[str, Any]]: One entry per series with labels, count and quantiles
+        """
+        metric = self.collect(directory).get(name)
+        if not metric or metric["type"] != HISTOGRAM:
+            return []
+
+        summary = []
+        for labels, data in metric["series"]:
+            entry = dict(zip(metric["labelnames"], labels))
+            entry["count"] = data["count"]
+            for q in quantiles:
+                entry[f"p{int(q * 100)}"] = estimate_quantile(metric["buckets"], data["counts"], q)
+            summary.append(entry)
+        return summary
+
+
+def _write_snapshot_file(path: str, data: Dict[str, Any]) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(orjson.dumps(data))
+    os.replace(temp_path, path)
+
+
+def _snapshot_pid(path: str) -> Optional[int]:
+    """Worker pid of a snapshot file, None for the archive"""
+    name = os.path.basename(path)[len("metrics-"):-len(".json")]
+    return int(name) if name.isdigit() else None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _snapshot_lock(directory: str):
+    """Exclusive lock on the snapshot directory while snapshots are archived or merged"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "metrics.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _archive_snapshot(directory: str, path: str) -> None:
+    """
+    Add a worker snapshot's counters and histograms to the archive snapshot
+    and delete it (caller holds the snapshot lock); gauges are dropped
+
+    Args:
+        directory: Shared snapshot directory
+        path: Worker snapshot file
+    """
+    archive_path = os.path.join(directory, ARCHIVE_SNAPSHOT)
+    try:
+        with open(path, "rb") as snapshot_file:
+            worker = orjson.loads(snapshot_file.read()).get("metrics", {})
+        archive = {}
+        if os.path.exists(archive_path):
+            with open(archive_path, "rb") as archive_file:
+                archive = orjson.loads(archive_file.read()).get("metrics", {})
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to archive metrics snapshot {path}: {e}")
+        return
+
+    _write_snapshot_file(archive_path, {"pid": None, "metrics": merge_snapshots([(archive, False), (worker, False)])})
+    os.unlink(path)
+
+
+def merge_snapshots(snapshots: Iterable[Tuple[Dict[str, Dict[str, Any]], bool]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Merge per-worker snapshots: counters and histograms are summed, gauges are
+    summed over workers that reported recently
+
+    Args:
+        snapshots: (snapshot, is_fresh) pairs
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Merged snapshot
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    values: Dict[str, Dict[Tuple, Any]] = {}
+
+    for snapshot, fresh in snapshots:
+        for name, metric in snapshot.items():
+            if metric["type"] == GAUGE and not fresh:
+                continue
+
+            if name not in merged:
+                merged[name] = {key: value for key, value in metric.items() if key != "series"}
+                values[name] = {}
+            elif metric.get("buckets") != merged[name].get("buckets"):
+                # Bucket layout changed between deploys; keep the first layout seen
+                continue
+
+            series = values[name]
+            for labels, value in metric["series"]:
+                key = tuple(labels)
+                if metric["type"] == HISTOGRAM:
+                    current = series.get(key)
+                    if current is None:
+                        series[key] = {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+                    else:
+                        current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                else:
+                    series[key] = series.get(key, 0.0) + value
+
+    for name, metric in merged.items():
+        metric["series"] = [[list(labels), value] for labels, value in values[name].items()]
+    return merged
+
+
+def render_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Render a (possibly merged) snapshot in the Prometheus text format
+
+    Args:
+        snapshot: Metric snapshots
+
+    Returns:
+        str: Exposition text
+    """
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labelnames = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+
+        for labels, value in sorted(metric["series"], key=lambda item: [str(label) for label in item[0]]):
+            if metric["type"] == HISTOGRAM:
+                cumulative = 0
+                bounds = list(metric["buckets"]) + [math.inf]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def run_snapshot_writer(registry: "MetricsRegistry", directory: str, interval: float) -> None:
+    """
+    Periodically write this worker's snapshot so other workers can merge it
+
+    Args:
+        registry: Registry to snapshot
+        directory: Shared snapshot directory
+        interval: Seconds between snapshots
+    """
+    while True:
+        try:
+            registry.write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+        await asyncio.sleep(interval)
+
+
+# Global metrics registry
+metrics_registry = MetricsRegistry()
+
+# === APPLICATION METRICS ===
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status class",
+    ("method", "route", "status_class")
+)
+http_requests_in_progress = metrics_registry.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled"
+)
+redis_command_duration = metrics_registry.histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency by command",
+    ("command",)
+)
+redis_command_errors = metrics_registry.counter(
+    "redis_command_errors_total",
+    "Redis commands that raised an error",
+    ("command",)
+)
+db_query_duration = metrics_registry.histogram(
+    "db_query_duration_seconds",
+    "Database query latency by table and operation",
+    ("table", "operation")
+)
+db_query_errors = metrics_registry.counter(
+    "db_query_errors_total",
+    "Database queries that raised an error",
+    ("table", "operation")
+)
+password_hash_duration = metrics_registry.histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash/verify latency",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+password_hash_in_flight = metrics_registry.gauge(
+    "password_hash_in_flight",
+    "bcrypt operations currently running or waiting (queue depth)",
+    ("operation",)
+)
+auth_refresh_outcomes = metrics_registry.counter(
+    "auth_refresh_total",
+    "Refresh token requests by outcome (rotated, shared, coalesced, reuse_detected, rejected)",
+    ("outcome",)
+)
+session_activity_touches = metrics_registry.counter(
+    "session_activity_touches_total",
+    "Session activity touches recorded by the write-behind buffer (before coalescing)"
+)
+session_activity_flushed = metrics_registry.counter(
+    "session_activity_flushed_total",
+    "Session last-access times written to the session store"
+)
+session_activity_dropped = metrics_registry.counter(
+    "session_activity_dropped_total",
+    "Session last-access updates dropped (buffer_full, flush_failed)",
+    ("reason",)
+)
+session_activity_pending = metrics_registry.gauge(
+    "session_activity_pending",
+    "Sessions with a buffered last-access time"
+)
+session_activity_flush_lag = metrics_registry.histogram(
+    "session_activity_flush_lag_seconds",
+    "Age of the oldest buffered session touch when its batch is written"
+)
+
+# === CACHE METRICS ===
+
+# Cache name -> callable returning (hits, misses)
+_cache_sources: Dict[str, Callable[[], Tuple[float, float]]] = {}
+
+
+def register_cache(cache_name: str, stats: Callable[[], Tuple[float, float]]) -> None:
+    """
+    Expose hit/miss counts an in-process cache already keeps
+
+    Args:
+        cache_name: Label value for the cache
+        stats: Returns (hits, misses)
+    """
+    _cache_sources[cache_name] = stats
+
+
+def _collect_cache_requests():
+    for cache_name, stats in list(_cache_sources.items()):
+        hits, misses = stats()
+        yield (cache_name, "hit"), hits
+        yield (cache_name, "miss"), misses
+
+
+# Hit ratio is derived in queries, e.g.
+#   sum by (cache) (rate(cache_requests_total{result="hit"}[5m])) / sum by (cache) (rate(cache_requests_total[5m]))
+# (a per-worker ratio gauge would be summed across workers)
+metrics_registry.register_callback(
+    "cache_requests_total",
+    "In-process cache lookups by result",
+    COUNTER,
+    ("cache", "result"),
+    _collect_cache_requests
+)
@@ -0,0 +1,141 @@
+"""
+Agent-Makalah Sampling Profiler
+Low-overhead wall-clock stack sampler writing collapsed-stack (flamegraph) files
+
+While a profile is active a background thread samples the event loop thread's
+stack every few milliseconds with sys._current_frames(). Samples are folded
+into "frame;frame;frame count" lines, the input format of flamegraph.pl,
+speedscope and similar tools.
+
+Note that the loop thread is shared, so a profile also contains the work of
+other requests that were interleaved with the profiled one.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from src.core.config import settings
+
+# Project root, used to shorten application file names
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Maximum frames kept per sample (innermost frames are kept)
+MAX_STACK_DEPTH = 96
+
+
+def _frame_label(frame: FrameType) -> str:
+    """
+    Short label for a frame: src/auth/jwt_utils.py:decode_token or jwt.py:decode
+
+    Args:
+        frame: Stack frame
+
+    Returns:
+        str: Frame label without separators that break the collapsed format
+    """
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT) and "site-packages" not in filename:
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """
+    Fold a stack into one collapsed-stack line key (outermost frame first)
+
+    Args:
+        frame: Innermost frame
+
+    Returns:
+        str: Frames joined by semicolons
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """
+    Samples one thread's stack at a fixed interval from a background thread
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: Optional[float] = None):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval if interval is not None else settings.profiler_interval_ms / 1000
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples[collapse_stack(frame)] += 1
+            self.sample_count += 1
+
+    def start(self) -> "StackSampler":
+        """Start sampling"""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        """Stop sampling and wait for the sampler thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def to_collapsed(self) -> str:
+        """
+        Render samples in collapsed-stack format
+
+        Returns:
+            str: One "stack count" line per distinct stack
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def write_profile(sampler: StackSampler, label: str, output_dir: Optional[str] = None) -> str:
+    """
+    Write a sampler's collapsed stacks to the profile directory
+
+    Args:
+        sampler: Stopped sampler
+        label: Request label (method and route), used in the file name
+        output_dir: Target directory (defaults to settings.profiler_output_dir)
+
+    Returns:
+        str: Path of the written file
+    """
+    output_dir = output_dir or settings.profiler_output_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")[:80]
+    filename = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-"
+        f"{sampler.duration * 1000:.0f}ms-{os.getpid()}.collapsed"
+    )
+    path = os.path.join(output_dir, filename)
+    with open(path, "w", encoding="utf-8") as profile_file:
+        profile_file.write(sampler.to_collapsed())
+    return path
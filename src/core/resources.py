@@ -0,0 +1,268 @@
+"""
+Agent-Makalah Resource Container
+Owns process-wide pools, caches and background services for the app lifespan
+
+Startup opens the shared HTTP pool, compiles the route policy table and runs
+the warmup steps (first dependency probe round over the pooled connections,
+bcrypt backend load and cost calibration, the revocation set in stateless auth
+mode, plus any registered warmups) before the app reports ready. Shutdown stops accepting work, waits for in-flight
+requests to drain and then stops background services in reverse order, so the
+log pipeline is flushed last.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceContainer:
+    """
+    Lifespan-managed holder of shared clients, caches and background tasks
+    """
+
+    def __init__(
+        self,
+        warmup_timeout: Optional[float] = None,
+        drain_timeout: Optional[float] = None
+    ):
+        self.warmup_timeout = warmup_timeout if warmup_timeout is not None else settings.startup_warmup_timeout
+        self.drain_timeout = drain_timeout if drain_timeout is not None else settings.shutdown_drain_timeout
+
+        self.http_client = None
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+
+        # Step name -> {"status", "duration_ms", "error"/"details"}
+        self.warmup_report: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+
+        self._warmups: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._background_tasks: List[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def register_warmup(self, name: str, warmup: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Register an extra warmup step run on startup (e.g. cache pre-loading)
+
+        Args:
+            name: Step name shown in the warmup report
+            warmup: Coroutine function; its return value is kept as step details
+        """
+        self._warmups[name] = warmup
+
+    # === In-flight tracking (DrainMiddleware) ===
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight <= 0:
+            self.in_flight = 0
+            self._idle.set()
+
+    # === Startup ===
+
+    async def startup(self, app) -> None:
+        """
+        Open pools, pre-load caches, warm connections and start background services
+
+        Args:
+            app: FastAPI application (its routes feed the route policy table)
+        """
+        from src.auth.session_activity import session_activity
+        from src.auth.stateless import revocation_set
+        from src.core.health import health_prober
+        from src.core.logging_pipeline import log_pipeline
+        from src.core.loop_monitor import loop_monitor
+        from src.core.metrics import metrics_registry, run_snapshot_writer
+        from src.middleware.route_policy import route_policy_table
+
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.draining = False
+        self.warmup_report = {}
+        self._idle = asyncio.Event()
+        if self.in_flight == 0:
+            self._idle.set()
+
+        # Ship log records through the non-blocking queue + background writer
+        if settings.log_pipeline_enabled:
+            log_pipeline.start()
+
+        # Route policy table shared by the middleware chain
+        compiled_routes = route_policy_table.compile(app.routes)
+        self.warmup_report["route_policy"] = {"status": "ok", "duration_ms": 0.0, "details": compiled_routes}
+
+        # Shared outbound HTTP pool (LLM providers, health probes)
+        import httpx
+        self.http_client = httpx.AsyncClient(
+            timeout=settings.health_probe_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_max_keepalive
+            )
+        )
+        health_prober.http_client = self.http_client
+
+        if settings.startup_warmup_enabled:
+            await self.warmup()
+
+        # Share metrics across workers through per-process snapshots
+        if settings.metrics_enabled and settings.metrics_multiprocess_dir:
+            self._background_tasks.append(asyncio.create_task(run_snapshot_writer(
+                metrics_registry,
+                settings.metrics_multiprocess_dir,
+                settings.metrics_snapshot_interval
+            )))
+
+        # Probe dependencies in the background; health endpoints serve the snapshot
+        if settings.health_probe_enabled:
+            health_prober.start()
+
+        # Watch for blocking calls on the event loop
+        if settings.loop_monitor_enabled:
+            loop_monitor.start()
+
+        # Stateless auth: keep the local revocation set in sync
+        if revocation_set.enabled:
+            revocation_set.start()
+
+        # Write session last-access times behind, in batches
+        session_activity.start()
+
+        self.ready = True
+        logger.info(f"Resources ready in {(time.monotonic() - self.started_at) * 1000:.0f}ms")
+
+    async def warmup(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run all warmup steps concurrently, bounded by the warmup timeout
+
+        Failures and timeouts are recorded but never abort startup: a cold
+        cache or an unreachable dependency must not keep the app down.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Warmup report
+        """
+        from src.auth.password_utils import calibrate_hash_cost
+        from src.auth.stateless import revocation_set
+        from src.core.health import health_prober
+
+        steps: Dict[str, Callable[[], Awaitable[Any]]] = {
+            # First probe round connects Supabase, Redis and LLM pools and fills the health snapshot
+            "dependencies": lambda: self._probe_dependencies(health_prober),
+            "password_hash": lambda: asyncio.to_thread(calibrate_hash_cost, settings.password_hash_target_ms)
+        }
+        if revocation_set.enabled:
+            # Full revocation window before stateless requests are accepted
+            steps["revocations"] = lambda: asyncio.to_thread(revocation_set.sync)
+        steps.update(self._warmups)
+
+        results = await asyncio.gather(*(self._run_step(name, step) for name, step in steps.items()))
+        self.warmup_report.update(dict(zip(steps, results)))
+        return self.warmup_report
+
+    async def _probe_dependencies(self, health_prober) -> Dict[str, str]:
+        await health_prober.run_due_checks()
+        return health_prober.get_summary()
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(step(), timeout=self.warmup_timeout)
+            result = {"status": "ok"}
+            if details is not None:
+                result["details"] = details
+        except asyncio.TimeoutError:
+            result = {"status": "timeout", "error": f"timed out after {self.warmup_timeout}s"}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        if result["status"] != "ok":
+            logger.warning(f"Warmup step {name} {result['status']}: {result['error']}")
+        return result
+
+    # === Shutdown ===
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop reporting ready and wait for in-flight requests to finish
+
+        Args:
+            timeout: Seconds to wait (defaults to the drain timeout)
+
+        Returns:
+            bool: True if all requests finished in time
+        """
+        self.ready = False
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.drain_timeout if timeout is None else timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutdown drain timed out with {self.in_flight} requests in flight")
+            return False
+
+    async def shutdown(self) -> None:
+        """Drain in-flight work, then stop background services and close pools"""
+        from src.auth.session_activity import session_activity
+        from src.auth.stateless import revocation_set
+        from src.core.health import health_prober
+        from src.core.logging_pipeline import log_pipeline
+        from src.core.loop_monitor import loop_monitor
+
+        await self.drain()
+
+        await health_prober.stop()
+        await loop_monitor.stop()
+        await revocation_set.stop()
+        # Write buffered session activity before the pools close
+        await session_activity.stop()
+
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks = []
+
+        # Hand this worker's totals to the metrics archive and remove its snapshot
+        if settings.metrics_enabled and settings.metrics_multiprocess_dir:
+            from src.core.metrics import metrics_registry
+            try:
+                metrics_registry.retire_snapshot(settings.metrics_multiprocess_dir)
+            except OSError as e:
+                logger.warning(f"Failed to retire metrics snapshot: {e}")
+
+        if self.http_client is not None:
+            health_prober.http_client = None
+            await self.http_client.aclose()
+            self.http_client = None
+
+        # Flush queued log records last so shutdown messages are written
+        log_pipeline.stop()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Readiness details
+
+        Returns:
+            Dict[str, Any]: Ready/draining flags, in-flight count and warmup report
+        """
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "warmup": self.warmup_report
+        }
+
+
+# Global resource container instance
+resources = ResourceContainer()
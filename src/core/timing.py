@@ -0,0 +1,163 @@
+"""
+Agent-Makalah Request Timing
+Request-scoped span recorder for Server-Timing headers and request logs
+
+ServerTimingMiddleware starts a RequestTimings recorder for every request and
+stores it in a context variable. Code on the request path (middlewares,
+UserCRUD, Redis managers, password helpers) records named phases into it;
+outside a request the span helpers are no-ops. Phases with the same name are
+aggregated (total duration and call count), so N+1 patterns show up as a high
+count. Phases may nest (e.g. "redis" inside "blacklist").
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class RequestTimings:
+    """
+    Named phase durations for a single request
+    """
+
+    __slots__ = ("start", "phases")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # Phase name -> [total_seconds, count], in first-recorded order
+        self.phases: Dict[str, List[float]] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        """
+        Record one occurrence of a phase
+
+        Args:
+            name: Phase name (a Server-Timing metric name, no spaces)
+            duration: Duration in seconds
+        """
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [duration, 1]
+        else:
+            phase[0] += duration
+            phase[1] += 1
+
+    def elapsed(self) -> float:
+        """Seconds since the recorder was started"""
+        return time.perf_counter() - self.start
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Phase breakdown for the request log
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Phase name -> {"ms": total, "count": calls}
+        """
+        return {
+            name: {"ms": round(total * 1000, 3), "count": int(count)}
+            for name, (total, count) in self.phases.items()
+        }
+
+    def to_header(self, include_total: bool = True) -> str:
+        """
+        Format the phases as a Server-Timing header value
+
+        Args:
+            include_total: Append a "total" entry with the elapsed time
+
+        Returns:
+            str: Header value, e.g. 'auth;dur=4.2, redis;dur=3.1;desc="2 calls"'
+        """
+        entries = []
+        for name, (total, count) in self.phases.items():
+            entry = f"{name};dur={total * 1000:.2f}"
+            if count > 1:
+                entry += f';desc="{int(count)} calls"'
+            entries.append(entry)
+        if include_total:
+            entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+
+# Recorder of the request being handled (None outside requests)
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Token:
+    """
+    Start a recorder for the current request
+
+    Returns:
+        Token: Token to pass to end_request_timings()
+    """
+    return _current_timings.set(RequestTimings())
+
+
+def end_request_timings(token: Token) -> None:
+    """Detach the recorder started with start_request_timings()"""
+    _current_timings.reset(token)
+
+
+def get_request_timings() -> Optional[RequestTimings]:
+    """Get the recorder of the current request, if any"""
+    return _current_timings.get()
+
+
+def record_span(name: str, duration: float) -> None:
+    """
+    Record an already measured phase for the current request (no-op outside requests)
+
+    Args:
+        name: Phase name
+        duration: Duration in seconds
+    """
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, duration)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a block as a named phase of the current request
+
+    Args:
+        name: Phase name
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator recording every call of a sync or async function as a phase
+
+    Args:
+        name: Phase name
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -9,8 +9,9 @@ import uuid
 import logging
 
 from ..models.user import UserCreate, UserInDB, UserUpdate, UserPublic
-from ..database.supabase_client import supabase_client
+from ..database.supabase_client import supabase_client, track_query
 from ..auth.password_utils import hash_password, verify_password
+from ..auth.stateless import revocation_set
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,8 @@ class UserCRUD:
         Retrieve a user by email
         """
         try:
-            response = supabase_client.client.table(self.table_name).select("*").eq("email", email).execute()
+            with track_query(self.table_name, "select"):
+                response = supabase_client.client.table(self.table_name).select("*").eq("email", email).execute()
             
             if response.data:
                 user_data = response.data[0]
@@ -42,7 +44,8 @@ class UserCRUD:
         Retrieve a user by ID
         """
         try:
-            response = supabase_client.client.table(self.table_name).select("*").eq("id", user_id).execute()
+            with track_query(self.table_name, "select"):
+                response = supabase_client.client.table(self.table_name).select("*").eq("id", user_id).execute()
             
             if response.data:
                 user_data = response.data[0]
@@ -53,6 +56,36 @@ class UserCRUD:
             logger.error(f"Error getting user by ID {user_id}: {str(e)}")
             return None
     
+    async def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, UserInDB]:
+        """
+        Retrieve many users by ID in one query
+
+        Args:
+            user_ids: User IDs (malformed IDs are skipped)
+
+        Returns:
+            Dict[str, UserInDB]: Users found, keyed by ID
+        """
+        # One malformed UUID would fail the whole IN query
+        valid_ids = []
+        for user_id in dict.fromkeys(user_ids):
+            try:
+                valid_ids.append(str(uuid.UUID(str(user_id))))
+            except ValueError:
+                continue
+        if not valid_ids:
+            return {}
+
+        try:
+            with track_query(self.table_name, "select"):
+                response = supabase_client.client.table(self.table_name).select("*").in_("id", valid_ids).execute()
+
+            return {str(row["id"]): UserInDB(**row) for row in response.data or []}
+
+        except Exception as e:
+            logger.error(f"Error getting {len(valid_ids)} users by ID: {str(e)}")
+            return {}
+
     async def create_user(self, user: UserCreate) -> Optional[UserInDB]:
         """
         Create a new user in the database
@@ -79,7 +112,8 @@ class UserCRUD:
             }
             
             # Insert into database
-            response = supabase_client.client.table(self.table_name).insert(user_data).execute()
+            with track_query(self.table_name, "insert"):
+                response = supabase_client.client.table(self.table_name).insert(user_data).execute()
             
             if response.data:
                 return UserInDB(**response.data[0])
@@ -113,9 +147,14 @@ class UserCRUD:
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             # Update in database
-            response = supabase_client.client.table(self.table_name).update(update_data).eq("id", user_id).execute()
+            with track_query(self.table_name, "update"):
+                response = supabase_client.client.table(self.table_name).update(update_data).eq("id", user_id).execute()
             
             if response.data:
+                # Stateless tokens carry these claims: revoke the ones already issued
+                if (user_update.password is not None or user_update.is_active is False
+                        or user_update.is_superuser is not None):
+                    revocation_set.revoke_user(user_id, "account_change")
                 return UserInDB(**response.data[0])
             return None
             
@@ -128,11 +167,14 @@ class UserCRUD:
         Delete a user (soft delete by setting is_active to False)
         """
         try:
-            response = supabase_client.client.table(self.table_name).update({
-                "is_active": False,
-                "updated_at": datetime.utcnow().isoformat()
-            }).eq("id", user_id).execute()
+            with track_query(self.table_name, "update"):
+                response = supabase_client.client.table(self.table_name).update({
+                    "is_active": False,
+                    "updated_at": datetime.utcnow().isoformat()
+                }).eq("id", user_id).execute()
             
+            if response.data:
+                revocation_set.revoke_user(user_id, "account_deleted")
             return bool(response.data)
             
         except Exception as e:
@@ -172,7 +214,8 @@ class UserCRUD:
         Get all users (admin function)
         """
         try:
-            response = supabase_client.admin_client.table(self.table_name).select("*").range(skip, skip + limit - 1).execute()
+            with track_query(self.table_name, "select"):
+                response = supabase_client.admin_client.table(self.table_name).select("*").range(skip, skip + limit - 1).execute()
             
             users = []
             for user_data in response.data:
@@ -0,0 +1,120 @@
+"""
+In-process Redis stand-in for Agent-Makalah
+The subset of Redis commands the token blacklist uses, kept in a TTLStore
+
+Single-node deployments without Upstash get working blacklisting and
+revocation from it instead of silently skipping them. Data is per process:
+with several workers, or several nodes, configure Redis.
+
+Revocations must fail closed, so the store is not capped by default (its
+keys expire with the tokens they revoke); past warn_entries it logs a
+warning instead of evicting.
+"""
+
+import fnmatch
+import logging
+from typing import Any, List, Optional, Tuple
+
+from src.utils.ttl_store import TTLStore
+
+# TTL of keys written without one (sets created by SADD)
+NO_EXPIRY = 10 * 365 * 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+class LocalRedis:
+    """
+    Strings and sets with TTLs, behind Upstash client method signatures
+
+    Supported: get, mget, set, setex, exists, delete, expire, ttl, sadd,
+    srem, smembers and scan.
+    """
+
+    def __init__(self, name: str, max_entries: Optional[int] = None, warn_entries: Optional[int] = None):
+        self.store = TTLStore(name, max_entries=max_entries)
+        self.warn_entries = warn_entries
+        self._warned = False
+
+    def _check_size(self) -> None:
+        """Warn once each time the store grows past warn_entries"""
+        if self.warn_entries is None:
+            return
+        size = len(self.store)
+        if size <= self.warn_entries:
+            self._warned = False
+        elif not self._warned:
+            self._warned = True
+            logger.warning(
+                f"In-process store {self.store.name} holds {size} keys (over {self.warn_entries}); "
+                f"configure Redis for this deployment"
+            )
+
+    # === Strings ===
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.store.get(key)
+        return value if isinstance(value, str) else None
+
+    def mget(self, *keys: str) -> List[Optional[str]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> bool:
+        if nx and key in self.store:
+            return False
+        self.store.set(key, str(value), ex if ex is not None else NO_EXPIRY)
+        self._check_size()
+        return True
+
+    def setex(self, key: str, seconds: int, value: Any) -> bool:
+        self.store.set(key, str(value), seconds)
+        self._check_size()
+        return True
+
+    # === Keys ===
+
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if key in self.store)
+
+    def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self.store.delete(key))
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return self.store.expire(key, seconds)
+
+    def ttl(self, key: str) -> int:
+        remaining = self.store.ttl(key)
+        return -2 if remaining is None else int(remaining)
+
+    def scan(self, cursor: int, match: Optional[str] = None, count: Optional[int] = None) -> Tuple[int, List[str]]:
+        """One pass over all keys (the cursor is always 0)"""
+        keys = [key for key, _ in self.store.items()]
+        if match:
+            keys = fnmatch.filter(keys, match)
+        return 0, keys
+
+    # === Sets ===
+
+    def sadd(self, key: str, *members: str) -> int:
+        members_set = self.store.get(key)
+        if not isinstance(members_set, set):
+            members_set = set()
+            self.store.set(key, members_set, NO_EXPIRY)
+            self._check_size()
+        added = len(set(members) - members_set)
+        members_set.update(members)
+        return added
+
+    def srem(self, key: str, *members: str) -> int:
+        members_set = self.store.get(key)
+        if not isinstance(members_set, set):
+            return 0
+        removed = len(members_set.intersection(members))
+        members_set.difference_update(members)
+        if not members_set:
+            self.store.delete(key)
+        return removed
+
+    def smembers(self, key: str) -> List[str]:
+        members_set = self.store.get(key)
+        return list(members_set) if isinstance(members_set, set) else []
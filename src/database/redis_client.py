@@ -0,0 +1,142 @@
+"""
+Upstash Redis client factory for Agent-Makalah
+Wraps the Redis client so every command is timed and counted in the metrics registry
+
+upstash_redis (and httpx behind it) is imported on first use, and all managers
+share one lazily created client, so importing the app does not pay for Redis.
+"""
+
+import time
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+from ..core.config import settings
+from ..core.metrics import redis_command_duration, redis_command_errors
+from ..core.timing import record_span
+
+if TYPE_CHECKING:
+    from upstash_redis import Redis
+
+logger = logging.getLogger(__name__)
+
+_shared_client: Optional["InstrumentedRedis"] = None
+_shared_client_created = False
+_shared_client_lock = threading.Lock()
+
+
+class InstrumentedRedis:
+    """
+    Transparent proxy around an Upstash Redis client that records per-command
+    latency and errors, and a "redis" phase in the request timings. Wrapped
+    commands are cached on the instance, so the proxy cost after the first call
+    is one attribute lookup.
+    """
+
+    def __init__(self, client: "Redis"):
+        self._client = client
+
+    def __getattr__(self, command: str) -> Any:
+        attr = getattr(self._client, command)
+        if not callable(attr):
+            return attr
+
+        def timed_command(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            except Exception:
+                redis_command_errors.inc(command)
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                redis_command_duration.observe(duration, command)
+                record_span("redis", duration)
+
+        # Cache so __getattr__ is not hit again for this command
+        setattr(self, command, timed_command)
+        return timed_command
+
+    @property
+    def client(self) -> "Redis":
+        """Underlying Upstash Redis client"""
+        return self._client
+
+
+def create_redis_client() -> Optional[InstrumentedRedis]:
+    """
+    Create an instrumented Upstash Redis client from settings
+
+    Returns:
+        Optional[InstrumentedRedis]: Client, or None if Redis is not configured
+    """
+    if not (settings.upstash_redis_url and settings.upstash_redis_token):
+        return None
+
+    from upstash_redis import Redis
+
+    return InstrumentedRedis(Redis(
+        url=settings.upstash_redis_url,
+        token=settings.upstash_redis_token
+    ))
+
+
+def get_redis_client() -> Optional[InstrumentedRedis]:
+    """
+    Get the process-wide shared Redis client, creating it on first use
+
+    Returns:
+        Optional[InstrumentedRedis]: Shared client, or None if Redis is not configured or unavailable
+    """
+    global _shared_client, _shared_client_created
+
+    if _shared_client_created:
+        return _shared_client
+
+    with _shared_client_lock:
+        if not _shared_client_created:
+            try:
+                _shared_client = create_redis_client()
+            except Exception as e:
+                logger.error(f"Failed to connect to Upstash Redis: {e}")
+                _shared_client = None
+            _shared_client_created = True
+
+    return _shared_client
+
+
+class SharedRedis:
+    """
+    Descriptor exposing the shared Redis client as a lazily resolved attribute
+
+    Managers declare `redis = SharedRedis()`; the client is looked up on first
+    access instead of at construction time. Assigning the attribute (e.g.
+    `manager.redis = None`) overrides it for that instance.
+
+    With local_store set, instances get an in-process LocalRedis of that name
+    when Redis is not configured, instead of None. It is not capped (it holds
+    revocations, which must not be evicted) and warns past
+    settings.local_store_max_entries keys.
+    """
+
+    def __init__(self, local_store: Optional[str] = None):
+        self.local_store = local_store
+
+    def __set_name__(self, owner, name: str):
+        self.attr = f"_{name}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.attr]
+        except KeyError:
+            client = get_redis_client()
+            if client is None and self.local_store:
+                from src.database.local_redis import LocalRedis
+                logger.info(f"Redis not available: keeping {self.local_store} in process")
+                client = LocalRedis(self.local_store, warn_entries=settings.local_store_max_entries)
+            instance.__dict__[self.attr] = client
+            return client
+
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self.attr] = value
@@ -2,24 +2,54 @@
 Supabase client configuration and database operations
 Agent-Makalah Backend
 """
-from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Iterator
+from contextlib import contextmanager
 import logging
+import time
 from ..core.config import settings
+from ..core.metrics import db_query_duration, db_query_errors
+from ..core.timing import record_span
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+
+@contextmanager
+def track_query(table: str, operation: str) -> Iterator[None]:
+    """
+    Time a database query, count failures in the metrics registry and
+    record a "db" phase in the request timings
+    
+    Args:
+        table: Table name
+        operation: Query kind (select, insert, update, ...)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        db_query_errors.inc(table, operation)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        db_query_duration.observe(duration, table, operation)
+        record_span("db", duration)
+
+
 class SupabaseClient:
     """Supabase client wrapper for Agent-Makalah operations"""
     
     def __init__(self):
-        self._client: Optional[Client] = None
-        self._admin_client: Optional[Client] = None
+        self._client: Optional["Client"] = None
+        self._admin_client: Optional["Client"] = None
     
     @property
-    def client(self) -> Client:
-        """Get Supabase client with anon key"""
+    def client(self) -> "Client":
+        """Get Supabase client with anon key (supabase is imported on first use)"""
         if self._client is None:
+            from supabase import create_client
             self._client = create_client(
                 settings.supabase_url,
                 settings.supabase_anon_key
@@ -27,20 +57,26 @@ class SupabaseClient:
         return self._client
     
     @property
-    def admin_client(self) -> Client:
+    def admin_client(self) -> "Client":
         """Get Supabase client with service role key (admin privileges)"""
         if self._admin_client is None:
+            from supabase import create_client
             self._admin_client = create_client(
                 settings.supabase_url,
                 settings.supabase_service_role_key
             )
         return self._admin_client
     
+    def ping(self) -> None:
+        """Run a minimal query against Supabase (synchronous, raises on failure)"""
+        # Simple test query - try to access any system table
+        with track_query("information_schema.tables", "select"):
+            self.client.table("information_schema.tables").select("table_name").limit(1).execute()
+    
     async def health_check(self) -> Dict[str, Any]:
-        """Check Supabase connection health"""
+        """Check Supabase connection health (live query, prefer health_prober snapshots)"""
         try:
-            # Simple test query - try to access any system table
-            response = self.client.table("information_schema.tables").select("table_name").limit(1).execute()
+            self.ping()
             
             return {
                 "status": "healthy",
@@ -61,7 +97,8 @@ class SupabaseClient:
     async def get_agents(self) -> List[Dict[str, Any]]:
         """Get all agents from database"""
         try:
-            response = self.client.table("agents").select("*").execute()
+            with track_query("agents", "select"):
+                response = self.client.table("agents").select("*").execute()
             return response.data
         except Exception as e:
             logger.error(f"Failed to get agents: {str(e)}")
@@ -93,7 +130,8 @@ class SupabaseClient:
     async def create_agent(self, agent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new agent"""
         try:
-            response = self.client.table("agents").insert(agent_data).execute()
+            with track_query("agents", "insert"):
+                response = self.client.table("agents").insert(agent_data).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             logger.error(f"Failed to create agent: {str(e)}")
@@ -102,7 +140,8 @@ class SupabaseClient:
     async def get_agent_by_id(self, agent_id: int) -> Optional[Dict[str, Any]]:
         """Get agent by ID"""
         try:
-            response = self.client.table("agents").select("*").eq("id", agent_id).execute()
+            with track_query("agents", "select"):
+                response = self.client.table("agents").select("*").eq("id", agent_id).execute()
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Failed to get agent {agent_id}: {str(e)}")
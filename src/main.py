@@ -7,13 +7,16 @@ It provides RESTful APIs for the multi-agent system that helps users create and
 academic papers in Bahasa Indonesia.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 from typing import Dict, Any
 import os
+import hmac
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Import API routes
@@ -25,9 +28,55 @@ from src.middleware.security_headers import SecurityHeadersMiddleware
 from src.middleware.rate_limiting import RateLimitingMiddleware
 from src.middleware.auth_middleware import AuthenticationMiddleware
 from src.middleware.request_logging import RequestLoggingMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.middleware.profiler import ProfilerMiddleware
+from src.middleware.drain import DrainMiddleware
+from src.core.metrics import metrics_registry, CONTENT_TYPE_LATEST
+from src.core.health import health_prober
+from src.core.resources import resources
+from src.auth.keyring import keyring
+from src.utils.responses import PrecomputedJSON
 
 # Import configuration
-from src.core.config import settings
+from src.core.config import settings, is_development
+
+# === APPLICATION LIFESPAN ===
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: warm resources before serving, drain them on shutdown
+    """
+    print("🚀 Agent-Makalah Backend starting up...")
+    print(f"📊 Environment: {settings.environment}")
+    
+    # Pools, caches and background services live in the resource container
+    await resources.startup(app)
+    for step, result in resources.warmup_report.items():
+        print(f"🔥 Warmup {step}: {result['status']} ({result['duration_ms']}ms)")
+    
+    print("🛡️ Security middleware enabled:")
+    print("   - Security Headers ✅")
+    print("   - Rate Limiting ✅") 
+    print("   - Authentication ✅")
+    print("   - Request Logging ✅")
+    print("   - CORS Protection ✅")
+    print("🔐 Authentication features:")
+    print("   - JWT Tokens ✅")
+    print("   - Token Blacklisting ✅")
+    print("   - Session Management ✅")
+    print("   - Role-based Access ✅")
+    print("✅ Agent-Makalah Backend ready!")
+    
+    yield
+    
+    print("🛑 Agent-Makalah Backend shutting down...")
+    
+    # Wait for in-flight requests, then stop background services and close pools
+    await resources.shutdown()
+    print("✅ Cleanup completed")
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -35,7 +84,9 @@ app = FastAPI(
     description="AI-powered academic writing assistant for Bahasa Indonesia",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # === MIDDLEWARE CONFIGURATION (Order matters!) ===
@@ -65,9 +116,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Request-ID", "X-Process-Time", "X-RateLimit-Remaining"]
+    expose_headers=["X-Request-ID", "X-Process-Time", "X-RateLimit-Remaining", "Server-Timing", "X-Profile-File"]
 )
 
+# 6. Metrics Middleware (outermost, so latency covers the whole middleware chain)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# 7. Server-Timing Middleware (outermost, starts the per-request phase recorder)
+app.add_middleware(ServerTimingMiddleware)
+
+# 8. Drain Middleware (counts in-flight requests, rejects new ones during shutdown)
+app.add_middleware(DrainMiddleware)
+
+# 9. Profiler Middleware (debug mode only, wraps the whole chain)
+if settings.profiler_enabled:
+    app.add_middleware(ProfilerMiddleware)
+
 # === ROUTE CONFIGURATION ===
 
 # Include API routes
@@ -83,6 +148,50 @@ class HealthResponse(BaseModel):
     system: str
     environment: str
     security_features: Dict[str, bool]
+    dependencies: Dict[str, str] = {}
+
+
+# === PRECOMPUTED RESPONSES ===
+# Constant payloads are serialized once; only the timestamp is serialized per request
+
+ROOT_RESPONSE = PrecomputedJSON({
+    "message": "Agent-Makalah Backend API",
+    "version": "1.0.0",
+    "status": "active",
+    "docs": "/docs",
+    "health": "/health"
+})
+
+SECURITY_STATUS_RESPONSE = PrecomputedJSON({
+    "security_status": "active",
+    "features": {
+        "middleware": {
+            "security_headers": "enabled",
+            "rate_limiting": "enabled", 
+            "authentication": "enabled",
+            "request_logging": "enabled"
+        },
+        "authentication": {
+            "jwt_tokens": "enabled",
+            "token_blacklisting": "enabled",
+            "session_management": "enabled",
+            "role_based_access": "enabled"
+        },
+        "security_headers": {
+            "csp": "enabled",
+            "xss_protection": "enabled",
+            "frame_options": "enabled",
+            "content_type_options": "enabled",
+            "hsts": "production_only"
+        },
+        "rate_limiting": {
+            "auth_endpoints": "strict",
+            "api_endpoints": "moderate",
+            "docs_endpoints": "generous"
+        }
+    },
+    "environment": settings.environment
+}, volatile=("timestamp",))
 
 
 # === CORE ENDPOINTS ===
@@ -92,22 +201,17 @@ async def root():
     """
     Root endpoint - basic API information
     """
-    return {
-        "message": "Agent-Makalah Backend API",
-        "version": "1.0.0",
-        "status": "active",
-        "docs": "/docs",
-        "health": "/health"
-    }
+    return ROOT_RESPONSE.response()
 
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Comprehensive health check endpoint
+    Dependency status comes from the background health prober snapshot
     """
     return HealthResponse(
-        status="healthy",
+        status=health_prober.get_overall_status(),
         message="Agent-Makalah Backend is running",
         timestamp=datetime.utcnow().isoformat(),
         version="1.0.0",
@@ -121,46 +225,66 @@ async def health_check():
             "cors_configured": True,
             "jwt_tokens": True,
             "role_based_access": True
+        },
+        dependencies=health_prober.get_summary()
+    )
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once resources are warmed up, 503 during startup and drain
+    """
+    status = resources.get_status()
+    return ORJSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={
+            "status": "ready" if status["ready"] else ("draining" if status["draining"] else "starting"),
+            "in_flight": status["in_flight"],
+            "warmup": {step: result["status"] for step, result in status["warmup"].items()}
         }
     )
 
 
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """
+    Public JWK Set for verifying tokens signed by this service (kid-indexed)
+    """
+    return Response(
+        content=keyring.jwks_body(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.jwks_cache_max_age}"}
+    )
+
+
 @app.get("/security-status")
 async def security_status():
     """
     Security status endpoint (requires authentication)
     """
-    return {
-        "security_status": "active",
-        "features": {
-            "middleware": {
-                "security_headers": "enabled",
-                "rate_limiting": "enabled", 
-                "authentication": "enabled",
-                "request_logging": "enabled"
-            },
-            "authentication": {
-                "jwt_tokens": "enabled",
-                "token_blacklisting": "enabled",
-                "session_management": "enabled",
-                "role_based_access": "enabled"
-            },
-            "security_headers": {
-                "csp": "enabled",
-                "xss_protection": "enabled",
-                "frame_options": "enabled",
-                "content_type_options": "enabled",
-                "hsts": "production_only"
-            },
-            "rate_limiting": {
-                "auth_endpoints": "strict",
-                "api_endpoints": "moderate",
-                "docs_endpoints": "generous"
-            }
-        },
-        "environment": settings.environment,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return SECURITY_STATUS_RESPONSE.response(timestamp=datetime.utcnow().isoformat())
+
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    """
+    Prometheus-compatible metrics endpoint (text exposition format)
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    
+    if settings.metrics_auth_token:
+        provided = request.headers.get("X-Metrics-Token", "")
+        if not hmac.compare_digest(provided, settings.metrics_auth_token):
+            raise HTTPException(status_code=403, detail="Invalid metrics token")
+    elif not is_development():
+        # Route names, user counts and dependency latencies are not public
+        raise HTTPException(status_code=403, detail="Metrics token not configured")
+    
+    # Multiprocess collection writes a snapshot and waits on a file lock shared with other workers
+    content = await run_in_threadpool(metrics_registry.render)
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
 
 
 # === ERROR HANDLERS ===
@@ -170,7 +294,7 @@ async def http_exception_handler(request, exc):
     """
     Custom HTTP exception handler with security headers
     """
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
@@ -189,7 +313,7 @@ async def internal_server_error_handler(request, exc):
     """
     Internal server error handler
     """
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -204,38 +328,6 @@ async def internal_server_error_handler(request, exc):
     )
 
 
-# === APPLICATION STARTUP/SHUTDOWN ===
-
-@app.on_event("startup")
-async def startup_event():
-    """
-    Application startup event
-    """
-    print("🚀 Agent-Makalah Backend starting up...")
-    print(f"📊 Environment: {settings.environment}")
-    print("🛡️ Security middleware enabled:")
-    print("   - Security Headers ✅")
-    print("   - Rate Limiting ✅") 
-    print("   - Authentication ✅")
-    print("   - Request Logging ✅")
-    print("   - CORS Protection ✅")
-    print("🔐 Authentication features:")
-    print("   - JWT Tokens ✅")
-    print("   - Token Blacklisting ✅")
-    print("   - Session Management ✅")
-    print("   - Role-based Access ✅")
-    print("✅ Agent-Makalah Backend ready!")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """
-    Application shutdown event
-    """
-    print("🛑 Agent-Makalah Backend shutting down...")
-    print("✅ Cleanup completed")
-
-
 # === DEVELOPMENT SERVER ===
 
 if __name__ == "__main__":
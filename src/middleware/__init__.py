@@ -7,10 +7,18 @@ from .security_headers import SecurityHeadersMiddleware
 from .rate_limiting import RateLimitingMiddleware  
 from .auth_middleware import AuthenticationMiddleware
 from .request_logging import RequestLoggingMiddleware
+from .metrics import MetricsMiddleware
+from .server_timing import ServerTimingMiddleware
+from .profiler import ProfilerMiddleware
+from .drain import DrainMiddleware
 
 __all__ = [
     "SecurityHeadersMiddleware",
     "RateLimitingMiddleware", 
     "AuthenticationMiddleware",
-    "RequestLoggingMiddleware"
+    "RequestLoggingMiddleware",
+    "MetricsMiddleware",
+    "ServerTimingMiddleware",
+    "ProfilerMiddleware",
+    "DrainMiddleware"
 ] 
\ No newline at end of file
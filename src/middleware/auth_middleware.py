@@ -4,13 +4,19 @@ Implements role-based access control and global authentication checks
 """
 
 from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
-from typing import Callable, Set, Optional
+from typing import Callable, Optional
+import asyncio
 import logging
-from src.auth.jwt_utils import validate_and_decode_token
-from src.crud.crud_user import UserCRUD
+from src.auth.enhanced_session_manager import enhanced_session_manager
+from src.auth.jwt_utils import decode_token, validate_and_decode_token
+from src.auth.session_activity import session_activity
+from src.auth.stateless import revocation_set, user_from_claims
+from src.crud.crud_user import user_crud
+from src.middleware.route_policy import route_policy_table, get_route_policy
+from src.core.timing import span
 
 logger = logging.getLogger(__name__)
 
@@ -23,31 +29,11 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
     
     def __init__(self, app):
         super().__init__(app)
-        self.user_crud = UserCRUD()
+        # Shared client (tests may swap it per instance)
+        self.user_crud = user_crud
         
-        # Public endpoints that don't require authentication
-        self.public_endpoints: Set[str] = {
-            "/",
-            "/health",
-            "/docs",
-            "/redoc", 
-            "/openapi.json",
-            "/api/v1/auth/register",
-            "/api/v1/auth/login"
-        }
-        
-        # Endpoints that require superuser access
-        self.superuser_endpoints: Set[str] = {
-            "/api/v1/admin/",
-            "/api/v1/users/",
-            "/api/v1/system/",
-            "/api/v1/manage/"
-        }
-        
-        # Authentication optional endpoints (provide different response if authenticated)
-        self.optional_auth_endpoints: Set[str] = {
-            "/api/v1/public/"
-        }
+        # Public, optional-auth and superuser endpoints are defined in
+        # src.middleware.route_policy and resolved once per request
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """
@@ -60,17 +46,18 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         Returns:
             Response or authentication error
         """
-        path = request.url.path
+        policy = get_route_policy(request)
         
         # Extract and validate token for all requests
-        token = self._extract_token(request)
-        user_data = None
-        
-        if token:
-            user_data = await self._validate_token_and_get_user(token)
+        with span("auth"):
+            token = self._extract_token(request)
+            user_data = None
+            
+            if token:
+                user_data = await self._validate_token_and_get_user(token)
         
         # Skip authentication checks for public endpoints
-        if self._is_public_endpoint(path):
+        if policy.is_public:
             # Add user data to request state anyway (might be useful)
             if user_data:
                 request.state.current_user = user_data
@@ -88,12 +75,12 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             return response
         
         # Check if authentication is required
-        if self._requires_authentication(path):
+        if policy.requires_authentication:
             if not user_data:
                 return self._create_auth_error("Authentication required")
             
             # Check superuser access
-            if self._requires_superuser(path):
+            if policy.superuser:
                 if not user_data.get("is_superuser", False):
                     return self._create_auth_error("Superuser access required", status.HTTP_403_FORBIDDEN)
         
@@ -150,6 +137,18 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             Optional[dict]: User data if token is valid
         """
         try:
+            # Stateless mode: claims + local revocation set, no Redis or database
+            if revocation_set.enabled:
+                with span("jwt"):
+                    token_payload = decode_token(token)
+                if not token_payload:
+                    return None
+                if revocation_set.can_verify(token_payload):
+                    user_data = user_from_claims(token_payload)
+                    if user_data:
+                        await self._record_activity(token_payload)
+                    return user_data
+            
             # Validate token structure and blacklist
             token_payload = validate_and_decode_token(token, check_blacklist=True)
             if not token_payload:
@@ -165,6 +164,8 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             if not user or not user.is_active:
                 return None
             
+            await self._record_activity(token_payload)
+            
             # Return user data
             return {
                 "user_id": str(user.id),
@@ -179,6 +180,29 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             logger.warning(f"Token validation failed: {str(e)}")
             return None
     
+    async def _record_activity(self, token_payload: dict) -> None:
+        """
+        Note activity on the token's session (reported as last_accessed by /auth/profile)
+        
+        Args:
+            token_payload: Decoded token payload
+        """
+        session_id = token_payload.get("sid")
+        if not session_id:
+            return
+        try:
+            if not session_activity.enabled:
+                # Flush interval 0: each touch writes the session, off the event loop
+                await asyncio.to_thread(
+                    enhanced_session_manager.record_activity, session_id, token_payload.get("sub")
+                )
+            elif session_activity.is_running:
+                # Buffered in memory; the background task writes it
+                enhanced_session_manager.record_activity(session_id, token_payload.get("sub"))
+        except Exception as e:
+            # Losing a last-access time must not fail authentication
+            logger.warning(f"Failed to record session activity: {e}")
+    
     def _is_public_endpoint(self, path: str) -> bool:
         """
         Check if endpoint is public (no authentication required)
@@ -189,18 +213,7 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True if endpoint is public
         """
-        # Exact match
-        if path in self.public_endpoints:
-            return True
-        
-        # Pattern matching for public paths
-        public_patterns = [
-            "/static/",
-            "/favicon.ico",
-            "/robots.txt"
-        ]
-        
-        return any(pattern in path for pattern in public_patterns)
+        return route_policy_table.lookup(path).is_public
     
     def _requires_authentication(self, path: str) -> bool:
         """
@@ -212,16 +225,7 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True if authentication is required
         """
-        # Public endpoints don't require auth
-        if self._is_public_endpoint(path):
-            return False
-        
-        # Optional auth endpoints don't require auth but benefit from it
-        if any(pattern in path for pattern in self.optional_auth_endpoints):
-            return False
-        
-        # All other endpoints require authentication
-        return True
+        return route_policy_table.lookup(path).requires_authentication
     
     def _requires_superuser(self, path: str) -> bool:
         """
@@ -233,9 +237,9 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True if superuser access is required
         """
-        return any(pattern in path for pattern in self.superuser_endpoints)
+        return route_policy_table.lookup(path).superuser
     
-    def _create_auth_error(self, message: str, status_code: int = status.HTTP_401_UNAUTHORIZED) -> JSONResponse:
+    def _create_auth_error(self, message: str, status_code: int = status.HTTP_401_UNAUTHORIZED) -> ORJSONResponse:
         """
         Create authentication error response
         
@@ -244,14 +248,14 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             status_code: HTTP status code
             
         Returns:
-            JSONResponse: Authentication error response
+            ORJSONResponse: Authentication error response
         """
         headers = {"WWW-Authenticate": "Bearer"}
         
         if status_code == status.HTTP_401_UNAUTHORIZED:
             headers["WWW-Authenticate"] = "Bearer"
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status_code,
             content={
                 "error": "Authentication failed",
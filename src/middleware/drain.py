@@ -0,0 +1,49 @@
+"""
+Drain Middleware for Agent-Makalah Backend
+Counts in-flight requests and turns new requests away while shutting down
+"""
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from typing import Callable
+from src.core.resources import resources
+
+
+class DrainMiddleware(BaseHTTPMiddleware):
+    """
+    Feeds the resource container's in-flight counter, which shutdown waits on.
+
+    Once draining has started, new requests get 503 with Connection: close so
+    load balancers and clients retry on another instance while requests that
+    were already accepted finish normally.
+    """
+
+    def __init__(self, app, container=None):
+        super().__init__(app)
+        self.resources = container or resources
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """
+        Track the request, or reject it while draining
+
+        Args:
+            request: Incoming HTTP request
+            call_next: Next middleware/handler in chain
+
+        Returns:
+            Response from the downstream chain, or 503 while draining
+        """
+        if self.resources.draining:
+            return ORJSONResponse(
+                status_code=503,
+                content={"error": "Service Unavailable", "message": "Server is shutting down"},
+                headers={"Connection": "close", "Retry-After": "1"}
+            )
+
+        self.resources.request_started()
+        try:
+            return await call_next(request)
+        finally:
+            self.resources.request_finished()
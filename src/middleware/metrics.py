@@ -0,0 +1,52 @@
+"""
+Metrics Middleware for Agent-Makalah Backend
+Records per-route latency histograms for the /metrics endpoint
+"""
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from typing import Callable
+import time
+from src.core.metrics import http_request_duration, http_requests_in_progress
+from src.middleware.route_policy import get_route_policy
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Observes request latency labelled by method, route template and status class
+
+    The route label comes from the shared route policy table, so concrete paths
+    such as /api/v1/admin/users/123 are recorded under their template and
+    unknown paths collapse into one "<unmatched>" series (bounded cardinality).
+    Added last in main.py so it wraps the whole middleware chain.
+    """
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """
+        Time the request and record it in the latency histogram
+
+        Args:
+            request: Incoming HTTP request
+            call_next: Next middleware/handler in chain
+
+        Returns:
+            Response from the downstream chain
+        """
+        route = get_route_policy(request).route
+        status_class = "5xx"
+
+        http_requests_in_progress.inc()
+        start_time = time.perf_counter()
+        try:
+            response = await call_next(request)
+            status_class = f"{response.status_code // 100}xx"
+            return response
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start_time,
+                request.method,
+                route,
+                status_class
+            )
+            http_requests_in_progress.dec()
@@ -0,0 +1,104 @@
+"""
+Profiler Middleware for Agent-Makalah Backend
+Opt-in sampling profiler for slow requests (debug mode, off by default)
+"""
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from typing import Callable
+import logging
+import random
+import threading
+from src.core.config import settings
+from src.core.profiler import StackSampler, write_profile
+from src.middleware.route_policy import get_route_policy
+
+performance_logger = logging.getLogger("agent_makalah.performance")
+
+
+class ProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Profiles whole requests (middleware chain and handler) with a stack sampler
+
+    A request is profiled when it is picked by settings.profiler_sample_rate or
+    when it carries the profiler header. Superuser status is only known after
+    AuthenticationMiddleware has run, so header requests are sampled
+    speculatively and their profile is discarded unless request.state shows a
+    superuser. At most settings.profiler_max_concurrent profiles run at once,
+    which bounds the cost of unauthenticated header requests.
+
+    Profiles of requests slower than settings.profiler_threshold_ms are written
+    as collapsed-stack files to settings.profiler_output_dir.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.header = settings.profiler_header
+        self.sample_rate = settings.profiler_sample_rate
+        self.threshold = settings.profiler_threshold_ms / 1000
+        self._slots = threading.BoundedSemaphore(settings.profiler_max_concurrent)
+        self.profiles_written = 0
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """
+        Profile the request if requested or sampled
+
+        Args:
+            request: Incoming HTTP request
+            call_next: Next middleware/handler in chain
+
+        Returns:
+            Response, with X-Profile-File for superusers when a profile was written
+        """
+        header_requested = request.headers.get(self.header) == "1"
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+
+        if not (header_requested or sampled) or not self._slots.acquire(blocking=False):
+            return await call_next(request)
+
+        sampler = StackSampler().start()
+        try:
+            response = await call_next(request)
+        finally:
+            sampler.stop()
+            self._slots.release()
+
+        if header_requested and not sampled and not self._is_superuser(request):
+            # Profiling is admin-only: drop profiles of other callers
+            return response
+
+        if sampler.duration < self.threshold or not sampler.samples:
+            return response
+
+        label = f"{request.method}_{get_route_policy(request).route}"
+        try:
+            path = await run_in_threadpool(write_profile, sampler, label)
+        except OSError as e:
+            performance_logger.warning(f"Failed to write profile: {e}")
+            return response
+
+        self.profiles_written += 1
+        performance_logger.info(
+            f"Profiled slow request {request.method} {request.url.path} "
+            f"({sampler.duration * 1000:.0f}ms, {sampler.sample_count} samples): {path}",
+            extra={"event_type": "request_profile", "profile_path": path}
+        )
+        if header_requested and self._is_superuser(request):
+            response.headers["X-Profile-File"] = path
+
+        return response
+
+    def _is_superuser(self, request: Request) -> bool:
+        """
+        Check the user set on request.state by AuthenticationMiddleware
+
+        Args:
+            request: HTTP request
+
+        Returns:
+            bool: True if the authenticated user is a superuser
+        """
+        current_user = getattr(request.state, "current_user", None)
+        return bool(current_user and current_user.get("is_superuser", False))
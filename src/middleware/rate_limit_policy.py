@@ -0,0 +1,261 @@
+"""
+Rate Limit Policy Engine for Agent-Makalah Backend
+Loads per-route and per-user rate limit policies from Settings or a JSON file with hot reload
+"""
+
+import json
+import logging
+import os
+import time
+import hashlib
+from typing import Any, Dict, Optional
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Client key strategies
+KEY_IP = "ip"            # Client IP + User-Agent (shared by everyone behind one NAT)
+KEY_USER = "user"        # Authenticated user_id, falls back to IP for anonymous requests
+KEY_IP_USER = "ip_user"  # IP + User-Agent and user_id together
+
+KEY_STRATEGIES = (KEY_IP, KEY_USER, KEY_IP_USER)
+
+# Built-in rate limit configurations (requests per window)
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, Any]] = {
+    # Authentication endpoints - stricter limits, keyed by IP against brute force
+    "auth_login": {"requests": 5, "window": 300, "key": KEY_IP},        # 5 login attempts per 5 minutes
+    "auth_register": {"requests": 3, "window": 3600, "key": KEY_IP},    # 3 registrations per hour
+    "auth_refresh": {"requests": 10, "window": 300, "key": KEY_USER},   # 10 token refreshes per 5 minutes
+    "auth_introspect": {"requests": 600, "window": 60, "key": KEY_IP},  # 600 batches per minute per service
+
+    # API endpoints - generous limits
+    "api_general": {"requests": 100, "window": 60, "key": KEY_USER},    # 100 requests per minute
+    "api_upload": {"requests": 10, "window": 300, "key": KEY_USER},     # 10 file uploads per 5 minutes
+
+    # Documentation endpoints - very generous
+    "docs": {"requests": 50, "window": 60, "key": KEY_IP},              # 50 requests per minute
+
+    # Default rate limit
+    "default": {"requests": 60, "window": 60, "key": KEY_USER}          # 60 requests per minute
+}
+
+
+class RateLimitPolicyEngine:
+    """
+    Resolves the rate limit policy and client key for each request
+    Policies are merged from built-in defaults, Settings and an optional JSON file:
+
+        {
+            "policies": {"api_general": {"requests": 200, "window": 60, "key": "user"}},
+            "users": {"<user_id>": {"api_general": {"requests": 1000, "window": 60}}}
+        }
+
+    The file is re-read when its modification time changes (checked at most
+    once per reload interval), so limits can change without a restart.
+    """
+
+    def __init__(
+        self,
+        policy_file: Optional[str] = None,
+        reload_interval: Optional[int] = None
+    ):
+        self.policy_file = policy_file if policy_file is not None else settings.rate_limit_policy_file
+        self.reload_interval = (
+            reload_interval if reload_interval is not None else settings.rate_limit_reload_interval
+        )
+
+        self.rate_limits: Dict[str, Dict[str, Any]] = {}
+        self.user_limits: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        self._file_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reload_count = 0
+
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Rebuild the policy tables from defaults, Settings and the policy file
+
+        Returns:
+            bool: True if policies were loaded successfully
+        """
+        rate_limits = {name: dict(config) for name, config in DEFAULT_RATE_LIMITS.items()}
+        user_limits: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        self._merge(rate_limits, user_limits, {
+            "policies": settings.rate_limit_policies,
+            "users": settings.rate_limit_user_policies
+        })
+
+        if self.policy_file:
+            try:
+                self._file_mtime = os.path.getmtime(self.policy_file)
+                with open(self.policy_file, "r", encoding="utf-8") as policy_file:
+                    file_data = json.load(policy_file)
+
+                # Merge into copies so a broken file never leaves half-applied policies
+                file_rate_limits = {name: dict(config) for name, config in rate_limits.items()}
+                file_user_limits = {user_id: dict(policies) for user_id, policies in user_limits.items()}
+                self._merge(file_rate_limits, file_user_limits, file_data)
+                rate_limits, user_limits = file_rate_limits, file_user_limits
+            except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+                # Keep serving the previous policies if the file is broken
+                logger.error(f"Failed to load rate limit policy file {self.policy_file}: {e}")
+                if self.rate_limits:
+                    return False
+
+        self.rate_limits = rate_limits
+        self.user_limits = user_limits
+        self.reload_count += 1
+        return True
+
+    def maybe_reload(self) -> bool:
+        """
+        Reload policies if the policy file changed since the last load
+
+        Returns:
+            bool: True if policies were reloaded
+        """
+        if not self.policy_file:
+            return False
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+
+        try:
+            mtime = os.path.getmtime(self.policy_file)
+        except OSError:
+            return False
+
+        if mtime == self._file_mtime:
+            return False
+
+        logger.info(f"Rate limit policy file changed, reloading: {self.policy_file}")
+        return self.reload()
+
+    def get_policy(self, endpoint_type: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the effective rate limit policy for an endpoint type and user
+
+        Args:
+            endpoint_type: Rate class from the route policy table
+            user_id: Authenticated user ID if known
+
+        Returns:
+            Dict[str, Any]: Policy with requests, window and key
+        """
+        if user_id:
+            user_policy = self.user_limits.get(user_id)
+            if user_policy:
+                override = user_policy.get(endpoint_type) or user_policy.get("default")
+                if override:
+                    return override
+
+        return self.rate_limits.get(endpoint_type, self.rate_limits["default"])
+
+    def build_client_key(self, request, key_strategy: str, user_id: Optional[str] = None) -> str:
+        """
+        Generate client identifier for rate limiting
+
+        Args:
+            request: HTTP request
+            key_strategy: One of KEY_IP, KEY_USER or KEY_IP_USER
+            user_id: Authenticated user ID if known
+
+        Returns:
+            str: Client identifier
+        """
+        if key_strategy == KEY_USER and user_id:
+            return f"user:{user_id}"
+
+        ip_key = self._get_ip_key(request)
+
+        if key_strategy == KEY_IP_USER and user_id:
+            return f"{ip_key}:{user_id}"
+
+        return ip_key
+
+    def _get_ip_key(self, request) -> str:
+        """
+        Generate IP + User-Agent based client identifier
+
+        Args:
+            request: HTTP request
+
+        Returns:
+            str: Hashed client identifier
+        """
+        # Primary: Use X-Forwarded-For or X-Real-IP (behind proxy)
+        client_ip = (
+            request.headers.get("X-Forwarded-For", "").split(",")[0].strip() or
+            request.headers.get("X-Real-IP") or
+            request.client.host if request.client else "unknown"
+        )
+
+        # Secondary: Include User-Agent for more granular control
+        user_agent = request.headers.get("User-Agent", "")
+
+        # Create hash for consistent key length
+        key_data = f"{client_ip}:{user_agent}"
+        return hashlib.md5(key_data.encode()).hexdigest()[:16]
+
+    def _merge(
+        self,
+        rate_limits: Dict[str, Dict[str, Any]],
+        user_limits: Dict[str, Dict[str, Dict[str, Any]]],
+        source: Dict[str, Any]
+    ) -> None:
+        """
+        Merge a policy source into the policy tables
+
+        Args:
+            rate_limits: Per-route policies to update
+            user_limits: Per-user policies to update
+            source: Policy source with "policies" and "users" sections
+        """
+        for endpoint_type, config in (source.get("policies") or {}).items():
+            base = rate_limits.get(endpoint_type, rate_limits.get("default", {}))
+            rate_limits[endpoint_type] = self._normalize({**base, **config})
+
+        for user_id, policies in (source.get("users") or {}).items():
+            user_policy = user_limits.setdefault(str(user_id), {})
+            for endpoint_type, config in policies.items():
+                base = rate_limits.get(endpoint_type, rate_limits.get("default", {}))
+                user_policy[endpoint_type] = self._normalize({**base, **config})
+
+    def _normalize(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate and normalize a single policy entry
+
+        Args:
+            config: Raw policy entry
+
+        Returns:
+            Dict[str, Any]: Normalized policy
+        """
+        key_strategy = config.get("key", KEY_IP)
+        if key_strategy not in KEY_STRATEGIES:
+            raise ValueError(f"Unknown rate limit key strategy: {key_strategy}")
+
+        return {
+            "requests": int(config["requests"]),
+            "window": int(config["window"]),
+            "key": key_strategy
+        }
+
+    def get_stats(self) -> dict:
+        """
+        Get policy engine information for monitoring
+
+        Returns:
+            dict: Engine statistics
+        """
+        return {
+            "policy_file": self.policy_file,
+            "reload_count": self.reload_count,
+            "route_policies": len(self.rate_limits),
+            "user_policies": len(self.user_limits)
+        }
@@ -0,0 +1,273 @@
+"""
+Rate Limit Stores for Agent-Makalah Backend
+Request counters behind RateLimitingMiddleware, per process or shared through Redis
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Violations across all endpoint types before a client is blacklisted
+BLACKLIST_THRESHOLD = 500
+BLACKLIST_SECONDS = 3600
+
+BACKEND_MEMORY = "memory"
+BACKEND_REDIS = "redis"
+BACKEND_AUTO = "auto"
+
+
+class MemoryRateLimitStore:
+    """
+    Sliding-window log per client and endpoint type, kept in this process
+
+    Exact, but every worker counts separately: with N workers a client gets up
+    to N times its limit. Use RedisRateLimitStore when running several workers.
+    """
+
+    def __init__(self):
+        # Structure: {client_key: {endpoint_type: deque([timestamp, timestamp, ...])}}
+        self.request_history: Dict[str, Dict[str, deque]] = defaultdict(lambda: defaultdict(deque))
+
+        # Blacklist for severe violators
+        self.blacklist: Dict[str, float] = {}  # {client_key: unblock_timestamp}
+
+    async def hit(self, client_key: str, endpoint_type: str, limit: int, window: int) -> Tuple[bool, int]:
+        """
+        Count a request if it is within the limit
+
+        Args:
+            client_key: Client identifier
+            endpoint_type: Type of endpoint
+            limit: Requests allowed per window
+            window: Window length in seconds
+
+        Returns:
+            Tuple[bool, int]: (allowed, requests in the current window)
+        """
+        current_time = time.time()
+        request_queue = self.request_history[client_key][endpoint_type]
+
+        # Clean old requests outside the window
+        window_start = current_time - window
+        while request_queue and request_queue[0] < window_start:
+            request_queue.popleft()
+
+        if len(request_queue) >= limit:
+            return False, len(request_queue)
+
+        request_queue.append(current_time)
+        return True, len(request_queue)
+
+    async def is_blacklisted(self, client_key: str) -> bool:
+        """
+        Check if client is blacklisted
+
+        Args:
+            client_key: Client identifier
+
+        Returns:
+            bool: True if client is blacklisted
+        """
+        if client_key in self.blacklist:
+            if time.time() > self.blacklist[client_key]:
+                # Unblock expired blacklist
+                del self.blacklist[client_key]
+                return False
+            return True
+        return False
+
+    async def record_violation(self, client_key: str) -> bool:
+        """
+        Record a rate limit violation and blacklist excessive violators
+
+        Args:
+            client_key: Client identifier
+
+        Returns:
+            bool: True if the client was blacklisted by this violation
+        """
+        # Multiple violations across different endpoints
+        total_violations = sum(
+            len(queue) for queue in self.request_history[client_key].values()
+        )
+        if total_violations > BLACKLIST_THRESHOLD:
+            self.blacklist[client_key] = time.time() + BLACKLIST_SECONDS
+            return True
+        return False
+
+    def cleanup(self) -> None:
+        """Drop request history older than one hour and expired blacklist entries"""
+        current_time = time.time()
+
+        # Clean request history
+        for client_key in list(self.request_history.keys()):
+            for endpoint_type in list(self.request_history[client_key].keys()):
+                queue = self.request_history[client_key][endpoint_type]
+                # Remove requests older than 1 hour
+                while queue and queue[0] < current_time - 3600:
+                    queue.popleft()
+
+                # Remove empty queues
+                if not queue:
+                    del self.request_history[client_key][endpoint_type]
+
+            # Remove empty client records
+            if not self.request_history[client_key]:
+                del self.request_history[client_key]
+
+        # Clean expired blacklist entries
+        for client_key in list(self.blacklist.keys()):
+            if current_time > self.blacklist[client_key]:
+                del self.blacklist[client_key]
+
+
+class RedisRateLimitStore:
+    """
+    Sliding-window counter shared by all workers and instances through Redis
+
+    Each window has one counter key; the count is the current counter plus the
+    previous window's counter weighted by the part of it still inside the
+    sliding window. One pipelined round trip per request (block check, INCR,
+    EXPIRE, previous counter), run in a worker thread because the Upstash
+    client is synchronous. Rejected requests are counted too, so a client that
+    keeps hammering stays limited. If Redis fails, the store falls back to a
+    per-process MemoryRateLimitStore instead of failing requests.
+    """
+
+    def __init__(self, redis=None, prefix: str = "ratelimit"):
+        if redis is None:
+            from src.database.redis_client import get_redis_client
+            redis = get_redis_client()
+        self.redis = redis
+        self.prefix = prefix
+        self.fallback = MemoryRateLimitStore()
+        self._fallback_logged_at = 0.0
+
+    def _counter_key(self, client_key: str, endpoint_type: str, window: int, index: int) -> str:
+        return f"{self.prefix}:{endpoint_type}:{window}:{client_key}:{index}"
+
+    def _block_key(self, client_key: str) -> str:
+        return f"{self.prefix}:block:{client_key}"
+
+    def _violations_key(self, client_key: str) -> str:
+        return f"{self.prefix}:violations:{client_key}"
+
+    def _log_fallback(self, error: Exception) -> None:
+        # At most one warning per minute while Redis is unavailable
+        now = time.monotonic()
+        if now - self._fallback_logged_at > 60:
+            self._fallback_logged_at = now
+            logger.warning(f"Rate limit store falling back to in-memory counters: {error}")
+
+    def _hit(self, client_key: str, endpoint_type: str, window: int) -> Tuple[bool, float]:
+        now = time.time()
+        index = int(now // window)
+        current_key = self._counter_key(client_key, endpoint_type, window, index)
+
+        pipeline = self.redis.pipeline()
+        pipeline.exists(self._block_key(client_key))
+        pipeline.incr(current_key)
+        pipeline.expire(current_key, window * 2)
+        pipeline.get(self._counter_key(client_key, endpoint_type, window, index - 1))
+        blocked, current, _, previous = pipeline.exec()
+
+        elapsed = (now - index * window) / window
+        count = int(current) + int(previous or 0) * (1.0 - elapsed)
+        return bool(blocked), count
+
+    async def hit(self, client_key: str, endpoint_type: str, limit: int, window: int) -> Tuple[bool, int]:
+        """
+        Count a request against the shared sliding window
+
+        Args:
+            client_key: Client identifier
+            endpoint_type: Type of endpoint
+            limit: Requests allowed per window
+            window: Window length in seconds
+
+        Returns:
+            Tuple[bool, int]: (allowed, estimated requests in the sliding window)
+        """
+        try:
+            blocked, count = await asyncio.to_thread(self._hit, client_key, endpoint_type, window)
+        except Exception as e:
+            self._log_fallback(e)
+            return await self.fallback.hit(client_key, endpoint_type, limit, window)
+        if blocked:
+            return False, limit
+        return count <= limit, int(count)
+
+    async def is_blacklisted(self, client_key: str) -> bool:
+        """
+        Check the process-local blacklist (the shared one is checked in hit())
+
+        Args:
+            client_key: Client identifier
+
+        Returns:
+            bool: True if client is blacklisted
+        """
+        return await self.fallback.is_blacklisted(client_key)
+
+    def _record_violation(self, client_key: str) -> bool:
+        key = self._violations_key(client_key)
+        pipeline = self.redis.pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, BLACKLIST_SECONDS)
+        violations, _ = pipeline.exec()
+        if int(violations) > BLACKLIST_THRESHOLD:
+            self.redis.set(self._block_key(client_key), "1", ex=BLACKLIST_SECONDS)
+            return True
+        return False
+
+    async def record_violation(self, client_key: str) -> bool:
+        """
+        Count a violation in Redis and blacklist the client on all workers past the threshold
+
+        Args:
+            client_key: Client identifier
+
+        Returns:
+            bool: True if the client was blacklisted by this violation
+        """
+        try:
+            return await asyncio.to_thread(self._record_violation, client_key)
+        except Exception as e:
+            self._log_fallback(e)
+            return await self.fallback.record_violation(client_key)
+
+    def cleanup(self) -> None:
+        """Redis keys expire on their own; only the fallback needs cleaning"""
+        self.fallback.cleanup()
+
+
+def create_rate_limit_store(backend: Optional[str] = None):
+    """
+    Create the rate limit store selected by settings.rate_limit_backend
+
+    "auto" shares counters through Redis when Upstash is configured, so limits
+    hold across workers and instances, and keeps them in memory otherwise.
+
+    Args:
+        backend: "memory", "redis" or "auto" (defaults to the setting)
+
+    Returns:
+        MemoryRateLimitStore or RedisRateLimitStore
+    """
+    backend = backend or settings.rate_limit_backend
+    if backend == BACKEND_MEMORY:
+        return MemoryRateLimitStore()
+
+    from src.database.redis_client import get_redis_client
+    redis = get_redis_client()
+    if redis is None:
+        if backend == BACKEND_REDIS:
+            logger.warning("rate_limit_backend is 'redis' but Redis is not configured; using in-memory counters")
+        return MemoryRateLimitStore()
+    return RedisRateLimitStore(redis)
@@ -9,41 +9,46 @@ from starlette.responses import Response
 from typing import Callable
 import time
 import json
+import random
 import logging
 from datetime import datetime
-import uuid
+from src.core.config import settings
+from src.core.logging_pipeline import log_pipeline, request_sampled_category
+from src.core.timing import get_request_timings
+from src.middleware.route_policy import (
+    LOG_SECURITY,
+    LOG_PERFORMANCE,
+    get_route_policy
+)
 
 # Setup logging for security events
 security_logger = logging.getLogger("agent_makalah.security")
 performance_logger = logging.getLogger("agent_makalah.performance")
+general_logger = logging.getLogger()
+
+# Client errors that are expected and not logged as warnings
+EXPECTED_CLIENT_ERRORS = frozenset({401, 403, 404, 429})
 
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """
     Comprehensive request logging middleware for security monitoring and performance tracking
     Logs authentication events, suspicious activities, and performance metrics
+    
+    Log records are built lazily: logger levels and sampling are checked first and
+    the request/response dictionaries are only built when a record will be emitted
     """
     
     def __init__(self, app, log_body: bool = False):
         super().__init__(app)
         self.log_body = log_body  # Whether to log request/response bodies (security consideration)
         
-        # Security-sensitive endpoints to monitor closely
-        self.security_endpoints = [
-            "/api/v1/auth/",
-            "/api/v1/admin/",
-            "/api/v1/user/",
-            "/api/v1/profile/",
-            "/api/v1/session/"
-        ]
-        
-        # Performance-critical endpoints to monitor
-        self.performance_endpoints = [
-            "/api/v1/upload/",
-            "/api/v1/process/",
-            "/api/v1/generate/",
-            "/api/v1/agent/"
-        ]
+        # Security-sensitive and performance-critical endpoints are classified
+        # by the shared route policy table (src.middleware.route_policy)
+        
+        # Sampling rates per category live in the logging pipeline
+        # (src.core.logging_pipeline); warnings and errors are never sampled out
+        self.pipeline = log_pipeline
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """
@@ -56,18 +61,27 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         Returns:
             Response with logging applied
         """
-        # Generate request ID for tracking
-        request_id = str(uuid.uuid4())[:8]
+        # Generate request ID for tracking (not security sensitive; 64 bits so IDs
+        # stay unique across billions of requests, 32 bits collide after ~65k)
+        request_id = "%016x" % random.getrandbits(64)
         request.state.request_id = request_id
         
         # Record request start time
         start_time = time.time()
         
-        # Extract request information
-        request_info = await self._extract_request_info(request, request_id)
+        # Decide up front whether informational records will be emitted
+        log_category = get_route_policy(request).log_category
+        sampled = self._is_sampled(log_category)
+        if sampled:
+            # Records of this category were sampled in for the whole request,
+            # so the pipeline must not sample them a second time
+            request_sampled_category.set(log_category)
         
-        # Log incoming request
-        self._log_request(request_info)
+        # Extract and log request information only when it will be emitted
+        request_info = None
+        if sampled and self._request_log_enabled(log_category):
+            request_info = await self._extract_request_info(request, request_id)
+            self._log_request(request_info)
         
         # Process request
         try:
@@ -76,11 +90,16 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             # Calculate response time
             response_time = time.time() - start_time
             
-            # Extract response information
-            response_info = self._extract_response_info(response, response_time, request_id)
-            
-            # Log response
-            self._log_response(request_info, response_info)
+            if self._response_log_enabled(log_category, response.status_code, response_time, sampled):
+                if request_info is None:
+                    # Body has been consumed downstream by now, never read it here
+                    request_info = await self._extract_request_info(request, request_id, include_body=False)
+                
+                # Extract response information
+                response_info = self._extract_response_info(response, response_time, request_id)
+                
+                # Log response
+                self._log_response(request_info, response_info, sampled)
             
             # Add request ID to response headers
             response.headers["X-Request-ID"] = request_id
@@ -90,16 +109,89 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Log error
             error_time = time.time() - start_time
+            if request_info is None:
+                request_info = await self._extract_request_info(request, request_id, include_body=False)
             self._log_error(request_info, str(e), error_time)
             raise
     
-    async def _extract_request_info(self, request: Request, request_id: str) -> dict:
+    def _is_sampled(self, log_category: str) -> bool:
+        """
+        Decide whether this request's informational records are sampled in
+        
+        Args:
+            log_category: Log category from the route policy
+            
+        Returns:
+            bool: True if informational records should be emitted
+        """
+        return self.pipeline.sample(log_category)
+    
+    def _request_log_enabled(self, log_category: str) -> bool:
+        """
+        Check whether the incoming request record would be emitted
+        
+        Args:
+            log_category: Log category from the route policy
+            
+        Returns:
+            bool: True if the target logger is enabled
+        """
+        if log_category == LOG_SECURITY:
+            return security_logger.isEnabledFor(logging.INFO)
+        if log_category == LOG_PERFORMANCE:
+            return performance_logger.isEnabledFor(logging.INFO)
+        return general_logger.isEnabledFor(logging.DEBUG)
+    
+    def _response_log_enabled(
+        self, 
+        log_category: str, 
+        status_code: int, 
+        response_time: float, 
+        sampled: bool
+    ) -> bool:
+        """
+        Check whether any response record would be emitted
+        
+        Args:
+            log_category: Log category from the route policy
+            status_code: Response status code
+            response_time: Response processing time
+            sampled: Whether informational records are sampled in
+            
+        Returns:
+            bool: True if at least one record will be emitted
+        """
+        if log_category == LOG_SECURITY:
+            if sampled and security_logger.isEnabledFor(logging.INFO):
+                return True
+            if status_code in (401, 403, 429) and security_logger.isEnabledFor(logging.WARNING):
+                return True
+        elif log_category == LOG_PERFORMANCE:
+            if sampled and performance_logger.isEnabledFor(logging.INFO):
+                return True
+            if response_time > 5.0 and performance_logger.isEnabledFor(logging.WARNING):
+                return True
+        
+        if status_code >= 500:
+            return general_logger.isEnabledFor(logging.ERROR)
+        if status_code >= 400 and status_code not in EXPECTED_CLIENT_ERRORS:
+            return general_logger.isEnabledFor(logging.WARNING)
+        
+        return False
+    
+    async def _extract_request_info(
+        self, 
+        request: Request, 
+        request_id: str, 
+        include_body: bool = True
+    ) -> dict:
         """
         Extract comprehensive request information for logging
         
         Args:
             request: HTTP request
             request_id: Unique request identifier
+            include_body: Whether the request body may be read
             
         Returns:
             dict: Request information
@@ -118,7 +210,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         
         # Request body (if configured to log)
         body = None
-        if self.log_body and content_type.startswith("application/json"):
+        if include_body and self.log_body and content_type.startswith("application/json"):
             try:
                 body = await request.body()
                 if body:
@@ -131,6 +223,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             "timestamp": datetime.utcnow().isoformat(),
             "method": request.method,
             "path": str(request.url.path),
+            "log_category": get_route_policy(request).log_category,
             "query_params": dict(request.query_params),
             "client_ip": client_ip,
             "user_agent": user_agent,
@@ -156,7 +249,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         Returns:
             dict: Response information
         """
-        return {
+        response_info = {
             "request_id": request_id,
             "status_code": response.status_code,
             "response_time": round(response_time, 4),
@@ -167,6 +260,13 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 if k.lower() not in ["set-cookie"]  # Exclude sensitive headers
             }
         }
+        
+        # Phase breakdown recorded so far (auth, rate limit, db, redis, ...)
+        timings = get_request_timings()
+        if timings is not None and settings.server_timing_log:
+            response_info["timings"] = timings.to_dict()
+        
+        return response_info
     
     def _log_request(self, request_info: dict) -> None:
         """
@@ -181,8 +281,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         request_id = request_info["request_id"]
         
         # Determine log level and logger based on endpoint type
-        is_security_endpoint = any(pattern in path for pattern in self.security_endpoints)
-        is_performance_endpoint = any(pattern in path for pattern in self.performance_endpoints)
+        log_category = request_info["log_category"]
+        is_security_endpoint = log_category == LOG_SECURITY
+        is_performance_endpoint = log_category == LOG_PERFORMANCE
         
         # Create log message
         log_message = f"[{request_id}] {method} {path} from {client_ip}"
@@ -217,25 +318,27 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 "request_info": request_info
             })
     
-    def _log_response(self, request_info: dict, response_info: dict) -> None:
+    def _log_response(self, request_info: dict, response_info: dict, sampled: bool = True) -> None:
         """
         Log response information with security and performance analysis
         
         Args:
             request_info: Request information
             response_info: Response information
+            sampled: Whether informational records are emitted (warnings always are)
         """
         path = request_info["path"]
         status_code = response_info["status_code"]
         response_time = response_info["response_time"]
         request_id = response_info["request_id"]
         client_ip = request_info["client_ip"]
+        log_category = request_info["log_category"]
         
         # Create response message
         log_message = f"[{request_id}] {status_code} in {response_time}s"
         
         # Security analysis
-        if any(pattern in path for pattern in self.security_endpoints):
+        if log_category == LOG_SECURITY:
             # Log security events
             if status_code == 401:
                 security_logger.warning(f"[{request_id}] Authentication failed from {client_ip} to {path}")
@@ -243,39 +346,41 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 security_logger.warning(f"[{request_id}] Authorization denied from {client_ip} to {path}")
             elif status_code == 429:
                 security_logger.warning(f"[{request_id}] Rate limit exceeded from {client_ip} to {path}")
-            elif "/auth/login" in path and status_code == 200:
+            elif sampled and "/auth/login" in path and status_code == 200:
                 security_logger.info(f"[{request_id}] Successful login from {client_ip}")
-            elif "/auth/register" in path and status_code == 201:
+            elif sampled and "/auth/register" in path and status_code == 201:
                 security_logger.info(f"[{request_id}] Successful registration from {client_ip}")
             
             # Log to security logger
-            security_logger.info(log_message, extra={
-                "event_type": "security_response",
-                "request_info": request_info,
-                "response_info": response_info
-            })
+            if sampled:
+                security_logger.info(log_message, extra={
+                    "event_type": "security_response",
+                    "request_info": request_info,
+                    "response_info": response_info
+                })
         
         # Performance analysis
-        if any(pattern in path for pattern in self.performance_endpoints):
+        if log_category == LOG_PERFORMANCE:
             # Log slow requests
             if response_time > 5.0:  # Requests taking more than 5 seconds
                 performance_logger.warning(f"[{request_id}] Slow response: {response_time}s for {path}")
-            elif response_time > 2.0:  # Requests taking more than 2 seconds
+            elif response_time > 2.0 and sampled:  # Requests taking more than 2 seconds
                 performance_logger.info(f"[{request_id}] Medium response time: {response_time}s for {path}")
             
             # Log to performance logger
-            performance_logger.info(log_message, extra={
-                "event_type": "performance_response",
-                "request_info": request_info,
-                "response_info": response_info
-            })
+            if sampled:
+                performance_logger.info(log_message, extra={
+                    "event_type": "performance_response",
+                    "request_info": request_info,
+                    "response_info": response_info
+                })
         
         # Server errors
         if status_code >= 500:
             logging.error(f"[{request_id}] Server error {status_code} for {path} from {client_ip}")
         
         # Client errors (excluding expected auth failures)
-        elif status_code >= 400 and status_code not in [401, 403, 404, 429]:
+        elif status_code >= 400 and status_code not in EXPECTED_CLIENT_ERRORS:
             logging.warning(f"[{request_id}] Client error {status_code} for {path} from {client_ip}")
     
     def _log_error(self, request_info: dict, error: str, error_time: float) -> None:
@@ -301,7 +406,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         })
         
         # Security logger for security endpoints
-        if any(pattern in path for pattern in self.security_endpoints):
+        if request_info["log_category"] == LOG_SECURITY:
             security_logger.error(f"[{request_id}] Security endpoint error: {error} from {client_ip}")
     
     def get_security_stats(self) -> dict:
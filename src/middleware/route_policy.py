@@ -0,0 +1,352 @@
+"""
+Route Policy Table for Agent-Makalah Backend
+Precomputed per-path classification shared by the whole middleware chain
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+from src.core.metrics import register_cache
+
+# === ROUTE PATTERNS ===
+
+# Public endpoints that don't require authentication
+PUBLIC_ENDPOINTS = frozenset({
+    "/",
+    "/health",
+    "/ready",
+    "/.well-known/jwks.json",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/metrics",
+    "/api/v1/auth/register",
+    "/api/v1/auth/login",
+    "/api/v1/auth/introspect"  # Service token or superuser, checked by the endpoint
+})
+
+# Pattern matching for public paths
+PUBLIC_PATTERNS = (
+    "/static/",
+    "/favicon.ico",
+    "/robots.txt"
+)
+
+# Authentication optional endpoints (provide different response if authenticated)
+OPTIONAL_AUTH_PATTERNS = (
+    "/api/v1/public/",
+)
+
+# Endpoints that require superuser access
+SUPERUSER_PATTERNS = (
+    "/api/v1/admin/",
+    "/api/v1/users/",
+    "/api/v1/system/",
+    "/api/v1/manage/"
+)
+
+# Documentation endpoints
+DOCS_ENDPOINTS = frozenset({"/docs", "/redoc", "/openapi.json"})
+
+# Security-sensitive endpoints to monitor closely
+SECURITY_LOG_PATTERNS = (
+    "/api/v1/auth/",
+    "/api/v1/admin/",
+    "/api/v1/user/",
+    "/api/v1/profile/",
+    "/api/v1/session/"
+)
+
+# Performance-critical endpoints to monitor
+PERFORMANCE_LOG_PATTERNS = (
+    "/api/v1/upload/",
+    "/api/v1/process/",
+    "/api/v1/generate/",
+    "/api/v1/agent/"
+)
+
+# Endpoints whose responses must never be cached
+SENSITIVE_PATTERNS = (
+    "/api/v1/auth/",
+    "/api/v1/user/",
+    "/api/v1/profile/",
+    "/api/v1/session/",
+    "/api/v1/admin/"
+)
+
+# Auth requirement levels
+AUTH_PUBLIC = "public"
+AUTH_OPTIONAL = "optional"
+AUTH_REQUIRED = "required"
+
+# Log categories
+LOG_SECURITY = "security"
+LOG_PERFORMANCE = "performance"
+LOG_GENERAL = "general"
+
+# Route template label for paths that match no registered route
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """
+    Precomputed middleware policy for a single request path
+    """
+    route: str
+    rate_class: str
+    auth: str
+    superuser: bool
+    log_category: str
+    sensitive: bool
+
+    @property
+    def is_public(self) -> bool:
+        return self.auth == AUTH_PUBLIC
+
+    @property
+    def requires_authentication(self) -> bool:
+        return self.auth == AUTH_REQUIRED
+
+
+def classify_rate_class(path: str) -> str:
+    """
+    Classify endpoint type for rate limiting rules
+
+    Args:
+        path: Request path
+
+    Returns:
+        str: Endpoint type classification
+    """
+    # Authentication endpoints
+    if "/auth/login" in path:
+        return "auth_login"
+    elif "/auth/register" in path:
+        return "auth_register"
+    elif "/auth/refresh" in path:
+        return "auth_refresh"
+    elif "/auth/introspect" in path:
+        return "auth_introspect"
+    elif "/auth/" in path:
+        return "auth_general"
+
+    # File upload endpoints
+    elif "/upload" in path or "/file" in path:
+        return "api_upload"
+
+    # Documentation endpoints
+    elif path in DOCS_ENDPOINTS:
+        return "docs"
+
+    # API endpoints
+    elif "/api/" in path:
+        return "api_general"
+
+    # Default
+    return "default"
+
+
+def classify_auth(path: str) -> str:
+    """
+    Classify authentication requirement for a path
+
+    Args:
+        path: Request path
+
+    Returns:
+        str: One of AUTH_PUBLIC, AUTH_OPTIONAL or AUTH_REQUIRED
+    """
+    # Exact match and pattern matching for public paths
+    if path in PUBLIC_ENDPOINTS or any(pattern in path for pattern in PUBLIC_PATTERNS):
+        return AUTH_PUBLIC
+
+    # Optional auth endpoints don't require auth but benefit from it
+    if any(pattern in path for pattern in OPTIONAL_AUTH_PATTERNS):
+        return AUTH_OPTIONAL
+
+    # All other endpoints require authentication
+    return AUTH_REQUIRED
+
+
+def classify_log_category(path: str) -> str:
+    """
+    Classify which logger a path reports to
+
+    Args:
+        path: Request path
+
+    Returns:
+        str: One of LOG_SECURITY, LOG_PERFORMANCE or LOG_GENERAL
+    """
+    if any(pattern in path for pattern in SECURITY_LOG_PATTERNS):
+        return LOG_SECURITY
+    if any(pattern in path for pattern in PERFORMANCE_LOG_PATTERNS):
+        return LOG_PERFORMANCE
+    return LOG_GENERAL
+
+
+def classify_path(path: str, route: str = UNMATCHED_ROUTE) -> RoutePolicy:
+    """
+    Build the full policy record for a path (slow path, result is cached)
+
+    Args:
+        path: Request path
+        route: Route template the path belongs to
+
+    Returns:
+        RoutePolicy: Policy record for the path
+    """
+    return RoutePolicy(
+        route=route,
+        rate_class=classify_rate_class(path),
+        auth=classify_auth(path),
+        superuser=any(pattern in path for pattern in SUPERUSER_PATTERNS),
+        log_category=classify_log_category(path),
+        sensitive=any(pattern in path for pattern in SENSITIVE_PATTERNS)
+    )
+
+
+class RoutePolicyTable:
+    """
+    Route policy lookup table compiled from the registered application routes
+    Static paths are resolved with a single dict lookup; templated paths are
+    classified once and kept in a bounded cache
+    """
+
+    def __init__(self, max_cache_size: int = 4096):
+        self.max_cache_size = max_cache_size
+
+        # Policies for static route paths, built by compile()
+        self._exact: Dict[str, RoutePolicy] = {}
+
+        # Compiled regexes for templated routes: [(path_regex, template)]
+        self._templates: List[Tuple[Pattern, str]] = []
+
+        # Cache for concrete paths of templated or unknown routes
+        self._cache: Dict[str, RoutePolicy] = {}
+
+        self.compiled = False
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, routes: Iterable) -> int:
+        """
+        Precompute policies for all registered routes
+
+        Args:
+            routes: Application routes (e.g. app.routes)
+
+        Returns:
+            int: Number of routes compiled
+        """
+        exact: Dict[str, RoutePolicy] = {}
+        templates: List[Tuple[Pattern, str]] = []
+
+        for route in routes:
+            path = getattr(route, "path", None)
+            if not path:
+                continue
+
+            if "{" in path:
+                path_regex = getattr(route, "path_regex", None)
+                if path_regex is not None:
+                    templates.append((path_regex, path))
+            else:
+                exact[path] = classify_path(path, route=path)
+
+        # Public endpoints are always known, even when not routed by the app
+        for path in PUBLIC_ENDPOINTS:
+            if path not in exact:
+                exact[path] = classify_path(path)
+
+        self._exact = exact
+        self._templates = templates
+        self._cache = {}
+        self.compiled = True
+
+        return len(exact) + len(templates)
+
+    def lookup(self, path: str) -> RoutePolicy:
+        """
+        Get the policy record for a request path
+
+        Args:
+            path: Request path
+
+        Returns:
+            RoutePolicy: Policy record for the path
+        """
+        policy = self._exact.get(path)
+        if policy is None:
+            policy = self._cache.get(path)
+        if policy is not None:
+            self.hits += 1
+            return policy
+
+        self.misses += 1
+        policy = classify_path(path, route=self._match_template(path))
+
+        # Bounded cache: evict the oldest entry once full
+        if len(self._cache) >= self.max_cache_size:
+            try:
+                del self._cache[next(iter(self._cache))]
+            except (StopIteration, KeyError, RuntimeError):
+                pass
+        self._cache[path] = policy
+
+        return policy
+
+    def _match_template(self, path: str) -> str:
+        """
+        Find the route template for a concrete path
+
+        Args:
+            path: Request path
+
+        Returns:
+            str: Route template or UNMATCHED_ROUTE
+        """
+        for path_regex, template in self._templates:
+            if path_regex.match(path):
+                return template
+        return UNMATCHED_ROUTE
+
+    def get_stats(self) -> dict:
+        """
+        Get lookup statistics for monitoring
+
+        Returns:
+            dict: Table statistics
+        """
+        return {
+            "compiled": self.compiled,
+            "static_routes": len(self._exact),
+            "templated_routes": len(self._templates),
+            "cached_paths": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Global route policy table instance
+route_policy_table = RoutePolicyTable()
+register_cache("route_policy", lambda: (route_policy_table.hits, route_policy_table.misses))
+
+
+def get_route_policy(request, table: Optional[RoutePolicyTable] = None) -> RoutePolicy:
+    """
+    Get the route policy for a request, looking it up at most once per request
+    The result is stored on request.state so every middleware shares it
+
+    Args:
+        request: HTTP request
+        table: Policy table to use (defaults to the global table)
+
+    Returns:
+        RoutePolicy: Policy record for the request path
+    """
+    policy = getattr(request.state, "route_policy", None)
+    if policy is None:
+        policy = (table or route_policy_table).lookup(request.url.path)
+        request.state.route_policy = policy
+    return policy
@@ -8,6 +8,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response as StarletteResponse
 from typing import Callable
 import time
+from src.middleware.route_policy import route_policy_table, get_route_policy
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -100,7 +101,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         response.headers["Server"] = "Agent-Makalah"
         
         # Cache control for sensitive endpoints
-        if self._is_sensitive_endpoint(request.url.path):
+        if get_route_policy(request).sensitive:
             response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
             response.headers["Pragma"] = "no-cache"
             response.headers["Expires"] = "0"
@@ -119,12 +120,4 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True if endpoint is sensitive
         """
-        sensitive_patterns = [
-            "/api/v1/auth/",
-            "/api/v1/user/",
-            "/api/v1/profile/",
-            "/api/v1/session/",
-            "/api/v1/admin/"
-        ]
-        
-        return any(pattern in path for pattern in sensitive_patterns) 
\ No newline at end of file
+        return route_policy_table.lookup(path).sensitive
\ No newline at end of file
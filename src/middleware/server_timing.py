@@ -0,0 +1,69 @@
+"""
+Server-Timing Middleware for Agent-Makalah Backend
+Attaches the per-request phase breakdown to responses of privileged callers
+"""
+
+import hmac
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from typing import Callable, Optional
+from src.core.config import settings
+from src.core.timing import start_request_timings, end_request_timings, get_request_timings
+
+
+class ServerTimingMiddleware(BaseHTTPMiddleware):
+    """
+    Starts the request-scoped span recorder (src.core.timing) and emits it as a
+    Server-Timing header. Added last in main.py so every other middleware, the
+    route handler and everything they call record into the same recorder.
+
+    The breakdown exposes internal work (which phases ran, e.g. bcrypt only
+    for known accounts on login), so the header is only sent to superusers
+    and to internal callers presenting the metrics token. Every caller's
+    phases still reach the request log (settings.server_timing_log).
+    """
+
+    def __init__(self, app, emit_header: Optional[bool] = None):
+        super().__init__(app)
+        self.emit_header = settings.server_timing_enabled if emit_header is None else emit_header
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """
+        Record request phases and add the Server-Timing header
+
+        Args:
+            request: Incoming HTTP request
+            call_next: Next middleware/handler in chain
+
+        Returns:
+            Response, with a Server-Timing header for privileged callers
+        """
+        token = start_request_timings()
+        try:
+            timings = get_request_timings()
+            response = await call_next(request)
+
+            if self.emit_header and self._is_privileged(request):
+                response.headers["Server-Timing"] = timings.to_header()
+
+            return response
+        finally:
+            end_request_timings(token)
+
+    def _is_privileged(self, request: Request) -> bool:
+        """
+        Check for a superuser (set on request.state by AuthenticationMiddleware)
+        or an internal caller sending the X-Metrics-Token header
+
+        Args:
+            request: HTTP request
+
+        Returns:
+            bool: True if the caller may see the phase breakdown
+        """
+        current_user = getattr(request.state, "current_user", None)
+        if current_user and current_user.get("is_superuser", False):
+            return True
+        provided = request.headers.get("X-Metrics-Token", "")
+        return bool(settings.metrics_auth_token) and hmac.compare_digest(provided, settings.metrics_auth_token)
@@ -0,0 +1,164 @@
+"""
+Agent-Makalah Production Server
+Multi-worker entry point: gunicorn process manager with uvicorn workers
+
+Usage:
+    python -m src.server
+
+All options come from Settings (SERVER_WORKERS, SERVER_MAX_REQUESTS, ...).
+The app is imported once in the master and workers are forked from it
+(preload); pools, clients and background services are only created per worker
+by the app lifespan, so nothing with open sockets or threads crosses the fork.
+Workers are recycled after a jittered number of requests and get
+server_graceful_timeout seconds to drain on shutdown or recycle.
+"""
+
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds of server_graceful_timeout reserved for the lifespan shutdown (drain, log flush)
+SHUTDOWN_RESERVE_SECONDS = 5
+
+
+class AgentMakalahWorker(UvicornWorker):
+    """
+    Uvicorn worker that requires the lifespan and bounds connection draining
+
+    Uvicorn waits for open connections before running the lifespan shutdown;
+    capping that wait leaves time for the resource container to flush before
+    gunicorn kills the worker at server_graceful_timeout.
+    """
+
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "lifespan": "on"}
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_RESERVE_SECONDS)
+
+
+def get_worker_count(configured: Optional[int] = None) -> int:
+    """
+    Resolve the number of workers
+
+    bcrypt and JSON work are CPU-bound, so the default is one worker per core
+    rather than the classic 2 * cores + 1 for I/O-bound WSGI apps.
+
+    Args:
+        configured: Configured worker count (0 or None = one per CPU core)
+
+    Returns:
+        int: Number of workers
+    """
+    configured = settings.server_workers if configured is None else configured
+    if configured and configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def build_gunicorn_options(workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build gunicorn options from settings
+
+    Args:
+        workers: Override for the number of workers
+
+    Returns:
+        Dict[str, Any]: gunicorn settings
+    """
+    return {
+        "bind": f"{settings.api_host}:{settings.api_port}",
+        "workers": get_worker_count(workers),
+        "worker_class": f"{__name__}.AgentMakalahWorker",
+        "preload_app": settings.server_preload_app,
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests_jitter if settings.server_max_requests else 0,
+        "graceful_timeout": settings.server_graceful_timeout,
+        "timeout": settings.server_timeout,
+        "keepalive": settings.server_keepalive,
+        "loglevel": settings.log_level,
+        # Requests are logged by RequestLoggingMiddleware
+        "accesslog": None
+    }
+
+
+def prepare_multiprocess_environment(workers: int) -> None:
+    """
+    Point per-process state at shared stores before the app is imported
+
+    With several workers, /metrics must merge per-worker snapshots; when no
+    directory is configured a temporary one is created. The environment
+    variable is set as well so workers that re-read settings see it.
+
+    Args:
+        workers: Number of workers
+
+    Raises:
+        RuntimeError: If sessions would be kept in memory, one copy per worker
+    """
+    if workers <= 1:
+        return
+
+    if settings.metrics_enabled and not settings.metrics_multiprocess_dir:
+        settings.metrics_multiprocess_dir = tempfile.mkdtemp(prefix="agent-makalah-metrics-")
+        os.environ["METRICS_MULTIPROCESS_DIR"] = settings.metrics_multiprocess_dir
+
+    if settings.rate_limit_backend == "memory":
+        logger.warning(
+            f"rate_limit_backend is 'memory' with {workers} workers: each worker counts separately"
+        )
+
+    # "auto" (the default) silently keeps sessions in memory without Upstash;
+    # refresh, logout and session listings would then miss other workers' sessions
+    from src.auth.session_store import BACKEND_MEMORY, resolve_session_store_backend
+
+    if resolve_session_store_backend() == BACKEND_MEMORY:
+        raise RuntimeError(
+            f"Sessions would be kept in memory by each of {workers} workers "
+            f"(session_store_backend={settings.session_store_backend!r}): configure Upstash Redis, "
+            "set SESSION_STORE_BACKEND=postgres, or run one worker (SERVER_WORKERS=1)"
+        )
+
+    if settings.shutdown_drain_timeout >= settings.server_graceful_timeout:
+        logger.warning(
+            "shutdown_drain_timeout should be lower than server_graceful_timeout, "
+            "otherwise workers are killed before they finish draining"
+        )
+
+
+class AgentMakalahServer(BaseApplication):
+    """
+    Embedded gunicorn application serving src.main:app
+    """
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        from src.main import app
+        return app
+
+
+def main() -> None:
+    """Run the production server"""
+    options = build_gunicorn_options()
+    prepare_multiprocess_environment(options["workers"])
+    AgentMakalahServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
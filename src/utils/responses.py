@@ -0,0 +1,78 @@
+"""
+Precomputed JSON responses for Agent-Makalah
+Constant payloads are serialized once; only volatile top-level fields are serialized per request
+"""
+
+from typing import Any, Dict, Sequence
+
+import orjson
+from starlette.responses import Response
+
+
+class PrecomputedJSON:
+    """
+    JSON body serialized once with orjson, with volatile top-level fields
+    (e.g. "timestamp") spliced in per request.
+
+    The constant part is stored as the serialized object without its closing
+    brace; rendering appends ',"field":<value>' for each volatile field and
+    closes the object. Volatile fields therefore always appear last.
+    """
+
+    def __init__(self, payload: Any, volatile: Sequence[str] = ()):
+        self.volatile = tuple(volatile)
+
+        if not self.volatile:
+            self.body = orjson.dumps(payload)
+            return
+
+        if not isinstance(payload, dict):
+            raise TypeError("Volatile fields are only supported for object payloads")
+
+        constant = {key: value for key, value in payload.items() if key not in self.volatile}
+        self.body = orjson.dumps(constant)
+
+        # '{...}' -> '{...' ; first spliced key needs no comma if the object is empty
+        self._prefix = self.body[:-1]
+        self._keys: Dict[str, bytes] = {}
+        separator = b"," if constant else b""
+        for key in self.volatile:
+            self._keys[key] = separator + orjson.dumps(key) + b":"
+            separator = b","
+
+    def render(self, **values: Any) -> bytes:
+        """
+        Build the response body
+
+        Args:
+            values: Current value of every volatile field
+
+        Returns:
+            bytes: JSON body
+        """
+        if not self.volatile:
+            return self.body
+
+        parts = [self._prefix]
+        for key in self.volatile:
+            parts.append(self._keys[key])
+            parts.append(orjson.dumps(values[key]))
+        parts.append(b"}")
+        return b"".join(parts)
+
+    def response(self, status_code: int = 200, **values: Any) -> Response:
+        """
+        Build a JSON response without re-serializing the constant payload
+
+        Args:
+            status_code: HTTP status code
+            values: Current value of every volatile field
+
+        Returns:
+            Response: application/json response
+        """
+        return Response(
+            content=self.render(**values),
+            status_code=status_code,
+            media_type="application/json"
+        )
@@ -0,0 +1,67 @@
+"""
+Single-flight call coalescing for Agent-Makalah
+Concurrent calls with the same key share one execution and its result
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent coroutine calls per key (per process, per event loop)
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for the same result or exception. Once it finishes the key is
+    released, so later calls run again.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run call() unless a call for key is already in flight
+
+        Args:
+            key: Coalescing key
+            call: Coroutine function run by the first caller
+
+        Returns:
+            The (shared) result of call()
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # A cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: waiters re-raise it, nobody else has to
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
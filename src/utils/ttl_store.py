@@ -0,0 +1,310 @@
+"""
+In-process TTL store for Agent-Makalah
+Key-value map with per-key expiry driven by a hierarchical timing wheel
+
+Used where Redis would hold expiring keys but is not configured (memory
+sessions, the token blacklist on single-node deployments).
+
+The wheel has WHEEL_LEVELS levels of WHEEL_SIZE slots. A slot of level 0
+spans one tick (resolution seconds), a slot of level n spans
+WHEEL_SIZE ** n ticks; with 1s ticks the levels cover about 1 minute,
+1 hour, 3 days and 6 months. Each entry sits in exactly one slot, so
+setting, renewing and deleting a key are O(1). The clock advances on every
+call: each elapsed tick drains one level 0 slot, and when a higher level
+slot comes due its entries move down a level (each entry moves at most
+WHEEL_LEVELS times), so expiring N keys is amortized O(1) per key. After
+a long idle gap the wheel is rebuilt from the entries instead of walking
+every elapsed tick.
+"""
+
+import logging
+import math
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from src.core.metrics import COUNTER, GAUGE, metrics_registry
+
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4
+
+# Entry layout: [expires_at, value, slot]
+_EXPIRES_AT, _VALUE, _SLOT = 0, 1, 2
+
+logger = logging.getLogger(__name__)
+
+
+class TTLStore:
+    """
+    Thread-safe map whose keys expire after a TTL
+
+    When max_entries is reached, setting a new key evicts the entry closest
+    to expiry (from the earliest non-empty wheel slot). on_remove is called
+    with (key, value) for every entry that leaves the store: deleted,
+    popped, expired or evicted (not when a value is overwritten).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = None,
+        resolution: float = 1.0,
+        on_remove: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.resolution = resolution
+        self.on_remove = on_remove
+        self.clock = clock
+        self._entries: Dict[Hashable, List[Any]] = {}
+        self._wheel: List[List[Set[Hashable]]] = [
+            [set() for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)
+        ]
+        self._tick = self._tick_of(clock())
+        # Reentrant: on_remove callbacks may read the store
+        self._lock = threading.RLock()
+        self.expired = 0
+        self.evicted = 0
+        _stores[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    # === Wheel ===
+
+    def _tick_of(self, moment: float) -> int:
+        return int(moment // self.resolution)
+
+    def _place(self, key: Hashable, entry: List[Any]) -> None:
+        tick = max(math.ceil(entry[_EXPIRES_AT] / self.resolution), self._tick + 1)
+        for level in range(WHEEL_LEVELS):
+            shift = level * WHEEL_BITS
+            if (tick >> shift) - (self._tick >> shift) < WHEEL_SIZE:
+                break
+        else:
+            # Beyond the wheel's span: park in the furthest top level slot, placed again when it comes due
+            tick = ((self._tick >> shift) + WHEEL_MASK) << shift
+        slot = self._wheel[level][(tick >> shift) & WHEEL_MASK]
+        slot.add(key)
+        entry[_SLOT] = slot
+
+    def _remove(self, key: Hashable) -> Any:
+        entry = self._entries.pop(key)
+        entry[_SLOT].discard(key)
+        if self.on_remove is not None:
+            self.on_remove(key, entry[_VALUE])
+        return entry[_VALUE]
+
+    def _requeue(self, slot: Set[Hashable], now: float) -> None:
+        """Expire the due entries of a slot and place the others in lower levels"""
+        keys = list(slot)
+        slot.clear()
+        for key in keys:
+            entry = self._entries[key]
+            if entry[_EXPIRES_AT] <= now:
+                self.expired += 1
+                self._remove(key)
+            else:
+                self._place(key, entry)
+
+    def _advance(self, now: float) -> None:
+        target = self._tick_of(now)
+        if target <= self._tick:
+            return
+
+        if target - self._tick > len(self._entries) + WHEEL_SIZE:
+            # Long idle gap: re-placing every entry is cheaper than walking every tick
+            for level in self._wheel:
+                for slot in level:
+                    slot.clear()
+            self._tick = target
+            for key in list(self._entries):
+                entry = self._entries[key]
+                if entry[_EXPIRES_AT] <= now:
+                    self.expired += 1
+                    self._remove(key)
+                else:
+                    self._place(key, entry)
+            return
+
+        while self._tick < target:
+            self._tick += 1
+            tick = self._tick
+            # Cascade higher levels first: their entries may land in the lower slots due now
+            for level in range(WHEEL_LEVELS - 1, 0, -1):
+                shift = level * WHEEL_BITS
+                if tick & ((1 << shift) - 1) == 0:
+                    self._requeue(self._wheel[level][(tick >> shift) & WHEEL_MASK], now)
+            self._requeue(self._wheel[0][tick & WHEEL_MASK], now)
+
+    def _evict_one(self) -> None:
+        for level in range(WHEEL_LEVELS):
+            shift = level * WHEEL_BITS
+            current = self._tick >> shift
+            for distance in range(WHEEL_SIZE):
+                slot = self._wheel[level][(current + distance) & WHEEL_MASK]
+                if slot:
+                    if not self.evicted:
+                        logger.warning(
+                            f"TTL store {self.name} reached its cap of {self.max_entries} entries: "
+                            f"evicting the entries closest to expiry (counted in local_store_evicted_total)"
+                        )
+                    self.evicted += 1
+                    self._remove(next(iter(slot)))
+                    return
+
+    def _live_entry(self, key: Hashable, now: float) -> Optional[List[Any]]:
+        self._advance(now)
+        entry = self._entries.get(key)
+        if entry is not None and entry[_EXPIRES_AT] <= now:
+            # Due within the current tick
+            self.expired += 1
+            self._remove(key)
+            return None
+        return entry
+
+    # === Operations ===
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Store a value for ttl seconds, replacing any existing value and TTL
+
+        Args:
+            key: Key
+            value: Value (stored as is, not copied)
+            ttl: Seconds until the key expires; <= 0 deletes it
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._live_entry(key, now)
+            if ttl <= 0:
+                if entry is not None:
+                    self._remove(key)
+                return
+
+            if entry is None:
+                if self.max_entries is not None and len(self._entries) >= self.max_entries:
+                    self._evict_one()
+                entry = self._entries[key] = [now + ttl, value, None]
+            else:
+                entry[_SLOT].discard(key)
+                entry[_EXPIRES_AT], entry[_VALUE] = now + ttl, value
+            self._place(key, entry)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Value of a live key, default if missing or expired"""
+        with self._lock:
+            entry = self._live_entry(key, self.clock())
+            return default if entry is None else entry[_VALUE]
+
+    def expire(self, key: Hashable, ttl: float) -> bool:
+        """
+        Set a new TTL for a live key
+
+        Args:
+            key: Key
+            ttl: Seconds from now until the key expires; <= 0 deletes it
+
+        Returns:
+            bool: True if the key existed
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._live_entry(key, now)
+            if entry is None:
+                return False
+            if ttl <= 0:
+                self._remove(key)
+                return True
+            entry[_SLOT].discard(key)
+            entry[_EXPIRES_AT] = now + ttl
+            self._place(key, entry)
+            return True
+
+    def ttl(self, key: Hashable) -> Optional[float]:
+        """Seconds until a live key expires, None if missing"""
+        with self._lock:
+            now = self.clock()
+            entry = self._live_entry(key, now)
+            return None if entry is None else entry[_EXPIRES_AT] - now
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value, default if missing or expired"""
+        with self._lock:
+            entry = self._live_entry(key, self.clock())
+            return default if entry is None else self._remove(key)
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove a key; True if it was live"""
+        with self._lock:
+            if self._live_entry(key, self.clock()) is None:
+                return False
+            self._remove(key)
+            return True
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Live (key, value) pairs"""
+        with self._lock:
+            now = self.clock()
+            self._advance(now)
+            return [(key, entry[_VALUE]) for key, entry in self._entries.items() if entry[_EXPIRES_AT] > now]
+
+    def clear(self) -> None:
+        """Remove every entry without calling on_remove"""
+        with self._lock:
+            self._entries.clear()
+            for level in self._wheel:
+                for slot in level:
+                    slot.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get store statistics for monitoring
+
+        Returns:
+            dict: Entry count, cap, expired and evicted totals
+        """
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+
+# Live stores by name, read by the metrics callbacks
+_stores: "weakref.WeakValueDictionary[str, TTLStore]" = weakref.WeakValueDictionary()
+
+
+def _collect(field: str):
+    return [((name,), store.get_stats()[field]) for name, store in list(_stores.items())]
+
+
+metrics_registry.register_callback(
+    "local_store_entries",
+    "Entries in in-process TTL stores",
+    GAUGE,
+    ("store",),
+    lambda: _collect("entries")
+)
+metrics_registry.register_callback(
+    "local_store_expired_total",
+    "Entries removed from in-process TTL stores because their TTL ran out",
+    COUNTER,
+    ("store",),
+    lambda: _collect("expired")
+)
+metrics_registry.register_callback(
+    "local_store_evicted_total",
+    "Entries evicted from in-process TTL stores at their size cap",
+    COUNTER,
+    ("store",),
+    lambda: _collect("evicted")
+)
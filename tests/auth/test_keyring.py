@@ -0,0 +1,118 @@
+"""
+Test JWT Signing Keyring for Agent-Makalah Backend
+Checks kid-based signing, zero-downtime rotation, JWKS output and the HS256 fallback
+"""
+
+import sys
+import os
+import json
+import hmac
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from jose import jwt
+from jose.utils import base64url_encode
+
+from src.auth import jwt_utils
+from src.auth.keyring import KeyRing, main as keyring_cli
+from src.core.config import settings
+
+USER_DATA = {"sub": "user-1", "email": "keyring@agent-makalah.com", "is_superuser": False}
+
+
+def test_rotation_keeps_old_tokens_valid(tmp_path, monkeypatch):
+    """Test that tokens signed before a rotation verify until the old key is retired"""
+    print("\n🔑 Testing keyring rotation...")
+
+    keyring_file = str(tmp_path / "keyring.json")
+    ring = KeyRing(keyring_file=keyring_file, reload_interval=0)
+    monkeypatch.setattr(jwt_utils, "keyring", ring)
+
+    assert keyring_cli(["--keyring", keyring_file, "generate", "--kid", "k1", "--activate"]) == 0
+    ring.reload()
+    old_token = jwt_utils.create_access_token(USER_DATA)
+    assert jwt.get_unverified_header(old_token) == {"alg": "ES256", "typ": "JWT", "kid": "k1"}
+
+    # New key is published first, then activated
+    assert keyring_cli(["--keyring", keyring_file, "generate", "--kid", "k2", "--alg", "RS256"]) == 0
+    ring.reload()
+    assert ring.active.kid == "k1"
+    assert keyring_cli(["--keyring", keyring_file, "activate", "k2"]) == 0
+    ring.reload()
+
+    new_token = jwt_utils.create_access_token(USER_DATA)
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert jwt_utils.decode_token(old_token)["sub"] == "user-1"
+    assert jwt_utils.decode_token(new_token)["sub"] == "user-1"
+
+    assert keyring_cli(["--keyring", keyring_file, "retire", "k1"]) == 0
+    ring.reload()
+    assert jwt_utils.decode_token(old_token) is None
+    assert jwt_utils.verify_token(new_token, "access") is True
+
+    print("   ✅ Old tokens valid through rotation, rejected after retirement")
+
+
+def test_jwks_document(tmp_path):
+    """Test that the JWK Set lists public keys only, active key first"""
+    print("\n📜 Testing JWKS document...")
+
+    keyring_file = str(tmp_path / "keyring.json")
+    keyring_cli(["--keyring", keyring_file, "generate", "--kid", "old"])
+    keyring_cli(["--keyring", keyring_file, "generate", "--kid", "new", "--activate"])
+    ring = KeyRing(keyring_file=keyring_file, reload_interval=0)
+
+    document = json.loads(ring.jwks_body())
+    assert [key["kid"] for key in document["keys"]] == ["new", "old"]
+    for key in document["keys"]:
+        assert key["kty"] == "EC" and key["use"] == "sig" and key["alg"] == "ES256"
+        assert "d" not in key
+
+    # Generated private keys are readable by the owner only
+    with open(keyring_file) as f:
+        data = json.load(f)
+    assert all(os.stat(tmp_path / entry["private_key_file"]).st_mode & 0o077 == 0 for entry in data["keys"])
+
+    print("   ✅ Public JWK Set without private material")
+
+
+def test_legacy_and_forged_tokens(tmp_path, monkeypatch):
+    """Test the kid-less HS256 fallback and that a kid pins its algorithm"""
+    print("\n🛡️ Testing legacy tokens and algorithm pinning...")
+
+    legacy_token = jwt.encode(
+        {**USER_DATA, "type": "access", "exp": 4102444800}, settings.jwt_secret_key, algorithm="HS256"
+    )
+
+    # No keyring: HS256 with jwt_secret_key, no kid header
+    hs_ring = KeyRing(keyring_file="", reload_interval=0)
+    monkeypatch.setattr(jwt_utils, "keyring", hs_ring)
+    token = jwt_utils.create_access_token(USER_DATA)
+    assert "kid" not in jwt.get_unverified_header(token)
+    assert jwt_utils.decode_token(legacy_token)["sub"] == "user-1"
+
+    keyring_file = str(tmp_path / "keyring.json")
+    keyring_cli(["--keyring", keyring_file, "generate", "--kid", "k1", "--alg", "RS256", "--activate"])
+    ring = KeyRing(keyring_file=keyring_file, reload_interval=0)
+    monkeypatch.setattr(jwt_utils, "keyring", ring)
+    # An active key ends the shared secret, except during a bounded migration window
+    assert jwt_utils.decode_token(legacy_token) is None
+    monkeypatch.setattr(settings, "jwt_legacy_tokens_until", datetime.utcnow() + timedelta(days=7))
+    assert jwt_utils.decode_token(legacy_token)["sub"] == "user-1"
+    monkeypatch.setattr(settings, "jwt_legacy_tokens_until", datetime.now(timezone.utc) - timedelta(seconds=1))
+    assert jwt_utils.decode_token(legacy_token) is None
+
+    # HS256 token "signed" with the published public key under a known kid
+    public_pem = ring.keys["k1"].verifier.to_pem()
+    signing_input = b".".join(
+        base64url_encode(json.dumps(part).encode())
+        for part in ({"alg": "HS256", "typ": "JWT", "kid": "k1"}, {**USER_DATA, "exp": 4102444800})
+    )
+    signature = base64url_encode(hmac.new(public_pem, signing_input, hashlib.sha256).digest())
+    forged = (signing_input + b"." + signature).decode()
+    assert jwt_utils.decode_token(forged) is None
+
+    print("   ✅ Legacy tokens only in their window, forged algorithms rejected")
@@ -0,0 +1,100 @@
+"""
+Test In-Process Token Blacklist for Agent-Makalah Backend
+Checks that revocation works without Redis on a single node and is never evicted
+"""
+
+import sys
+import os
+import asyncio
+import logging
+import uuid
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.jwt_utils import create_token_pair
+from src.auth.refresh_rotation import RefreshTokenError, RefreshTokenRotator
+from src.auth.token_blacklist import TokenBlacklist, token_blacklist
+from src.core.config import settings
+from src.database import redis_client
+from src.database.local_redis import LocalRedis
+
+
+class FailingUserCRUD:
+    """Fails the test if a revoked token gets as far as the user lookup"""
+
+    async def get_user_by_id(self, user_id):
+        raise AssertionError("revoked refresh token was not rejected")
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(redis_client, "get_redis_client", lambda: None)
+
+
+def test_blacklist_without_redis(no_redis):
+    """Test that tokens are blacklisted and user tokens revoked in process when Redis is not configured"""
+    print("\n🛑 Testing in-process token blacklist...")
+
+    blacklist = TokenBlacklist()
+    assert isinstance(blacklist.redis, LocalRedis)
+
+    user_id = str(uuid.uuid4())
+    access_token, refresh_token = create_token_pair({"sub": user_id})
+    assert not blacklist.is_token_blacklisted(access_token)
+    assert blacklist.blacklist_token(access_token, "user_logout")
+    assert blacklist.is_token_blacklisted(access_token)
+
+    assert blacklist.track_user_token(user_id, refresh_token)
+    assert blacklist.blacklist_all_user_tokens(user_id) == 1
+    assert blacklist.is_token_blacklisted(refresh_token)
+    assert blacklist.get_blacklist_stats()["total_blacklisted"] == 2
+
+    print("   ✅ Revocation works without Redis")
+
+
+def test_refresh_rejects_blacklisted_token_without_redis(monkeypatch):
+    """Test that a logged-out refresh token cannot be rotated when the blacklist is kept in process"""
+    print("\n🔁 Testing refresh after logout without Redis...")
+
+    monkeypatch.setattr(token_blacklist, "redis", LocalRedis("test_blacklist"))
+    rotator = RefreshTokenRotator()
+    rotator.redis = None
+
+    _, refresh_token = create_token_pair({"sub": str(uuid.uuid4())})
+    assert token_blacklist.blacklist_token(refresh_token, "user_logout")
+
+    with pytest.raises(RefreshTokenError):
+        asyncio.run(rotator.refresh(refresh_token, FailingUserCRUD()))
+
+    print("   ✅ Revoked refresh token rejected")
+
+
+def test_blacklist_survives_store_pressure(no_redis, monkeypatch, caplog):
+    """Test that revocations are kept past local_store_max_entries and a warning is logged instead"""
+    print("\n🧱 Testing blacklist under store pressure...")
+
+    monkeypatch.setattr(settings, "local_store_max_entries", 10)
+    blacklist = TokenBlacklist()
+    user_id = str(uuid.uuid4())
+
+    # Revoked with the shortest TTL, so it is closest to expiry once the rest follow
+    revoked_token, _ = create_token_pair({"sub": user_id})
+    assert blacklist.blacklist_jti(blacklist._extract_jti(revoked_token), 60, "user_logout")
+    with caplog.at_level(logging.WARNING, logger="src.database.local_redis"):
+        for index in range(50):
+            blacklist.blacklist_jti(f"revoked-{index}", 3600, "token_refresh")
+            blacklist.track_user_token(user_id, create_token_pair({"sub": user_id})[0])
+
+    assert blacklist.is_token_blacklisted(revoked_token)
+    assert all(blacklist.redis.get(blacklist._get_blacklist_key(f"revoked-{index}")) for index in range(50))
+    assert blacklist.redis.store.get_stats()["evicted"] == 0
+    warnings = [
+        record for record in caplog.records
+        if record.name == "src.database.local_redis" and record.levelno == logging.WARNING
+    ]
+    assert len(warnings) == 1 and "token_blacklist" in warnings[0].getMessage()
+
+    print("   ✅ No revocation evicted, one warning logged")
@@ -0,0 +1,175 @@
+"""
+Test Refresh Token Rotation for Agent-Makalah Backend
+Checks one-time-use refresh tokens, single-flight refresh, the cross-worker grace period and reuse detection
+"""
+
+import sys
+import os
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.enhanced_session_manager import enhanced_session_manager
+from src.auth.jwt_utils import decode_token
+from src.auth.refresh_rotation import RefreshTokenError, RefreshTokenRotator
+from src.auth.session_codec import session_from_hash
+from src.auth.session_store import RedisSessionStore
+from src.auth.token_blacklist import token_blacklist
+from src.models.user import UserInDB
+from src.utils.single_flight import SingleFlight
+
+
+class FakeUserCRUD:
+    """Counts user lookups"""
+
+    def __init__(self, user):
+        self.user = user
+        self.lookups = 0
+
+    async def get_user_by_id(self, user_id):
+        self.lookups += 1
+        # Give concurrent refreshes a chance to overlap
+        await asyncio.sleep(0.01)
+        return self.user if user_id == str(self.user.id) else None
+
+
+@pytest.fixture
+def redis(monkeypatch, fake_redis):
+    redis = fake_redis
+    monkeypatch.setattr(token_blacklist, "redis", redis)
+    store = RedisSessionStore(
+        enhanced_session_manager.SESSION_KEY_PREFIX, enhanced_session_manager.USER_SESSIONS_KEY_PREFIX
+    )
+    store.redis = redis
+    monkeypatch.setattr(enhanced_session_manager, "_store", store)
+    return redis
+
+
+def make_user() -> UserInDB:
+    now = datetime.utcnow()
+    return UserInDB(
+        id=uuid.uuid4(), email=f"{uuid.uuid4().hex[:8]}@agent-makalah.com", hashed_password="x",
+        is_active=True, is_superuser=False, created_at=now, updated_at=now
+    )
+
+
+def login(user: UserInDB):
+    return enhanced_session_manager.create_authenticated_session(
+        str(user.id), {"email": user.email, "is_superuser": False}
+    )
+
+
+def make_rotator(redis) -> RefreshTokenRotator:
+    rotator = RefreshTokenRotator(grace_seconds=30)
+    rotator.redis = redis
+    return rotator
+
+
+def test_single_flight_coalesces_calls():
+    """Test that concurrent calls for one key share a single execution"""
+    print("\n🛫 Testing single-flight coalescing...")
+
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        first = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        second = await flights.do("key", work)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [1] * 5 and second == 2
+    assert flights.executed == 2 and flights.shared == 4 and flights.in_flight == 0
+
+    print("   ✅ 5 concurrent calls, 1 execution")
+
+
+def test_rotation_and_concurrent_refresh(redis):
+    """Test that a refresh returns a new pair in the same family and concurrent refreshes coalesce"""
+    print("\n🔄 Testing refresh token rotation...")
+
+    user = make_user()
+    session_id, access_token, refresh_token = login(user)
+    crud = FakeUserCRUD(user)
+    rotator = make_rotator(redis)
+
+    async def refresh_twice():
+        return await asyncio.gather(rotator.refresh(refresh_token, crud), rotator.refresh(refresh_token, crud))
+
+    first, second = asyncio.run(refresh_twice())
+    assert first == second
+    assert crud.lookups == 1
+
+    new_refresh = decode_token(first["refresh_token"])
+    assert new_refresh["type"] == "refresh" and new_refresh["sid"] == session_id
+    assert new_refresh["jti"] != decode_token(refresh_token)["jti"]
+    assert first["session_updated"] is True
+
+    session = session_from_hash(redis.hgetall(enhanced_session_manager.store._get_session_key(session_id)), session_id)
+    assert session["refresh_jti"] == new_refresh["jti"]
+    assert token_blacklist.is_token_blacklisted(access_token)
+
+    # The new refresh token can be used in turn
+    third = asyncio.run(rotator.refresh(first["refresh_token"], crud))
+    assert decode_token(third["refresh_token"])["sid"] == session_id
+
+    print("   ✅ New pair issued, concurrent refreshes shared one rotation")
+
+
+def test_other_worker_within_grace_gets_same_pair(redis):
+    """Test that a second worker presenting the consumed token within the grace period gets the same pair"""
+    print("\n🤝 Testing cross-worker grace period...")
+
+    user = make_user()
+    _, _, refresh_token = login(user)
+    crud = FakeUserCRUD(user)
+
+    first = asyncio.run(make_rotator(redis).refresh(refresh_token, crud))
+    second = asyncio.run(make_rotator(redis).refresh(refresh_token, crud))
+
+    assert second["access_token"] == first["access_token"]
+    assert second["refresh_token"] == first["refresh_token"]
+    assert crud.lookups == 1
+
+    print("   ✅ Second worker got the stored result")
+
+
+def test_reuse_after_grace_revokes_family(redis):
+    """Test that replaying a consumed refresh token after the grace period revokes the family"""
+    print("\n🚨 Testing refresh token reuse detection...")
+
+    user = make_user()
+    session_id, _, refresh_token = login(user)
+    crud = FakeUserCRUD(user)
+    rotator = make_rotator(redis)
+
+    rotated = asyncio.run(rotator.refresh(refresh_token, crud))
+
+    # Grace period over: the stored result expired and the claim is old
+    jti = decode_token(refresh_token)["jti"]
+    redis.delete(rotator._get_result_key(jti))
+    redis.set(rotator._get_used_key(jti), str(time.time() - 60))
+
+    with pytest.raises(RefreshTokenError, match="reuse"):
+        asyncio.run(rotator.refresh(refresh_token, crud))
+
+    # The legitimate client's latest tokens are revoked as well
+    assert token_blacklist.is_token_blacklisted(rotated["access_token"])
+    assert token_blacklist.is_token_blacklisted(rotated["refresh_token"])
+    assert enhanced_session_manager.store._get_session_key(session_id) not in redis.data
+
+    with pytest.raises(RefreshTokenError, match="revoked"):
+        asyncio.run(rotator.refresh(rotated["refresh_token"], crud))
+
+    print("   ✅ Family revoked, session ended")
@@ -0,0 +1,196 @@
+"""
+Test Session Activity Write-Behind Buffer for Agent-Makalah Backend
+Checks coalesced batch writes, read-your-writes, failure handling and the shutdown flush
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.enhanced_session_manager import EnhancedSessionManager
+from src.auth.session_activity import SessionActivityBuffer
+from src.auth.session_codec import epoch_now, epoch_to_iso, session_from_hash
+from src.auth.session_store import MemorySessionStore, RedisSessionStore
+from src.core.metrics import session_activity_dropped
+
+
+class FailingStore(MemorySessionStore):
+    """Memory store whose batch writes fail until told otherwise"""
+
+    failing = True
+
+    def touch_many(self, last_accessed, ttl, user_ids=None):
+        if self.failing:
+            raise ConnectionError("store down")
+        return super().touch_many(last_accessed, ttl, user_ids)
+
+
+def make_session(user_id, accessed_at):
+    return {
+        "session_id": str(uuid.uuid4()), "user_id": user_id, "created_at": accessed_at,
+        "last_accessed": accessed_at, "user_data": {"email": "student@agent-makalah.com"}
+    }
+
+
+def test_touches_coalesce_into_one_pipeline(fake_redis):
+    """Test that many touches of a few sessions are written in one request, keeping the latest times"""
+    print("\n📝 Testing coalesced activity writes...")
+
+    store = RedisSessionStore("session_test", "user_sessions_test")
+    store.redis = redis = fake_redis
+    user_id = str(uuid.uuid4())
+    sessions = [make_session(user_id, 1700000000) for _ in range(3)]
+    for session in sessions:
+        store.create(session, 3600)
+    store.delete(sessions[2]["session_id"])
+
+    buffer = SessionActivityBuffer(flush_interval_ms=60000)
+    before = redis.requests
+    for second in range(100):
+        for session in sessions:
+            buffer.touch(store, session["session_id"], 1700000100 + second)
+    assert redis.requests == before
+    assert buffer.pending(store, sessions[0]["session_id"]) == 1700000199
+
+    # One pipeline, plus one delete of the partial hash left for the ended session
+    assert buffer.flush() == 2
+    assert redis.requests - before == 2
+    for session in sessions[:2]:
+        stored = session_from_hash(redis.hgetall(store._get_session_key(session["session_id"])), session["session_id"])
+        assert stored["last_accessed"] == 1700000199
+    assert store._get_session_key(sessions[2]["session_id"]) not in redis.data
+    assert buffer.pending(store, sessions[0]["session_id"]) is None
+
+    print("   ✅ 300 touches written in one pipeline")
+
+
+def test_profile_sees_buffered_activity(monkeypatch):
+    """Test that active session listings report activity that is not flushed yet"""
+    print("\n👀 Testing buffered activity reads...")
+
+    buffer = SessionActivityBuffer(flush_interval_ms=60000)
+    monkeypatch.setattr(sys.modules[EnhancedSessionManager.__module__], "session_activity", buffer)
+
+    manager = EnhancedSessionManager(store=MemorySessionStore(name="activity_sessions"))
+    user_id = str(uuid.uuid4())
+    session = make_session(user_id, 1700000000)
+    manager.store.create(session, 3600)
+
+    now = epoch_now()
+    manager.record_activity(session["session_id"])
+    assert manager.store.get(session["session_id"])["last_accessed"] == 1700000000
+    assert manager.get_user_active_sessions(user_id)[0]["last_accessed"] in (epoch_to_iso(now), epoch_to_iso(now + 1))
+
+    buffer.flush()
+    assert manager.store.get(session["session_id"])["last_accessed"] >= now
+
+    print("   ✅ Latest activity reported before and after the flush")
+
+
+def test_failed_flush_requeues_and_counts_drops():
+    """Test that a failed batch is queued again and touches beyond the cap are counted as dropped"""
+    print("\n🚧 Testing flush failures and the buffer cap...")
+
+    store = FailingStore(name="failing_sessions")
+    user_id = str(uuid.uuid4())
+    sessions = [make_session(user_id, 1700000000) for _ in range(3)]
+    for session in sessions:
+        store.create(session, 3600)
+
+    buffer = SessionActivityBuffer(flush_interval_ms=60000, max_pending=2)
+    dropped_full = session_activity_dropped.get("buffer_full")
+    for session in sessions:
+        buffer.touch(store, session["session_id"], 1700000500)
+    assert session_activity_dropped.get("buffer_full") == dropped_full + 1
+
+    assert buffer.flush() == 0
+    assert buffer.get_stats()["pending"] == 2 and buffer.flush_errors == 1
+
+    store.failing = False
+    assert buffer.flush() == 2
+    assert store.get(sessions[0]["session_id"])["last_accessed"] == 1700000500
+
+    print("   ✅ Failed batch retried, overflow counted")
+
+
+def test_flush_with_nothing_buffered():
+    """Test that touches rejected by a full buffer leave nothing to flush"""
+    print("\n🫙 Testing flushes of a full or zero-sized buffer...")
+
+    store = MemorySessionStore(name="full_sessions")
+    session = make_session(str(uuid.uuid4()), 1700000000)
+    store.create(session, 3600)
+
+    buffer = SessionActivityBuffer(flush_interval_ms=60000, max_pending=0)
+    buffer.touch(store, session["session_id"], 1700000500)
+    assert buffer.pending(store, session["session_id"]) is None
+    assert buffer.flush() == 0
+
+    # A second store while the buffer is full gets no empty batch either
+    buffer = SessionActivityBuffer(flush_interval_ms=60000, max_pending=1)
+    buffer.touch(store, session["session_id"], 1700000500)
+    other = MemorySessionStore(name="other_sessions")
+    buffer.touch(other, session["session_id"], 1700000600)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+    assert store.get(session["session_id"])["last_accessed"] == 1700000500
+
+    print("   ✅ Nothing buffered, nothing flushed")
+
+
+def test_stop_flushes_buffer():
+    """Test that the background flusher writes on its interval and on shutdown"""
+    print("\n🛑 Testing background and shutdown flushes...")
+
+    store = MemorySessionStore(name="shutdown_sessions")
+    session = make_session(str(uuid.uuid4()), 1700000000)
+    store.create(session, 3600)
+    buffer = SessionActivityBuffer(flush_interval_ms=20)
+
+    async def run():
+        buffer.start()
+        assert buffer.is_running
+        buffer.touch(store, session["session_id"], 1700000001)
+        await asyncio.sleep(0.1)
+        assert store.get(session["session_id"])["last_accessed"] == 1700000001
+
+        buffer.touch(store, session["session_id"], 1700000002)
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert not buffer.is_running
+    assert store.get(session["session_id"])["last_accessed"] == 1700000002
+
+    print("   ✅ Flushed on interval and on shutdown")
+
+
+def test_middleware_writes_each_touch_without_interval(monkeypatch):
+    """Test that with flush interval 0 the middleware writes activity at once, without a background task"""
+    print("\n⚡ Testing unbuffered activity writes...")
+
+    from src.middleware import auth_middleware
+    from src.middleware.auth_middleware import AuthenticationMiddleware
+
+    buffer = SessionActivityBuffer(flush_interval_ms=0)
+    manager = EnhancedSessionManager(store=MemorySessionStore(name="unbuffered_sessions"))
+    monkeypatch.setattr(sys.modules[EnhancedSessionManager.__module__], "session_activity", buffer)
+    monkeypatch.setattr(auth_middleware, "session_activity", buffer)
+    monkeypatch.setattr(auth_middleware, "enhanced_session_manager", manager)
+
+    user_id = str(uuid.uuid4())
+    session = make_session(user_id, 1700000000)
+    manager.store.create(session, 3600)
+
+    now = epoch_now()
+    middleware = AuthenticationMiddleware(app=None)
+    asyncio.run(middleware._record_activity({"sid": session["session_id"], "sub": user_id}))
+    assert not buffer.is_running
+    assert manager.store.get(session["session_id"])["last_accessed"] >= now
+
+    print("   ✅ Each touch written without the write-behind buffer")
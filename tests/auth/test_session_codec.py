@@ -0,0 +1,103 @@
+"""
+Test Compact Session Encoding for Agent-Makalah Backend
+Checks hash round trips, size against the legacy JSON sessions and decoding of string sessions
+"""
+
+import sys
+import os
+import json
+import uuid
+from datetime import datetime
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.jwt_utils import create_token_pair
+from src.auth.session_codec import (
+    decode_session, epoch_now, session_from_hash, session_hash_fields, token_ref
+)
+
+# Blob session (schema version 1) as written before sessions moved to hashes
+BLOB_SESSION = (
+    '1["u1",1700000000,1700000000,"a",1700000900,"r",1700600000,'
+    '["student@agent-makalah.com",false,{"rev":3}],0,1]'
+)
+
+
+def make_legacy_session():
+    user_id = str(uuid.uuid4())
+    user_data = {"email": "student@agent-makalah.com", "is_superuser": False}
+    access_token, refresh_token = create_token_pair({"sub": user_id, **user_data})
+    now = datetime.utcnow().replace(microsecond=0).isoformat()
+    return {
+        "session_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "created_at": now,
+        "last_accessed": now,
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "user_data": user_data,
+        "device_info": {"user_agent": "Mozilla/5.0", "ip": "203.0.113.7"},
+        "is_active": True
+    }
+
+
+def test_round_trip_and_size():
+    """Test that sessions survive a hash round trip and shrink against the legacy JSON encoding"""
+    print("\n📦 Testing compact session encoding...")
+
+    legacy = make_legacy_session()
+    data = decode_session(json.dumps(legacy), legacy["session_id"])
+    data["user_data"]["rev"] = 3
+
+    fields = session_hash_fields(data, versioned=True)
+    assert session_from_hash(fields, legacy["session_id"]) == data
+
+    legacy_size = len(json.dumps(legacy))
+    compact_size = sum(len(field) + len(value) for field, value in fields.items())
+    assert compact_size * 3 < legacy_size
+
+    print(f"   ✅ {legacy_size} bytes -> {compact_size} bytes")
+
+
+def test_legacy_sessions_decode():
+    """Test that unversioned JSON sessions decode to token references and epoch timestamps"""
+    print("\n🕰️ Testing legacy session decoding...")
+
+    legacy = make_legacy_session()
+    data = decode_session(json.dumps(legacy), legacy["session_id"])
+
+    assert (data["access_jti"], data["access_exp"]) == token_ref(legacy["access_token"])
+    assert (data["refresh_jti"], data["refresh_exp"]) == token_ref(legacy["refresh_token"])
+    assert abs(data["created_at"] - epoch_now()) <= 2
+    assert data["device_info"] == legacy["device_info"]
+    assert "access_token" not in data
+
+    print("   ✅ Legacy session migrated on read")
+
+
+def test_blob_sessions_decode():
+    """Test that blob sessions (schema version 1) still decode for migration"""
+    print("\n🗜️ Testing blob session decoding...")
+
+    data = decode_session(BLOB_SESSION.encode(), "session")
+    assert data == {
+        "session_id": "session", "user_id": "u1", "created_at": 1700000000, "last_accessed": 1700000000,
+        "access_jti": "a", "access_exp": 1700000900, "refresh_jti": "r", "refresh_exp": 1700600000,
+        "user_data": {"email": "student@agent-makalah.com", "is_superuser": False, "rev": 3},
+        "device_info": {}, "is_active": True
+    }
+
+    print("   ✅ Blob session decoded")
+
+
+def test_unknown_version_rejected():
+    """Test that values from a newer schema version are not misread"""
+    print("\n🚫 Testing unknown schema versions...")
+
+    with pytest.raises(ValueError):
+        decode_session('9["x"]', "session")
+
+    print("   ✅ Unknown version rejected")
@@ -0,0 +1,116 @@
+"""
+Test Redis Hash Session Storage for Agent-Makalah Backend
+Checks field-level session updates, their round trips and migration of sessions stored as strings
+"""
+
+import sys
+import os
+import json
+import uuid
+from datetime import datetime
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.enhanced_session_manager import EnhancedSessionManager
+from src.auth.jwt_utils import create_token_pair
+from src.auth.session_codec import session_from_hash
+from src.auth.session_manager import SessionManager
+from src.auth.session_store import RedisSessionStore
+from src.auth.token_blacklist import token_blacklist
+
+
+@pytest.fixture
+def redis(monkeypatch, fake_redis):
+    monkeypatch.setattr(token_blacklist, "redis", fake_redis)
+    return fake_redis
+
+
+def redis_store(redis, manager_class):
+    store = RedisSessionStore(manager_class.SESSION_KEY_PREFIX, getattr(manager_class, "USER_SESSIONS_KEY_PREFIX", None))
+    store.redis = redis
+    return store
+
+
+def test_field_updates_do_not_overwrite_each_other(redis):
+    """Test that two updates of different fields both survive, each in one request"""
+    print("\n🧩 Testing field-level session updates...")
+
+    manager = SessionManager(store=redis_store(redis, SessionManager))
+    session_id = manager.create_session(str(uuid.uuid4()), {"email": "student@agent-makalah.com"})
+
+    # Two requests that both started from the same session state
+    before = redis.requests
+    assert manager.update_session(session_id, {"theme": "dark"})
+    assert manager.update_session(session_id, {"language": "id"})
+    assert redis.requests - before == 2
+
+    session = manager.get_session(session_id)
+    assert session["user_data"] == {"email": "student@agent-makalah.com", "theme": "dark", "language": "id"}
+    datetime.fromisoformat(session["last_accessed"])
+
+    # Updating a session that is gone must not leave a partial hash behind
+    assert not manager.update_session("missing", {"theme": "dark"})
+    assert manager.store._get_session_key("missing") not in redis.data
+
+    print("   ✅ Both updates kept, one request each")
+
+
+def test_enhanced_session_round_trip(redis):
+    """Test that enhanced sessions are stored as hashes and token rotation updates fields in place"""
+    print("\n🔑 Testing enhanced session hashes...")
+
+    manager = EnhancedSessionManager(store=redis_store(redis, EnhancedSessionManager))
+    user_id = str(uuid.uuid4())
+    session_id, access_token, refresh_token = manager.create_authenticated_session(
+        user_id, {"email": "student@agent-makalah.com", "is_superuser": False}, {"ip": "203.0.113.7"}
+    )
+
+    key = manager.store._get_session_key(session_id)
+    stored = session_from_hash(redis.hgetall(key), session_id)
+    assert stored["user_id"] == user_id and stored["device_info"] == {"ip": "203.0.113.7"}
+    assert stored["user_data"]["email"] == "student@agent-makalah.com"
+
+    new_access, new_refresh = create_token_pair({"sub": user_id, "sid": session_id})
+    assert manager.rotate_session_tokens(session_id, new_access, new_refresh)
+    rotated = session_from_hash(redis.hgetall(key), session_id)
+    assert rotated["access_jti"] != stored["access_jti"]
+    assert rotated["created_at"] == stored["created_at"] and rotated["user_data"] == stored["user_data"]
+
+    print("   ✅ Stored as hash, rotated in place")
+
+
+def test_string_sessions_migrate(redis):
+    """Test that sessions stored as strings are read and rewritten as hashes"""
+    print("\n🚚 Testing string session migration...")
+
+    enhanced = EnhancedSessionManager(store=redis_store(redis, EnhancedSessionManager))
+    session_id = str(uuid.uuid4())
+    blob = {
+        "session_id": session_id, "user_id": "u1", "created_at": 1700000000, "last_accessed": 1700000000,
+        "access_jti": "a", "access_exp": 1700000900, "refresh_jti": "r", "refresh_exp": 1700600000,
+        "user_data": {"email": "student@agent-makalah.com", "is_superuser": False},
+        "device_info": {}, "is_active": True
+    }
+    # Blob session (schema version 1) of the same fields
+    redis.data[enhanced.store._get_session_key(session_id)] = (
+        '1["u1",1700000000,1700000000,"a",1700000900,"r",1700600000,'
+        '["student@agent-makalah.com",false],0,1]'
+    )
+
+    assert enhanced.store.get(session_id) == blob
+    assert isinstance(redis.data[enhanced.store._get_session_key(session_id)], dict)
+
+    basic = SessionManager(store=redis_store(redis, SessionManager))
+    redis.data[basic.store._get_session_key("legacy")] = json.dumps({
+        "user_id": "u2", "created_at": "2024-01-01T00:00:00", "last_accessed": "2024-01-01T00:00:00",
+        "user_data": {"email": "student@agent-makalah.com"}
+    })
+    assert basic.update_session("legacy", {"theme": "dark"})
+    session = basic.get_session("legacy")
+    assert session["created_at"] == "2024-01-01T00:00:00"
+    assert session["user_data"] == {"email": "student@agent-makalah.com", "theme": "dark"}
+
+    print("   ✅ Blob and JSON sessions rewritten as hashes")
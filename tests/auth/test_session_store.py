@@ -0,0 +1,246 @@
+"""
+Test Session Stores for Agent-Makalah Backend
+Checks the shared store contract, paged listings and the per-user cap, in-memory
+TTL eviction and backend selection
+"""
+
+import sys
+import os
+import uuid
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from src.auth.enhanced_session_manager import EnhancedSessionManager
+from src.auth.session_codec import epoch_now
+from src.auth.session_store import (
+    MemorySessionStore,
+    PostgresSessionStore,
+    RedisSessionStore,
+    create_session_store
+)
+from src.auth.token_blacklist import token_blacklist
+from src.core.config import settings
+from src.database.local_redis import LocalRedis
+
+
+def make_session(user_id):
+    now = epoch_now()
+    return {
+        "session_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "created_at": now,
+        "last_accessed": now,
+        "access_jti": uuid.uuid4().hex,
+        "access_exp": now + 900,
+        "refresh_jti": uuid.uuid4().hex,
+        "refresh_exp": now + 604800,
+        "user_data": {"email": "student@agent-makalah.com", "is_superuser": False},
+        "device_info": {"ip": "203.0.113.7"},
+        "is_active": True
+    }
+
+
+def redis_store(redis):
+    store = RedisSessionStore("session_test", "user_sessions_test")
+    store.redis = redis
+    return store
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request, fake_redis):
+    """Each store backend that runs without external services"""
+    return MemorySessionStore() if request.param == "memory" else redis_store(fake_redis)
+
+
+def test_store_contract(store):
+    """Test that every backend round-trips sessions, merges updates and indexes sessions per user"""
+    print("\n🗄️ Testing session store contract...")
+
+    user_id = str(uuid.uuid4())
+    first, second = make_session(user_id), make_session(user_id)
+    assert store.create(first, 3600) and store.create(second, 3600)
+
+    assert store.get(first["session_id"]) == first
+    assert store.get("missing") is None
+
+    # Partial updates: user_data keys merge, other fields are replaced
+    assert store.update(first["session_id"], {"user_data": {"theme": "dark"}, "access_jti": "new"}, 3600)
+    updated = store.get(first["session_id"])
+    assert updated["user_data"] == {**first["user_data"], "theme": "dark"}
+    assert updated["access_jti"] == "new" and updated["refresh_jti"] == first["refresh_jti"]
+    assert not store.update("missing", {"last_accessed": epoch_now()}, 3600)
+
+    assert {session["session_id"] for session in store.user_sessions(user_id)} == {
+        first["session_id"], second["session_id"]
+    }
+
+    assert store.delete(second["session_id"], user_id)
+    assert store.get(second["session_id"]) is None
+    assert [session["session_id"] for session in store.delete_user_sessions(user_id)] == [first["session_id"]]
+    assert store.user_sessions(user_id) == []
+
+    print("   ✅ Contract holds")
+
+
+def test_sessions_listed_and_trimmed_by_activity(store):
+    """Test that a user's sessions are paged most recently active first and trimming ends the oldest"""
+    print("\n📑 Testing paged listings and trimming...")
+
+    user_id = str(uuid.uuid4())
+    sessions = [make_session(user_id) for _ in range(5)]
+    for offset, session in enumerate(sessions):
+        session["last_accessed"] = 1700000000 + offset
+        store.create(session, 3600)
+
+    # Activity on the oldest session moves it to the front
+    assert store.touch_many({sessions[0]["session_id"]: 1700000100}, 3600, {sessions[0]["session_id"]: user_id}) == 1
+    expected = [sessions[index]["session_id"] for index in (0, 4, 3, 2, 1)]
+
+    pages = [store.user_sessions(user_id, offset, 2) for offset in (0, 2, 4)]
+    assert [[session["session_id"] for session in page] for page in pages] == [expected[:2], expected[2:4], expected[4:]]
+    assert store.user_sessions(user_id, 0, 0) == []
+
+    evicted = store.trim_user_sessions(user_id, 3)
+    assert [session["session_id"] for session in evicted] == expected[3:]
+    assert [session["session_id"] for session in store.user_sessions(user_id)] == expected[:3]
+    assert store.get(sessions[1]["session_id"]) is None
+    assert store.trim_user_sessions(user_id, 3) == []
+
+    print("   ✅ Pages ordered by activity, oldest sessions trimmed")
+
+
+def test_pages_skip_expired_index_entries(fake_redis):
+    """Test that expired sessions left in the index neither shorten a page nor shift the next one"""
+    print("\n🧹 Testing pages over expired index entries...")
+
+    store = redis_store(fake_redis)
+    user_id = str(uuid.uuid4())
+    sessions = [make_session(user_id) for _ in range(6)]
+    for offset, session in enumerate(sessions):
+        session["last_accessed"] = 1700000000 + offset
+        store.create(session, 3600)
+    # The two most recently active sessions expired; their index entries remain
+    for session in sessions[4:]:
+        del store.redis.data[store._get_session_key(session["session_id"])]
+
+    first_page = store.user_sessions(user_id, 0, 3)
+    second_page = store.user_sessions(user_id, 3, 3)
+    assert [session["session_id"] for session in first_page] == [sessions[index]["session_id"] for index in (3, 2, 1)]
+    assert [session["session_id"] for session in second_page] == [sessions[0]["session_id"]]
+    assert len(store.redis.data[store._get_user_sessions_key(user_id)]) == 4
+
+    print("   ✅ Full pages, nothing skipped")
+
+
+def test_set_index_migrated_to_sorted_set(fake_redis):
+    """Test that a per-user set index written by an earlier version is rewritten on first use"""
+    print("\n🔁 Testing session index migration...")
+
+    store = redis_store(fake_redis)
+    user_id = str(uuid.uuid4())
+    older, newer = make_session(user_id), make_session(user_id)
+    older["last_accessed"] -= 60
+    store.create(older, 3600)
+    store.create(newer, 3600)
+
+    index_key = store._get_user_sessions_key(user_id)
+    del store.redis.data[index_key]
+    store.redis.sadd(index_key, older["session_id"], newer["session_id"], "expired")
+
+    assert [session["session_id"] for session in store.user_sessions(user_id)] == [
+        newer["session_id"], older["session_id"]
+    ]
+    assert store.redis.data[index_key] == {newer["session_id"]: newer["last_accessed"], older["session_id"]: older["last_accessed"]}
+
+    print("   ✅ Set index rewritten as a sorted set")
+
+
+def test_login_beyond_cap_ends_least_recently_active(monkeypatch):
+    """Test that logging in beyond max_sessions_per_user ends the least recently active session and revokes its tokens"""
+    print("\n🧢 Testing the per-user session cap...")
+
+    monkeypatch.setattr(settings, "max_sessions_per_user", 2)
+    monkeypatch.setattr(token_blacklist, "redis", LocalRedis("test_session_cap"))
+    manager = EnhancedSessionManager(store=MemorySessionStore(name="capped_user_sessions"))
+    user_id = str(uuid.uuid4())
+    user_data = {"email": "student@agent-makalah.com"}
+
+    first_id, first_access, first_refresh = manager.create_authenticated_session(user_id, user_data)
+    second_id, _, _ = manager.create_authenticated_session(user_id, user_data)
+    # The first session stays in use, so the second is the least recently active
+    manager.store.update(first_id, {"last_accessed": epoch_now() + 60}, 3600)
+    third_id, _, _ = manager.create_authenticated_session(user_id, user_data)
+
+    assert {session["session_id"] for session in manager.get_user_active_sessions(user_id)} == {first_id, third_id}
+    assert manager.store.get(second_id) is None
+    assert not token_blacklist.is_token_blacklisted(first_access)
+
+    manager.store.update(third_id, {"last_accessed": epoch_now() + 120}, 3600)
+    manager.create_authenticated_session(user_id, user_data)
+    assert manager.store.get(first_id) is None
+    assert token_blacklist.is_token_blacklisted(first_access) and token_blacklist.is_token_blacklisted(first_refresh)
+    assert len(manager.get_user_active_sessions(user_id, limit=1)) == 1
+
+    print("   ✅ Oldest sessions ended, tokens revoked")
+
+
+def test_memory_store_expires_sessions():
+    """Test that expired sessions leave the store and its user index, renewed ones stay, and the cap evicts"""
+    print("\n⏳ Testing in-memory session expiry...")
+
+    store = MemorySessionStore()
+    clock = [store.sessions.clock()]
+    store.sessions.clock = lambda: clock[0]
+    user_id = str(uuid.uuid4())
+    short, renewed = make_session(user_id), make_session(user_id)
+    store.create(short, 60)
+    store.create(renewed, 60)
+
+    # Renewing the TTL moves the session to a later wheel slot
+    clock[0] += 50
+    assert store.update(renewed["session_id"], {"last_accessed": epoch_now()}, 60)
+
+    clock[0] += 20
+    assert store.get(short["session_id"]) is None
+    assert store.get(renewed["session_id"]) is not None
+    assert short["session_id"] not in store.sessions
+    assert store.user_index[user_id] == {renewed["session_id"]}
+
+    clock[0] += 60
+    assert store.user_sessions(user_id) == []
+    assert len(store.sessions) == 0 and not store.user_index
+    assert store.sessions.get_stats()["expired"] == 2
+
+    # At the cap the session closest to expiry is evicted
+    capped = MemorySessionStore(name="capped_sessions", max_entries=2)
+    sessions = [make_session(user_id) for _ in range(3)]
+    for session, ttl in zip(sessions, (600, 10, 3600)):
+        capped.create(session, ttl)
+    assert capped.get(sessions[1]["session_id"]) is None
+    assert capped.user_index[user_id] == {sessions[0]["session_id"], sessions[2]["session_id"]}
+    assert capped.sessions.get_stats()["evicted"] == 1
+
+    print("   ✅ Expired sessions removed, renewed ones kept, cap enforced")
+
+
+def test_backend_selection(monkeypatch):
+    """Test that the configured backend is used and Redis falls back to memory when not configured"""
+    print("\n🔀 Testing session store selection...")
+
+    monkeypatch.setattr(settings, "upstash_redis_url", "https://redis.example")
+    monkeypatch.setattr(settings, "upstash_redis_token", "token")
+    assert isinstance(create_session_store("session", backend="memory"), MemorySessionStore)
+    assert isinstance(create_session_store("session", backend="postgres"), PostgresSessionStore)
+
+    monkeypatch.setattr(settings, "session_store_backend", "auto")
+    store = create_session_store("session", "user_sessions")
+    assert isinstance(store, RedisSessionStore) and store.index_prefix == "user_sessions"
+
+    monkeypatch.setattr(settings, "upstash_redis_url", None)
+    assert isinstance(create_session_store("session", backend="redis"), MemorySessionStore)
+    assert isinstance(create_session_store("session"), MemorySessionStore)
+
+    print("   ✅ Backend chosen from settings")
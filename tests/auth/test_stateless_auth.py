@@ -0,0 +1,132 @@
+"""
+Test Stateless Authentication for Agent-Makalah Backend
+Checks claims-based verification, revocation sync between nodes and the stateful fallback
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.auth.jwt_utils import create_access_token, decode_token
+from src.auth.stateless import RevocationSet, user_from_claims
+from src.core.config import settings
+from src.middleware.auth_middleware import AuthenticationMiddleware
+
+
+def make_node(redis) -> RevocationSet:
+    node = RevocationSet(sync_interval=1.0, max_staleness=30.0)
+    node.redis = redis
+    return node
+
+
+def stateless_token(user_id: str, rev: int) -> dict:
+    token = create_access_token({
+        "sub": user_id,
+        "email": "edge@agent-makalah.com",
+        "is_superuser": False,
+        "is_active": True,
+        "created_at": "2025-01-01T00:00:00",
+        "rev": rev
+    })
+    return decode_token(token)
+
+
+def test_revocations_reach_other_nodes(monkeypatch, fake_redis):
+    """Test that logouts and logout-all published on one node apply on another after a sync"""
+    print("\n🔄 Testing revocation sync between nodes...")
+
+    monkeypatch.setattr(settings, "auth_mode", "stateless")
+    redis = fake_redis
+    issuer, edge = make_node(redis), make_node(redis)
+
+    edge.sync()
+    payload = stateless_token("user-1", issuer.current_epoch("user-1"))
+    assert edge.can_verify(payload)
+    assert user_from_claims(payload)["user_id"] == "user-1"
+
+    # Single token revocation (logout)
+    issuer.revoke_token(payload["jti"], payload["exp"])
+    assert not edge.is_revoked(payload)
+    assert edge.sync() == 1
+    assert edge.is_revoked(payload)
+
+    # User revocation (logout-all) revokes older tokens only
+    other = stateless_token("user-1", 0)
+    assert issuer.revoke_user("user-1", "test") == 1
+    edge.sync()
+    assert edge.is_revoked(other)
+    assert issuer.current_epoch("user-1") == 1
+    assert not edge.is_revoked(stateless_token("user-1", issuer.current_epoch("user-1")))
+
+    # A node starting later loads the whole retention window
+    late = make_node(redis)
+    late.sync()
+    assert late.is_revoked(payload) and late.is_revoked(other)
+
+    print("   ✅ Token and user revocations synced")
+
+
+def test_stale_set_falls_back(monkeypatch, fake_redis):
+    """Test that stateless verification is only used with a fresh set and stateless claims"""
+    print("\n⏱️ Testing staleness fallback...")
+
+    monkeypatch.setattr(settings, "auth_mode", "stateless")
+    node = make_node(fake_redis)
+    payload = stateless_token("user-2", 0)
+
+    assert not node.can_verify(payload)  # never synced
+    node.sync()
+    assert node.can_verify(payload)
+
+    node.last_sync = time.monotonic() - 60
+    assert not node.can_verify(payload)
+
+    node.sync()
+    legacy = decode_token(create_access_token({"sub": "user-2", "email": "x@y.z"}))
+    assert not node.can_verify(legacy)
+    assert not node.can_verify({**payload, "type": "refresh"})
+
+    monkeypatch.setattr(settings, "auth_mode", "stateful")
+    assert not node.can_verify(payload)
+
+    print("   ✅ Stale sets and tokens without claims use the stateful path")
+
+
+def test_middleware_skips_database(monkeypatch, fake_redis):
+    """Test that the middleware authenticates stateless tokens without Redis or the database"""
+    print("\n🚀 Testing stateless middleware path...")
+
+    from src.auth import stateless
+
+    monkeypatch.setattr(settings, "auth_mode", "stateless")
+    node = make_node(fake_redis)
+    node.sync()
+    monkeypatch.setattr(stateless, "revocation_set", node)
+    monkeypatch.setattr("src.middleware.auth_middleware.revocation_set", node)
+
+    class NoDatabase:
+        async def get_user_by_id(self, user_id):
+            raise AssertionError("database lookup in stateless mode")
+
+    middleware = AuthenticationMiddleware(app=None)
+    middleware.user_crud = NoDatabase()
+
+    token = create_access_token({
+        "sub": "user-3", "email": "edge@agent-makalah.com", "is_superuser": True,
+        "is_active": True, "created_at": "2025-01-01T00:00:00", "rev": 0
+    })
+    user = asyncio.run(middleware._validate_token_and_get_user(token))
+    assert user["user_id"] == "user-3" and user["is_superuser"] is True
+
+    # Access tokens are short-lived in stateless mode
+    payload = decode_token(token)
+    assert payload["exp"] - payload["iat"] == settings.stateless_access_token_expire_minutes * 60
+
+    node.revoke_user("user-3")
+    assert asyncio.run(middleware._validate_token_and_get_user(token)) is None
+
+    print("   ✅ Claims verified in memory, revocation honoured")
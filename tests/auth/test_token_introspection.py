@@ -0,0 +1,130 @@
+"""
+Test Batch Token Introspection for Agent-Makalah Backend
+Checks per-token results, batched Redis and database calls, and endpoint access control
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi.testclient import TestClient
+
+from src.auth.introspection import introspect_tokens
+from src.auth.jwt_utils import create_access_token, create_refresh_token
+from src.auth.token_blacklist import token_blacklist
+from src.core.config import settings
+from src.models.user import UserInDB
+
+
+class FakeUserCRUD:
+    """Counts batched user queries"""
+
+    def __init__(self, users):
+        self.users = {str(user.id): user for user in users}
+        self.queries = []
+
+    async def get_users_by_ids(self, user_ids):
+        self.queries.append(list(user_ids))
+        return {user_id: self.users[user_id] for user_id in user_ids if user_id in self.users}
+
+
+def make_user(is_active: bool = True) -> UserInDB:
+    now = datetime.utcnow()
+    return UserInDB(
+        id=uuid.uuid4(), email=f"{uuid.uuid4().hex[:8]}@agent-makalah.com", hashed_password="x",
+        is_active=is_active, is_superuser=False, created_at=now, updated_at=now
+    )
+
+
+def token_for(user: UserInDB, **kwargs) -> str:
+    return create_access_token({"sub": str(user.id), "email": user.email, "is_superuser": False}, **kwargs)
+
+
+def test_batch_results_in_order(monkeypatch, fake_redis):
+    """Test that every token gets its own result with one MGET and one user query"""
+    print("\n🔍 Testing batch introspection...")
+
+    active_user, inactive_user, revoked_user = make_user(), make_user(is_active=False), make_user()
+    missing_user = make_user()
+    revoked_token = token_for(revoked_user)
+    revoked_jti = token_blacklist._extract_jti(revoked_token)
+
+    redis = fake_redis
+    redis.data[token_blacklist._get_blacklist_key(revoked_jti)] = "{}"
+    monkeypatch.setattr(token_blacklist, "redis", redis)
+    crud = FakeUserCRUD([active_user, inactive_user, revoked_user])
+
+    tokens = [
+        token_for(active_user),
+        "not-a-token",
+        token_for(active_user, expires_delta=timedelta(seconds=-10)),
+        revoked_token,
+        token_for(inactive_user),
+        token_for(missing_user),
+        create_refresh_token({"sub": str(active_user.id), "email": active_user.email})
+    ]
+    results = asyncio.run(introspect_tokens(tokens, crud))
+
+    assert results[0]["active"] is True and results[0]["sub"] == str(active_user.id)
+    assert results[0]["token_type"] == "access"
+    assert [result.get("reason") for result in results[1:6]] == [
+        "invalid", "expired", "revoked", "user_inactive", "user_not_found"
+    ]
+    assert results[6]["active"] is True and results[6]["token_type"] == "refresh"
+
+    assert redis.requests == 1  # one MGET
+    assert len(crud.queries) == 1
+
+    print("   ✅ 7 tokens, 1 Redis call, 1 user query")
+
+
+def test_stateless_epochs_in_same_call(monkeypatch, fake_redis):
+    """Test that revocation epochs are read in the same MGET in stateless mode"""
+    print("\n🧮 Testing revocation epochs...")
+
+    from src.auth.stateless import revocation_set
+
+    monkeypatch.setattr(settings, "auth_mode", "stateless")
+    user = make_user()
+    redis = fake_redis
+    redis.data[revocation_set._get_epoch_key(str(user.id))] = "2"
+    monkeypatch.setattr(token_blacklist, "redis", redis)
+
+    old = create_access_token({"sub": str(user.id), "email": user.email, "rev": 1})
+    current = create_access_token({"sub": str(user.id), "email": user.email, "rev": 2})
+    results = asyncio.run(introspect_tokens([old, current], FakeUserCRUD([user])))
+
+    assert results[0] == {"active": False, "reason": "revoked"}
+    assert results[1]["active"] is True
+    assert redis.requests == 1  # one MGET
+
+    print("   ✅ Older epochs revoked")
+
+
+def test_endpoint_requires_service_token(monkeypatch):
+    """Test endpoint access control and batch size limits"""
+    print("\n🔐 Testing introspection endpoint access...")
+
+    from src.main import app
+
+    monkeypatch.setattr(settings, "introspection_auth_token", "service-secret")
+    client = TestClient(app)
+    url = "/api/v1/auth/introspect"
+
+    assert client.post(url, json={"tokens": ["x"]}).status_code == 403
+    assert client.post(url, json={"tokens": ["x"]}, headers={"X-Introspection-Token": "wrong"}).status_code == 403
+
+    headers = {"X-Introspection-Token": "service-secret"}
+    response = client.post(url, json={"tokens": ["x"]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"active": False, "reason": "invalid"}]
+
+    too_many = ["x"] * (settings.introspection_max_tokens + 1)
+    assert client.post(url, json={"tokens": too_many}, headers=headers).status_code == 400
+
+    print("   ✅ Service token required, batch size bounded")
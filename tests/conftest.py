@@ -0,0 +1,215 @@
+"""
+Shared Test Fixtures for Agent-Makalah Backend
+In-memory stand-in for the shared Upstash Redis client
+"""
+
+import functools
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+class SortedSet(dict):
+    """Member -> score map stored for sorted set keys"""
+
+
+def _command(method):
+    """Count a call as one request (unless it runs inside a pipeline) and fail while Redis is down"""
+    @functools.wraps(method)
+    def run(self, *args, **kwargs):
+        self._request()
+        return method(self, *args, **kwargs)
+    return run
+
+
+class FakePipeline:
+    """Queues calls and runs them against FakeRedis on exec, as one request (pipeline and MULTI/EXEC)"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def exec(self) -> List[Any]:
+        # Like Upstash: every command runs, then the first error is raised
+        self.redis._request()
+        results, error = [], None
+        self.redis._batched = True
+        try:
+            for command, args, kwargs in self.commands:
+                try:
+                    results.append(getattr(self.redis, command)(*args, **kwargs))
+                except Exception as e:
+                    error = error or e
+                    results.append(None)
+        finally:
+            self.redis._batched = False
+        if error:
+            raise error
+        return results
+
+
+class FakeRedis:
+    """
+    Dict-backed stand-in for the shared Upstash client
+
+    Strings, sets, hashes and sorted sets live in `data` (TTLs are ignored);
+    commands on a key of another type raise WRONGTYPE like Redis. `requests`
+    counts round trips: one per command, one per pipeline or transaction.
+    With `fail` set every request raises ConnectionError.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.requests = 0
+        self.fail = False
+        self._batched = False
+
+    def _request(self) -> None:
+        if self.fail:
+            raise ConnectionError("redis down")
+        if not self._batched:
+            self.requests += 1
+
+    def _value(self, key: str, kind: type, create: bool = False) -> Any:
+        value = self.data.get(key)
+        if value is None and create:
+            value = self.data[key] = kind()
+        if value is not None and type(value) is not kind:
+            raise Exception(WRONGTYPE)
+        return value
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    multi = pipeline
+
+    # === Keys ===
+
+    @_command
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if key in self.data)
+
+    @_command
+    def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    @_command
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+    # === Strings ===
+
+    @_command
+    def get(self, key: str) -> Optional[str]:
+        return self._value(key, str)
+
+    @_command
+    def mget(self, *keys: str) -> List[Optional[str]]:
+        return [self._value(key, str) for key in keys]
+
+    @_command
+    def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = str(value)
+        return True
+
+    @_command
+    def setex(self, key: str, seconds: int, value: Any) -> bool:
+        self.data[key] = str(value)
+        return True
+
+    @_command
+    def incr(self, key: str) -> int:
+        value = int(self._value(key, str) or 0) + 1
+        self.data[key] = str(value)
+        return value
+
+    # === Sets ===
+
+    @_command
+    def sadd(self, key: str, *members: str) -> int:
+        members_set = self._value(key, set, create=True)
+        added = len(set(members) - members_set)
+        members_set.update(members)
+        return added
+
+    @_command
+    def srem(self, key: str, *members: str) -> int:
+        members_set = self._value(key, set) or set()
+        removed = len(members_set.intersection(members))
+        members_set.difference_update(members)
+        return removed
+
+    @_command
+    def smembers(self, key: str) -> set:
+        return set(self._value(key, set) or ())
+
+    # === Hashes ===
+
+    @_command
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._value(key, dict) or {})
+
+    @_command
+    def hset(self, key: str, field: Optional[str] = None, value: Any = None, values: Optional[Dict[str, Any]] = None) -> int:
+        values = dict(values or {})
+        if field is not None:
+            values[field] = value
+        fields = self._value(key, dict, create=True)
+        added = len(set(values) - set(fields))
+        fields.update(values)
+        return added
+
+    # === Sorted sets ===
+
+    @_command
+    def zadd(self, key: str, scores: Dict[str, float]) -> int:
+        zset = self._value(key, SortedSet, create=True)
+        added = len(set(scores) - set(zset))
+        zset.update(scores)
+        return added
+
+    @_command
+    def zrem(self, key: str, *members: str) -> int:
+        zset = self._value(key, SortedSet) or {}
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    @_command
+    def zrange(self, key: str, start: int, stop: int, rev: bool = False) -> List[str]:
+        zset = self._value(key, SortedSet) or {}
+        members = sorted(zset, key=lambda member: (zset[member], member), reverse=rev)
+        return members[start:None if stop == -1 else stop + 1]
+
+    @_command
+    def zrangebyscore(self, key: str, minimum: Any, maximum: Any, withscores: bool = False) -> List[Any]:
+        zset = self._value(key, SortedSet) or {}
+        low, high = float(minimum), float(maximum)
+        items = sorted(
+            ((member, score) for member, score in zset.items() if low <= score <= high),
+            key=lambda item: (item[1], item[0])
+        )
+        return items if withscores else [member for member, _ in items]
+
+    @_command
+    def zremrangebyscore(self, key: str, minimum: Any, maximum: Any) -> int:
+        zset = self._value(key, SortedSet) or {}
+        low, high = float(minimum), float(maximum)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    """Fresh FakeRedis for one test"""
+    return FakeRedis()
@@ -0,0 +1,49 @@
+"""
+Test Lazy Imports for Agent-Makalah Backend
+Checks that importing the app does not load heavy client libraries
+"""
+
+import sys
+import os
+import subprocess
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+DEFERRED_MODULES = ("supabase", "upstash_redis", "passlib.context", "jose.jwt", "httpx")
+
+
+def test_app_import_defers_heavy_clients():
+    """Test that `import src.main` leaves Supabase, Upstash, passlib, jose.jwt and httpx unloaded"""
+    print("\n📦 Testing deferred imports...")
+
+    check = f"import sys, src.main; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    assert result.stdout.strip() == ""
+
+    print("   ✅ Heavy clients are imported on first use")
+
+
+def test_shared_redis_is_lazy():
+    """Test that session managers share one lazily created Redis client"""
+    print("\n🔗 Testing shared Redis client...")
+
+    from src.auth.session_manager import SessionManager
+    from src.auth.token_blacklist import TokenBlacklist
+
+    sentinel = object()
+    manager = SessionManager()
+    manager.redis = sentinel
+    assert manager.redis is sentinel
+    assert "_redis" not in vars(TokenBlacklist())
+
+    print("   ✅ Redis client resolved on first use and overridable per instance")
@@ -0,0 +1,127 @@
+"""
+Test Logging Pipeline for Agent-Makalah Backend
+Checks queued JSON-lines output, batching, drop counters and sampling
+"""
+
+import sys
+import os
+import io
+import logging
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import orjson
+
+from src.core.logging_pipeline import (
+    LogPipeline,
+    CATEGORY_SECURITY,
+    CATEGORY_GENERAL,
+    request_sampled_category
+)
+
+
+def make_pipeline(**kwargs) -> LogPipeline:
+    """Create a pipeline writing to an in-memory stream"""
+    kwargs.setdefault("stream", io.BytesIO())
+    kwargs.setdefault("flush_interval", 0.01)
+    kwargs.setdefault("sample_rates", {CATEGORY_SECURITY: 1.0, "performance": 1.0, CATEGORY_GENERAL: 1.0})
+    return LogPipeline(**kwargs)
+
+
+def read_lines(pipeline: LogPipeline) -> list:
+    """Parse the JSON lines written so far"""
+    return [orjson.loads(line) for line in pipeline.stream.getvalue().splitlines()]
+
+
+def test_structured_json_lines():
+    """Test that records are written as JSON lines with extras"""
+    print("\n📝 Testing structured JSON output...")
+
+    pipeline = make_pipeline()
+    logger = logging.getLogger("test_pipeline.structured")
+    logger.propagate = False
+    logger.setLevel(logging.ERROR)
+    pipeline.start(logger=logger, level="info")
+    try:
+        logger.info("hello %s", "world", extra={"request_id": "abc123"})
+        logging.getLogger("test_pipeline.structured.child").warning("careful")
+    finally:
+        pipeline.stop()
+
+    lines = read_lines(pipeline)
+    assert len(lines) == 2
+    assert lines[0]["message"] == "hello world"
+    assert lines[0]["request_id"] == "abc123"
+    assert lines[0]["level"] == "INFO"
+    assert lines[0]["category"] == CATEGORY_GENERAL
+    assert lines[1]["level"] == "WARNING"
+
+    # Previous handlers and level are restored after stop
+    assert pipeline.handler not in logger.handlers
+    assert logger.level == logging.ERROR
+
+    print("   ✅ Records written as JSON lines")
+
+
+def test_batching():
+    """Test that queued records are written in batches"""
+    print("\n📦 Testing batched writes...")
+
+    pipeline = make_pipeline(batch_size=50)
+    logger = logging.getLogger("test_pipeline.batching")
+    logger.propagate = False
+
+    # Enqueue before the writer starts so everything is drained in full batches
+    for i in range(120):
+        pipeline.enqueue(logger.makeRecord(logger.name, logging.INFO, __file__, 0, "event %d", (i,), None))
+    pipeline.start(logger=logger, level="info")
+    pipeline.stop()
+
+    stats = pipeline.get_stats()
+    assert stats["written"] == 120
+    assert stats["batches"] <= 4
+    assert len(read_lines(pipeline)) == 120
+
+    print(f"   ✅ 120 records in {stats['batches']} batches")
+
+
+def test_drop_counters_when_full():
+    """Test that a full queue drops records without blocking and counts them"""
+    print("\n🚰 Testing bounded queue drops...")
+
+    pipeline = make_pipeline(max_queue_size=5)
+    security_logger = logging.getLogger("agent_makalah.security.test")
+
+    for _ in range(8):
+        pipeline.enqueue(security_logger.makeRecord(security_logger.name, logging.WARNING, __file__, 0, "x", (), None))
+
+    stats = pipeline.get_stats()
+    assert stats["queued"] == 5
+    assert stats["dropped"][CATEGORY_SECURITY] == 3
+    assert stats["dropped"][CATEGORY_GENERAL] == 0
+
+    print("   ✅ Overflow dropped and counted per category")
+
+
+def test_sampling_keeps_warnings():
+    """Test that informational records are sampled but warnings are kept"""
+    print("\n🎲 Testing per-category sampling...")
+
+    pipeline = make_pipeline(sample_rates={CATEGORY_GENERAL: 0.0})
+    logger = logging.getLogger("test_pipeline.sampling")
+
+    pipeline.enqueue(logger.makeRecord(logger.name, logging.INFO, __file__, 0, "dropped", (), None))
+    pipeline.enqueue(logger.makeRecord(logger.name, logging.ERROR, __file__, 0, "kept", (), None))
+    assert pipeline.get_stats()["sampled_out"][CATEGORY_GENERAL] == 1
+    assert pipeline.get_stats()["queued"] == 1
+
+    # Records of a category already sampled in by the request are not re-sampled
+    token = request_sampled_category.set(CATEGORY_GENERAL)
+    try:
+        pipeline.enqueue(logger.makeRecord(logger.name, logging.INFO, __file__, 0, "request", (), None))
+    finally:
+        request_sampled_category.reset(token)
+    assert pipeline.get_stats()["queued"] == 2
+
+    print("   ✅ Sampling applied once, warnings always kept")
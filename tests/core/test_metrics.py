@@ -0,0 +1,191 @@
+"""
+Test Metrics Registry for Agent-Makalah Backend
+Checks histograms, Prometheus text output, worker snapshot merging and archiving,
+the middleware and access to /metrics
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.core.metrics import (
+    ARCHIVE_SNAPSHOT,
+    MetricsRegistry,
+    estimate_quantile,
+    http_request_duration,
+    metrics_registry
+)
+from src.middleware.metrics import MetricsMiddleware
+from src.database.redis_client import InstrumentedRedis
+
+
+def test_histogram_and_text_format():
+    """Test bucket placement and Prometheus exposition output"""
+    print("\n📊 Testing histogram rendering...")
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    counter = registry.counter("test_events_total", "Test events", ("kind",))
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+    counter.inc("x")
+    counter.inc("x", amount=2)
+
+    text = registry.render(directory="")
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert 'test_events_total{kind="x"} 3' in text
+
+    print("   ✅ Buckets are cumulative in the text output")
+
+
+def test_quantile_estimate():
+    """Test p50/p99 estimation from bucket counts"""
+    print("\n📐 Testing quantile estimation...")
+
+    buckets = (0.1, 0.2, 0.4)
+    assert estimate_quantile(buckets, [0, 0, 0, 0], 0.5) is None
+    assert estimate_quantile(buckets, [10, 0, 0, 0], 0.5) == 0.05
+    assert abs(estimate_quantile(buckets, [50, 40, 10, 0], 0.99) - 0.38) < 1e-9
+
+    print("   ✅ Quantiles interpolated within buckets")
+
+
+def test_snapshot_merge_across_workers():
+    """Test that snapshots from several workers are summed"""
+    print("\n🧮 Testing cross-worker snapshot merge...")
+
+    worker = MetricsRegistry()
+    histogram = worker.histogram("merge_latency_seconds", "Merged latency", ("route",), buckets=(0.1,))
+    histogram.observe(0.05, "/x")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Pretend another worker already wrote an identical snapshot
+        path = worker.write_snapshot(directory)
+        os.rename(path, os.path.join(directory, "metrics-0.json"))
+
+        merged = worker.collect(directory)
+        series = merged["merge_latency_seconds"]["series"]
+        assert series == [[["/x"], {"counts": [2, 0], "sum": 0.1, "count": 2}]]
+
+    print("   ✅ Worker snapshots merged")
+
+
+def test_exited_worker_snapshots_archived():
+    """Test that snapshots of exited workers are folded into one archive, keeping counters and dropping gauges"""
+    print("\n🗃️ Testing snapshot archiving...")
+
+    worker = MetricsRegistry()
+    counter = worker.counter("archive_events_total", "Archived events")
+    gauge = worker.gauge("archive_in_progress", "Archived gauge")
+    counter.inc(amount=3)
+    gauge.set(5)
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Two workers that exited without retiring their snapshots
+        for name in (f"metrics-{exited.pid}.json", "metrics-999999999.json"):
+            os.rename(worker.write_snapshot(directory), os.path.join(directory, name))
+
+        merged = worker.collect(directory)
+        assert merged["archive_events_total"]["series"] == [[[], 9.0]]
+        assert merged["archive_in_progress"]["series"] == [[[], 5.0]]
+        assert set(os.listdir(directory)) == {ARCHIVE_SNAPSHOT, f"metrics-{os.getpid()}.json", "metrics.lock"}
+
+        # This worker exits: its totals move to the archive as well
+        worker.retire_snapshot(directory)
+        assert set(os.listdir(directory)) == {ARCHIVE_SNAPSHOT, "metrics.lock"}
+        merged = MetricsRegistry().collect(directory)
+        assert merged["archive_events_total"]["series"] == [[[], 9.0]]
+        assert "archive_in_progress" not in merged
+
+    print("   ✅ Directory bounded, totals kept")
+
+
+def test_metrics_endpoint_requires_token_outside_development(monkeypatch):
+    """Test that /metrics is refused outside development unless a metrics token is configured and sent"""
+    print("\n🔐 Testing /metrics access...")
+
+    from src.main import app
+    client = TestClient(app)
+
+    monkeypatch.setattr(settings, "metrics_multiprocess_dir", None)
+    monkeypatch.setattr(settings, "metrics_auth_token", None)
+    monkeypatch.setattr(settings, "environment", "development")
+    assert client.get("/metrics").status_code == 200
+
+    monkeypatch.setattr(settings, "environment", "production")
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(settings, "metrics_auth_token", "scrape-token")
+    assert client.get("/metrics", headers={"X-Metrics-Token": "wrong"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Metrics-Token": "scrape-token"}).status_code == 200
+
+    print("   ✅ Token required outside development")
+
+
+def test_middleware_records_route_template():
+    """Test that requests are recorded under the route template and status class"""
+    print("\n🛣️ Testing metrics middleware...")
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/v1/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    from src.middleware.route_policy import route_policy_table
+    route_policy_table.compile(app.routes)
+
+    client = TestClient(app)
+    client.get("/api/v1/items/1")
+    client.get("/api/v1/items/2")
+
+    series = http_request_duration._series.get(("GET", "/api/v1/items/{item_id}", "2xx"))
+    assert series is not None and series.count == 2
+    assert "cache_requests_total" in metrics_registry.render(directory="")
+
+    print("   ✅ Latency recorded per route template")
+
+
+def test_instrumented_redis_counts_errors():
+    """Test that the Redis proxy times commands and counts failures"""
+    print("\n🔴 Testing Redis instrumentation...")
+
+    class FakeRedis:
+        def get(self, key):
+            return "value"
+
+        def set(self, key, value):
+            raise ConnectionError("down")
+
+    registry_errors = metrics_registry.get("redis_command_errors_total")
+    before = registry_errors.get("set")
+
+    redis = InstrumentedRedis(FakeRedis())
+    assert redis.get("k") == "value"
+    try:
+        redis.set("k", "v")
+    except ConnectionError:
+        pass
+
+    assert registry_errors.get("set") == before + 1
+    assert metrics_registry.get("redis_command_duration_seconds")._series[("get",)].count >= 1
+
+    print("   ✅ Redis commands timed and failures counted")
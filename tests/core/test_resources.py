@@ -0,0 +1,98 @@
+"""
+Test Resource Container for Agent-Makalah Backend
+Checks lifespan warmup, readiness and graceful drain
+"""
+
+import sys
+import os
+import asyncio
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi.testclient import TestClient
+
+from src.core.resources import ResourceContainer, resources
+
+
+def test_warmup_report_records_failures():
+    """Test that failing or slow warmup steps are reported without aborting startup"""
+    print("\n🔥 Testing warmup steps...")
+
+    container = ResourceContainer(warmup_timeout=0.1)
+
+    async def ok():
+        return 3
+
+    async def failing():
+        raise ConnectionError("refused")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        return await asyncio.gather(
+            container._run_step("ok", ok),
+            container._run_step("failing", failing),
+            container._run_step("slow", slow)
+        )
+
+    ok_result, failed_result, slow_result = asyncio.run(scenario())
+    assert ok_result["status"] == "ok" and ok_result["details"] == 3
+    assert failed_result == {"status": "failed", "error": "refused", "duration_ms": failed_result["duration_ms"]}
+    assert slow_result["status"] == "timeout"
+    assert slow_result["duration_ms"] < 500
+
+    print("   ✅ Warmup failures recorded, startup continues")
+
+
+def test_drain_waits_for_in_flight_requests():
+    """Test that drain returns once in-flight requests finish, or times out"""
+    print("\n🚰 Testing graceful drain...")
+
+    container = ResourceContainer(drain_timeout=1.0)
+
+    async def scenario():
+        container.request_started()
+        asyncio.get_running_loop().call_later(0.05, container.request_finished)
+        drained = await container.drain()
+
+        container.request_started()
+        timed_out = await container.drain(timeout=0.05)
+        container.request_finished()
+        return drained, timed_out
+
+    drained, timed_out = asyncio.run(scenario())
+    assert drained is True
+    assert timed_out is False
+    assert container.draining and not container.ready
+
+    print("   ✅ Drain waits for in-flight work with a deadline")
+
+
+def test_lifespan_warms_up_before_ready():
+    """Test that the app is ready after lifespan startup and drains on shutdown"""
+    print("\n🚀 Testing lifespan startup...")
+
+    from src.main import app
+
+    with TestClient(app) as client:
+        assert resources.ready
+        assert resources.http_client is not None
+        assert {"route_policy", "dependencies", "password_hash"} <= set(resources.warmup_report)
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    assert not resources.ready
+    assert resources.draining
+    assert resources.http_client is None
+
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+
+    # Let later tests use the app without a lifespan
+    resources.draining = False
+
+    print("   ✅ Ready after warmup, draining after shutdown")
@@ -0,0 +1,67 @@
+"""
+Test Production Server Options for Agent-Makalah Backend
+Checks the gunicorn configuration built from settings
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.config import settings
+from src.server import (
+    AgentMakalahServer,
+    build_gunicorn_options,
+    get_worker_count,
+    prepare_multiprocess_environment
+)
+
+
+def test_gunicorn_options_from_settings():
+    """Test worker count, recycling and graceful timeout options"""
+    print("\n🏭 Testing production server options...")
+
+    assert get_worker_count(0) == (os.cpu_count() or 1)
+    assert get_worker_count(3) == 3
+
+    options = build_gunicorn_options(workers=4)
+    assert options["workers"] == 4
+    assert options["worker_class"] == "src.server.AgentMakalahWorker"
+    assert options["bind"] == f"{settings.api_host}:{settings.api_port}"
+    assert options["preload_app"] is settings.server_preload_app
+    assert options["max_requests"] == settings.server_max_requests
+    assert options["max_requests_jitter"] == settings.server_max_requests_jitter
+    assert options["graceful_timeout"] == settings.server_graceful_timeout
+
+    server = AgentMakalahServer(options)
+    assert server.cfg.workers == 4
+    assert server.cfg.max_requests_jitter == settings.server_max_requests_jitter
+    assert server.cfg.preload_app is settings.server_preload_app
+
+    print("   ✅ gunicorn configured from settings")
+
+
+def test_workers_refuse_in_memory_sessions(monkeypatch):
+    """Test that several workers never start with per-worker in-memory sessions"""
+    print("\n🧩 Testing session backend check for workers...")
+
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    monkeypatch.setattr(settings, "upstash_redis_url", None)
+    for backend in ("auto", "redis", "memory"):
+        monkeypatch.setattr(settings, "session_store_backend", backend)
+        with pytest.raises(RuntimeError):
+            prepare_multiprocess_environment(4)
+        prepare_multiprocess_environment(1)
+
+    monkeypatch.setattr(settings, "session_store_backend", "postgres")
+    prepare_multiprocess_environment(4)
+
+    monkeypatch.setattr(settings, "upstash_redis_url", "https://redis.example")
+    monkeypatch.setattr(settings, "upstash_redis_token", "token")
+    monkeypatch.setattr(settings, "session_store_backend", "auto")
+    prepare_multiprocess_environment(4)
+
+    print("   ✅ Memory sessions rejected with several workers")
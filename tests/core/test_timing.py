@@ -0,0 +1,102 @@
+"""
+Test Request Timing for Agent-Makalah Backend
+Checks the span recorder and the Server-Timing header
+"""
+
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.core.timing import (
+    RequestTimings,
+    span,
+    timed,
+    record_span,
+    get_request_timings,
+    start_request_timings,
+    end_request_timings
+)
+from src.middleware.server_timing import ServerTimingMiddleware
+
+
+def test_spans_are_noops_outside_requests():
+    """Test that span helpers do nothing without an active recorder"""
+    print("\n⏱️ Testing no-op spans outside requests...")
+
+    assert get_request_timings() is None
+    with span("db"):
+        pass
+    record_span("redis", 0.01)
+    assert get_request_timings() is None
+
+    print("   ✅ No recorder, no work")
+
+
+def test_phases_are_aggregated():
+    """Test that repeated phases are summed and counted"""
+    print("\n🧮 Testing phase aggregation...")
+
+    @timed("redis")
+    def fake_redis_get():
+        return "value"
+
+    token = start_request_timings()
+    try:
+        for _ in range(3):
+            fake_redis_get()
+        record_span("db", 0.004)
+        timings = get_request_timings()
+    finally:
+        end_request_timings(token)
+
+    breakdown = timings.to_dict()
+    assert breakdown["redis"]["count"] == 3
+    assert breakdown["db"] == {"ms": 4.0, "count": 1}
+
+    header = timings.to_header()
+    assert 'redis;dur=' in header and 'desc="3 calls"' in header
+    assert "db;dur=4.00" in header
+    assert "total;dur=" in header
+
+    print(f"   ✅ Header: {header}")
+
+
+def test_server_timing_header(monkeypatch):
+    """Test that superusers and metrics token holders get the Server-Timing breakdown, other callers do not"""
+    print("\n📨 Testing Server-Timing header...")
+
+    monkeypatch.setattr(settings, "metrics_auth_token", "internal-token")
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, emit_header=True)
+
+    @app.get("/api/v1/profile")
+    async def profile(request: Request):
+        # Stands in for AuthenticationMiddleware
+        request.state.current_user = {"is_superuser": request.headers.get("X-Test-Superuser") == "1"}
+        record_span("db", 0.002)
+        with span("jwt"):
+            pass
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert "Server-Timing" not in client.get("/api/v1/profile").headers
+    assert "Server-Timing" not in client.get("/api/v1/profile", headers={"X-Metrics-Token": "wrong"}).headers
+    assert "Server-Timing" in client.get("/api/v1/profile", headers={"X-Metrics-Token": "internal-token"}).headers
+
+    response = client.get("/api/v1/profile", headers={"X-Test-Superuser": "1"})
+    header = response.headers["Server-Timing"]
+    assert header.startswith("db;dur=2.00, jwt;dur=")
+    assert "total;dur=" in header
+
+    disabled = FastAPI()
+    disabled.add_middleware(ServerTimingMiddleware, emit_header=False)
+    disabled.get("/x")(lambda: {"ok": True})
+    assert "Server-Timing" not in TestClient(disabled).get("/x").headers
+
+    print("   ✅ Server-Timing emitted to privileged callers only, and configurable")
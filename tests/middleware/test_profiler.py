@@ -0,0 +1,94 @@
+"""
+Test Profiler Middleware for Agent-Makalah Backend
+Checks collapsed-stack output and admin-only header profiling
+"""
+
+import sys
+import os
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.config import settings
+from src.core.profiler import StackSampler
+from src.middleware.profiler import ProfilerMiddleware
+
+
+def slow_work():
+    time.sleep(0.08)
+
+
+def create_test_app(is_superuser: bool):
+    """Create app with the profiler outside a stub authentication middleware"""
+    app = FastAPI()
+
+    class StubAuthMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            request.state.current_user = {"user_id": "u1", "is_superuser": is_superuser}
+            return await call_next(request)
+
+    app.add_middleware(StubAuthMiddleware)
+    app.add_middleware(ProfilerMiddleware)
+
+    @app.get("/api/v1/slow")
+    async def slow():
+        slow_work()
+        return {"ok": True}
+
+    return app
+
+
+def test_sampler_collapsed_output():
+    """Test that the sampler folds stacks into collapsed lines"""
+    print("\n🔥 Testing stack sampler...")
+
+    sampler = StackSampler(interval=0.002).start()
+    slow_work()
+    sampler.stop()
+
+    output = sampler.to_collapsed()
+    assert sampler.sample_count > 0
+    assert "test_profiler.py:slow_work" in output
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in output.splitlines())
+
+    print(f"   ✅ {sampler.sample_count} samples collected")
+
+
+def test_header_profile_for_superuser(tmp_path, monkeypatch):
+    """Test that a superuser's header request writes a profile file"""
+    print("\n🛠️ Testing admin header profiling...")
+
+    monkeypatch.setattr(settings, "profiler_output_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "profiler_threshold_ms", 10)
+    monkeypatch.setattr(settings, "profiler_interval_ms", 2)
+
+    client = TestClient(create_test_app(is_superuser=True))
+    response = client.get("/api/v1/slow", headers={settings.profiler_header: "1"})
+    assert response.status_code == 200
+
+    profile_path = response.headers["X-Profile-File"]
+    with open(profile_path, encoding="utf-8") as profile_file:
+        assert "slow_work" in profile_file.read()
+
+    print("   ✅ Profile written for superuser")
+
+
+def test_header_ignored_for_regular_user(tmp_path, monkeypatch):
+    """Test that non-superusers cannot trigger profile output"""
+    print("\n🚫 Testing header from regular user...")
+
+    monkeypatch.setattr(settings, "profiler_output_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "profiler_threshold_ms", 10)
+
+    client = TestClient(create_test_app(is_superuser=False))
+    response = client.get("/api/v1/slow", headers={settings.profiler_header: "1"})
+    assert response.status_code == 200
+    assert "X-Profile-File" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+    print("   ✅ Profile discarded")
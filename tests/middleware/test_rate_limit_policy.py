@@ -0,0 +1,138 @@
+"""
+Test Rate Limit Policy Engine for Agent-Makalah Backend
+Checks policy merging, per-user budgets, client keying and hot reload
+"""
+
+import sys
+import os
+import json
+import time
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.middleware.rate_limiting import RateLimitingMiddleware
+from src.middleware.rate_limit_policy import (
+    RateLimitPolicyEngine,
+    KEY_IP,
+    KEY_USER,
+    KEY_IP_USER
+)
+
+
+def make_request(ip: str = "10.0.0.1", user_agent: str = "pytest"):
+    """Build a minimal request stand-in for key generation"""
+    request = Mock()
+    request.headers = {"X-Forwarded-For": ip, "User-Agent": user_agent}
+    request.client = None
+    return request
+
+
+def test_default_policies_and_user_overrides(tmp_path):
+    """Test file-based route and per-user policies"""
+    print("\n📜 Testing rate limit policy loading...")
+
+    policy_file = tmp_path / "rate_limits.json"
+    policy_file.write_text(json.dumps({
+        "policies": {"api_general": {"requests": 200}},
+        "users": {"heavy-user": {"api_general": {"requests": 1000, "window": 60}}}
+    }))
+
+    engine = RateLimitPolicyEngine(policy_file=str(policy_file), reload_interval=0)
+
+    assert engine.get_policy("auth_login")["requests"] == 5
+    assert engine.get_policy("api_general")["requests"] == 200
+    assert engine.get_policy("api_general")["window"] == 60
+    assert engine.get_policy("api_general", "heavy-user")["requests"] == 1000
+    assert engine.get_policy("api_general", "someone-else")["requests"] == 200
+    assert engine.get_policy("unknown_class") == engine.rate_limits["default"]
+
+    print("   ✅ Route and user policies merged")
+
+
+def test_hot_reload(tmp_path):
+    """Test that policy file changes are picked up without restart"""
+    print("\n🔄 Testing policy hot reload...")
+
+    policy_file = tmp_path / "rate_limits.json"
+    policy_file.write_text(json.dumps({"policies": {"docs": {"requests": 10}}}))
+
+    engine = RateLimitPolicyEngine(policy_file=str(policy_file), reload_interval=0)
+    assert engine.get_policy("docs")["requests"] == 10
+    assert not engine.maybe_reload()
+
+    policy_file.write_text(json.dumps({"policies": {"docs": {"requests": 20}}}))
+    later = time.time() + 5
+    os.utime(policy_file, (later, later))
+    assert engine.maybe_reload()
+    assert engine.get_policy("docs")["requests"] == 20
+
+    # A broken file keeps the previous policies
+    policy_file.write_text("{not json")
+    later += 5
+    os.utime(policy_file, (later, later))
+    assert not engine.maybe_reload()
+    assert engine.get_policy("docs")["requests"] == 20
+
+    print("   ✅ Policies reloaded on file change")
+
+
+def test_client_key_strategies():
+    """Test keying on IP, user and both"""
+    print("\n🔑 Testing client key strategies...")
+
+    engine = RateLimitPolicyEngine(policy_file="")
+
+    campus_a = make_request(ip="203.0.113.5")
+    campus_b = make_request(ip="203.0.113.5")
+
+    # Same NAT address, different users get separate budgets
+    assert engine.build_client_key(campus_a, KEY_USER, "user-a") != \
+        engine.build_client_key(campus_b, KEY_USER, "user-b")
+
+    # Anonymous requests fall back to the IP key
+    assert engine.build_client_key(campus_a, KEY_USER, None) == \
+        engine.build_client_key(campus_b, KEY_IP, None)
+
+    combined = engine.build_client_key(campus_a, KEY_IP_USER, "user-a")
+    assert combined.endswith(":user-a")
+
+    print("   ✅ Client keys separate authenticated users")
+
+
+def test_middleware_uses_user_budget():
+    """Test that authenticated users behind one IP don't throttle each other"""
+    print("\n🏫 Testing per-user budgets in middleware...")
+
+    class FakeAuthMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            user_id = request.headers.get("X-Test-User")
+            request.state.current_user = {"user_id": user_id} if user_id else None
+            return await call_next(request)
+
+    app = FastAPI()
+    app.add_middleware(RateLimitingMiddleware)
+    app.add_middleware(FakeAuthMiddleware)
+
+    @app.post("/api/v1/auth/refresh")
+    async def refresh():
+        return {"ok": True}
+
+    client = TestClient(app)
+
+    # auth_refresh allows 10 requests per window per user
+    for _ in range(10):
+        assert client.post("/api/v1/auth/refresh", headers={"X-Test-User": "a"}).status_code == 200
+    assert client.post("/api/v1/auth/refresh", headers={"X-Test-User": "a"}).status_code == 429
+
+    # Another user from the same address still has a budget
+    response = client.post("/api/v1/auth/refresh", headers={"X-Test-User": "b"})
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Type"] == "auth_refresh"
+
+    print("   ✅ Users behind one address have separate budgets")
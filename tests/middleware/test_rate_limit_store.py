@@ -0,0 +1,82 @@
+"""
+Test Rate Limit Stores for Agent-Makalah Backend
+Checks the in-memory sliding window and the Redis-shared counters
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.middleware.rate_limit_store import (
+    MemoryRateLimitStore,
+    RedisRateLimitStore,
+    BLACKLIST_THRESHOLD
+)
+
+
+def test_memory_store_sliding_window():
+    """Test that the in-memory store allows up to the limit per window"""
+    print("\n🪟 Testing in-memory rate limit store...")
+
+    store = MemoryRateLimitStore()
+
+    async def scenario():
+        return [await store.hit("client", "auth_login", 3, 60) for _ in range(4)]
+
+    results = asyncio.run(scenario())
+    assert results == [(True, 1), (True, 2), (True, 3), (False, 3)]
+
+    store.request_history["client"]["auth_login"][0] = time.time() - 7200
+    store.cleanup()
+    assert len(store.request_history["client"]["auth_login"]) == 2
+
+    print("   ✅ Sliding window enforced and cleaned")
+
+
+def test_redis_store_shared_between_workers(fake_redis):
+    """Test that two workers sharing Redis share one budget"""
+    print("\n🔗 Testing shared Redis rate limit store...")
+
+    redis = fake_redis
+    worker_a = RedisRateLimitStore(redis)
+    worker_b = RedisRateLimitStore(redis)
+
+    async def scenario():
+        results = []
+        for store in (worker_a, worker_b, worker_a, worker_b):
+            results.append((await store.hit("client", "auth_login", 3, 60))[0])
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, True, False]
+
+    print("   ✅ Limit holds across workers")
+
+
+def test_redis_store_blacklists_and_falls_back(fake_redis):
+    """Test shared blacklisting and the in-memory fallback when Redis fails"""
+    print("\n🚫 Testing shared blacklist and fallback...")
+
+    redis = fake_redis
+    store = RedisRateLimitStore(redis)
+    other_worker = RedisRateLimitStore(redis)
+
+    async def blacklist():
+        blacklisted = False
+        for _ in range(BLACKLIST_THRESHOLD + 1):
+            blacklisted = await store.record_violation("client")
+        return blacklisted, await other_worker.hit("client", "api_general", 100, 60)
+
+    blacklisted, (allowed, _) = asyncio.run(blacklist())
+    assert blacklisted is True
+    assert allowed is False
+
+    redis.fail = True
+    broken = RedisRateLimitStore(redis)
+    assert asyncio.run(broken.hit("client", "api_general", 1, 60)) == (True, 1)
+    assert asyncio.run(broken.hit("client", "api_general", 1, 60)) == (False, 1)
+
+    print("   ✅ Blacklist shared, in-memory fallback on Redis errors")
@@ -0,0 +1,106 @@
+"""
+Test Request Logging Fast Path for Agent-Makalah Backend
+Checks that log records are only built when a logger will emit them
+"""
+
+import sys
+import os
+import logging
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from src.middleware.request_logging import RequestLoggingMiddleware
+
+
+def create_test_app():
+    """Create test FastAPI app with only the request logging middleware"""
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, log_body=False)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/v1/broken")
+    async def broken():
+        return JSONResponse(status_code=503, content={"error": "unavailable"})
+
+    return app
+
+
+
+def set_levels(level: int):
+    """Set root, security and performance logger levels"""
+    previous = {}
+    for name in ("", "agent_makalah.security", "agent_makalah.performance"):
+        logger = logging.getLogger(name)
+        previous[name] = logger.level
+        logger.setLevel(level)
+    return previous
+
+
+def restore_levels(previous: dict):
+    for name, level in previous.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def test_fast_path_skips_record_building():
+    """Test that disabled loggers never build request records"""
+    print("\n⚡ Testing lazy logging fast path...")
+
+    client = TestClient(create_test_app())
+    previous = set_levels(logging.WARNING)
+    try:
+        with patch.object(
+            RequestLoggingMiddleware, "_extract_request_info", autospec=True
+        ) as mock_extract:
+            response = client.get("/health")
+            assert response.status_code == 200
+            assert len(response.headers["X-Request-ID"]) == 16
+            mock_extract.assert_not_called()
+    finally:
+        restore_levels(previous)
+
+    print("   ✅ No record built for unlogged request")
+
+
+def test_errors_still_logged():
+    """Test that server errors build and emit records on the fast path"""
+    print("\n🚨 Testing error logging on fast path...")
+
+    client = TestClient(create_test_app())
+    previous = set_levels(logging.WARNING)
+    try:
+        with patch("src.middleware.request_logging.logging.error") as mock_error:
+            response = client.get("/api/v1/broken")
+            assert response.status_code == 503
+            mock_error.assert_called_once()
+    finally:
+        restore_levels(previous)
+
+    print("   ✅ Server errors logged")
+
+
+def test_debug_level_builds_records():
+    """Test that enabled loggers still receive full records"""
+    print("\n🔍 Testing full records at debug level...")
+
+    client = TestClient(create_test_app())
+    previous = set_levels(logging.DEBUG)
+    try:
+        with patch("src.middleware.request_logging.logging.debug") as mock_debug:
+            client.get("/health")
+            mock_debug.assert_called_once()
+            request_info = mock_debug.call_args.kwargs["extra"]["request_info"]
+            assert request_info["path"] == "/health"
+            assert request_info["log_category"] == "general"
+    finally:
+        restore_levels(previous)
+
+    print("   ✅ Full records built when logger enabled")
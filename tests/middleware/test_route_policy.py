@@ -0,0 +1,157 @@
+"""
+Test Route Policy Table for Agent-Makalah Backend
+Checks that the compiled table classifies paths exactly like the middleware rules
+"""
+
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.route_policy import (
+    RoutePolicyTable,
+    UNMATCHED_ROUTE,
+    AUTH_PUBLIC,
+    AUTH_OPTIONAL,
+    AUTH_REQUIRED,
+    LOG_SECURITY,
+    LOG_PERFORMANCE,
+    LOG_GENERAL,
+    route_policy_table
+)
+from src.middleware.rate_limiting import RateLimitingMiddleware
+from src.middleware.auth_middleware import AuthenticationMiddleware
+
+
+def create_test_app():
+    """Create test FastAPI app with static and templated routes"""
+    app = FastAPI(title="Route Policy Test API")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return {"message": "Login endpoint"}
+
+    @app.get("/api/v1/admin/users/{user_id}")
+    async def admin_user(user_id: str):
+        return {"user_id": user_id}
+
+    @app.post("/api/v1/upload/{kind}")
+    async def upload(kind: str):
+        return {"kind": kind}
+
+    return app
+
+
+def test_classification_rules():
+    """Test policy records for representative paths"""
+    print("\n🗺️ Testing route policy classification...")
+
+    table = RoutePolicyTable()
+
+    policy = table.lookup("/health")
+    assert policy.auth == AUTH_PUBLIC
+    assert policy.rate_class == "default"
+    assert policy.log_category == LOG_GENERAL
+
+    policy = table.lookup("/api/v1/auth/login")
+    assert policy.auth == AUTH_PUBLIC
+    assert policy.rate_class == "auth_login"
+    assert policy.log_category == LOG_SECURITY
+    assert policy.sensitive
+
+    policy = table.lookup("/api/v1/auth/profile")
+    assert policy.requires_authentication
+    assert policy.rate_class == "auth_general"
+
+    policy = table.lookup("/api/v1/admin/users")
+    assert policy.superuser
+    assert policy.auth == AUTH_REQUIRED
+
+    policy = table.lookup("/api/v1/public/papers")
+    assert policy.auth == AUTH_OPTIONAL
+
+    policy = table.lookup("/api/v1/upload/pdf")
+    assert policy.rate_class == "api_upload"
+    assert policy.log_category == LOG_PERFORMANCE
+
+    assert table.lookup("/docs").rate_class == "docs"
+    assert table.lookup("/static/logo.png").is_public
+
+    print("   ✅ Policies match middleware rules")
+
+
+def test_compiled_routes_and_cache():
+    """Test compiling from app routes and caching templated paths"""
+    print("\n📦 Testing compiled route table...")
+
+    app = create_test_app()
+    table = RoutePolicyTable(max_cache_size=2)
+    compiled = table.compile(app.routes)
+    assert compiled > 0
+
+    # Static routes resolve without touching the cache
+    assert table.lookup("/health").route == "/health"
+    assert table.get_stats()["misses"] == 0
+
+    # Templated routes resolve to their template and are cached
+    policy = table.lookup("/api/v1/admin/users/abc")
+    assert policy.route == "/api/v1/admin/users/{user_id}"
+    assert policy.superuser
+    assert table.lookup("/api/v1/admin/users/abc") is policy
+    assert table.get_stats()["misses"] == 1
+
+    # Unknown paths are labelled as unmatched
+    assert table.lookup("/nope").route == UNMATCHED_ROUTE
+
+    # Cache stays bounded
+    table.lookup("/api/v1/upload/a")
+    table.lookup("/api/v1/upload/b")
+    assert table.get_stats()["cached_paths"] <= 2
+
+    print("   ✅ Compiled table and bounded cache working")
+
+
+def test_middleware_helpers_use_table():
+    """Test that middleware helper methods delegate to the shared table"""
+    print("\n🔗 Testing middleware helpers...")
+
+    app = create_test_app()
+    rate_limiter = RateLimitingMiddleware(app)
+    auth = AuthenticationMiddleware(app)
+
+    assert rate_limiter._get_endpoint_type("/api/v1/auth/register") == "auth_register"
+    assert rate_limiter._get_endpoint_type("/api/v1/agents") == "api_general"
+    assert auth._is_public_endpoint("/api/v1/auth/login")
+    assert auth._requires_authentication("/api/v1/agents")
+    assert not auth._requires_authentication("/api/v1/public/x")
+    assert auth._requires_superuser("/api/v1/manage/settings")
+    assert route_policy_table.lookup("/api/v1/agents").rate_class == "api_general"
+
+    print("   ✅ Middleware helpers consistent with route policy table")
+
+
+def test_request_state_policy():
+    """Test that the policy is looked up once and shared on request.state"""
+    print("\n🧭 Testing request-scoped policy sharing...")
+
+    app = FastAPI()
+    app.add_middleware(RateLimitingMiddleware)
+
+    @app.get("/api/v1/echo")
+    async def echo():
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.get("/api/v1/echo")
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Type"] == "api_general"
+
+    print("   ✅ Policy shared through request state")
@@ -26,6 +26,7 @@ from src.middleware.request_logging import RequestLoggingMiddleware
 # Import auth utilities for testing
 from src.auth.jwt_utils import create_access_token
 from src.core.config import settings
+from src.crud.crud_user import user_crud
 
 def create_test_app():
     """Create test FastAPI app with security middleware"""
@@ -176,20 +177,15 @@ def test_authentication_middleware():
     test_token = create_access_token(token_data)
     
     # Mock user lookup for auth middleware
-    with patch('src.middleware.auth_middleware.UserCRUD') as mock_user_crud:
-        # Mock user object
-        mock_user = Mock()
-        mock_user.id = "test-user-id"
-        mock_user.email = "test@agent-makalah.com"
-        mock_user.is_active = True
-        mock_user.is_superuser = False
-        mock_user.created_at = datetime.utcnow()
-        
-        # Setup mock
-        mock_instance = Mock()
-        mock_instance.get_user_by_id = AsyncMock(return_value=mock_user)
-        mock_user_crud.return_value = mock_instance
-        
+    mock_user = Mock()
+    mock_user.id = "test-user-id"
+    mock_user.email = "test@agent-makalah.com"
+    mock_user.is_active = True
+    mock_user.is_superuser = False
+    mock_user.created_at = datetime.utcnow()
+    
+    # The middleware uses the shared user_crud singleton
+    with patch.object(user_crud, 'get_user_by_id', AsyncMock(return_value=mock_user)):
         # Test protected endpoint with auth
         headers = {"Authorization": f"Bearer {test_token}"}
         response = client.get("/api/v1/protected", headers=headers)
@@ -227,7 +223,7 @@ def test_request_logging_middleware():
         # Check request ID header
         assert "X-Request-ID" in response.headers
         request_id = response.headers["X-Request-ID"]
-        assert len(request_id) == 8  # Should be 8 character UUID
+        assert len(request_id) == 16  # 64-bit hex ID
         print(f"   ✅ Request ID generated: {request_id}")
         
         # Test security endpoint